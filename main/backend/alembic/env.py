@@ -17,6 +17,7 @@ sys.path.insert(0, str(src_dir))
 
 # 导入模型
 from base.pg.entity import SQLModel
+from base.pg.vector_index import is_vector_index_name
 from pgvector.sqlalchemy import Vector
 
 # 设置目标metadata
@@ -46,6 +47,13 @@ if config.config_file_name is not None:
 # ... etc.
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """autogenerate 时忽略数据库中按模型创建的向量索引 (不在实体中声明，由迁移/ensure_embedding_index 维护)"""
+    if type_ == "index" and reflected and compare_to is None and is_vector_index_name(name):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -62,6 +70,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -88,7 +97,7 @@ def run_migrations_online() -> None:
         # connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
 
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,36 @@
+"""add_job_idempotency_unique
+
+Revision ID: 3f9a1c2d7b6e
+Revises: 07d35bff1e8f
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b6e'
+down_revision: Union[str, Sequence[str], None] = '07d35bff1e8f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 同一用户的幂等键唯一，作业编排依赖 ON CONFLICT (user_id, idempotency_key) 去重
+    op.create_index(
+        'uq_jobs_user_idempotency_key',
+        'jobs',
+        ['user_id', 'idempotency_key'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_jobs_user_idempotency_key', table_name='jobs')
@@ -0,0 +1,60 @@
+"""add_paper_chunk_vector_index
+
+Revision ID: a4c7e9b2d1f0
+Revises: 3f9a1c2d7b6e
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector
+
+from base.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7e9b2d1f0'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c2d7b6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_paper_chunks_embedding_ann'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 语义检索按 cosine_distance 排序，使用 vector_cosine_ops 的近似最近邻索引替代全表扫描。
+    # 构建参数取自配置 (VECTOR_INDEX_METHOD / VECTOR_INDEX_HNSW_M 等)，修改后需删除索引重新执行迁移。
+    if settings.vector_index_method == 'ivfflat':
+        options = {'lists': settings.vector_index_ivfflat_lists}
+    else:
+        options = {
+            'm': settings.vector_index_hnsw_m,
+            'ef_construction': settings.vector_index_hnsw_ef_construction,
+        }
+    # CONCURRENTLY 不能在事务中执行，建索引期间不阻塞文本块写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            'paper_chunks',
+            ['embedding'],
+            postgresql_using=settings.vector_index_method,
+            postgresql_with=options,
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name='paper_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
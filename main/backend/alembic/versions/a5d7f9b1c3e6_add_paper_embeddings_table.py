@@ -0,0 +1,54 @@
+"""add_paper_embeddings_table
+
+Revision ID: a5d7f9b1c3e6
+Revises: f4c6e8a0b2d5
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector
+
+from base.embedding.registry import active_embedding_model
+from base.pg.vector_index import paper_embedding_index_ddl, paper_embedding_index_name
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d7f9b1c3e6'
+down_revision: Union[str, Sequence[str], None] = 'f4c6e8a0b2d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'paper_embeddings',
+        sa.Column('paper_id', sa.UUID(), nullable=False, comment='论文ID'),
+        sa.Column('model', sqlmodel.sql.sqltypes.AutoString(), nullable=False, comment='生成向量的模型'),
+        sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(), nullable=False, comment='论文向量(文本块向量均值，维度随模型)'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, comment='更新时间'),
+        sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('paper_id', 'model'),
+        comment='论文向量表: 按模型存储论文级向量(文本块向量均值)',
+    )
+    # 已有论文按各模型的文本块向量求均值 (halfvec 存储时均值为 halfvec，转换为 vector)
+    op.execute(
+        "INSERT INTO paper_embeddings (paper_id, model, embedding, updated_at) "
+        "SELECT pc.paper_id, ce.model, avg(ce.embedding)::vector, now() "
+        "FROM chunk_embeddings ce JOIN paper_chunks pc ON pc.id = ce.chunk_id "
+        "GROUP BY pc.paper_id, ce.model"
+    )
+    # 当前模型的论文向量索引；其他模型 (回填中或新增) 的索引由 ensure_embedding_index 一并创建
+    with op.get_context().autocommit_block():
+        op.execute(paper_embedding_index_ddl(active_embedding_model()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {paper_embedding_index_name(active_embedding_model())}")
+    op.drop_table('paper_embeddings')
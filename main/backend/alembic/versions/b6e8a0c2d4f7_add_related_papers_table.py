@@ -0,0 +1,40 @@
+"""add_related_papers_table
+
+Revision ID: b6e8a0c2d4f7
+Revises: a5d7f9b1c3e6
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e8a0c2d4f7'
+down_revision: Union[str, Sequence[str], None] = 'a5d7f9b1c3e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 列表由 Worker 维护，已有论文执行 related_papers.py --rebuild 填充
+    op.create_table(
+        'related_papers',
+        sa.Column('paper_id', sa.UUID(), nullable=False, comment='论文ID'),
+        sa.Column('related_paper_id', sa.UUID(), nullable=False, comment='相关论文ID'),
+        sa.Column('score', sa.REAL(), nullable=False, comment='相似度(论文向量的余弦相似度)'),
+        sa.ForeignKeyConstraint(['paper_id'], ['papers.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['related_paper_id'], ['papers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('paper_id', 'related_paper_id'),
+        comment='相关论文表: 每篇论文在用户论文库中论文向量最相近的K篇论文',
+    )
+    op.create_index(op.f('ix_related_papers_related_paper_id'), 'related_papers', ['related_paper_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_related_papers_related_paper_id'), table_name='related_papers')
+    op.drop_table('related_papers')
@@ -0,0 +1,65 @@
+"""add_full_text_search_columns
+
+Revision ID: b7d2e4f6a8c1
+Revises: a4c7e9b2d1f0
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector
+from sqlalchemy.dialects import postgresql
+
+from base.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f6a8c1'
+down_revision: Union[str, Sequence[str], None] = 'a4c7e9b2d1f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 全文检索生成列 (STORED): 写入时由数据库维护，检索配置取自 TEXT_SEARCH_CONFIG，修改配置需重建列
+    # 标题权重 A、摘要权重 B，ts_rank_cd 排序时标题命中优先
+    config = settings.text_search_config
+    op.add_column('papers', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            f"setweight(to_tsvector('{config}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{config}', coalesce(abstract, '')), 'B')",
+            persisted=True,
+        ),
+        comment='标题/摘要全文检索向量(生成列)',
+    ))
+    op.add_column('paper_chunks', sa.Column(
+        'content_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed(f"to_tsvector('{config}', coalesce(content, ''))", persisted=True),
+        comment='切片内容全文检索向量(生成列)',
+    ))
+    # CONCURRENTLY 不能在事务中执行，建索引期间不阻塞写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_papers_search_vector', 'papers', ['search_vector'],
+            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_paper_chunks_content_tsv', 'paper_chunks', ['content_tsv'],
+            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_paper_chunks_content_tsv', table_name='paper_chunks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_papers_search_vector', table_name='papers', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('paper_chunks', 'content_tsv')
+    op.drop_column('papers', 'search_vector')
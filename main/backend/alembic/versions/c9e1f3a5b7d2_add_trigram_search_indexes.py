@@ -0,0 +1,56 @@
+"""add_trigram_search_indexes
+
+Revision ID: c9e1f3a5b7d2
+Revises: b7d2e4f6a8c1
+Create Date: 2026-10-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1f3a5b7d2'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e4f6a8c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # 作者列表(JSON)规范化为小写纯文本，供三元组索引模糊匹配: ["A B", "C"] -> a b, c
+    # 先转 jsonb 再输出，JSON 中转义的 \uXXXX (中文作者名) 还原为原字符
+    op.add_column('papers', sa.Column(
+        'authors_text',
+        sa.Text(),
+        sa.Computed(
+            "lower(translate(coalesce(authors::jsonb, '[]'::jsonb)::text, '[]\"', ''))",
+            persisted=True,
+        ),
+        comment='作者列表规范化文本(生成列，用于模糊检索)',
+    ))
+    # CONCURRENTLY 不能在事务中执行，建索引期间不阻塞写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_papers_title_trgm', 'papers', ['title'],
+            postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_papers_authors_text_trgm', 'papers', ['authors_text'],
+            postgresql_using='gin', postgresql_ops={'authors_text': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_papers_authors_text_trgm', table_name='papers', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_papers_title_trgm', table_name='papers', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('papers', 'authors_text')
@@ -0,0 +1,44 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: d2f4a6c8e0b1
+Revises: c9e1f3a5b7d2
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f4a6c8e0b1'
+down_revision: Union[str, Sequence[str], None] = 'c9e1f3a5b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 列表查询的 (过滤列, 排序时间, ID) 复合索引，与 base.pg.pagination.paginate 的排序一致:
+# 等值过滤后按索引顺序倒序扫描，游标条件 (sort, id) < (...) 直接定位起点，无需排序与跳过 OFFSET 行
+INDEXES = [
+    ('ix_papers_user_created_id', 'papers', ['user_id', 'created_at', 'id']),
+    ('ix_collections_user_updated_id', 'collections', ['user_id', 'updated_at', 'id']),
+    ('ix_collection_papers_collection_created_paper', 'collection_papers', ['collection_id', 'created_at', 'paper_id']),
+    ('ix_search_histories_user_created_id', 'search_histories', ['user_id', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY 不能在事务中执行，建索引期间不阻塞写入
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
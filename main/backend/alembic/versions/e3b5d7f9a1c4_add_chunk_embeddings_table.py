@@ -0,0 +1,83 @@
+"""add_chunk_embeddings_table
+
+Revision ID: e3b5d7f9a1c4
+Revises: d2f4a6c8e0b1
+Create Date: 2026-10-20 06:00:00.000000
+
+"""
+import logging
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector
+
+from base.embedding.registry import active_embedding_model
+from base.pg.vector_index import embedding_index_ddl, embedding_index_name
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b5d7f9a1c4'
+down_revision: Union[str, Sequence[str], None] = 'd2f4a6c8e0b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _indexed_models() -> List[str]:
+    """需要向量索引的模型: 迁入的历史向量所属的模型 (见 f4c6e8a0b2d5，检索模型登记为其中之一) 与当前模型"""
+    present = op.get_bind().execute(sa.text("SELECT DISTINCT model FROM chunk_embeddings")).scalars().all()
+    return sorted(set(present) | {active_embedding_model()})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'chunk_embeddings',
+        sa.Column('chunk_id', sa.UUID(), nullable=False, comment='文本块ID'),
+        sa.Column('model', sqlmodel.sql.sqltypes.AutoString(), nullable=False, comment='生成向量的模型'),
+        sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(), nullable=False, comment='向量Embedding(维度随模型)'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, comment='创建时间'),
+        sa.ForeignKeyConstraint(['chunk_id'], ['paper_chunks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('chunk_id', 'model'),
+        comment='文本块向量表: 按模型存储文本块的向量Embedding',
+    )
+    # 历史向量按记录的模型 (旧版本未写入时为默认值) 迁入，跳过向量化失败时填充的零向量；paper_chunks.embedding 保留不删除
+    op.execute(
+        "INSERT INTO chunk_embeddings (chunk_id, model, embedding, created_at) "
+        "SELECT id, embedding_model, embedding, now() FROM paper_chunks "
+        "WHERE embedding IS NOT NULL AND vector_norm(embedding) > 0"
+    )
+    op.alter_column(
+        'paper_chunks', 'embedding',
+        comment='历史向量Embedding(1536维)，新向量见chunk_embeddings',
+        existing_type=pgvector.sqlalchemy.vector.VECTOR(dim=1536),
+        existing_nullable=True,
+    )
+    # 已有向量的模型与当前模型的向量索引；之后切换模型只需为新模型建索引 (base.pg.vector_index.ensure_embedding_index)
+    models = _indexed_models()
+    with op.get_context().autocommit_block():
+        for model in models:
+            try:
+                ddl = embedding_index_ddl(model)
+            except ValueError as e:
+                logger.warning(f"跳过向量索引: {e} (在 EMBEDDING_DIMENSIONS 中配置后执行 python embedding_index.py --model {model})")
+                continue
+            op.execute(ddl)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    models = _indexed_models()
+    with op.get_context().autocommit_block():
+        for model in models:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {embedding_index_name(model)}")
+    op.alter_column(
+        'paper_chunks', 'embedding',
+        comment='向量Embedding(默认1536维)',
+        existing_type=pgvector.sqlalchemy.vector.VECTOR(dim=1536),
+        existing_nullable=True,
+    )
+    op.drop_table('chunk_embeddings')
@@ -0,0 +1,71 @@
+"""add_embedding_models_table
+
+Revision ID: f4c6e8a0b2d5
+Revises: e3b5d7f9a1c4
+Create Date: 2026-10-20 07:00:00.000000
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from base.embedding.registry import active_embedding_model
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c6e8a0b2d5'
+down_revision: Union[str, Sequence[str], None] = 'e3b5d7f9a1c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    embedding_models = op.create_table(
+        'embedding_models',
+        sa.Column('model', sqlmodel.sql.sqltypes.AutoString(), nullable=False, comment='模型名'),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False, comment='状态(backfilling/serving/retired)'),
+        sa.Column('cursor', sa.UUID(), nullable=True, comment='回填游标: 已处理到的文本块ID'),
+        sa.Column('embedded', sa.Integer(), nullable=False, comment='本模型已回填的文本块数'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, comment='更新时间'),
+        sa.Column('switched_at', sa.DateTime(), nullable=True, comment='切换为检索模型的时间'),
+        sa.PrimaryKeyConstraint('model'),
+        comment='向量化模型表: 各模型的向量回填进度与检索使用的模型',
+    )
+    # 检索模型登记为实际已有向量的模型: 历史向量按 paper_chunks.embedding_model 记录的模型迁入
+    # (旧版本未写入该列，多为默认值 text-embedding-3-small)，未必是当前配置的模型；
+    # 直接登记当前模型时检索模型没有任何向量，所有论文库都会从语义搜索中消失。
+    bind = op.get_bind()
+    serving = bind.execute(sa.text(
+        "SELECT model FROM chunk_embeddings GROUP BY model ORDER BY count(*) DESC LIMIT 1"
+    )).scalar() or active_embedding_model()
+    models = [(serving, 'serving')]
+    if serving != active_embedding_model():
+        # 当前模型登记为回填中，由 reembed.py 投递回填任务，覆盖率 100% 后自动切换
+        models.append((active_embedding_model(), 'backfilling'))
+        logger.warning(
+            f"检索模型登记为已有向量的 {serving}；当前模型 {active_embedding_model()} 需回填向量: "
+            f"python reembed.py --model {active_embedding_model()}"
+        )
+    for model, status in models:
+        op.execute(
+            embedding_models.insert().values(
+                model=model,
+                status=status,
+                embedded=0,
+                created_at=sa.func.now(),
+                updated_at=sa.func.now(),
+                switched_at=sa.func.now() if status == 'serving' else None,
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('embedding_models')
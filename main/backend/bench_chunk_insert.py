@@ -0,0 +1,96 @@
+"""
+文本块写入基准测试 (paper_chunks)
+
+对比二进制 COPY、批量多行 INSERT 与 ORM add_all 三种写入方式的吞吐。
+每种方式在独立事务中写入后回滚，不会在数据库中留下数据。
+
+用法:
+    python bench_chunk_insert.py
+    python bench_chunk_insert.py --rows 100000 --methods copy,insert
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from uuid import uuid4
+
+# 与 alembic/env.py 一致: 将 src 加入 python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from base.pg.bulk import bulk_insert  # noqa: E402
+from base.pg.entity import Paper, PaperChunk, User  # noqa: E402
+from base.pg.service import async_session_factory, engine  # noqa: E402
+
+METHODS = ("copy", "insert", "orm")
+# 复用少量随机向量，避免生成 rows*dim 个浮点数占满内存
+VECTOR_POOL_SIZE = 1000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="paper_chunks 写入基准测试")
+    parser.add_argument("--rows", type=int, default=100_000, help="写入的文本块数(默认100000)")
+    parser.add_argument("--dim", type=int, default=1536, help="向量维度(需与表定义一致)")
+    parser.add_argument("--methods", default=",".join(METHODS), help=f"逗号分隔: {','.join(METHODS)}")
+    parser.add_argument("--batch-size", type=int, default=None, help="批量INSERT每批行数(默认取配置)")
+    return parser.parse_args()
+
+
+def build_chunks(paper_id, rows: int, dim: int) -> list[PaperChunk]:
+    vectors = [[random.uniform(-1, 1) for _ in range(dim)] for _ in range(min(rows, VECTOR_POOL_SIZE))]
+    return [
+        PaperChunk(
+            paper_id=paper_id,
+            content=f"benchmark chunk {i} " * 20,
+            page_number=i // 20 + 1,
+            chunk_index=i,
+            embedding=vectors[i % len(vectors)],
+            embedding_dim=dim,
+        )
+        for i in range(rows)
+    ]
+
+
+async def run_method(method: str, args: argparse.Namespace) -> float:
+    async with async_session_factory() as session:
+        user = User(email=f"bench-{uuid4()}@example.com", hashed_password="-")
+        paper = Paper(user_id=user.id, title="chunk insert benchmark", authors=[], file_key=f"bench/{uuid4()}")
+        session.add_all([user, paper])
+        await session.flush()
+        chunks = build_chunks(paper.id, args.rows, args.dim)
+
+        started = time.perf_counter()
+        if method == "orm":
+            session.add_all(chunks)
+            await session.flush()
+        else:
+            await bulk_insert(session, chunks, batch_size=args.batch_size, use_copy=method == "copy")
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    return elapsed
+
+
+async def run(args: argparse.Namespace) -> int:
+    methods = [m.strip() for m in args.methods.split(",") if m.strip()]
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        raise SystemExit(f"未知写入方式: {', '.join(sorted(unknown))}")
+
+    print(f"写入 {args.rows} 个文本块 (向量维度 {args.dim})")
+    try:
+        for method in methods:
+            elapsed = await run_method(method, args)
+            print(f"  {method:<7} {elapsed:8.2f}s  {args.rows / elapsed:10.0f} 行/秒")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main():
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
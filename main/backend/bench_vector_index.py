@@ -0,0 +1,208 @@
+"""
+向量索引召回率/延迟基准测试
+
+在临时表中生成合成文本块向量 (围绕若干簇中心分布，近似真实语料的聚集特性)，
+先以顺序扫描求精确 Top-K 作为基准，再建立 HNSW / IVFFlat 索引，
+按不同 ef_search / probes 取值测量 recall@K 与查询延迟 (p50/p95)。
+--quantization 时改为比较存储/量化方式 (均为 HNSW): vector 全精度、halfvec 表达式索引、
+二值量化索引预筛选 (取 K × oversample 个候选) 后按全精度重排，报告索引大小、建索引耗时、recall@K 与延迟。
+临时表随连接关闭自动删除，不影响业务数据。
+
+用法:
+    python bench_vector_index.py
+    python bench_vector_index.py --rows 200000 --method hnsw --m 16 --ef-construction 64 --ef-search 20,40,80,160
+    python bench_vector_index.py --method ivfflat --lists 200 --probes 1,5,10,20
+    python bench_vector_index.py --quantization --oversample 2,4,8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# 与 alembic/env.py 一致: 将 src 加入 python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from sqlalchemy import text  # noqa: E402
+
+from base.config import settings  # noqa: E402
+from base.pg.service import engine  # noqa: E402
+
+TABLE = "bench_chunk_vectors"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="向量索引召回率/延迟基准测试")
+    parser.add_argument("--rows", type=int, default=100_000, help="合成文本块数(默认100000)")
+    parser.add_argument("--dim", type=int, default=1536, help="向量维度")
+    parser.add_argument("--clusters", type=int, default=200, help="合成数据的簇数")
+    parser.add_argument("--queries", type=int, default=100, help="查询次数")
+    parser.add_argument("--k", type=int, default=10, help="每次查询返回条数")
+    parser.add_argument("--method", choices=("hnsw", "ivfflat"), default=settings.vector_index_method)
+    parser.add_argument("--m", type=int, default=settings.vector_index_hnsw_m)
+    parser.add_argument("--ef-construction", type=int, default=settings.vector_index_hnsw_ef_construction)
+    parser.add_argument("--lists", type=int, default=settings.vector_index_ivfflat_lists)
+    parser.add_argument("--ef-search", default="10,20,40,80,160", help="逗号分隔的 hnsw.ef_search 取值")
+    parser.add_argument("--probes", default="1,5,10,20,50", help="逗号分隔的 ivfflat.probes 取值")
+    parser.add_argument("--quantization", action="store_true", help="比较 vector / halfvec / 二值量化+重排")
+    parser.add_argument("--oversample", default="2,4,8", help="逗号分隔的二值预筛选候选倍数")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def vector_literal(values) -> str:
+    return "[" + ",".join(f"{v:.6f}" for v in values) + "]"
+
+
+def perturb(center, scale: float):
+    return [c + random.gauss(0, scale) for c in center]
+
+
+async def load_corpus(conn, args: argparse.Namespace, centers) -> None:
+    await conn.execute(text(f"CREATE TEMP TABLE {TABLE} (id bigserial PRIMARY KEY, embedding vector({args.dim}))"))
+    raw = await conn.get_raw_connection()
+    driver_conn = raw.driver_connection
+    batch = []
+    for i in range(args.rows):
+        batch.append((vector_literal(perturb(random.choice(centers), 0.3)),))
+        if len(batch) == 2000 or i == args.rows - 1:
+            await driver_conn.executemany(f"INSERT INTO {TABLE} (embedding) VALUES ($1::text::vector)", batch)
+            batch = []
+    await conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+TOP_K_SQL = f"SELECT id FROM {TABLE} ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"
+
+
+async def top_k(conn, query: str, k: int, sql: str = TOP_K_SQL, **params) -> tuple[list[int], float]:
+    started = time.perf_counter()
+    result = await conn.execute(text(sql), {"q": query, "k": k, **params})
+    ids = [row[0] for row in result.all()]
+    return ids, (time.perf_counter() - started) * 1000
+
+
+def report(label: str, recalls: list[float], latencies: list[float]) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"  {label:<18} recall@K {statistics.mean(recalls):6.3f}   "
+          f"p50 {statistics.median(latencies):8.2f}ms   p95 {p95:8.2f}ms")
+
+
+async def measure(conn, queries, exact, k: int, label: str, sql: str = TOP_K_SQL, **params) -> None:
+    recalls, latencies = [], []
+    for query, expected in zip(queries, exact):
+        ids, elapsed = await top_k(conn, query, k, sql, **params)
+        recalls.append(len(expected & set(ids)) / len(expected))
+        latencies.append(elapsed)
+    report(label, recalls, latencies)
+
+
+async def build_index(conn, name: str, expression: str, args: argparse.Namespace) -> None:
+    """建立 HNSW 索引并输出耗时与大小"""
+    started = time.perf_counter()
+    await conn.execute(text(
+        f"CREATE INDEX {name} ON {TABLE} USING hnsw ({expression}) "
+        f"WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+    ))
+    await conn.execute(text(f"ANALYZE {TABLE}"))
+    elapsed = time.perf_counter() - started
+    size = (await conn.execute(text(f"SELECT pg_size_pretty(pg_relation_size('{name}'))"))).scalar_one()
+    print(f"{name}: 建索引 {elapsed:.1f}s, 大小 {size}")
+
+
+async def compare_quantization(conn, args: argparse.Namespace, queries, exact) -> None:
+    """
+    vector / halfvec / 二值量化 + 重排 的对比
+
+    每种方式单独建索引并在测量后删除，保证查询只能走当前索引。
+    理论上每条向量: vector 4d+8 字节, halfvec 2d+8 字节, bit d/8+8 字节。
+    """
+    dim = args.dim
+    ef_search = max(int(v) for v in args.ef_search.split(",") if v.strip())
+    heap = (await conn.execute(text(f"SELECT pg_size_pretty(pg_relation_size('{TABLE}'))"))).scalar_one()
+    print(f"表 (vector 存储): {heap}; 理论每条: vector {4 * dim + 8}B, halfvec {2 * dim + 8}B, bit {dim // 8 + 8}B")
+
+    await conn.execute(text("SELECT set_config('hnsw.ef_search', :value, false)"), {"value": str(ef_search)})
+    await build_index(conn, "bench_ix_vector", "embedding vector_cosine_ops", args)
+    await measure(conn, queries, exact, args.k, f"vector ef={ef_search}")
+    await conn.execute(text("DROP INDEX bench_ix_vector"))
+
+    await build_index(conn, "bench_ix_halfvec", f"(embedding::halfvec({dim})) halfvec_cosine_ops", args)
+    await measure(
+        conn, queries, exact, args.k, f"halfvec ef={ef_search}",
+        f"SELECT id FROM {TABLE} ORDER BY embedding::halfvec({dim}) <=> CAST(:q AS halfvec({dim})) LIMIT :k",
+    )
+    await conn.execute(text("DROP INDEX bench_ix_halfvec"))
+
+    await build_index(conn, "bench_ix_bit", f"(binary_quantize(embedding)::bit({dim})) bit_hamming_ops", args)
+    rerank_sql = (
+        f"SELECT id FROM (SELECT id, embedding FROM {TABLE} "
+        f"ORDER BY binary_quantize(embedding)::bit({dim}) <~> binary_quantize(CAST(:q AS vector)) LIMIT :candidates) c "
+        f"ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"
+    )
+    for oversample in [int(v) for v in args.oversample.split(",") if v.strip()]:
+        candidates = args.k * oversample
+        # ef_search 小于候选数时索引返回不足
+        await conn.execute(
+            text("SELECT set_config('hnsw.ef_search', :value, false)"), {"value": str(max(ef_search, candidates))}
+        )
+        await measure(conn, queries, exact, args.k, f"bit+重排 x{oversample}", rerank_sql, candidates=candidates)
+    await conn.execute(text("DROP INDEX bench_ix_bit"))
+
+
+async def run(args: argparse.Namespace) -> int:
+    random.seed(args.seed)
+    centers = [[random.uniform(-1, 1) for _ in range(args.dim)] for _ in range(args.clusters)]
+    queries = [vector_literal(perturb(random.choice(centers), 0.3)) for _ in range(args.queries)]
+
+    try:
+        async with engine.connect() as conn:
+            started = time.perf_counter()
+            await load_corpus(conn, args, centers)
+            print(f"生成 {args.rows} 条合成向量 (维度 {args.dim}): {time.perf_counter() - started:.1f}s")
+
+            # 精确结果 (顺序扫描)
+            exact, latencies = [], []
+            for query in queries:
+                ids, elapsed = await top_k(conn, query, args.k)
+                exact.append(set(ids))
+                latencies.append(elapsed)
+            print(f"Top-{args.k}, {args.queries} 次查询:")
+            report("顺序扫描", [1.0] * len(queries), latencies)
+
+            if args.quantization:
+                await compare_quantization(conn, args, queries, exact)
+                await conn.rollback()
+                return 0
+
+            if args.method == "hnsw":
+                options = f"m = {args.m}, ef_construction = {args.ef_construction}"
+                param, values = "hnsw.ef_search", args.ef_search
+            else:
+                options = f"lists = {args.lists}"
+                param, values = "ivfflat.probes", args.probes
+            started = time.perf_counter()
+            await conn.execute(text(
+                f"CREATE INDEX ON {TABLE} USING {args.method} (embedding vector_cosine_ops) WITH ({options})"
+            ))
+            await conn.execute(text(f"ANALYZE {TABLE}"))
+            print(f"建立 {args.method} 索引 ({options}): {time.perf_counter() - started:.1f}s")
+
+            for value in [int(v) for v in values.split(",") if v.strip()]:
+                await conn.execute(text("SELECT set_config(:name, :value, false)"), {"name": param, "value": str(value)})
+                await measure(conn, queries, exact, args.k, f"{param}={value}")
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main():
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
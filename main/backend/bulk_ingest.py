@@ -0,0 +1,95 @@
+"""
+批量导入论文 (目录/清单)
+
+用法:
+    python bulk_ingest.py --user-email admin@example.com --dir ./seed_pdfs
+    python bulk_ingest.py --user-id <UUID> --manifest ./manifest.txt --parallelism 8
+    python bulk_ingest.py --user-id <UUID> --dir ./seed_pdfs --mode queue
+
+断点文件默认为 ./bulk_ingest.checkpoint.jsonl，进程中断后使用相同参数重新运行即可从断点继续。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from uuid import UUID
+
+# 与 alembic/env.py 一致: 将 src 加入 python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from base.embedding.batcher import close_embedding_batcher  # noqa: E402
+from base.pg.service import UserRepository, async_session_factory  # noqa: E402
+from base.redis.arq_service import ArqService  # noqa: E402
+from service.papers.bulk_ingest import BulkIngestor, IngestCheckpoint, load_manifest, scan_directory  # noqa: E402
+from service.reader.job_progress import JobStatusBuffer  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="批量导入论文PDF")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", type=Path, help="扫描该目录下的PDF文件")
+    source.add_argument("--manifest", type=Path, help="导入清单(每行一个路径或JSON记录)")
+
+    owner = parser.add_mutually_exclusive_group(required=True)
+    owner.add_argument("--user-id", type=UUID, help="论文归属的用户ID")
+    owner.add_argument("--user-email", help="论文归属的用户邮箱")
+
+    parser.add_argument("--collection-id", type=UUID, default=None, help="导入到指定收藏夹(默认收藏夹)")
+    parser.add_argument("--parallelism", type=int, default=4, help="同时处理的论文数(默认4)")
+    parser.add_argument("--mode", choices=("inline", "queue"), default="inline",
+                        help="inline: 本进程内处理并统计分阶段耗时; queue: 仅登记并投递到Worker队列")
+    parser.add_argument("--checkpoint", type=Path, default=Path("bulk_ingest.checkpoint.jsonl"), help="断点文件路径")
+    parser.add_argument("--no-recursive", action="store_true", help="扫描目录时不递归子目录")
+    parser.add_argument("--report-every", type=int, default=10, help="每处理N篇输出一次进度")
+    return parser.parse_args()
+
+
+async def resolve_user_id(args: argparse.Namespace) -> UUID:
+    if args.user_id:
+        return args.user_id
+    async with async_session_factory() as session:
+        user = await UserRepository.get_user_by_email(session, args.user_email)
+    if not user:
+        raise SystemExit(f"用户不存在: {args.user_email}")
+    return user.id
+
+
+async def run(args: argparse.Namespace) -> int:
+    if args.dir:
+        items = scan_directory(args.dir, recursive=not args.no_recursive)
+    else:
+        items = load_manifest(args.manifest)
+    print(f"待导入文件: {len(items)} 个, 并发度: {args.parallelism}, 模式: {args.mode}, 断点文件: {args.checkpoint}")
+
+    user_id = await resolve_user_id(args)
+    if args.mode == "queue":
+        await ArqService.init()
+
+    ingestor = BulkIngestor(
+        user_id=user_id,
+        checkpoint=IngestCheckpoint(args.checkpoint),
+        parallelism=args.parallelism,
+        mode=args.mode,
+        collection_id=args.collection_id,
+        report_every=args.report_every,
+        on_progress=lambda stats: print(stats.progress_line(), flush=True),
+    )
+    try:
+        stats = await ingestor.run(items)
+    finally:
+        await close_embedding_batcher()
+        await JobStatusBuffer.flush()
+        await ArqService.close()
+
+    print(stats.summary())
+    return 1 if stats.failed else 0
+
+
+def main():
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+为向量化模型创建向量索引 (chunk_embeddings 与 paper_embeddings 的部分表达式索引)
+
+切换向量化模型前执行: 新模型的向量与旧模型并存于 chunk_embeddings，各模型一个索引，
+无需修改表结构。CONCURRENTLY 建索引，期间不阻塞写入；索引已存在时跳过。
+
+用法:
+    python embedding_index.py                 # 当前模型 (EMBEDDING_MODEL / EMBEDDING_TYPE)
+    python embedding_index.py --model bge-m3
+    python embedding_index.py --binary        # 二值量化索引 (开启 VECTOR_BINARY_PREFILTER 前执行)
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# 与 alembic/env.py 一致: 将 src 加入 python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from base.config import settings  # noqa: E402
+from base.embedding.registry import active_embedding_model  # noqa: E402
+from base.pg.service import engine  # noqa: E402
+from base.pg.vector_index import (  # noqa: E402
+    binary_index_ddl,
+    embedding_index_ddl,
+    ensure_embedding_index,
+    paper_embedding_index_ddl,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="为向量化模型创建向量索引")
+    parser.add_argument("--model", default=None, help="模型名 (默认当前模型)，维度取自 EMBEDDING_DIMENSIONS")
+    parser.add_argument("--binary", action="store_true", default=None,
+                        help="创建二值量化索引 (Hamming 距离)，默认按 VECTOR_BINARY_PREFILTER")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> int:
+    model = args.model or active_embedding_model()
+    binary = settings.vector_binary_prefilter if args.binary is None else args.binary
+    print(binary_index_ddl(model) if binary else embedding_index_ddl(model))
+    print(paper_embedding_index_ddl(model))
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await ensure_embedding_index(conn, model, binary=binary)
+    finally:
+        await engine.dispose()
+    print(f"模型 {model} 的向量索引已就绪")
+    return 0
+
+
+def main():
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+更换向量化模型: 在线回填新模型的向量，覆盖率 100% 后切换检索模型
+
+回填期间检索继续使用原模型，新旧模型的向量并存于 chunk_embeddings；
+回填由向量化Worker (EmbedWorkerSettings) 在 reembed 通道上节流执行，进度保存在 embedding_models 表，
+中断后重新执行本命令即从原进度继续。
+
+用法:
+    python reembed.py --model bge-m3            # 建索引、登记并投递回填任务
+    python reembed.py --model bge-m3 --status   # 查看回填进度
+    python reembed.py --status                  # 查看所有模型
+
+切换完成后再把 EMBEDDING_MODEL 改为新模型 (未登记检索模型时的默认值，以及Worker预加载的模型)。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# 与 alembic/env.py 一致: 将 src 加入 python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from base.pg.service import EmbeddingModelRepository, async_session_factory, engine  # noqa: E402
+from base.pg.vector_index import ensure_embedding_index  # noqa: E402
+from base.redis.arq_service import ArqService  # noqa: E402
+from service.papers.reembed_service import ReembedService  # noqa: E402
+from worker.tasks import task_queue  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="更换向量化模型并在线回填向量")
+    parser.add_argument("--model", default=None, help="新模型名，维度取自 EMBEDDING_DIMENSIONS")
+    parser.add_argument("--status", action="store_true", help="只查看回填进度，不投递任务")
+    args = parser.parse_args()
+    if not args.model and not args.status:
+        parser.error("需要 --model 或 --status")
+    return args
+
+
+async def print_status(model: str | None) -> None:
+    service = ReembedService()
+    if model:
+        models = [model]
+    else:
+        async with async_session_factory() as session:
+            models = [state.model for state in await EmbeddingModelRepository.list_states(session)]
+    for name in models:
+        progress = await service.progress(name)
+        print(
+            f"{progress['model']}: {progress['status'] or '未登记'}, "
+            f"{progress['embedded']}/{progress['total']} ({progress['coverage']:.2%}), 游标: {progress['cursor'] or '-'}"
+        )
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        if args.status:
+            await print_status(args.model)
+            return 0
+
+        # 回填写入时新模型的索引已存在，切换后检索立即走索引
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await ensure_embedding_index(conn, args.model)
+        progress = await ReembedService().start(args.model)
+        print(f"已登记 {args.model}: {progress['status']}, {progress['embedded']}/{progress['total']}")
+
+        await ArqService.init()
+        job_id = await task_queue.enqueue_reembed(args.model)
+        if job_id is None:
+            print("回填任务入队失败 (Redis 不可用)，进度已保存，可稍后重新执行")
+            return 1
+        print(f"回填任务已入队: {job_id}")
+        return 0
+    finally:
+        await ArqService.close()
+        await engine.dispose()
+
+
+def main():
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+重建相关论文列表 (related_papers)
+
+列表平时由入库Worker (PersistWorkerSettings) 在论文入库、删除后增量维护 (update_related_papers_task)，
+增量更新只修改新增论文的近邻论文，是近似结果；以下情况执行本命令按论文向量逐篇重算:
+- 首次上线 (迁移后表为空)；
+- 切换检索模型后 (列表基于原模型的论文向量)；
+- 更新任务入队失败或进入死信队列后。
+
+用法:
+    python related_papers.py --rebuild                     # 重建所有用户的列表
+    python related_papers.py --rebuild --user-id <UUID>    # 只重建一个用户的列表
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from uuid import UUID
+
+# 与 alembic/env.py 一致: 将 src 加入 python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from base.pg.service import engine  # noqa: E402
+from service.papers.related_service import RelatedPaperService  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="重建相关论文列表")
+    parser.add_argument("--rebuild", action="store_true", help="按当前检索模型的论文向量逐篇重算")
+    parser.add_argument("--user-id", type=UUID, default=None, help="只重建该用户的论文库")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("需要 --rebuild")
+    return args
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        updated = await RelatedPaperService().rebuild(args.user_id)
+        print(f"已重建 {updated} 篇论文的相关论文列表")
+        return 0
+    finally:
+        await engine.dispose()
+
+
+def main():
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
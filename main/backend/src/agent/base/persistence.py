@@ -1,9 +1,11 @@
 """
 开发者: LangGraphAgent
-当前版本: v1.0.0
+当前版本: v1.0.2
 创建时间: 2026-01-14 18:00
-更新时间: 2026-01-14 18:00
+更新时间: 2026-10-20 12:00
 更新记录:
+    [2026-10-20 12:00:v1.0.2:写入改用 save 收尾，在工作单元中只 flush、随工作单元统一提交]
+    [2026-10-20 03:00:v1.0.1:会话状态更新改为单条 UPDATE ... RETURNING]
     [2026-01-14 18:00:v1.0.0:实现 Agent 持久化服务，集成 LangGraph checkpointer 和自定义持久化逻辑]
 """
 
@@ -19,7 +21,7 @@ from langgraph.checkpoint.base import BaseCheckpointSaver
 from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
 
 from base.pg.entity import AgentSession, AgentTodo, ChatSession
-from base.pg.service import SessionDep
+from base.pg.service import SessionDep, save, update_returning
 
 
 class AgentPersistenceService:
@@ -47,8 +49,7 @@ class AgentPersistenceService:
             status="active"
         )
         self.session.add(agent_session)
-        await self.session.commit()
-        await self.session.refresh(agent_session)
+        await save(self.session, agent_session)
         return agent_session
 
     async def get_agent_session_by_thread(self, thread_id: str) -> Optional[AgentSession]:
@@ -76,23 +77,23 @@ class AgentPersistenceService:
         interrupt_type: Optional[str] = None,
         interrupt_data: Optional[Dict] = None
     ) -> Optional[AgentSession]:
-        """更新 Agent 会话状态"""
-        agent_session = await self.get_agent_session_by_thread(thread_id)
-        if not agent_session:
-            return None
-
-        agent_session.status = status
-        agent_session.interrupt_type = interrupt_type
-        agent_session.interrupt_data = interrupt_data
-        agent_session.updated_at = datetime.utcnow()
-
+        """更新 Agent 会话状态 (单条 UPDATE ... RETURNING，会话不存在时返回 None)"""
+        now = datetime.utcnow()
+        values = {
+            "status": status,
+            "interrupt_type": interrupt_type,
+            "interrupt_data": interrupt_data,
+            "updated_at": now,
+        }
         if status == "completed":
-            agent_session.completed_at = datetime.utcnow()
+            values["completed_at"] = now
+        # 中断信息/完成时间列尚未加入 agent_sessions 表结构，只写入已存在的列
+        columns = AgentSession.__table__.columns
+        values = {name: value for name, value in values.items() if name in columns}
 
-        self.session.add(agent_session)
-        await self.session.commit()
-        await self.session.refresh(agent_session)
-        return agent_session
+        return await update_returning(
+            self.session, AgentSession, [AgentSession.thread_id == thread_id], values
+        )
 
     async def create_todo(
         self,
@@ -108,8 +109,7 @@ class AgentPersistenceService:
             status="pending"
         )
         self.session.add(todo)
-        await self.session.commit()
-        await self.session.refresh(todo)
+        await save(self.session, todo)
         return todo
 
     async def get_pending_todos(self, agent_session_id: UUID) -> List[AgentTodo]:
@@ -145,8 +145,7 @@ class AgentPersistenceService:
             todo.todo_data = todo_data
 
         self.session.add(todo)
-        await self.session.commit()
-        await self.session.refresh(todo)
+        await save(self.session, todo)
         return todo
 
     async def get_interrupt_state(self, thread_id: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,176 @@
+'''
+开发者: BackendAgent
+当前版本: v1.3_embedding_batcher
+创建时间: 2026年10月19日 13:00
+更新时间: 2026年10月20日 12:00
+更新记录:
+    [2026年10月20日 12:00:v1.3_embedding_batcher:批处理器按显式模型名创建，当前模型也不回退到 SiliconFlow 模型]
+    [2026年10月20日 07:00:v1.2_embedding_batcher:批处理器按模型区分，查询向量可指定模型(与检索使用的模型一致)]
+    [2026年10月19日 23:00:v1.1_embedding_batcher:新增embed_query供检索请求向量化查询文本]
+    [2026年10月19日 13:00:v1.0_embedding_batcher:Worker侧跨论文向量化批处理，凑满批次或到达最大等待时间后统一调用模型]
+'''
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+from base.config import settings
+from base.embedding.embedding_service import EmbeddingService
+from base.embedding.registry import active_embedding_model
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# 关闭信号: 消费者收到后发送手头的批次并退出
+_STOP = object()
+
+
+@dataclass
+class _PendingText:
+    text: str
+    future: asyncio.Future
+    enqueued_at: float = 0.0
+
+
+class EmbeddingBatcher:
+    """
+    跨论文的向量化批处理器 (Worker 进程内共享)
+
+    并发处理的多篇论文各自提交文本块，批处理器把它们合并为满批次再调用模型:
+    - 凑满 batch_size 条立即发送；
+    - 否则从批次中最早的一条入队起，最多等待 max_latency 秒后发送不满的批次；
+    - 同时在途的批次数受 max_inflight 限制，结果按提交顺序回填给各自的调用方。
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        batch_size: int = 64,
+        max_latency: float = 0.05,
+        max_inflight: int = 2,
+    ):
+        if batch_size <= 0:
+            raise ValueError("batch_size 必须大于0")
+        self._embed_fn = embed_fn
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._semaphore = asyncio.Semaphore(max_inflight)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """提交一组文本并等待其向量 (顺序与输入一致)"""
+        if not texts:
+            return []
+        self._ensure_consumer()
+        loop = asyncio.get_running_loop()
+        pending = [_PendingText(text, loop.create_future(), loop.time()) for text in texts]
+        for item in pending:
+            self._queue.put_nowait(item)
+        return list(await asyncio.gather(*(item.future for item in pending)))
+
+    async def close(self) -> None:
+        """发送剩余文本并等待所有在途批次完成"""
+        if self._consumer is None:
+            return
+        if not self._consumer.done():
+            self._queue.put_nowait(_STOP)
+            await self._consumer
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._consumer = None
+        self._queue = None
+
+    def _ensure_consumer(self) -> None:
+        if self._consumer is None or self._consumer.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._consumer = asyncio.create_task(self._consume())
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = first.enqueued_at + self.max_latency
+            while len(batch) < self.batch_size:
+                # 已排队的直接取走，不必等待
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[_PendingText]) -> None:
+        try:
+            vectors = await self._embed_fn([item.text for item in batch])
+            if len(vectors) != len(batch):
+                raise RuntimeError(f"向量数量与文本数量不一致: {len(vectors)} != {len(batch)}")
+            for item, vector in zip(batch, vectors):
+                if not item.future.done():
+                    item.future.set_result(vector)
+        except Exception as e:
+            logger.error(f"批量向量化失败: {len(batch)} 条, 错误: {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        finally:
+            self._semaphore.release()
+
+
+# 模型名 -> 批处理器 (为空的键表示当前模型)
+_embedding_batchers: Dict[Optional[str], EmbeddingBatcher] = {}
+
+
+def get_embedding_batcher(model: Optional[str] = None) -> EmbeddingBatcher:
+    """
+    获取进程级共享的批处理器 (首次调用时初始化该模型的 EmbeddingService)
+
+    model 为空时为当前模型，与显式指定当前模型共用同一个批处理器；更换模型期间新旧模型各有一个。
+    按模型名加载，不回退到别的模型: 向量按模型名写入与检索，其他模型生成的向量不能混入。
+    """
+    key = model or active_embedding_model()
+    batcher = _embedding_batchers.get(key)
+    if batcher is None:
+        service = EmbeddingService(key)
+        batcher = EmbeddingBatcher(
+            lambda texts: service.embed_batch(texts, batch_size=len(texts)),
+            batch_size=settings.embedding_batch_size,
+            max_latency=settings.embedding_batch_max_latency,
+            max_inflight=settings.embedding_batch_max_inflight,
+        )
+        _embedding_batchers[key] = batcher
+    return batcher
+
+
+async def embed_query(text: str, model: Optional[str] = None) -> List[float]:
+    """查询文本向量化 (检索请求使用，首次调用时在线程中加载模型，避免阻塞事件循环)"""
+    batcher = await asyncio.to_thread(get_embedding_batcher, model)
+    vectors = await batcher.embed([text])
+    return vectors[0]
+
+
+async def close_embedding_batcher() -> None:
+    batchers = list(_embedding_batchers.values())
+    _embedding_batchers.clear()
+    for batcher in batchers:
+        await batcher.close()
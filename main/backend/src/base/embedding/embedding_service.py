@@ -1,9 +1,11 @@
 '''
 开发者: BackendAgent
-当前版本: v1.1_embedding_service
+当前版本: v1.3_embedding_service
 创建时间: 2026年01月08日 15:30
-更新时间: 2026年01月09日 16:20
+更新时间: 2026年10月20日 12:00
 更新记录:
+    [2026年10月20日 12:00:v1.3_embedding_service:指定模型名 (包括当前模型) 时均不做跨模型回退]
+    [2026年10月20日 07:00:v1.2_embedding_service:支持按模型名创建服务(更换模型时回填新模型向量)，指定的非当前模型不做跨模型回退]
     [2026年01月08日 15:30:v1.0_embedding_service:创建文本向量化服务，支持OpenAI和Ollama模型]
     [2026年01月09日 16:20:v1.1_embedding_service:新增本地ONNX模型(BGE-M3)支持及SiliconFlow云端回退机制]
 '''
@@ -204,10 +206,35 @@ class LocalOnnxEmbeddingModel(BaseEmbeddingModel):
 class EmbeddingService:
     """文本向量化服务 (支持本地/云端自动回退)"""
 
-    def __init__(self):
+    def __init__(self, model: Optional[str] = None):
+        """
+        model: 模型名，指定时 (包括当前模型) 只加载该模型，不回退到别的模型:
+        回退模型的向量维度可能相同，但不能按该模型名写入或检索 (向量不可混用)。
+        为空时按 embedding_type 加载并配置 SiliconFlow 回退 (不按模型存取向量的场景)。
+        """
         self.primary_model: Optional[BaseEmbeddingModel] = None
         self.fallback_model: Optional[BaseEmbeddingModel] = None
-        self._init_models()
+        if model is None:
+            self._init_models()
+        else:
+            self.primary_model = self._create_model(model)
+
+    def _create_model(self, model: str) -> BaseEmbeddingModel:
+        """按模型名创建模型: bge-m3 为本地 ONNX 模型，OpenAI 模型走 OpenAI 接口，其余走 SiliconFlow 接口"""
+        if model == "bge-m3":
+            return LocalOnnxEmbeddingModel(
+                model_path=settings.local_embedding_model_path,
+                tokenizer_path=settings.local_embedding_tokenizer_path
+            )
+        if model.startswith("text-embedding-"):
+            return OpenAIEmbeddingModel(model=model, api_key=settings.openai_api_key)
+        if not settings.siliconflow_api_key:
+            raise ValueError("SiliconFlow API Key 未配置")
+        return OpenAIEmbeddingModel(
+            model=model,
+            api_key=settings.siliconflow_api_key,
+            base_url=settings.siliconflow_base_url
+        )
 
     def _init_models(self):
         # 1. 初始化 Primary Model (根据配置)
@@ -0,0 +1,31 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_embedding_registry
+创建时间: 2026年10月20日 06:00
+更新时间: 2026年10月20日 06:00
+更新记录:
+    [2026年10月20日 06:00:v1.0_embedding_registry:当前向量化模型名与各模型向量维度]
+'''
+
+from base.config import settings
+
+# embedding_type 对应的模型名 (与 EmbeddingService 实际加载的主模型一致；ollama 未实现，由 SiliconFlow 回退模型生成)
+_MODEL_BY_TYPE = {
+    "local": "bge-m3",
+    "openai": "text-embedding-ada-002",
+}
+
+
+def active_embedding_model() -> str:
+    """当前生成向量所用的模型名 (写入与检索都按该模型存取向量)"""
+    if settings.embedding_model:
+        return settings.embedding_model
+    return _MODEL_BY_TYPE.get(settings.embedding_type, settings.siliconflow_embedding_model)
+
+
+def embedding_dimension(model: str) -> int:
+    """模型的向量维度，未登记的模型需在 EMBEDDING_DIMENSIONS 中配置"""
+    try:
+        return settings.embedding_dimensions[model]
+    except KeyError:
+        raise ValueError(f"未配置向量维度的模型: {model}") from None
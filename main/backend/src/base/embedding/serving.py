@@ -0,0 +1,50 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_embedding_serving
+创建时间: 2026年10月20日 07:00
+更新时间: 2026年10月20日 07:00
+更新记录:
+    [2026年10月20日 07:00:v1.0_embedding_serving:检索与导入使用的向量化模型(embedding_models表中的serving模型)，进程内短时缓存]
+'''
+
+import time
+from typing import Optional, Tuple
+
+from loguru import logger
+
+from base.config import settings
+from base.embedding.registry import active_embedding_model
+from base.pg.service import EmbeddingModelRepository, async_session_factory
+
+# (模型名, 过期时间 monotonic)
+_cached: Optional[Tuple[str, float]] = None
+
+
+async def serving_embedding_model() -> str:
+    """
+    检索使用的向量化模型 (查询向量与新导入的文本块都按该模型生成)
+
+    取 embedding_models 表中 status = serving 的模型，表中没有时为配置的当前模型 (active_embedding_model)。
+    结果在进程内缓存 embedding_model_cache_seconds 秒，切换后各进程在该时长内先后生效；
+    切换前后两个模型的向量都完整，过渡期内任一模型的检索结果都是正确的。
+    数据库不可用时按配置的当前模型处理，同样缓存，避免每次请求都等待连接失败。
+    """
+    global _cached
+    now = time.monotonic()
+    if _cached is not None and _cached[1] > now:
+        return _cached[0]
+    try:
+        async with async_session_factory() as session:
+            model = await EmbeddingModelRepository.get_serving_model(session)
+    except Exception as e:
+        logger.warning(f"读取检索向量化模型失败，使用配置的当前模型: {e}")
+        model = None
+    model = model or active_embedding_model()
+    _cached = (model, now + settings.embedding_model_cache_seconds)
+    return model
+
+
+def invalidate_serving_model() -> None:
+    """清除本进程缓存 (本进程切换模型后立即生效)"""
+    global _cached
+    _cached = None
@@ -0,0 +1,111 @@
+'''
+开发者: BackendAgent
+当前版本: v1.1_parse_artifact_store
+创建时间: 2026年10月19日 12:00
+更新时间: 2026年10月20日 07:00
+更新记录:
+    [2026年10月20日 07:00:v1.1_parse_artifact_store:向量产物记录生成向量的模型，入库阶段按该模型写入]
+    [2026年10月19日 12:00:v1.0_parse_artifact_store:解析产物存储，用于分阶段导入(parse/embed/persist)之间传递文本块与向量]
+'''
+
+import asyncio
+import json
+import os
+import shutil
+import struct
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from base.config import settings
+
+# 向量文件头: 向量数量、维度 (小端 uint32)
+_EMBEDDING_HEADER = struct.Struct("<II")
+
+
+class ParseArtifactStore:
+    """
+    解析产物存储 (本地文件系统: {upload_dir}/artifacts/{paper_id}/)
+
+    - chunks.json: 解析阶段产出的文本块与元数据
+    - embeddings.f32: 向量化阶段产出的向量 (float32 紧凑二进制，避免 JSON 膨胀)
+    - embeddings.model: 生成向量的模型名 (向量化与入库之间检索模型可能切换，入库按该模型写入)
+
+    所有写入先写临时文件再原子替换，阶段任务重试时可安全覆盖。
+    """
+
+    CHUNKS_FILE = "chunks.json"
+    EMBEDDINGS_FILE = "embeddings.f32"
+    EMBEDDING_MODEL_FILE = "embeddings.model"
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else Path(settings.upload_dir) / "artifacts"
+
+    def paper_dir(self, paper_id: UUID | str) -> Path:
+        return self.root / str(paper_id)
+
+    async def save_chunks(self, paper_id: UUID | str, chunks: List[str], metadata: Dict[str, Any]) -> None:
+        data = json.dumps({"metadata": metadata, "chunks": chunks}, ensure_ascii=False, default=str).encode("utf-8")
+        await asyncio.to_thread(self._write_atomic, self.paper_dir(paper_id) / self.CHUNKS_FILE, data)
+
+    async def load_chunks(self, paper_id: UUID | str) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+        """返回 (chunks, metadata)，产物不存在时返回 None"""
+        path = self.paper_dir(paper_id) / self.CHUNKS_FILE
+        if not path.exists():
+            return None
+        data = json.loads(await asyncio.to_thread(path.read_bytes))
+        return data["chunks"], data.get("metadata", {})
+
+    async def save_embeddings(
+        self, paper_id: UUID | str, embeddings: List[List[float]], model: Optional[str] = None
+    ) -> None:
+        if model:
+            await asyncio.to_thread(
+                self._write_atomic, self.paper_dir(paper_id) / self.EMBEDDING_MODEL_FILE, model.encode("utf-8")
+            )
+        await asyncio.to_thread(
+            self._write_atomic,
+            self.paper_dir(paper_id) / self.EMBEDDINGS_FILE,
+            self._encode_embeddings(embeddings),
+        )
+
+    async def load_embeddings(self, paper_id: UUID | str) -> Optional[List[List[float]]]:
+        path = self.paper_dir(paper_id) / self.EMBEDDINGS_FILE
+        if not path.exists():
+            return None
+        return self._decode_embeddings(await asyncio.to_thread(path.read_bytes))
+
+    async def load_embedding_model(self, paper_id: UUID | str) -> Optional[str]:
+        """生成向量的模型名，未记录时返回 None"""
+        path = self.paper_dir(paper_id) / self.EMBEDDING_MODEL_FILE
+        if not path.exists():
+            return None
+        return (await asyncio.to_thread(path.read_bytes)).decode("utf-8")
+
+    async def clear(self, paper_id: UUID | str) -> None:
+        await asyncio.to_thread(shutil.rmtree, self.paper_dir(paper_id), True)
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _encode_embeddings(embeddings: List[List[float]]) -> bytes:
+        dim = len(embeddings[0]) if embeddings else 0
+        values = array("f")
+        for vector in embeddings:
+            if len(vector) != dim:
+                raise ValueError(f"向量维度不一致: {len(vector)} != {dim}")
+            values.extend(vector)
+        return _EMBEDDING_HEADER.pack(len(embeddings), dim) + values.tobytes()
+
+    @staticmethod
+    def _decode_embeddings(data: bytes) -> List[List[float]]:
+        count, dim = _EMBEDDING_HEADER.unpack_from(data)
+        values = array("f")
+        values.frombytes(data[_EMBEDDING_HEADER.size:])
+        return [values[i * dim:(i + 1) * dim].tolist() for i in range(count)]
@@ -1,15 +1,17 @@
 '''
 开发者: BackendAgent
-当前版本: v1.2_marker_fix
+当前版本: v1.3_parser_preload
 创建时间: 2026年01月08日 15:00
-更新时间: 2026年01月15日 14:00
+更新时间: 2026年10月19日 18:00
 更新记录:
+    [2026年10月19日 18:00:v1.3_parser_preload:解析器单例在线程中加载(不阻塞事件循环)且并发首次调用只加载一次，新增预热解析]
     [2026年01月15日 14:00:v1.2_marker_fix:修复Marker库API变更导致的导入错误，适配新版Marker API]
     [2026年01月08日 15:00:v1.0_pdf_parser:创建PDF解析器，支持Marker和PyMuPDF两种方案]
 '''
 
 import asyncio
 import re
+import tempfile
 from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -392,16 +394,42 @@ class PDFParserFactory:
 
 # 全局解析器实例
 _pdf_parser: Optional[BasePDFParser] = None
+_pdf_parser_lock: Optional[asyncio.Lock] = None
 
 
 async def get_pdf_parser(parser_type: str = "auto") -> BasePDFParser:
-    """获取PDF解析器单例"""
-    global _pdf_parser
+    """
+    获取PDF解析器单例
+
+    Marker 模型加载耗时可达数十秒，在线程中执行以免阻塞事件循环；
+    并发的首次调用共用同一次加载。
+    """
+    global _pdf_parser, _pdf_parser_lock
     if _pdf_parser is None:
-        _pdf_parser = PDFParserFactory.create_parser(parser_type)
+        if _pdf_parser_lock is None:
+            _pdf_parser_lock = asyncio.Lock()
+        async with _pdf_parser_lock:
+            if _pdf_parser is None:
+                _pdf_parser = await asyncio.to_thread(PDFParserFactory.create_parser, parser_type)
     return _pdf_parser
 
 
+async def warmup_pdf_parser(parser: BasePDFParser) -> None:
+    """
+    预热解析器: 解析一页生成的PDF，触发模型的首次推理初始化
+    PyMuPDF 不可用时无法生成预热文件，直接跳过。
+    """
+    if not PYMUPDF_AVAILABLE:
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "warmup.pdf"
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "Warmup document for PDF parser initialization.")
+        doc.save(str(path))
+        doc.close()
+        await parser.parse(path)
+
+
 async def parse_pdf(file_path: Path, parser_type: str = "auto") -> PDFParseResult:
     """便捷函数：解析PDF文件"""
     parser = await get_pdf_parser(parser_type)
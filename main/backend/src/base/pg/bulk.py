@@ -0,0 +1,105 @@
+'''
+开发者: BackendAgent
+当前版本: v1.1_pg_bulk
+创建时间: 2026-10-19 20:00:00
+更新时间: 2026-10-20 11:00:00
+更新记录:
+    [2026-10-20 11:00:00:v1.1_pg_bulk:跳过生成列 (数据库计算，不能写入)]
+    [2026-10-19 20:00:00:v1.0_pg_bulk:批量写入实体，asyncpg 下使用二进制 COPY (pgvector 二进制编码)，否则按批多行 INSERT]
+'''
+
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional, Sequence
+
+from loguru import logger
+from pgvector import HalfVector, Vector
+from pgvector.sqlalchemy import HALFVEC, VECTOR
+from sqlalchemy import Table, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from base.config import settings
+
+# pgvector 列类型 -> (数据库类型名, 二进制编码类)
+_VECTOR_CODECS = {
+    VECTOR: ("vector", Vector),
+    HALFVEC: ("halfvec", HalfVector),
+}
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    instances: Sequence[SQLModel],
+    batch_size: Optional[int] = None,
+    use_copy: bool = True,
+) -> int:
+    """
+    批量写入同一张表的实体 (在当前事务内执行，不提交)
+
+    - asyncpg 驱动: copy_records_to_table 二进制 COPY，向量列按 pgvector 二进制格式编码，
+      避免逐行 INSERT 及向量的文本序列化；COPY 在保存点内执行，失败时回滚保存点后改用批量 INSERT。
+    - 其他驱动: 每批 batch_size 行的多行 INSERT ... VALUES。
+
+    列值取实体属性，需为驱动可直接编码的类型 (UUID/str/int/float/向量列表)。
+    use_copy=False 时直接使用批量 INSERT (基准测试对比用)。返回写入行数。
+    """
+    if not instances:
+        return 0
+    table: Table = type(instances[0]).__table__
+    # 生成列 (如全文检索向量) 由数据库计算，不能写入
+    columns = [column.name for column in table.columns if column.computed is None]
+    records = [tuple(getattr(instance, name) for name in columns) for instance in instances]
+
+    conn = await session.connection()
+    if use_copy and conn.dialect.driver == "asyncpg":
+        try:
+            async with session.begin_nested():
+                await _copy_records(conn, table, columns, records)
+            return len(records)
+        except Exception as e:
+            logger.warning(f"COPY写入失败，改用批量INSERT: {table.name}, 错误: {e}")
+
+    await _insert_batches(session, table, columns, records, batch_size or settings.bulk_insert_batch_size)
+    return len(records)
+
+
+async def _copy_records(conn, table: Table, columns: List[str], records: List[tuple]) -> None:
+    raw = await conn.get_raw_connection()
+    driver_conn = raw.driver_connection
+    vector_types = {_VECTOR_CODECS[type(column.type)] for column in table.columns if type(column.type) in _VECTOR_CODECS}
+    async with _binary_vector_codecs(driver_conn, vector_types):
+        await driver_conn.copy_records_to_table(
+            table.name, records=records, columns=columns, schema_name=table.schema or "public"
+        )
+
+
+@asynccontextmanager
+async def _binary_vector_codecs(driver_conn: Any, vector_types: set):
+    """
+    COPY 期间在连接上临时注册 pgvector 二进制编解码，结束后恢复
+
+    连接池中的连接还会被 SQLAlchemy 复用，其 pgvector 列类型按文本格式收发，不能永久替换编解码。
+    """
+    registered = []
+    try:
+        for type_name, codec in vector_types:
+            await driver_conn.set_type_codec(
+                type_name,
+                schema="public",
+                encoder=lambda value, codec=codec: (value if isinstance(value, codec) else codec(value)).to_binary(),
+                decoder=codec.from_binary,
+                format="binary",
+            )
+            registered.append(type_name)
+        yield
+    finally:
+        for type_name in registered:
+            await driver_conn.reset_type_codec(type_name, schema="public")
+
+
+async def _insert_batches(
+    session: AsyncSession, table: Table, columns: List[str], records: List[tuple], batch_size: int
+) -> None:
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        await session.execute(insert(table).values([dict(zip(columns, record)) for record in batch]))
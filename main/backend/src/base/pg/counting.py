@@ -0,0 +1,51 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_pg_counting
+创建时间: 2026年10月20日 02:00
+更新时间: 2026年10月20日 02:00
+更新记录:
+    [2026年10月20日 02:00:v1.0_pg_counting:(可设上限的)精确计数与查询计划行数估算]
+'''
+
+import json
+from typing import Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class _ExplainJson(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <statement>，参数照常绑定"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_ExplainJson, "postgresql")
+def _compile_explain_json(element: _ExplainJson, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def count_rows(session: AsyncSession, statement: Select, cap: Optional[int] = None) -> int:
+    """
+    统计 statement 的行数；指定 cap 时最多数到 cap + 1
+
+    带上限时子查询加 LIMIT，命中行数很多时扫描到 cap + 1 行即停止，返回值 <= cap 时为精确总数。
+    """
+    statement = statement.order_by(None)
+    if cap is not None:
+        statement = statement.limit(cap + 1)
+    return (await session.execute(select(func.count()).select_from(statement.subquery()))).scalar_one()
+
+
+async def planner_estimate(session: AsyncSession, statement: Select) -> int:
+    """查询计划器对 statement 结果行数的估算 (只生成计划不执行，依赖表统计信息的时效)"""
+    result = await session.execute(_ExplainJson(statement.order_by(None)))
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -2,10 +2,19 @@
 
 '''
 开发者: BackendAgent
-当前版本: v1.3_db_models
+当前版本: v1.12_db_models
 创建时间: 2026年01月08日 11:00
-更新时间: 2026年01月12日 08:00
+更新时间: 2026年10月20日 11:00
 更新记录:
+    [2026年10月20日 11:00:v1.12_db_models:声明列表游标(键集)分页使用的复合索引，与迁移一致]
+    [2026年10月20日 11:00:v1.11_db_models:声明作者规范化文本生成列 Paper.authors_text 及标题/作者三元组 GIN 索引，与迁移一致]
+    [2026年10月20日 11:00:v1.10_db_models:声明全文检索生成列 Paper.search_vector / PaperChunk.content_tsv 及其 GIN 索引，与迁移一致]
+    [2026年10月20日 11:00:v1.9_db_models:Job 声明 (user_id, idempotency_key) 唯一索引，与迁移一致 (autogenerate 不再删除)]
+    [2026年10月20日 10:00:v1.8_db_models:新增预先计算的相关论文表 RelatedPaper]
+    [2026年10月20日 09:00:v1.7_db_models:新增按模型存储论文级向量(文本块向量均值)的 PaperEmbedding 表]
+    [2026年10月20日 08:00:v1.6_db_models:ChunkEmbedding.embedding 列类型随 embedding_storage (vector/halfvec)]
+    [2026年10月20日 07:00:v1.5_db_models:新增 EmbeddingModelState 表，记录各向量化模型的回填进度与检索使用的模型]
+    [2026年10月20日 06:00:v1.4_db_models:新增按模型存储向量的 ChunkEmbedding 表，PaperChunk.embedding 保留为历史列]
     [2026年01月08日 11:00:v1.0_db_models:创建数据库模型文件，包含所有核心表结构]
     [2026年01月08日 16:30:v1.1_db_models:从/src/business_model/database_models.py迁移到/src/base/pg/entity.py中]
     [2026年01月12日 07:50:v1.2_db_models:为所有实体类添加详细文档注释(Docstring)]
@@ -16,14 +25,15 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 from uuid import UUID, uuid4
 
-from sqlalchemy import Column, JSON, Text
+from sqlalchemy import Column, Computed, Index, JSON, REAL, Text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC, Vector
 from sqlmodel import Field, Relationship, SQLModel
 
-from common.model.enums import PaperStatus
+from base.config import settings
+from common.model.enums import EmbeddingModelStatus, PaperStatus
 from service.setting.schema import Settings
-from common.db_types import PydanticJSON
+from common.db_types import PydanticJSON, TSVectorType
 
 
 class User(SQLModel, table=True):
@@ -128,13 +138,26 @@ class Paper(SQLModel, table=True):
         - authors: 使用 JSON 类型存储作者列表，灵活适应不同数量的作者。
         - file_key: 存储对象存储 (如 MinIO) 中的文件路径或 Key。
         - status: 枚举类型 (PaperStatus)，管理论文处理生命周期。
+        - search_vector: 标题/摘要的全文检索向量 (生成列，GIN 索引)，检索配置取自 settings.text_search_config。
+        - authors_text: 作者列表的小写纯文本 (生成列)，与 title 一起建 pg_trgm 三元组 GIN 索引，用于模糊检索。
         - 关联:
             - chunks: 一对多关联 PaperChunk，用于RAG检索。
             - layers: 一对多关联 Layer，用于阅读器标注。
             - reports: 一对多关联 Report，用于生成的研究报告。
     """
     __tablename__ = "papers"
-    __table_args__ = {"comment": "论文表: 存储论文元数据、文件路径及处理状态"}
+    __table_args__ = (
+        # 列表游标分页 (按用户、创建时间、ID)
+        Index("ix_papers_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_papers_search_vector", "search_vector", postgresql_using="gin"),
+        # 标题/作者模糊检索 (pg_trgm)
+        Index("ix_papers_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index(
+            "ix_papers_authors_text_trgm", "authors_text",
+            postgresql_using="gin", postgresql_ops={"authors_text": "gin_trgm_ops"},
+        ),
+        {"comment": "论文表: 存储论文元数据、文件路径及处理状态"},
+    )
 
     id: UUID = Field(
         default_factory=uuid4,
@@ -194,6 +217,32 @@ class Paper(SQLModel, table=True):
         sa_column_kwargs={"comment": "处理失败时的错误信息"}
     )
 
+    # 全文检索生成列 (STORED，数据库维护，写入时不赋值)；标题权重 A、摘要权重 B
+    search_vector: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            TSVectorType,
+            Computed(
+                f"setweight(to_tsvector('{settings.text_search_config}', coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('{settings.text_search_config}', coalesce(abstract, '')), 'B')",
+                persisted=True,
+            ),
+            comment="标题/摘要全文检索向量(生成列)",
+        )
+    )
+    # 作者列表 (JSON) 规范化为小写纯文本，供三元组索引模糊匹配: ["A B", "C"] -> a b, c
+    authors_text: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            Text,
+            Computed(
+                "lower(translate(coalesce(authors::jsonb, '[]'::jsonb)::text, '[]\"', ''))",
+                persisted=True,
+            ),
+            comment="作者列表规范化文本(生成列，用于模糊检索)",
+        )
+    )
+
     created_at: datetime = Field(
         default_factory=datetime.now,
         sa_column_kwargs={"comment": "上传/创建时间"}
@@ -231,11 +280,15 @@ class PaperChunk(SQLModel, table=True):
         - paper_id: 外键关联 Papers 表。
         - content: 存储切片后的纯文本内容。
         - chunk_index: 记录切片在原文档中的顺序，用于上下文重组。
-        - embedding: 使用 pgvector 扩展存储高维向量 (1536维，适配 OpenAI text-embedding-3-small 或兼容模型)。
-            - 注意: 需要数据库开启 vector 扩展。
+        - embedding: 历史向量列 (固定1536维)，新写入的向量按模型存放在 chunk_embeddings (见 ChunkEmbedding)。
+        - embedding_model / embedding_dim: 导入时使用的向量化模型及其维度。
+        - content_tsv: 内容的全文检索向量 (生成列，GIN 索引)，检索配置取自 settings.text_search_config。
     """
     __tablename__ = "paper_chunks"
-    __table_args__ = {"comment": "论文切片表: 存储解析后的文本片段及向量Embedding"}
+    __table_args__ = (
+        Index("ix_paper_chunks_content_tsv", "content_tsv", postgresql_using="gin"),
+        {"comment": "论文切片表: 存储解析后的文本片段及向量Embedding"},
+    )
 
     id: UUID = Field(
         default_factory=uuid4,
@@ -261,9 +314,19 @@ class PaperChunk(SQLModel, table=True):
     chunk_index: int = Field(
         sa_column_kwargs={"comment": "切片顺序索引"}
     )
+    # 全文检索生成列 (STORED，数据库维护，写入时不赋值)
+    content_tsv: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            TSVectorType,
+            Computed(f"to_tsvector('{settings.text_search_config}', coalesce(content, ''))", persisted=True),
+            comment="切片内容全文检索向量(生成列)",
+        )
+    )
 
-    embedding: List[float] = Field(
-        sa_column=Column(Vector(1536), comment="向量Embedding(默认1536维)")
+    embedding: Optional[List[float]] = Field(
+        default=None,
+        sa_column=Column(Vector(1536), comment="历史向量Embedding(1536维)，新向量见chunk_embeddings")
     )
     embedding_model: str = Field(
         default="text-embedding-3-small",
@@ -277,6 +340,165 @@ class PaperChunk(SQLModel, table=True):
     # 关联关系
     paper: Paper = Relationship(back_populates="chunks")
 
+
+class ChunkEmbedding(SQLModel, table=True):
+    """
+    文本块向量表模型 (Chunk Embedding Model)
+
+    用途:
+        按模型存储文本块向量，一个文本块可同时有多个模型的向量 (切换模型时新旧向量并存)。
+
+    内部实现:
+        - 主键 (chunk_id, model)，文本块删除时级联删除。
+        - embedding: 不限定维度的 vector 列 (embedding_storage 为 halfvec 时为 halfvec 列)，维度由模型决定 (见 settings.embedding_dimensions)；
+          每个模型一个部分表达式索引 ((embedding::vector(dim)) ... WHERE model = '...')，
+          检索时按当前模型过滤并转换为对应维度 (见 base.pg.vector_index)。
+    """
+    __tablename__ = "chunk_embeddings"
+    __table_args__ = {"comment": "文本块向量表: 按模型存储文本块的向量Embedding"}
+
+    chunk_id: UUID = Field(
+        foreign_key="paper_chunks.id",
+        ondelete="CASCADE",
+        primary_key=True,
+        sa_type=PGUUID(as_uuid=True),
+        sa_column_kwargs={"comment": "文本块ID"}
+    )
+    model: str = Field(
+        primary_key=True,
+        sa_column_kwargs={"comment": "生成向量的模型"}
+    )
+    embedding: List[float] = Field(
+        sa_column=Column(
+            HALFVEC() if settings.embedding_storage == "halfvec" else Vector(),
+            nullable=False,
+            comment="向量Embedding(维度随模型)"
+        )
+    )
+    created_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column_kwargs={"comment": "创建时间"}
+    )
+
+
+class PaperEmbedding(SQLModel, table=True):
+    """
+    论文向量表模型 (Paper Embedding Model)
+
+    用途:
+        按模型存储论文级向量，用于论文级语义检索 (检索的粗排阶段) 与相关论文推荐。
+
+    内部实现:
+        - 主键 (paper_id, model)，论文删除时级联删除。
+        - embedding: 该模型下论文所有文本块向量的均值 (质心)，余弦距离与向量长度无关，不做归一化；
+          每篇论文一行，表很小，固定为 vector 列 (不随 embedding_storage)。
+        - 每个模型一个部分表达式索引，与 chunk_embeddings 相同 (见 base.pg.vector_index)。
+    """
+    __tablename__ = "paper_embeddings"
+    __table_args__ = {"comment": "论文向量表: 按模型存储论文级向量(文本块向量均值)"}
+
+    paper_id: UUID = Field(
+        foreign_key="papers.id",
+        ondelete="CASCADE",
+        primary_key=True,
+        sa_type=PGUUID(as_uuid=True),
+        sa_column_kwargs={"comment": "论文ID"}
+    )
+    model: str = Field(
+        primary_key=True,
+        sa_column_kwargs={"comment": "生成向量的模型"}
+    )
+    embedding: List[float] = Field(
+        sa_column=Column(Vector(), nullable=False, comment="论文向量(文本块向量均值，维度随模型)")
+    )
+    updated_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column_kwargs={"comment": "更新时间"}
+    )
+
+
+class RelatedPaper(SQLModel, table=True):
+    """
+    相关论文表模型 (Related Paper Model)
+
+    用途:
+        预先计算的相关论文: 每篇论文在所属用户论文库中论文向量最相近的 K 篇论文 (settings.related_papers_k)，
+        由后台任务增量维护 (见 service.papers.related_service)，读取时不做向量计算。
+
+    内部实现:
+        - 主键 (paper_id, related_paper_id)，按主键前缀读取一篇论文的列表；任一论文删除时级联删除。
+        - related_paper_id 单独索引: 删除论文前据此找到列表中含该论文的论文 (之后补齐其列表)。
+        - 每行只有两个 UUID 与一个 real 相似度。
+    """
+    __tablename__ = "related_papers"
+    __table_args__ = {"comment": "相关论文表: 每篇论文在用户论文库中论文向量最相近的K篇论文"}
+
+    paper_id: UUID = Field(
+        foreign_key="papers.id",
+        ondelete="CASCADE",
+        primary_key=True,
+        sa_type=PGUUID(as_uuid=True),
+        sa_column_kwargs={"comment": "论文ID"}
+    )
+    related_paper_id: UUID = Field(
+        foreign_key="papers.id",
+        ondelete="CASCADE",
+        primary_key=True,
+        index=True,
+        sa_type=PGUUID(as_uuid=True),
+        sa_column_kwargs={"comment": "相关论文ID"}
+    )
+    score: float = Field(
+        sa_column=Column(REAL, nullable=False, comment="相似度(论文向量的余弦相似度)")
+    )
+
+
+class EmbeddingModelState(SQLModel, table=True):
+    """
+    向量化模型状态表模型 (Embedding Model State)
+
+    用途:
+        记录各向量化模型的向量回填进度，以及检索当前使用的模型 (status = serving)。
+
+    内部实现:
+        - 更换模型时新增一行 (backfilling)，后台任务按文本块主键顺序补齐该模型的向量，
+          cursor 为已处理到的文本块ID，任务中断后从 cursor 继续。
+        - 覆盖全部文本块后以一条 UPDATE 同时把新模型置为 serving、原模型置为 retired，检索随之切换。
+    """
+    __tablename__ = "embedding_models"
+    __table_args__ = {"comment": "向量化模型表: 各模型的向量回填进度与检索使用的模型"}
+
+    model: str = Field(
+        primary_key=True,
+        sa_column_kwargs={"comment": "模型名"}
+    )
+    status: str = Field(
+        default=EmbeddingModelStatus.BACKFILLING.value,
+        sa_column_kwargs={"comment": "状态(backfilling/serving/retired)"}
+    )
+    cursor: Optional[UUID] = Field(
+        default=None,
+        sa_type=PGUUID(as_uuid=True),
+        sa_column_kwargs={"comment": "回填游标: 已处理到的文本块ID"}
+    )
+    embedded: int = Field(
+        default=0,
+        sa_column_kwargs={"comment": "本模型已回填的文本块数"}
+    )
+    created_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column_kwargs={"comment": "创建时间"}
+    )
+    updated_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column_kwargs={"comment": "更新时间"}
+    )
+    switched_at: Optional[datetime] = Field(
+        default=None,
+        sa_column_kwargs={"comment": "切换为检索模型的时间"}
+    )
+
+
 class Collection(SQLModel, table=True):
     """
     收藏夹表模型 (Collection Model)
@@ -292,7 +514,11 @@ class Collection(SQLModel, table=True):
         - 将论文添加到收藏夹以便管理。
     """
     __tablename__ = "collections"
-    __table_args__ = {"comment": "收藏夹表: 用户自定义的论文集合"}
+    __table_args__ = (
+        # 列表游标分页
+        Index("ix_collections_user_updated_id", "user_id", "updated_at", "id"),
+        {"comment": "收藏夹表: 用户自定义的论文集合"},
+    )
 
     id: UUID = Field(
         default_factory=uuid4,
@@ -340,7 +566,11 @@ class CollectionPaper(SQLModel, table=True):
         实现收藏夹与论文的多对多关联。
     """
     __tablename__ = "collection_papers"
-    __table_args__ = {"comment": "收藏夹-论文关联表"}
+    __table_args__ = (
+        # 列表游标分页
+        Index("ix_collection_papers_collection_created_paper", "collection_id", "created_at", "paper_id"),
+        {"comment": "收藏夹-论文关联表"},
+    )
 
     id: UUID = Field(
         default_factory=uuid4,
@@ -384,7 +614,11 @@ class SearchHistory(SQLModel, table=True):
         - 分析用户感兴趣的领域。
     """
     __tablename__ = "search_histories"
-    __table_args__ = {"comment": "搜索历史表: 记录用户的搜索关键词及上下文"}
+    __table_args__ = (
+        # 列表游标分页
+        Index("ix_search_histories_user_created_id", "user_id", "created_at", "id"),
+        {"comment": "搜索历史表: 记录用户的搜索关键词及上下文"},
+    )
 
     id: UUID = Field(
         default_factory=uuid4,
@@ -901,7 +1135,11 @@ class AgentSession(SQLModel, table=True):
 
 class Job(SQLModel, table=True):
     __tablename__ = "jobs"
-    __table_args__ = {"comment": "作业表: 存储异步任务信息"}
+    __table_args__ = (
+        # 同一用户的幂等键唯一，作业编排依赖 ON CONFLICT (user_id, idempotency_key) 去重
+        Index("uq_jobs_user_idempotency_key", "user_id", "idempotency_key", unique=True),
+        {"comment": "作业表: 存储异步任务信息"},
+    )
     id: UUID = Field(
         default_factory=uuid4,
         primary_key=True,
@@ -0,0 +1,68 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_pg_pagination
+创建时间: 2026年10月20日 01:00
+更新时间: 2026年10月20日 01:00
+更新记录:
+    [2026年10月20日 01:00:v1.0_pg_pagination:列表查询的键集(游标)分页，保留 OFFSET 兼容模式]
+'''
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, Select, tuple_
+
+from common.model.errors import BusinessError
+
+# 列表接口通过响应头返回下一页游标，响应体结构保持不变
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    """将最后一行的 (排序时间, ID) 编码为不透明游标 (URL 安全的 base64)"""
+    payload = json.dumps([sort_value.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """解析游标，格式不合法时抛出 BusinessError (400)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise BusinessError(message="无效的分页游标")
+
+
+def paginate(
+    statement: Select,
+    sort_column: ColumnElement,
+    id_column: ColumnElement,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Select:
+    """
+    按 (sort_column, id_column) 倒序分页
+
+    - 传入 cursor: 键集分页，WHERE (sort, id) < (游标值) 直接在复合索引上定位起点，
+      翻页耗时与页码无关，且翻页期间插入的新行不会导致重复或遗漏；此时忽略 offset。
+    - 未传 cursor: 兼容旧接口的 OFFSET 分页。
+    id_column 作为排序的唯一性补充，排序时间相同的行顺序稳定。
+    """
+    statement = statement.order_by(sort_column.desc(), id_column.desc()).limit(limit)
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        return statement.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    return statement.offset(offset)
+
+
+def next_cursor(rows: Sequence[Any], limit: int, key: Callable[[Any], Tuple[datetime, UUID]]) -> Optional[str]:
+    """满页时由最后一行生成下一页游标，不足一页说明已到末尾，返回 None"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
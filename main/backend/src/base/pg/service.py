@@ -1,25 +1,40 @@
 
 import logging
-from typing import AsyncGenerator, Optional, List, Annotated
+from typing import AsyncGenerator, Awaitable, Callable, Optional, List, Annotated, Any, Dict, Iterable, Sequence, Set, Type, TypeVar
 from uuid import UUID
+from datetime import datetime
 from contextlib import asynccontextmanager
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.future import select
-from sqlalchemy import func, delete, Tuple
-from sqlalchemy.orm import selectinload
-from fastapi import Depends
+from sqlalchemy import ColumnElement, case, cast, func, delete, update, exists, literal, or_, tuple_, Tuple
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, aliased, selectinload
+from pgvector.sqlalchemy import Vector
+from fastapi import Depends, Request
+from sqlmodel import SQLModel
 
 from base.config import settings
-from base.pg.entity import User, Paper, Collection, CollectionPaper, PaperChunk, PaperSummary, Layer, Annotation, Note, MindMap, AgentSession, Job
-from common.model.enums import PaperStatus
+from base.embedding.registry import embedding_dimension
+from base.pg.bulk import bulk_insert
+from base.pg.pagination import paginate
+from base.pg.vector_index import HNSW_MAX_EF_SEARCH, paper_embedding_distance, paper_model_filter
+from base.pg.entity import User, Paper, Collection, CollectionPaper, PaperChunk, ChunkEmbedding, PaperEmbedding, RelatedPaper, EmbeddingModelState, PaperSummary, Layer, Annotation, Note, MindMap, AgentSession, Job, Report
+from base.redis.read_your_writes import ReadYourWrites
+from common.model.enums import EmbeddingModelStatus, PaperStatus
+from common.security import decode_access_token
 
 logger = logging.getLogger(__name__)
 
 # 1. 创建异步引擎
-database_url = settings.database_url
-if database_url.startswith("postgresql://"):
-    database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+def _async_url(url: str) -> str:
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+database_url = _async_url(settings.database_url)
 
 engine = create_async_engine(
     database_url,
@@ -30,6 +45,16 @@ engine = create_async_engine(
     pool_recycle=3600,
 )
 
+# 只读副本 (可选)，独立连接池，只读查询不占用主库连接
+replica_engine = create_async_engine(
+    _async_url(settings.database_replica_url),
+    echo=False,
+    future=True,
+    pool_size=settings.database_replica_pool_size,
+    max_overflow=settings.database_replica_max_overflow,
+    pool_recycle=3600,
+) if settings.database_replica_url else None
+
 # 2. 创建异步会话工厂
 async_session_factory = async_sessionmaker(
     engine,
@@ -38,29 +63,260 @@ async_session_factory = async_sessionmaker(
     autoflush=False,
 )
 
-# 3. 获取数据库会话的依赖项
-async def _get_session() -> AsyncGenerator[AsyncSession, None]:
+replica_session_factory = async_sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+) if replica_engine is not None else None
+
+# 3. 工作单元 (Unit of Work)
+# 工作单元模式的会话 (session.info 带 UNIT_OF_WORK 标记) 中，仓储写入只 flush，
+# 由请求/任务在结束时统一提交一次；其他会话 (脚本、Worker 中直接使用 async_session_factory) 保持仓储内立即提交。
+UNIT_OF_WORK = "unit_of_work"
+AFTER_COMMIT = "after_commit"
+HAS_WRITES = "has_writes"
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def in_unit_of_work(session: AsyncSession) -> bool:
+    return session.info.get(UNIT_OF_WORK) is True
+
+
+def has_writes(session: AsyncSession) -> bool:
+    """会话是否执行过写入 (flush 了实体变更，或执行了 INSERT/UPDATE/DELETE 语句)"""
+    return session.info.get(HAS_WRITES) is True
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, flush_context) -> None:
+    session.info[HAS_WRITES] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_dml(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[HAS_WRITES] = True
+
+
+@asynccontextmanager
+async def untracked_writes(session: AsyncSession) -> AsyncGenerator[None, None]:
+    """
+    块内写入不计为请求的写入 (不触发读己之写粘滞)，用于检索历史这类不要求写后立即读到的记录
+    块内需 flush 完成写入 (save)，块外的写入照常计入。
+    """
+    wrote = has_writes(session)
+    try:
+        yield
+    finally:
+        if not wrote:
+            session.info.pop(HAS_WRITES, None)
+
+
+async def save(session: AsyncSession, *instances: SQLModel) -> None:
+    """
+    仓储写入的收尾
+    工作单元模式下只 flush (主键/约束错误在此抛出)，否则立即提交并刷新 instances
+    """
+    if in_unit_of_work(session):
+        await session.flush()
+        return
+    await session.commit()
+    for instance in instances:
+        await session.refresh(instance)
+
+
+async def on_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    写入提交后的副作用 (缓存失效、删除文件等无法随事务回滚的操作)
+    工作单元模式下登记到会话，统一提交成功后执行、回滚时丢弃；否则仓储已各自提交，立即执行。
+    """
+    if in_unit_of_work(session):
+        session.info.setdefault(AFTER_COMMIT, []).append(callback)
+        return
+    await _run_callbacks([callback])
+
+
+async def _run_callbacks(callbacks: Iterable[Callable[[], Awaitable[None]]]) -> None:
+    # 写入已提交，副作用失败只记录日志，不影响其余回调与请求结果
+    for callback in callbacks:
+        try:
+            await callback()
+        except Exception as e:
+            logger.warning(f"After-commit callback failed: {e}")
+
+
+async def _commit_unit_of_work(session: AsyncSession) -> None:
+    await session.commit()
+    await _run_callbacks(session.info.pop(AFTER_COMMIT, []))
+
+
+async def _rollback_unit_of_work(session: AsyncSession) -> None:
+    session.info.pop(AFTER_COMMIT, None)
+    await session.rollback()
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncGenerator[AsyncSession, None]:
+    """任务内的工作单元: 块内的仓储写入在退出时一次提交，异常时整体回滚"""
+    async with async_session_factory() as session:
+        session.info[UNIT_OF_WORK] = True
+        try:
+            yield session
+            await _commit_unit_of_work(session)
+        except Exception:
+            await _rollback_unit_of_work(session)
+            raise
+
+
+@asynccontextmanager
+async def savepoint(session: AsyncSession) -> AsyncGenerator[None, None]:
+    """
+    包裹允许失败的写入: 失败时只撤销这部分写入，异常继续抛给调用方处理
+    工作单元模式下使用保存点，同一事务中之前的写入不受影响；否则仓储已各自提交，回滚当前事务即可。
+    """
+    if in_unit_of_work(session):
+        async with session.begin_nested():
+            yield
+        return
+    try:
+        yield
+    except Exception:
+        await session.rollback()
+        raise
+
+
+# 4. 获取数据库会话的依赖项
+async def _get_session(read_only: bool = False) -> AsyncGenerator[AsyncSession, None]:
     """
     Core session generator logic.
+
+    read_only=False: 工作单元，请求结束时提交一次 (提交后执行 on_commit 登记的副作用)，异常时回滚。
+    read_only=True: 不做最终提交，关闭时回滚只读事务 (仓储内的写入仍各自提交)。
     """
     async with async_session_factory() as session:
+        if read_only:
+            try:
+                yield session
+            finally:
+                await session.close()
+            return
+        session.info[UNIT_OF_WORK] = True
         try:
             yield session
-            await session.commit()
+            await _commit_unit_of_work(session)
         except Exception:
-            await session.rollback()
+            await _rollback_unit_of_work(session)
             raise
         finally:
             await session.close()
 
-async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
+def _request_principal(request: Request) -> Optional[str]:
+    """
+    请求所属用户 (token 中的 sub)，用于读己之写粘滞
+    与鉴权依赖相同的 token 来源: Header (Bearer) -> Query Param (?token=) -> Cookie (access_token)；
+    这里只做路由判断，不校验用户是否存在。
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        token = request.query_params.get("token") or request.cookies.get("access_token")
+    if not token:
+        return None
+    payload = decode_access_token(token)
+    return str(payload["sub"]) if payload and payload.get("sub") else None
+
+
+async def _mark_recent_write(request: Request) -> None:
+    if replica_session_factory is None:
+        return
+    principal = _request_principal(request)
+    if principal is None:
+        return
+    try:
+        await ReadYourWrites.mark(principal, settings.read_your_writes_seconds)
+    except Exception as e:
+        # 标记失败时该用户短时间内可能从副本读到旧数据，不影响已提交的写入
+        logger.warning(f"Failed to mark recent write for read-your-writes: {e}")
+
+
+async def _reads_from_primary(request: Request) -> bool:
+    """用户在读己之写窗口内时只读请求走主库；无法判断 (Redis 不可用) 时保守地走主库"""
+    principal = _request_principal(request)
+    if principal is None:
+        return False
+    try:
+        return await ReadYourWrites.is_recent(principal)
+    except Exception as e:
+        logger.warning(f"Read-your-writes check failed, reading from primary: {e}")
+        return True
+
+
+async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     FastAPI dependency for database session.
+
+    GET/HEAD/OPTIONS 请求使用只读会话，其余请求使用工作单元会话。
+    依赖在路径函数返回后、响应发送前结束 (scope="function")，提交失败时客户端收到错误而不是成功响应。
+    写请求提交成功且确有写入时标记读己之写窗口 (配置了只读副本时)；只读的 POST (如检索) 不影响后续读请求走副本。
+    """
+    read_only = request.method in READ_ONLY_METHODS
+    async for session in _get_session(read_only=read_only):
+        yield session
+    # 提交时的 flush 同样计入，提交完成后再判断
+    if not read_only and has_writes(session):
+        await _mark_recent_write(request)
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    只读依赖的会话 (不提交，关闭时回滚)
+    配置了只读副本时路由到副本，用户处于读己之写窗口内时仍走主库；未配置副本时等同主库的只读会话。
+    会话中不能有写入: 副本只读，写入会报错。
     """
-    async for session in _get_session():
+    factory = async_session_factory
+    if replica_session_factory is not None and not await _reads_from_primary(request):
+        factory = replica_session_factory
+    async with factory() as session:
         yield session
 
-SessionDep = Annotated[AsyncSession, Depends(get_db_session)]
+SessionDep = Annotated[AsyncSession, Depends(get_db_session, scope="function")]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session, scope="function")]
+
+ModelT = TypeVar("ModelT", bound=SQLModel)
+
+
+async def update_returning(
+    session: AsyncSession,
+    model: Type[ModelT],
+    where: Iterable[ColumnElement],
+    values: Dict[str, Any],
+    commit: bool = True,
+) -> Optional[ModelT]:
+    """
+    部分字段更新: 一条 UPDATE ... RETURNING 完成更新并取回整行
+
+    替代 "SELECT -> 修改 -> commit -> refresh" 的三次往返；归属等校验条件放进 where，
+    未命中 (不存在或无权限) 时返回 None。实体有 updated_at 且未显式指定时一并刷新。
+    会话中已加载的同一行实例原地刷新为更新后的值 (返回的即该实例)。
+    values 按原样写入 (None 即置空)，只更新部分字段时由调用方剔除不需要的键。
+    """
+    values = dict(values)
+    if "updated_at" in model.__table__.columns and "updated_at" not in values:
+        values["updated_at"] = datetime.now()
+    statement = (
+        update(model)
+        .where(*where)
+        .values(**values)
+        .returning(model)
+        # 行已在会话的标识映射中时，用 RETURNING 的新值覆盖实例上的旧属性
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await session.execute(statement)
+    row = result.scalars().first()
+    if commit:
+        await save(session)
+    return row
 
 
 class UserRepository:
@@ -75,8 +331,7 @@ class UserRepository:
     @staticmethod
     async def create_user(session: AsyncSession, user: User) -> User:
         session.add(user)
-        await session.commit()
-        await session.refresh(user)
+        await save(session, user)
         return user
 
     @staticmethod
@@ -88,11 +343,18 @@ class UserRepository:
     @staticmethod
     async def update_user(session: AsyncSession, user: User) -> User:
         session.add(user)
-        await session.commit()
-        await session.refresh(user)
+        await save(session, user)
         return user
 
 
+def _upsert_paper_embeddings(statement):
+    """论文向量按 (paper_id, model) 覆盖写入"""
+    return statement.on_conflict_do_update(
+        index_elements=[PaperEmbedding.paper_id, PaperEmbedding.model],
+        set_={"embedding": statement.excluded.embedding, "updated_at": statement.excluded.updated_at},
+    )
+
+
 class PaperRepository:
     """论文相关的数据访问层"""
 
@@ -105,17 +367,20 @@ class PaperRepository:
     @staticmethod
     async def create_paper(session: AsyncSession, paper: Paper) -> Paper:
         session.add(paper)
-        await session.commit()
-        await session.refresh(paper)
+        await save(session, paper)
         return paper
     
     @staticmethod
     async def update_paper(session: AsyncSession, paper: Paper) -> Paper:
         session.add(paper)
-        await session.commit()
-        await session.refresh(paper)
+        await save(session, paper)
         return paper
 
+    @staticmethod
+    async def update_paper_fields(session: AsyncSession, paper_id: UUID, **values: Any) -> Optional[Paper]:
+        """按字段部分更新论文 (单条 UPDATE ... RETURNING)，论文不存在时返回 None"""
+        return await update_returning(session, Paper, [Paper.id == paper_id], values)
+
     @staticmethod
     async def update_paper_status(
         session: AsyncSession, 
@@ -123,18 +388,10 @@ class PaperRepository:
         status: PaperStatus, 
         error_message: Optional[str] = None
     ) -> Optional[Paper]:
-        statement = select(Paper).where(Paper.id == paper_id)
-        result = await session.execute(statement)
-        paper = result.scalar_one_or_none()
-        
-        if paper:
-            paper.status = status
-            if error_message:
-                paper.error_message = error_message
-            session.add(paper)
-            await session.commit()
-            await session.refresh(paper)
-        return paper
+        values: Dict[str, Any] = {"status": status}
+        if error_message:
+            values["error_message"] = error_message
+        return await PaperRepository.update_paper_fields(session, paper_id, **values)
 
     @staticmethod
     async def update_paper_metadata(
@@ -144,30 +401,37 @@ class PaperRepository:
         authors: Optional[List[str]] = None,
         toc: Optional[List] = None
     ) -> Optional[Paper]:
-        statement = select(Paper).where(Paper.id == paper_id)
-        result = await session.execute(statement)
-        paper = result.scalar_one_or_none()
-        
-        if paper:
-            if title:
-                paper.title = title
-            if authors:
-                paper.authors = authors
-            if toc:
-                paper.toc = toc
-            session.add(paper)
-            await session.commit()
-            await session.refresh(paper)
-        return paper
+        values = PaperRepository.metadata_values(title, authors, toc)
+        if not values:
+            return await PaperRepository.get_paper_by_id(session, paper_id)
+        return await PaperRepository.update_paper_fields(session, paper_id, **values)
+
+    @staticmethod
+    def metadata_values(
+        title: Optional[str] = None,
+        authors: Optional[List[str]] = None,
+        toc: Optional[List] = None
+    ) -> Dict[str, Any]:
+        """元数据中的非空字段 (空值不覆盖已有元数据)"""
+        return {
+            name: value
+            for name, value in (("title", title), ("authors", authors), ("toc", toc))
+            if value
+        }
 
     @staticmethod
     async def get_user_papers(
         session: AsyncSession, 
         user_id: UUID, 
         limit: int = 10, 
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[Paper]:
-        statement = select(Paper).where(Paper.user_id == user_id).order_by(Paper.created_at.desc()).limit(limit).offset(offset)
+        """按 (created_at, id) 倒序分页，传入 cursor 时为键集分页 (见 base.pg.pagination)"""
+        statement = paginate(
+            select(Paper).where(Paper.user_id == user_id),
+            Paper.created_at, Paper.id, limit, offset, cursor
+        )
         result = await session.execute(statement)
         return result.scalars().all()
 
@@ -179,14 +443,161 @@ class PaperRepository:
         
         if paper:
             await session.delete(paper)
-            await session.commit()
+            await save(session)
             return True
         return False
 
     @staticmethod
-    async def create_paper_chunks(session: AsyncSession, chunks: List[PaperChunk]) -> None:
-        session.add_all(chunks)
-        await session.commit()
+    async def create_paper_chunks(
+        session: AsyncSession,
+        chunks: List[PaperChunk],
+        embeddings: Sequence[ChunkEmbedding] = (),
+        paper_embedding: Optional[PaperEmbedding] = None,
+    ) -> None:
+        """
+        批量写入文本块及其向量 (asyncpg 下为二进制 COPY，见 base.pg.bulk)
+        paper_embedding: 论文向量，与文本块一同写入 (重新导入时覆盖原论文向量)
+        """
+        await bulk_insert(session, chunks)
+        await bulk_insert(session, embeddings)
+        if paper_embedding is not None:
+            await session.execute(_upsert_paper_embeddings(pg_insert(PaperEmbedding).values(
+                paper_id=paper_embedding.paper_id,
+                model=paper_embedding.model,
+                embedding=paper_embedding.embedding,
+                updated_at=paper_embedding.updated_at,
+            )))
+        await save(session)
+
+    @staticmethod
+    async def delete_paper_chunks(session: AsyncSession, paper_id: UUID) -> int:
+        statement = delete(PaperChunk).where(PaperChunk.paper_id == paper_id)
+        result = await session.execute(statement)
+        await save(session)
+        return result.rowcount
+
+    @staticmethod
+    async def set_vector_search_params(
+        session: AsyncSession,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> None:
+        """
+        设置当前事务内的向量索引查询参数 (set_config(..., true) 等价于 SET LOCAL，事务结束后恢复)
+        ef_search: HNSW 搜索候选列表长度 (不超过 pgvector 上限 1000); probes: IVFFlat 查询的聚类数，为空时取配置
+
+        开启 vector_search_iterative_scan 时，带过滤条件 (用户/论文) 的近似检索在过滤后不足 LIMIT 条时继续扫描索引
+        (至多 vector_search_max_scan_tuples 个元组)，而不是只返回 ef_search 个候选中通过过滤的部分。
+        """
+        ef_search = min(ef_search or settings.vector_search_ef_search, HNSW_MAX_EF_SEARCH)
+        params = [
+            func.set_config("hnsw.ef_search", str(ef_search), True),
+            func.set_config("ivfflat.probes", str(probes or settings.vector_search_ivfflat_probes), True),
+        ]
+        iterative_scan = settings.vector_search_iterative_scan
+        if iterative_scan != "off":
+            params += [
+                func.set_config("hnsw.iterative_scan", iterative_scan, True),
+                func.set_config("hnsw.max_scan_tuples", str(settings.vector_search_max_scan_tuples), True),
+            ]
+            # IVFFlat 只支持 relaxed_order (结果可能不严格按距离排序)
+            if iterative_scan == "relaxed_order":
+                params.append(func.set_config("ivfflat.iterative_scan", iterative_scan, True))
+        await session.execute(select(*params))
+
+    @staticmethod
+    async def set_fuzzy_search_params(session: AsyncSession, threshold: Optional[float] = None) -> None:
+        """设置当前事务内 pg_trgm 相似度运算符 (%、<%) 的阈值，为空时取配置"""
+        value = str(threshold or settings.fuzzy_search_threshold)
+        await session.execute(select(
+            func.set_config("pg_trgm.similarity_threshold", value, True),
+            func.set_config("pg_trgm.word_similarity_threshold", value, True),
+        ))
+
+    @staticmethod
+    async def get_chunk_contents(session: AsyncSession, chunk_ids: Iterable[UUID]) -> List[tuple[UUID, str]]:
+        """按ID读取文本块内容 (只取 id/content，不加载向量列)"""
+        chunk_ids = list(chunk_ids)
+        if not chunk_ids:
+            return []
+        result = await session.execute(
+            select(PaperChunk.id, PaperChunk.content).where(PaperChunk.id.in_(chunk_ids))
+        )
+        return [(chunk_id, content) for chunk_id, content in result.all()]
+
+    @staticmethod
+    async def save_chunk_embeddings(session: AsyncSession, model: str, vectors: List[tuple[UUID, List[float]]]) -> None:
+        """
+        写入 (或覆盖) 文本块在某个模型下的向量，可重复执行
+        vectors: [(chunk_id, 向量)]，维度须与模型登记的维度一致 (否则无法进入该模型的索引)
+        """
+        if not vectors:
+            return
+        dim = embedding_dimension(model)
+        for chunk_id, vector in vectors:
+            if len(vector) != dim:
+                raise ValueError(f"向量维度与模型不一致: {model} 需要 {dim} 维，文本块 {chunk_id} 为 {len(vector)} 维")
+        statement = pg_insert(ChunkEmbedding).values([
+            {"chunk_id": chunk_id, "model": model, "embedding": vector, "created_at": datetime.now()}
+            for chunk_id, vector in vectors
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[ChunkEmbedding.chunk_id, ChunkEmbedding.model],
+            set_={"embedding": statement.excluded.embedding, "created_at": statement.excluded.created_at},
+        )
+        await session.execute(statement)
+        await save(session)
+
+    @staticmethod
+    async def refresh_paper_embeddings(session: AsyncSession, model: str, chunk_ids: Iterable[UUID]) -> None:
+        """
+        按文本块所属论文当前已有的该模型向量重新计算论文向量 (文本块向量均值)，可重复执行
+        用于导入之外写入文本块向量的场景 (补算向量、更换模型回填)，均值在数据库内计算，不读回向量。
+        """
+        chunk_ids = list(chunk_ids)
+        if not chunk_ids:
+            return
+        papers = select(PaperChunk.paper_id).where(PaperChunk.id.in_(chunk_ids))
+        centroids = (
+            select(PaperChunk.paper_id, literal(model), cast(func.avg(ChunkEmbedding.embedding), Vector()), func.now())
+            .join(PaperChunk, PaperChunk.id == ChunkEmbedding.chunk_id)
+            .where(ChunkEmbedding.model == model, PaperChunk.paper_id.in_(papers))
+            .group_by(PaperChunk.paper_id)
+        )
+        await session.execute(_upsert_paper_embeddings(
+            pg_insert(PaperEmbedding).from_select(["paper_id", "model", "embedding", "updated_at"], centroids)
+        ))
+        await save(session)
+
+    @staticmethod
+    async def delete_failed_paper_chunks(session: AsyncSession, before: datetime, limit: int) -> int:
+        """删除一批处理失败(且在 before 之前失败)的论文残留文本块，返回删除条数"""
+        batch = (
+            select(PaperChunk.id)
+            .join(Paper, Paper.id == PaperChunk.paper_id)
+            .where(Paper.status == PaperStatus.FAILED, Paper.updated_at < before)
+            .limit(limit)
+        )
+        result = await session.execute(delete(PaperChunk).where(PaperChunk.id.in_(batch)))
+        await save(session)
+        return result.rowcount
+
+    @staticmethod
+    async def get_existing_file_keys(session: AsyncSession, file_keys: Iterable[str]) -> Set[str]:
+        """返回仍被论文引用的文件Key"""
+        file_keys = list(file_keys)
+        if not file_keys:
+            return set()
+        result = await session.execute(select(Paper.file_key).where(Paper.file_key.in_(file_keys)))
+        return set(result.scalars().all())
+
+    @staticmethod
+    async def get_paper_statuses(session: AsyncSession, paper_ids: Iterable[UUID]) -> Dict[UUID, PaperStatus]:
+        paper_ids = list(paper_ids)
+        if not paper_ids:
+            return {}
+        result = await session.execute(select(Paper.id, Paper.status).where(Paper.id.in_(paper_ids)))
+        return {paper_id: status for paper_id, status in result.all()}
 
 
 class CollectionRepository:
@@ -196,8 +607,7 @@ class CollectionRepository:
     async def create_collection(session: AsyncSession, collection: Collection) -> Collection:
         """创建收藏夹"""
         session.add(collection)
-        await session.commit()
-        await session.refresh(collection)
+        await save(session, collection)
         return collection
 
     @staticmethod
@@ -224,17 +634,16 @@ class CollectionRepository:
         session: AsyncSession, 
         user_id: UUID, 
         limit: int = 100, 
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[Tuple]:
-        """获取用户的收藏夹列表及其论文数量"""
-        statement = (
+        """获取用户的收藏夹列表及其论文数量，按 (updated_at, id) 倒序分页"""
+        statement = paginate(
             select(Collection, func.count(CollectionPaper.paper_id))
             .outerjoin(CollectionPaper, Collection.id == CollectionPaper.collection_id)
             .where(Collection.user_id == user_id)
-            .group_by(Collection.id)
-            .order_by(Collection.updated_at.desc())
-            .limit(limit)
-            .offset(offset)
+            .group_by(Collection.id),
+            Collection.updated_at, Collection.id, limit, offset, cursor
         )
         result = await session.execute(statement)
         return result.all()
@@ -252,15 +661,14 @@ class CollectionRepository:
     async def update_collection(session: AsyncSession, collection: Collection) -> Collection:
         """更新收藏夹"""
         session.add(collection)
-        await session.commit()
-        await session.refresh(collection)
+        await save(session, collection)
         return collection
 
     @staticmethod
     async def delete_collection(session: AsyncSession, collection: Collection) -> bool:
         """删除收藏夹"""
         await session.delete(collection)
-        await session.commit()
+        await save(session)
         return True
 
     @staticmethod
@@ -283,8 +691,7 @@ class CollectionRepository:
             
         link = CollectionPaper(collection_id=collection_id, paper_id=paper_id)
         session.add(link)
-        await session.commit()
-        await session.refresh(link)
+        await save(session, link)
         return link
 
     @staticmethod
@@ -303,7 +710,7 @@ class CollectionRepository:
         
         if link:
             await session.delete(link)
-            await session.commit()
+            await save(session)
             return True
         return False
 
@@ -322,7 +729,7 @@ class CollectionRepository:
             CollectionPaper.collection_id.in_(subquery)
         )
         result = await session.execute(statement)
-        await session.commit()
+        await save(session)
         return result.rowcount
 
     @staticmethod
@@ -330,19 +737,22 @@ class CollectionRepository:
         session: AsyncSession, 
         collection_id: UUID,
         limit: int = 20,
-        offset: int = 0
-    ) -> List[Paper]:
-        """获取收藏夹内的论文列表"""
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> List[Tuple]:
+        """
+        获取收藏夹内的论文列表，按收藏时间 (created_at, paper_id) 倒序分页
+        返回 [(论文, 收藏时间)]，收藏时间用于生成下一页游标
+        """
         # 使用 join 查询
-        statement = (
-            select(Paper)
+        statement = paginate(
+            select(Paper, CollectionPaper.created_at)
             .join(CollectionPaper, Paper.id == CollectionPaper.paper_id)
-            .where(CollectionPaper.collection_id == collection_id)
-            .limit(limit)
-            .offset(offset)
+            .where(CollectionPaper.collection_id == collection_id),
+            CollectionPaper.created_at, CollectionPaper.paper_id, limit, offset, cursor
         )
         result = await session.execute(statement)
-        return result.scalars().all()
+        return result.all()
 
 
 class ReaderRepository:
@@ -439,8 +849,7 @@ class ReaderRepository:
     async def create_layer(session: AsyncSession, layer: Layer) -> Layer:
         """创建图层"""
         session.add(layer)
-        await session.commit()
-        await session.refresh(layer)
+        await save(session, layer)
         return layer
 
     @staticmethod
@@ -454,16 +863,30 @@ class ReaderRepository:
     async def create_annotation(session: AsyncSession, annotation: Annotation) -> Annotation:
         """创建标注"""
         session.add(annotation)
-        await session.commit()
-        await session.refresh(annotation)
+        await save(session, annotation)
         return annotation
 
+    @staticmethod
+    async def update_annotation_fields(
+        session: AsyncSession, annotation_id: UUID, layer_id: UUID, user_id: UUID, **values: Any
+    ) -> Optional[Annotation]:
+        """
+        部分更新标注 (单条 UPDATE ... RETURNING)
+        标注需属于 layer_id 且图层归属 user_id，否则不更新并返回 None
+        """
+        owned_layer = select(Layer.id).where(Layer.id == layer_id, Layer.user_id == user_id)
+        return await update_returning(
+            session,
+            Annotation,
+            [Annotation.id == annotation_id, Annotation.layer_id == layer_id, Annotation.layer_id.in_(owned_layer)],
+            values,
+        )
+
     @staticmethod
     async def update_annotation(session: AsyncSession, annotation: Annotation) -> Annotation:
         """更新标注"""
         session.add(annotation)
-        await session.commit()
-        await session.refresh(annotation)
+        await save(session, annotation)
         return annotation
         
     @staticmethod
@@ -477,20 +900,362 @@ class ReaderRepository:
     async def delete_annotation(session: AsyncSession, annotation: Annotation) -> bool:
         """删除标注"""
         await session.delete(annotation)
-        await session.commit()
+        await save(session)
         return True
 
+    @staticmethod
+    async def update_layer_fields(session: AsyncSession, layer_id: UUID, user_id: UUID, **values: Any) -> Optional[Layer]:
+        """部分更新用户自己的图层 (单条 UPDATE ... RETURNING)，不存在或无权限时返回 None"""
+        return await update_returning(session, Layer, [Layer.id == layer_id, Layer.user_id == user_id], values)
+
     @staticmethod
     async def update_layer(session: AsyncSession, layer: Layer) -> Layer:
         """更新图层"""
         session.add(layer)
-        await session.commit()
-        await session.refresh(layer)
+        await save(session, layer)
         return layer
 
     @staticmethod
     async def delete_layer(session: AsyncSession, layer: Layer) -> bool:
         """删除图层"""
         await session.delete(layer)
-        await session.commit()
+        await save(session)
         return True
+
+
+class JobRepository:
+    """作业相关的数据访问层"""
+
+    @staticmethod
+    async def create_job(session: AsyncSession, job: Job) -> Job:
+        session.add(job)
+        await save(session, job)
+        return job
+
+    @staticmethod
+    async def get_job_by_id(session: AsyncSession, job_id: UUID) -> Optional[Job]:
+        statement = select(Job).where(Job.id == job_id)
+        result = await session.execute(statement)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_jobs_by_ids(session: AsyncSession, job_ids: Iterable[UUID]) -> List[Job]:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return []
+        statement = select(Job).where(Job.id.in_(job_ids))
+        result = await session.execute(statement)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_job_by_idempotency_key(session: AsyncSession, user_id: UUID, idempotency_key: str) -> Optional[Job]:
+        statement = select(Job).where(Job.user_id == user_id, Job.idempotency_key == idempotency_key)
+        result = await session.execute(statement)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def create_job_if_absent(session: AsyncSession, job: Job) -> tuple[Job, bool]:
+        """
+        按 (user_id, idempotency_key) 幂等创建作业 (INSERT ... ON CONFLICT DO NOTHING)
+        返回 (作业, 是否新建)；并发重复提交时只有一个请求能创建成功，其余返回已有作业。
+        """
+        values = {column.name: getattr(job, column.name) for column in Job.__table__.columns}
+        statement = (
+            pg_insert(Job)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["user_id", "idempotency_key"])
+            .returning(Job.id)
+        )
+        created = (await session.execute(statement)).scalar_one_or_none() is not None
+        await save(session)
+        existing = await JobRepository.get_job_by_idempotency_key(session, job.user_id, job.idempotency_key)
+        return existing, created
+
+    @staticmethod
+    async def get_blocked_jobs(session: AsyncSession, user_id: UUID) -> List[Job]:
+        """用户下等待依赖的作业 (数量很少，依赖关系在应用层过滤)"""
+        statement = select(Job).where(Job.user_id == user_id, Job.status == "blocked")
+        result = await session.execute(statement)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def transition_jobs(
+        session: AsyncSession, job_ids: Iterable[UUID], from_status: str, values: Dict[str, Any]
+    ) -> List[UUID]:
+        """
+        条件状态迁移: 仅更新当前状态为 from_status 的作业，返回实际迁移的作业ID
+        多个父作业同时完成时，同一依赖作业只会被其中一个迁移 (避免重复入队)。
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return []
+        statement = (
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == from_status)
+            .values(**values)
+            .returning(Job.id)
+        )
+        result = await session.execute(statement)
+        transitioned = list(result.scalars().all())
+        await save(session)
+        return transitioned
+
+    @staticmethod
+    async def delete_finished_jobs(
+        session: AsyncSession, statuses: Iterable[str], before: datetime, limit: int
+    ) -> int:
+        """删除一批在 before 之前结束的作业 (被研究报告引用的作业保留)，返回删除条数"""
+        batch = (
+            select(Job.id)
+            .where(
+                Job.status.in_(list(statuses)),
+                func.coalesce(Job.completed_at, Job.updated_at) < before,
+                ~exists().where(Report.job_id == Job.id),
+            )
+            .limit(limit)
+        )
+        result = await session.execute(delete(Job).where(Job.id.in_(batch)))
+        await save(session)
+        return result.rowcount
+
+    @staticmethod
+    async def bulk_update_jobs(session: AsyncSession, rows: List[dict], final_statuses: Sequence[str] = ()) -> None:
+        """
+        按主键批量更新作业 (ORM bulk UPDATE by primary key, 一次 executemany)
+        rows: [{"id": job_id, "status": ..., "progress": ..., ...}, ...]
+        final_statuses: 已处于这些状态 (终态) 的作业不再更新，其他进程缓冲的旧进度不会覆盖已写入的终态
+        """
+        if not rows:
+            return
+        statement = update(Job)
+        if final_statuses:
+            # 带额外条件的按主键批量更新不支持同步会话中的实例 (此处的会话只用于写入)
+            statement = statement.where(Job.status.not_in(final_statuses)).execution_options(synchronize_session=False)
+        await session.execute(statement, rows)
+        await save(session)
+
+
+def _has_embedding(model: str) -> ColumnElement[bool]:
+    """文本块已有该模型的向量 (按主键 (chunk_id, model) 判断)"""
+    return exists().where(ChunkEmbedding.chunk_id == PaperChunk.id, ChunkEmbedding.model == model)
+
+
+class EmbeddingModelRepository:
+    """向量化模型状态 (embedding_models) 的数据访问层"""
+
+    @staticmethod
+    async def get_serving_model(session: AsyncSession) -> Optional[str]:
+        result = await session.execute(
+            select(EmbeddingModelState.model).where(EmbeddingModelState.status == EmbeddingModelStatus.SERVING.value)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_state(session: AsyncSession, model: str) -> Optional[EmbeddingModelState]:
+        return await session.get(EmbeddingModelState, model, populate_existing=True)
+
+    @staticmethod
+    async def list_states(session: AsyncSession) -> List[EmbeddingModelState]:
+        result = await session.execute(select(EmbeddingModelState).order_by(EmbeddingModelState.created_at))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def start_backfill(session: AsyncSession, model: str) -> EmbeddingModelState:
+        """
+        登记模型的向量回填并返回其状态
+        已在回填中或已是检索模型时保持不变 (继续原进度)；已退役的模型从头重新回填。
+        """
+        now = datetime.now()
+        backfilling = EmbeddingModelStatus.BACKFILLING.value
+        statement = pg_insert(EmbeddingModelState).values(
+            model=model, status=backfilling, embedded=0, created_at=now, updated_at=now
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[EmbeddingModelState.model],
+            set_={"status": backfilling, "cursor": None, "embedded": 0, "updated_at": now},
+            where=EmbeddingModelState.status == EmbeddingModelStatus.RETIRED.value,
+        )
+        await session.execute(statement)
+        await save(session)
+        return await session.get(EmbeddingModelState, model, populate_existing=True)
+
+    @staticmethod
+    async def get_chunks_missing_embedding(
+        session: AsyncSession, model: str, after: Optional[UUID], limit: int
+    ) -> List[tuple[UUID, str]]:
+        """按主键顺序取 after 之后一批还没有该模型向量的文本块 (id, content)"""
+        statement = select(PaperChunk.id, PaperChunk.content).where(~_has_embedding(model))
+        if after is not None:
+            statement = statement.where(PaperChunk.id > after)
+        result = await session.execute(statement.order_by(PaperChunk.id).limit(limit))
+        return [(chunk_id, content) for chunk_id, content in result.all()]
+
+    @staticmethod
+    async def count_coverage(session: AsyncSession, model: str) -> tuple[int, int]:
+        """返回 (已有该模型向量的文本块数, 文本块总数)"""
+        result = await session.execute(select(
+            select(func.count()).select_from(ChunkEmbedding).where(ChunkEmbedding.model == model).scalar_subquery(),
+            select(func.count()).select_from(PaperChunk).scalar_subquery(),
+        ))
+        embedded, total = result.one()
+        return embedded, total
+
+    @staticmethod
+    async def advance_cursor(session: AsyncSession, model: str, cursor: Optional[UUID], embedded: int = 0) -> None:
+        """记录回填进度: 游标移到 cursor (为空表示从头开始下一轮)，累加本批写入条数"""
+        await session.execute(
+            update(EmbeddingModelState)
+            .where(EmbeddingModelState.model == model)
+            .values(cursor=cursor, embedded=EmbeddingModelState.embedded + embedded, updated_at=datetime.now())
+        )
+        await save(session)
+
+    @staticmethod
+    async def switch_serving(session: AsyncSession, model: str) -> bool:
+        """
+        把回填中的 model 切换为检索模型，原检索模型置为 retired，返回是否切换
+
+        一条 UPDATE 同时改写两行，读取方不会看到没有检索模型或有两个检索模型的中间状态；
+        条件中再次确认所有文本块都已有该模型的向量 (覆盖率 100%)，否则不切换。
+        """
+        now = datetime.now()
+        target = EmbeddingModelState.model == model
+        candidate = aliased(EmbeddingModelState)
+        statement = (
+            update(EmbeddingModelState)
+            .where(
+                or_(target, EmbeddingModelState.status == EmbeddingModelStatus.SERVING.value),
+                select(candidate.model)
+                .where(candidate.model == model, candidate.status == EmbeddingModelStatus.BACKFILLING.value)
+                .exists(),
+                ~select(PaperChunk.id).where(~_has_embedding(model)).exists(),
+            )
+            .values(
+                status=case(
+                    (target, EmbeddingModelStatus.SERVING.value),
+                    else_=EmbeddingModelStatus.RETIRED.value,
+                ),
+                switched_at=case((target, now), else_=EmbeddingModelState.switched_at),
+                updated_at=now,
+            )
+            .returning(EmbeddingModelState.model)
+        )
+        result = await session.execute(statement)
+        switched = model in result.scalars().all()
+        await save(session)
+        return switched
+
+
+class RelatedPaperRepository:
+    """相关论文 (related_papers) 的数据访问层"""
+
+    @staticmethod
+    async def find_nearest_papers(
+        session: AsyncSession, paper_id: UUID, user_id: UUID, model: str, limit: int
+    ) -> List[tuple[UUID, float]]:
+        """
+        用户论文库中论文向量与某篇论文最相近的论文 [(论文ID, 相似度)]，走该模型的论文向量索引
+        索引按全体用户的论文排序，用户过滤在索引扫描之后: 调用方须先 set_vector_search_params
+        (ef_search 不小于 limit，开启迭代索引扫描)，过滤后不足 limit 篇时继续扫描索引。
+        该论文还没有论文向量时返回空列表。
+        """
+        source = aliased(PaperEmbedding)
+        target = select(source.embedding).where(source.paper_id == paper_id, source.model == model).correlate(None)
+        distance = paper_embedding_distance(model, target.scalar_subquery())
+        statement = (
+            select(Paper.id, (1 - distance).label("score"))
+            .join(PaperEmbedding, PaperEmbedding.paper_id == Paper.id)
+            .where(
+                paper_model_filter(model),
+                Paper.user_id == user_id,
+                Paper.id != paper_id,
+                Paper.status != PaperStatus.FAILED,
+                # 不相关子查询只执行一次，没有论文向量时直接返回空结果
+                target.exists(),
+            )
+            .order_by(distance)
+            .limit(limit)
+        )
+        result = await session.execute(statement)
+        return [(related_id, score) for related_id, score in result.all()]
+
+    @staticmethod
+    async def replace_related(session: AsyncSession, paper_id: UUID, related: List[tuple[UUID, float]]) -> None:
+        """整体替换一篇论文的相关论文列表"""
+        await session.execute(delete(RelatedPaper).where(RelatedPaper.paper_id == paper_id))
+        if related:
+            await session.execute(pg_insert(RelatedPaper).values([
+                {"paper_id": paper_id, "related_paper_id": related_id, "score": score}
+                for related_id, score in related
+            ]))
+        await save(session)
+
+    @staticmethod
+    async def offer_related(
+        session: AsyncSession, paper_id: UUID, neighbours: List[tuple[UUID, float]], limit: int
+    ) -> None:
+        """
+        把 paper_id 加入各近邻论文的列表 (相似度对称)，再把这些列表截断为前 limit 个
+        即 paper_id 只在比某个列表原第 limit 名更相近时留在该列表中。
+        """
+        if not neighbours:
+            return
+        statement = pg_insert(RelatedPaper).values([
+            {"paper_id": neighbour_id, "related_paper_id": paper_id, "score": score}
+            for neighbour_id, score in neighbours
+        ])
+        await session.execute(statement.on_conflict_do_update(
+            index_elements=[RelatedPaper.paper_id, RelatedPaper.related_paper_id],
+            set_={"score": statement.excluded.score},
+        ))
+        ranked = (
+            select(
+                RelatedPaper.paper_id,
+                RelatedPaper.related_paper_id,
+                func.row_number().over(
+                    partition_by=RelatedPaper.paper_id,
+                    order_by=(RelatedPaper.score.desc(), RelatedPaper.related_paper_id),
+                ).label("rank"),
+            )
+            .where(RelatedPaper.paper_id.in_([neighbour_id for neighbour_id, _ in neighbours]))
+            .subquery()
+        )
+        await session.execute(delete(RelatedPaper).where(
+            tuple_(RelatedPaper.paper_id, RelatedPaper.related_paper_id).in_(
+                select(ranked.c.paper_id, ranked.c.related_paper_id).where(ranked.c.rank > limit)
+            )
+        ))
+        await save(session)
+
+    @staticmethod
+    async def get_listing_papers(session: AsyncSession, paper_id: UUID) -> List[UUID]:
+        """相关论文列表中包含 paper_id 的论文 (related_paper_id 索引)"""
+        result = await session.execute(
+            select(RelatedPaper.paper_id).where(RelatedPaper.related_paper_id == paper_id)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_embedded_papers(session: AsyncSession, model: str, user_id: Optional[UUID] = None) -> List[UUID]:
+        """已有该模型论文向量的论文 (可限定用户)，用于重建相关论文"""
+        statement = select(PaperEmbedding.paper_id).where(PaperEmbedding.model == model)
+        if user_id is not None:
+            statement = statement.join(Paper, Paper.id == PaperEmbedding.paper_id).where(Paper.user_id == user_id)
+        result = await session.execute(statement.order_by(PaperEmbedding.paper_id))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_related_papers(
+        session: AsyncSession, paper_id: UUID, user_id: UUID, limit: int
+    ) -> List[tuple[Paper, float]]:
+        """读取预先计算的相关论文 [(论文, 相似度)]，按相似度降序 (主键前缀读取，不做向量计算)"""
+        statement = (
+            select(Paper, RelatedPaper.score)
+            .select_from(RelatedPaper)
+            .join(Paper, Paper.id == RelatedPaper.related_paper_id)
+            .where(RelatedPaper.paper_id == paper_id, Paper.user_id == user_id, Paper.status != PaperStatus.FAILED)
+            .order_by(RelatedPaper.score.desc(), RelatedPaper.related_paper_id)
+            .limit(limit)
+        )
+        result = await session.execute(statement)
+        return [(paper, score) for paper, score in result.all()]
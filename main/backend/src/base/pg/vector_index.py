@@ -0,0 +1,201 @@
+'''
+开发者: BackendAgent
+当前版本: v1.4_pg_vector_index
+创建时间: 2026年10月20日 06:00
+更新时间: 2026年10月20日 11:00
+更新记录:
+    [2026年10月20日 11:00:v1.4_pg_vector_index:新增 is_vector_index_name，迁移 autogenerate 时忽略按模型创建的向量索引]
+    [2026年10月20日 11:00:v1.3_pg_vector_index:新增 hnsw.ef_search 上限常量 (pgvector 限制)；nearest 的 LIMIT 使用具名参数]
+    [2026年10月20日 09:00:v1.2_pg_vector_index:新增论文级向量(paper_embeddings)的按模型索引与检索表达式]
+    [2026年10月20日 08:00:v1.1_pg_vector_index:支持halfvec存储与二值量化(Hamming距离)索引，二值预筛选后按存储精度重排]
+    [2026年10月20日 06:00:v1.0_pg_vector_index:按模型的部分表达式向量索引与对应的检索表达式]
+'''
+
+import hashlib
+import re
+from typing import List, Optional, Union
+
+from pgvector.sqlalchemy import BIT, HALFVEC, VECTOR
+from sqlalchemy import ColumnElement, Select, bindparam, cast, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from base.config import settings
+from base.embedding.registry import embedding_dimension
+from base.pg.entity import ChunkEmbedding, PaperEmbedding
+
+
+# pgvector 允许的 hnsw.ef_search 最大值，超过时 set_config 报错
+HNSW_MAX_EF_SEARCH = 1000
+
+# 存储类型 -> SQLAlchemy 列类型
+_STORAGE_TYPES = {"vector": VECTOR, "halfvec": HALFVEC}
+
+
+def _slug(model: str) -> str:
+    """模型名规范化后截断，附哈希避免冲突"""
+    slug = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")[:30]
+    digest = hashlib.sha1(model.encode()).hexdigest()[:8]
+    return f"{slug}_{digest}"
+
+
+def embedding_index_name(model: str) -> str:
+    """模型向量索引名 (不超过 63 字节)"""
+    return f"ix_chunk_embeddings_{_slug(model)}"
+
+
+def binary_index_name(model: str) -> str:
+    """模型二值量化索引名 (不超过 63 字节)"""
+    return f"ix_chunk_embeddings_bq_{_slug(model)}"
+
+
+def paper_embedding_index_name(model: str) -> str:
+    """模型论文向量索引名 (不超过 63 字节)"""
+    return f"ix_paper_embeddings_{_slug(model)}"
+
+
+# 历史列 paper_chunks.embedding 的向量索引 (迁移 a4c7e9b2d1f0)
+LEGACY_CHUNK_INDEX_NAME = "ix_paper_chunks_embedding_ann"
+# 按模型创建的索引名: 前缀 + _slug(model)
+_MODEL_INDEX_NAME = re.compile(r"^ix_(chunk_embeddings|chunk_embeddings_bq|paper_embeddings)_[a-z0-9_]*_[0-9a-f]{8}$")
+
+
+def is_vector_index_name(name: Optional[str]) -> bool:
+    """
+    是否为向量索引 (历史列索引与按模型的部分表达式索引)
+
+    这些索引的模型、维度与构建参数来自配置，由迁移与 ensure_embedding_index 创建，不在实体中声明；
+    alembic autogenerate 据此忽略它们 (见 alembic/env.py include_object)，不会生成 drop_index。
+    """
+    return bool(name) and (name == LEGACY_CHUNK_INDEX_NAME or bool(_MODEL_INDEX_NAME.match(name)))
+
+
+def _index_options(method: str) -> str:
+    if method == "ivfflat":
+        return f"lists = {settings.vector_index_ivfflat_lists}"
+    return f"m = {settings.vector_index_hnsw_m}, ef_construction = {settings.vector_index_hnsw_ef_construction}"
+
+
+def _partial_index_ddl(name: str, method: str, expression: str, model: str, table: str = "chunk_embeddings") -> str:
+    model_literal = model.replace("'", "''")
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+        f"USING {method} ({expression}) WITH ({_index_options(method)}) WHERE model = '{model_literal}'"
+    )
+
+
+def embedding_index_ddl(model: str, method: Optional[str] = None, storage: Optional[str] = None) -> str:
+    """
+    某个模型的近似最近邻索引 DDL
+
+    chunk_embeddings.embedding 不限定维度，ANN 索引需要固定维度: 按模型建部分表达式索引
+    ((embedding::vector(dim)) ... WHERE model = '...')，各模型索引互不影响，新增模型只需新建索引。
+    storage 为 halfvec 时表达式为 embedding::halfvec(dim) (索引大小减半)。
+    CONCURRENTLY 不能在事务中执行。
+    """
+    storage = storage or settings.embedding_storage
+    expression = f"(embedding::{storage}({embedding_dimension(model)})) {storage}_cosine_ops"
+    return _partial_index_ddl(embedding_index_name(model), method or settings.vector_index_method, expression, model)
+
+
+def binary_index_ddl(model: str, method: Optional[str] = None, storage: Optional[str] = None) -> str:
+    """
+    某个模型的二值量化索引 DDL (Hamming 距离)
+
+    每维只保留符号位 (binary_quantize)，索引约为全精度索引的 1/32，用于二值预筛选 (见 nearest)。
+    """
+    storage = storage or settings.embedding_storage
+    dim = embedding_dimension(model)
+    expression = f"(binary_quantize(embedding::{storage}({dim}))::bit({dim})) bit_hamming_ops"
+    return _partial_index_ddl(binary_index_name(model), method or settings.vector_index_method, expression, model)
+
+
+def paper_embedding_index_ddl(model: str, method: Optional[str] = None) -> str:
+    """某个模型的论文向量索引 DDL (paper_embeddings 固定为 vector 列)"""
+    expression = f"(embedding::vector({embedding_dimension(model)})) vector_cosine_ops"
+    return _partial_index_ddl(
+        paper_embedding_index_name(model), method or settings.vector_index_method, expression, model, "paper_embeddings"
+    )
+
+
+async def ensure_embedding_index(conn: AsyncConnection, model: str, binary: Optional[bool] = None) -> None:
+    """
+    创建模型的文本块与论文向量索引 (已存在时跳过)；conn 需为 AUTOCOMMIT 隔离级别
+    binary 为真时文本块建二值量化索引 (开启二值预筛选时检索只用该索引)，默认取 vector_binary_prefilter
+    """
+    binary = settings.vector_binary_prefilter if binary is None else binary
+    await conn.execute(text(binary_index_ddl(model) if binary else embedding_index_ddl(model)))
+    await conn.execute(text(paper_embedding_index_ddl(model)))
+
+
+def model_filter(model: str) -> ColumnElement:
+    """
+    按模型过滤向量行
+
+    模型名以字面量写入 SQL: 部分索引的 WHERE 条件须在生成计划时可证明成立，
+    绑定参数在通用计划 (预编译语句多次执行后) 下无法匹配部分索引。
+    """
+    return ChunkEmbedding.model == bindparam("embedding_model", model, literal_execute=True)
+
+
+def paper_model_filter(model: str) -> ColumnElement:
+    """按模型过滤论文向量行 (模型名以字面量写入 SQL，见 model_filter)"""
+    return PaperEmbedding.model == bindparam("paper_embedding_model", model, literal_execute=True)
+
+
+def _storage_type(model: str):
+    return _STORAGE_TYPES[settings.embedding_storage](embedding_dimension(model))
+
+
+def embedding_distance(model: str, embedding: List[float]) -> ColumnElement:
+    """与模型索引表达式一致的余弦距离 (embedding::vector(dim) <=> :query，halfvec 存储时为 halfvec(dim))"""
+    vector_type = _storage_type(model)
+    query = bindparam("embedding", embedding, type_=vector_type, unique=True)
+    return cast(ChunkEmbedding.embedding, vector_type).cosine_distance(query)
+
+
+def paper_embedding_distance(model: str, embedding: Union[List[float], ColumnElement]) -> ColumnElement:
+    """
+    与论文向量索引表达式一致的余弦距离 (embedding::vector(dim) <=> :query)
+    embedding 可为查询向量或标量子查询 (如另一篇论文的向量，子查询只执行一次，仍走索引)
+    """
+    vector_type = VECTOR(embedding_dimension(model))
+    if isinstance(embedding, list):
+        query = bindparam("embedding", embedding, type_=vector_type, unique=True)
+    else:
+        query = cast(embedding, vector_type)
+    return cast(PaperEmbedding.embedding, vector_type).cosine_distance(query)
+
+
+def hamming_distance(model: str, embedding: List[float]) -> ColumnElement:
+    """与二值量化索引表达式一致的 Hamming 距离 (binary_quantize(embedding)::bit(dim) <~> binary_quantize(:query))"""
+    vector_type = _storage_type(model)
+    bit_type = BIT(embedding_dimension(model))
+    query = bindparam("embedding", embedding, type_=vector_type, unique=True)
+    column_bits = cast(func.binary_quantize(cast(ChunkEmbedding.embedding, vector_type)), bit_type)
+    return column_bits.hamming_distance(cast(func.binary_quantize(cast(query, vector_type)), bit_type))
+
+
+def index_candidates(limit: int) -> int:
+    """取 limit 个最近行时近似索引需要返回的候选数 (hnsw.ef_search 不应小于该值)"""
+    return limit * settings.vector_binary_oversample if settings.vector_binary_prefilter else limit
+
+
+def nearest(stmt: Select, model: str, embedding: List[float], limit: int, name: str = "candidates") -> Select:
+    """
+    stmt 中与查询向量最近的 limit 行，附加 distance 列 (余弦距离) 并按其升序
+
+    stmt 须从 chunk_embeddings 查询并已按 model_filter(model) 过滤；LIMIT 为具名参数 {name}_limit (预筛选候选数为 {name}_index_limit)。
+    开启 vector_binary_prefilter 时分两步: 先按 Hamming 距离 (走二值量化索引) 取 limit × vector_binary_oversample
+    个候选 (子查询 name)，再只对候选计算存储精度的余弦距离重排取前 limit 个；否则直接按余弦距离走向量索引。
+    """
+    distance = embedding_distance(model, embedding)
+    limit_param = bindparam(f"{name}_limit", limit)
+    if not settings.vector_binary_prefilter:
+        return stmt.add_columns(distance.label("distance")).order_by(distance).limit(limit_param)
+    candidates = (
+        stmt.add_columns(distance.label("distance"))
+        .order_by(hamming_distance(model, embedding))
+        .limit(bindparam(f"{name}_index_limit", index_candidates(limit)))
+        .subquery(name)
+    )
+    return select(*candidates.c).order_by(candidates.c.distance).limit(limit_param)
@@ -0,0 +1,184 @@
+'''
+开发者: BackendAgent
+当前版本: v1.2_arq_pool
+创建时间: 2026-10-19 10:00:00
+更新时间: 2026-10-19 15:00:00
+更新记录:
+    [2026-10-19 15:00:00:v1.2_arq_pool:连接异常类型公开为CONNECTION_ERRORS，供通道调度复用]
+    [2026-10-19 12:00:00:v1.1_arq_pool:新增分阶段导入队列名]
+    [2026-10-19 10:00:00:v1.0_arq_pool:进程级常驻Arq连接池，健康状态跟踪替代逐请求TCP探测，支持批量入队]
+'''
+
+import asyncio
+import time
+from typing import Any, Iterable, List, Optional, Sequence
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from arq.jobs import Job as ArqJob
+from loguru import logger
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from base.config import settings
+
+# 分阶段导入队列: 解析(CPU密集) -> 向量化 -> 入库，各自由独立的Worker池消费
+INGEST_PARSE_QUEUE = "arq:ingest:parse"
+INGEST_EMBED_QUEUE = "arq:ingest:embed"
+INGEST_PERSIST_QUEUE = "arq:ingest:persist"
+
+# 视为"队列不可用"的连接类错误
+CONNECTION_ERRORS = (ConnectionError, OSError, asyncio.TimeoutError, RedisConnectionError, RedisTimeoutError)
+
+
+class ArqRedisSettings(RedisSettings):
+    """自定义Redis设置，支持从配置读取"""
+
+    def __init__(self, conn_retries: int = 5):
+        # 从settings中读取Redis配置
+        dsn = RedisSettings.from_dsn(settings.arq_redis_url)
+        super().__init__(
+            host=dsn.host,
+            port=dsn.port,
+            database=dsn.database,
+            password=dsn.password,
+            username=dsn.username,
+            conn_timeout=settings.arq_conn_timeout,
+            conn_retries=conn_retries,
+        )
+
+
+class ArqService:
+    """
+    Arq 连接池管理 (进程级单例)
+
+    - 应用启动时在 lifespan 中 init，关闭时 close，所有请求复用同一个 ArqRedis 连接池。
+    - 健康状态由入队结果被动维护: 失败则标记为不可用，冷却期内直接跳过入队，
+      冷却期过后由下一次调用做一次 PING 探测，恢复后自动重新可用。
+    """
+    _pool: Optional[ArqRedis] = None
+    _healthy: bool = False
+    _last_failure: float = 0.0
+    _lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def _get_lock(cls) -> asyncio.Lock:
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        return cls._lock
+
+    @classmethod
+    async def init(cls) -> bool:
+        """创建连接池 (幂等)，返回当前是否可用"""
+        if cls._pool is not None:
+            return cls._healthy
+        async with cls._get_lock():
+            if cls._pool is not None:
+                return cls._healthy
+            try:
+                # API 进程内不做连接重试，Redis 不可用时快速失败并进入冷却期
+                cls._pool = await create_pool(ArqRedisSettings(conn_retries=0))
+                cls._healthy = True
+                logger.info(f"Arq连接池初始化完成: {settings.arq_redis_url}")
+            except Exception as e:
+                cls._pool = None
+                cls.mark_unhealthy(e)
+        return cls._healthy
+
+    @classmethod
+    def mark_unhealthy(cls, error: Optional[BaseException] = None) -> None:
+        if cls._healthy or cls._last_failure == 0.0:
+            logger.warning(f"Arq/Redis不可用，{settings.arq_health_retry_interval}s内跳过任务入队: {error}")
+        cls._healthy = False
+        cls._last_failure = time.monotonic()
+
+    @classmethod
+    def is_healthy(cls) -> bool:
+        return cls._pool is not None and cls._healthy
+
+    @classmethod
+    async def is_available(cls) -> bool:
+        """
+        判断队列是否可用。
+
+        健康时直接返回 True，不产生任何网络开销；不健康时仅在冷却期过后做一次 PING。
+        """
+        if cls.is_healthy():
+            return True
+        if time.monotonic() - cls._last_failure < settings.arq_health_retry_interval:
+            return False
+        if cls._pool is None:
+            return await cls.init()
+        try:
+            await asyncio.wait_for(cls._pool.ping(), timeout=settings.arq_conn_timeout)
+            cls._healthy = True
+            logger.info("Arq/Redis连接已恢复")
+        except Exception as e:
+            cls.mark_unhealthy(e)
+        return cls._healthy
+
+    @classmethod
+    async def get_pool(cls) -> Optional[ArqRedis]:
+        """获取共享连接池，不可用时返回 None"""
+        if not await cls.is_available():
+            return None
+        return cls._pool
+
+    @classmethod
+    async def enqueue(cls, function: str, *args: Any, **kwargs: Any) -> Optional[ArqJob]:
+        """
+        入队单个任务。队列不可用或入队失败时返回 None (不抛出异常)。
+        kwargs 透传给 ArqRedis.enqueue_job (支持 _queue_name/_job_id 等)。
+        """
+        pool = await cls.get_pool()
+        if pool is None:
+            return None
+        try:
+            return await pool.enqueue_job(function, *args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            cls.mark_unhealthy(e)
+            return None
+
+    @classmethod
+    async def enqueue_many(
+        cls,
+        function: str,
+        args_list: Iterable[Sequence[Any]],
+        **kwargs: Any,
+    ) -> List[Optional[ArqJob]]:
+        """
+        批量入队同一函数的多个任务。
+
+        各任务的 enqueue_job 并发发出，由连接池中的多个连接同时执行，
+        N 个任务的耗时约为一次往返而不是 N 次。返回值与 args_list 一一对应，失败项为 None。
+        """
+        args_list = [tuple(args) for args in args_list]
+        if not args_list:
+            return []
+        pool = await cls.get_pool()
+        if pool is None:
+            return [None] * len(args_list)
+
+        results = await asyncio.gather(
+            *(pool.enqueue_job(function, *args, **kwargs) for args in args_list),
+            return_exceptions=True,
+        )
+        jobs: List[Optional[ArqJob]] = []
+        for result in results:
+            if isinstance(result, BaseException):
+                if isinstance(result, CONNECTION_ERRORS):
+                    cls.mark_unhealthy(result)
+                else:
+                    logger.error(f"批量入队失败: {function}, 错误: {result}")
+                jobs.append(None)
+            else:
+                jobs.append(result)
+        return jobs
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._pool is not None:
+            await cls._pool.close()
+            logger.info("Arq连接池已关闭")
+        cls._pool = None
+        cls._healthy = False
+        cls._last_failure = 0.0
@@ -0,0 +1,52 @@
+'''
+开发者: BackendAgent
+当前版本: v1.2_count_cache
+创建时间: 2026年10月20日 02:00
+更新时间: 2026年10月20日 12:00
+更新记录:
+    [2026年10月20日 12:00:v1.2_count_cache:过期时间只在哈希创建时设置，持续写入不再推迟过期；论文处理完成时同样失效]
+    [2026年10月20日 11:00:v1.1_count_cache:论文标记失败/失败后重试时同样失效]
+    [2026年10月20日 02:00:v1.0_count_cache:按用户缓存论文检索总数，论文新增/删除时整体失效]
+'''
+
+from typing import Optional
+from uuid import UUID
+
+import redis.asyncio as redis
+
+from base.redis.service import RedisService
+
+
+class PaperCountCache:
+    """
+    论文检索总数缓存 (Redis 哈希: paper_count:{user_id}，字段为检索条件指纹)
+
+    同一用户的所有条件放在一个哈希中，论文新增/删除/完成/标记失败时 (写入提交后) 删除整个哈希即可失效；
+    过期时间兜底失效失败 (Redis 不可用) 等场景，只在哈希创建时设置 (NX)，
+    否则不断写入新条件会一直推迟过期，旧条件的总数永不过期。
+    """
+
+    @staticmethod
+    def key(user_id: UUID) -> str:
+        return f"paper_count:{user_id}"
+
+    @classmethod
+    async def get(cls, user_id: UUID, fingerprint: str, client: Optional[redis.Redis] = None) -> Optional[int]:
+        client = client or RedisService.get_client()
+        value = await client.hget(cls.key(user_id), fingerprint)
+        return int(value) if value is not None else None
+
+    @classmethod
+    async def set(
+        cls, user_id: UUID, fingerprint: str, total: int, ttl: int, client: Optional[redis.Redis] = None
+    ) -> None:
+        client = client or RedisService.get_client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(cls.key(user_id), fingerprint, total)
+            pipe.expire(cls.key(user_id), ttl, nx=True)
+            await pipe.execute()
+
+    @classmethod
+    async def invalidate(cls, user_id: UUID, client: Optional[redis.Redis] = None) -> None:
+        client = client or RedisService.get_client()
+        await client.delete(cls.key(user_id))
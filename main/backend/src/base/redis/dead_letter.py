@@ -0,0 +1,81 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_dead_letter
+创建时间: 2026-10-19 17:00:00
+更新时间: 2026-10-19 17:00:00
+更新记录:
+    [2026-10-19 17:00:00:v1.0_dead_letter:死信队列，记录重试耗尽或不可重试的任务(如无法解析的PDF)]
+'''
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import redis.asyncio as redis
+
+from base.config import settings
+from base.redis.service import RedisService
+
+DEAD_LETTER_KEY = "arq:dead_letter"
+
+
+def _decode(value: Any) -> Any:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class DeadLetterStore:
+    """
+    死信队列 (Redis Stream: arq:dead_letter)
+
+    Worker 内任务最终失败时写入一条记录 (任务名、参数、执行次数、异常类型与信息)，
+    用于排查与人工重放；超过 dead_letter_maxlen 条时近似裁剪最旧的记录。
+    """
+
+    @classmethod
+    async def add(
+        cls,
+        function: str,
+        args: Sequence[Any],
+        error: BaseException | str,
+        job_id: Optional[str] = None,
+        job_try: int = 1,
+        queue_name: Optional[str] = None,
+        client: Optional[redis.Redis] = None,
+    ) -> str:
+        """写入一条死信记录，返回条目 ID"""
+        client = client or RedisService.get_client()
+        fields = {
+            "function": function,
+            "args": json.dumps(list(args), ensure_ascii=False, default=str),
+            "job_id": job_id or "",
+            "job_try": job_try,
+            "queue": queue_name or "",
+            "error_type": type(error).__name__ if isinstance(error, BaseException) else "",
+            "error": str(error)[:2000],
+            "failed_at": int(time.time() * 1000),
+        }
+        entry_id = await client.xadd(
+            DEAD_LETTER_KEY, fields, maxlen=settings.dead_letter_maxlen, approximate=True
+        )
+        return _decode(entry_id)
+
+    @classmethod
+    async def list_entries(cls, count: int = 100, client: Optional[redis.Redis] = None) -> List[Dict[str, Any]]:
+        """按失败时间倒序列出死信记录"""
+        client = client or RedisService.get_client()
+        entries = await client.xrevrange(DEAD_LETTER_KEY, count=count)
+        records = []
+        for entry_id, fields in entries:
+            record = {_decode(k): _decode(v) for k, v in fields.items()}
+            record["id"] = _decode(entry_id)
+            record["args"] = json.loads(record.get("args") or "[]")
+            records.append(record)
+        return records
+
+    @classmethod
+    async def remove(cls, entry_ids: Sequence[str], client: Optional[redis.Redis] = None) -> int:
+        """删除已处理(重放或确认放弃)的死信记录"""
+        if not entry_ids:
+            return 0
+        client = client or RedisService.get_client()
+        return await client.xdel(DEAD_LETTER_KEY, *entry_ids)
@@ -0,0 +1,76 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_job_stream
+创建时间: 2026-10-19 11:00:00
+更新时间: 2026-10-19 11:00:00
+更新记录:
+    [2026-10-19 11:00:00:v1.0_job_stream:基于Redis Stream的作业事件流，Worker发布、SSE端点按Last-Event-ID续读]
+'''
+
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import redis.asyncio as redis
+
+from base.redis.service import RedisService
+
+# 单个作业事件流保留的最大条数 (近似裁剪)
+STREAM_MAXLEN = 500
+# 事件流过期时间 (秒)，作业结束后客户端仍可在该窗口内断线续读
+STREAM_TTL_SECONDS = 24 * 3600
+
+StreamEntry = Tuple[str, Dict[str, str]]
+
+
+class JobEventStream:
+    """
+    作业事件流 (每个作业一个 Redis Stream: job:{job_id}:events)
+
+    - Stream 条目 ID 直接作为 SSE 的 id，客户端断线重连时通过 Last-Event-ID 从断点续读。
+    - 字段值统一为字符串，复杂结构由调用方自行序列化。
+    """
+
+    @staticmethod
+    def stream_key(job_id: UUID | str) -> str:
+        return f"job:{job_id}:events"
+
+    @classmethod
+    async def publish(
+        cls,
+        job_id: UUID | str,
+        fields: Dict[str, Any],
+        client: Optional[redis.Redis] = None,
+    ) -> str:
+        """追加一条事件，返回 Stream 条目 ID"""
+        client = client or RedisService.get_client()
+        key = cls.stream_key(job_id)
+        data = {k: "" if v is None else str(v) for k, v in fields.items()}
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, data, maxlen=STREAM_MAXLEN, approximate=True)
+            pipe.expire(key, STREAM_TTL_SECONDS)
+            entry_id, _ = await pipe.execute()
+        return entry_id
+
+    @classmethod
+    async def read(
+        cls,
+        job_id: UUID | str,
+        last_id: Optional[str] = None,
+        block_ms: Optional[int] = 15000,
+        count: int = 100,
+        client: Optional[redis.Redis] = None,
+    ) -> List[StreamEntry]:
+        """
+        读取 last_id 之后的事件，无新事件时最多阻塞 block_ms 毫秒 (None 表示不阻塞)。
+        last_id 为空时从头读取 (回放全部历史事件)。
+        """
+        client = client or RedisService.get_client()
+        response = await client.xread(
+            {cls.stream_key(job_id): last_id or "0-0"},
+            count=count,
+            block=block_ms,
+        )
+        if not response:
+            return []
+        # [(key, [(entry_id, fields), ...])]
+        return list(response[0][1])
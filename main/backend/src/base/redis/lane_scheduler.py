@@ -0,0 +1,257 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_lane_scheduler
+创建时间: 2026-10-19 15:00:00
+更新时间: 2026-10-19 15:00:00
+更新记录:
+    [2026-10-19 15:00:00:v1.0_lane_scheduler:Arq任务优先级通道，按(通道,用户)虚拟时钟做加权公平调度，记录各通道积压与等待时间]
+'''
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from arq.connections import ArqRedis
+from arq.constants import default_queue_name
+from arq.jobs import Job as ArqJob
+from loguru import logger
+
+from base.config import settings
+from base.redis.arq_service import ArqService, CONNECTION_ERRORS
+from common.model.enums import JobLane
+
+# 推进 (通道,用户) 的虚拟完成时间，返回本批第一个任务的起始标签
+# KEYS[1]: 虚拟时钟键  ARGV: now_ms, 单任务增量, 任务数, 额外保留时间
+_ADVANCE_CLOCK_LUA = """
+local now = tonumber(ARGV[1])
+local inc = tonumber(ARGV[2])
+local count = tonumber(ARGV[3])
+local f = tonumber(redis.call('GET', KEYS[1]) or '0')
+if f < now then f = now end
+local finish = f + inc * count
+redis.call('SET', KEYS[1], tostring(finish), 'PX', math.floor(finish - now + tonumber(ARGV[4])))
+return tostring(f)
+"""
+
+# 每个通道保留的等待时间样本数
+_WAIT_SAMPLES = 500
+_JOB_LANE_KEY = "arq:lanes:job_lane"
+
+
+class LaneScheduler:
+    """
+    任务优先级通道 (基于 Arq 有序集合分数的加权公平调度)
+
+    Arq Worker 按分数从小到大取出分数 <= 当前时间的任务。这里为每个 (通道, 用户) 维护一个虚拟完成时间:
+        F = max(now, F_prev) + cost / weight(通道)
+    以 F 作为排序依据，分数 = F - horizon (整体前移，使积压在 horizon 内的任务都可立即执行)。
+    - 高权重通道的 F 增长慢，排在低权重通道的大量积压之前；
+    - 同一通道内每个用户各有虚拟时钟，单个租户的大批量任务只推迟自己的任务，不会饿死其他用户。
+
+    各通道的积压 (pending 有序集合) 与任务开始时记录的等待时间用于 lane_stats 观测。
+    """
+
+    _clock_script = None
+
+    @staticmethod
+    def weight(lane: JobLane | str) -> int:
+        return max(1, int(settings.job_lane_weights.get(JobLane(lane).value, 1)))
+
+    @staticmethod
+    def _clock_key(queue_name: str, lane: JobLane, user_id: Optional[UUID | str]) -> str:
+        return f"arq:lanes:{queue_name}:{lane.value}:vclock:{user_id or '-'}"
+
+    @staticmethod
+    def _pending_key(queue_name: str, lane: str) -> str:
+        return f"arq:lanes:{queue_name}:{lane}:pending"
+
+    @staticmethod
+    def _waits_key(queue_name: str, lane: str) -> str:
+        return f"arq:lanes:{queue_name}:{lane}:waits"
+
+    @classmethod
+    async def _advance_clock(
+        cls, redis: ArqRedis, queue_name: str, lane: JobLane, user_id: Optional[UUID | str], count: int
+    ) -> tuple[int, float, float]:
+        """返回 (now_ms, 首个任务标签, 单任务增量)"""
+        now_ms = int(time.time() * 1000)
+        increment = settings.job_lane_cost_ms / cls.weight(lane)
+        if cls._clock_script is None:
+            cls._clock_script = redis.register_script(_ADVANCE_CLOCK_LUA)
+        start = await cls._clock_script(
+            keys=[cls._clock_key(queue_name, lane, user_id)],
+            args=[now_ms, increment, count, settings.job_lane_horizon_seconds * 1000],
+            client=redis,
+        )
+        return now_ms, float(start), increment
+
+    @classmethod
+    async def enqueue(
+        cls,
+        function: str,
+        *args: Any,
+        lane: JobLane | str,
+        user_id: Optional[UUID | str] = None,
+        queue_name: str = default_queue_name,
+        redis: Optional[ArqRedis] = None,
+        **kwargs: Any,
+    ) -> Optional[ArqJob]:
+        """按通道入队单个任务，队列不可用时返回 None"""
+        jobs = await cls.enqueue_many(
+            function, [args], lane=lane, user_id=user_id, queue_name=queue_name, redis=redis, **kwargs
+        )
+        return jobs[0]
+
+    @classmethod
+    async def enqueue_many(
+        cls,
+        function: str,
+        args_list: Iterable[Sequence[Any]],
+        lane: JobLane | str,
+        user_id: Optional[UUID | str] = None,
+        queue_name: str = default_queue_name,
+        redis: Optional[ArqRedis] = None,
+        **kwargs: Any,
+    ) -> List[Optional[ArqJob]]:
+        """
+        按通道批量入队同一用户的多个任务，返回值与 args_list 一一对应。
+
+        redis 为空时使用 ArqService 的共享连接池；Worker 内阶段间投递可传入 ctx["redis"]。
+        """
+        lane = JobLane(lane)
+        args_list = [tuple(args) for args in args_list]
+        if not args_list:
+            return []
+        shared_pool = redis is None
+        if shared_pool:
+            redis = await ArqService.get_pool()
+            if redis is None:
+                return [None] * len(args_list)
+
+        try:
+            now_ms, start, increment = await cls._advance_clock(redis, queue_name, lane, user_id, len(args_list))
+            job_ids = [uuid4().hex for _ in args_list]
+            # 先登记通道信息，保证任务开始时的回调一定能找到
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(_JOB_LANE_KEY, mapping={job_id: f"{queue_name}|{lane.value}|{now_ms}" for job_id in job_ids})
+                pipe.zadd(cls._pending_key(queue_name, lane.value), {job_id: now_ms for job_id in job_ids})
+                await pipe.execute()
+        except CONNECTION_ERRORS as e:
+            if shared_pool:
+                ArqService.mark_unhealthy(e)
+            return [None] * len(args_list)
+
+        horizon_ms = settings.job_lane_horizon_seconds * 1000
+        expires = timedelta(seconds=settings.job_lane_expires_seconds)
+        # 标签取各任务的虚拟完成时刻 (起始 + 增量 * 序号)，与 WFQ 按完成时间排序一致
+        results = await asyncio.gather(
+            *(
+                redis.enqueue_job(
+                    function, *args,
+                    _job_id=job_id,
+                    _queue_name=queue_name,
+                    _defer_until=datetime.fromtimestamp((start + increment * (i + 1) - horizon_ms) / 1000, tz=timezone.utc),
+                    _expires=expires,
+                    **kwargs,
+                )
+                for i, (job_id, args) in enumerate(zip(job_ids, args_list))
+            ),
+            return_exceptions=True,
+        )
+        jobs: List[Optional[ArqJob]] = []
+        failed: List[str] = []
+        for job_id, result in zip(job_ids, results):
+            if isinstance(result, BaseException):
+                logger.error(f"通道任务入队失败: {function}, lane={lane.value}, 错误: {result}")
+                if isinstance(result, CONNECTION_ERRORS) and shared_pool:
+                    ArqService.mark_unhealthy(result)
+                result = None
+            if result is None:
+                failed.append(job_id)
+            jobs.append(result)
+
+        if failed:
+            await cls._forget(redis, queue_name, lane.value, failed)
+        return jobs
+
+    @classmethod
+    async def _forget(cls, redis: ArqRedis, queue_name: str, lane: str, job_ids: List[str]) -> None:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hdel(_JOB_LANE_KEY, *job_ids)
+                pipe.zrem(cls._pending_key(queue_name, lane), *job_ids)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"清理通道登记失败: {e}")
+
+    @classmethod
+    async def on_job_start(cls, ctx: Dict[str, Any]) -> None:
+        """
+        Worker 任务开始回调 (WorkerSettings.on_job_start)
+
+        从通道积压中移除该任务并记录等待时间；非通道任务或重试任务直接忽略。
+        """
+        redis: ArqRedis = ctx["redis"]
+        job_id = ctx["job_id"]
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hget(_JOB_LANE_KEY, job_id)
+                pipe.hdel(_JOB_LANE_KEY, job_id)
+                info, _ = await pipe.execute()
+            if not info:
+                return
+            if isinstance(info, bytes):
+                info = info.decode()
+            queue_name, lane, enqueued_ms = info.split("|")
+            wait_ms = int(time.time() * 1000) - int(enqueued_ms)
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.zrem(cls._pending_key(queue_name, lane), job_id)
+                pipe.lpush(cls._waits_key(queue_name, lane), max(0, wait_ms))
+                pipe.ltrim(cls._waits_key(queue_name, lane), 0, _WAIT_SAMPLES - 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"记录通道等待时间失败: job_id={job_id}, 错误: {e}")
+
+    @classmethod
+    async def lane_stats(cls, queue_names: Iterable[str], redis: Optional[ArqRedis] = None) -> List[Dict[str, Any]]:
+        """
+        各队列、各通道的积压深度与等待时间
+
+        - depth: 已入队未开始的任务数
+        - oldest_wait_seconds: 积压中最早任务已等待的时间
+        - avg/p95_wait_seconds: 最近开始执行的任务的排队等待时间
+        """
+        redis = redis or await ArqService.get_pool()
+        if redis is None:
+            raise ConnectionError("任务队列不可用(Redis连接失败)")
+
+        now_ms = int(time.time() * 1000)
+        expired_before = now_ms - settings.job_lane_expires_seconds * 1000
+        pairs = [(queue_name, lane.value) for queue_name in queue_names for lane in JobLane]
+        async with redis.pipeline(transaction=False) as pipe:
+            for queue_name, lane in pairs:
+                pending_key = cls._pending_key(queue_name, lane)
+                # 已过期未执行的任务不再计入积压
+                pipe.zremrangebyscore(pending_key, "-inf", expired_before)
+                pipe.zcard(pending_key)
+                pipe.zrange(pending_key, 0, 0, withscores=True)
+                pipe.lrange(cls._waits_key(queue_name, lane), 0, -1)
+            results = await pipe.execute()
+
+        stats = []
+        for i, (queue_name, lane) in enumerate(pairs):
+            _, depth, oldest, waits = results[i * 4:(i + 1) * 4]
+            samples = sorted(int(w) for w in waits)
+            stats.append({
+                "queue": queue_name,
+                "lane": lane,
+                "weight": cls.weight(lane),
+                "depth": depth,
+                "oldest_wait_seconds": (now_ms - oldest[0][1]) / 1000 if oldest else 0.0,
+                "avg_wait_seconds": sum(samples) / len(samples) / 1000 if samples else 0.0,
+                "p95_wait_seconds": samples[min(len(samples) - 1, int(len(samples) * 0.95))] / 1000 if samples else 0.0,
+                "samples": len(samples),
+            })
+        return stats
@@ -0,0 +1,37 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_read_your_writes
+创建时间: 2026年10月20日 05:00
+更新时间: 2026年10月20日 05:00
+更新记录:
+    [2026年10月20日 05:00:v1.0_read_your_writes:记录用户最近一次写入，窗口内的只读请求粘滞到主库]
+'''
+
+from typing import Optional
+
+import redis.asyncio as redis
+
+from base.redis.service import RedisService
+
+
+class ReadYourWrites:
+    """
+    读己之写标记 (Redis 键: pg:recent_write:{principal}，带过期时间)
+
+    用户写请求提交成功后写入，过期前该用户的只读请求走主库；
+    过期时间应覆盖副本的复制延迟，多个 API 进程共享同一标记。
+    """
+
+    @staticmethod
+    def key(principal: str) -> str:
+        return f"pg:recent_write:{principal}"
+
+    @classmethod
+    async def mark(cls, principal: str, ttl: int, client: Optional[redis.Redis] = None) -> None:
+        client = client or RedisService.get_client()
+        await client.set(cls.key(principal), 1, ex=ttl)
+
+    @classmethod
+    async def is_recent(cls, principal: str, client: Optional[redis.Redis] = None) -> bool:
+        client = client or RedisService.get_client()
+        return bool(await client.exists(cls.key(principal)))
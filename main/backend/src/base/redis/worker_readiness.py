@@ -0,0 +1,48 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_worker_readiness
+创建时间: 2026-10-19 18:00:00
+更新时间: 2026-10-19 18:00:00
+更新记录:
+    [2026-10-19 18:00:00:v1.0_worker_readiness:Worker就绪状态上报，记录各组件预加载结果与耗时，带过期时间定期续期]
+'''
+
+import json
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as redis
+
+from base.redis.service import RedisService
+
+
+class WorkerReadiness:
+    """
+    Worker 就绪状态 (Redis 键: arq:workers:{queue_name}:{worker_id})
+
+    Worker 启动预热完成后写入，运行期间定期续期；进程异常退出时记录随过期时间自动消失。
+    """
+
+    @staticmethod
+    def key(queue_name: str, worker_id: str) -> str:
+        return f"arq:workers:{queue_name}:{worker_id}"
+
+    @classmethod
+    async def report(
+        cls, client: redis.Redis, queue_name: str, worker_id: str, info: Dict[str, Any], ttl: int
+    ) -> None:
+        await client.set(cls.key(queue_name, worker_id), json.dumps(info, ensure_ascii=False, default=str), ex=ttl)
+
+    @classmethod
+    async def clear(cls, client: redis.Redis, queue_name: str, worker_id: str) -> None:
+        await client.delete(cls.key(queue_name, worker_id))
+
+    @classmethod
+    async def list_workers(cls, queue_name: str, client: Optional[redis.Redis] = None) -> List[Dict[str, Any]]:
+        """列出某队列下存活 Worker 的就绪信息"""
+        client = client or RedisService.get_client()
+        workers = []
+        async for key in client.scan_iter(match=cls.key(queue_name, "*")):
+            value = await client.get(key)
+            if value:
+                workers.append(json.loads(value))
+        return workers
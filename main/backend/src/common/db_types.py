@@ -1,5 +1,8 @@
 from typing import Type, TypeVar, Any, Generic, Optional
-from sqlalchemy.types import TypeDecorator, JSON
+from sqlalchemy import Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.types import TypeDecorator, JSON, Text
 from pydantic import BaseModel
 
 T = TypeVar("T", bound=BaseModel)
@@ -45,3 +48,13 @@ class PydanticJSON(TypeDecorator, Generic[T]):
         if value is None:
             return None
         return self.pydantic_model.model_validate(value)
+
+
+# 全文检索向量列类型: PostgreSQL 为 tsvector，其他方言 (如 SQLite 建表检查) 按文本列处理
+TSVectorType = Text().with_variant(TSVECTOR(), "postgresql")
+
+
+@compiles(Computed, "sqlite")
+def _computed_as_plain_column_on_sqlite(element, compiler, **kw) -> str:
+    """生成列表达式使用 PostgreSQL 函数 (to_tsvector 等)，SQLite 建表时按普通列创建"""
+    return ""
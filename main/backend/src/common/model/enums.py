@@ -1,9 +1,11 @@
 '''
 开发者: BackendAgent
-当前版本: v1.0_enums
+当前版本: v1.2_enums
 创建时间: 2026年01月10日 10:00
-更新时间: 2026年01月10日 10:00
+更新时间: 2026年10月20日 07:00
 更新记录:
+    [2026年10月20日 07:00:v1.2_enums:新增EmbeddingModelStatus向量化模型状态枚举]
+    [2026年10月19日 15:00:v1.1_enums:新增JobLane任务优先级通道枚举]
     [2026年01月10日 10:00:v1.0_enums:从entity.py提取PaperStatus枚举，解耦数据模型]
 '''
 
@@ -15,3 +17,18 @@ class PaperStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+
+
+class JobLane(str, Enum):
+    """后台任务优先级通道"""
+    INTERACTIVE = "interactive"  # 用户单篇上传，等待结果
+    USER = "user"  # 用户触发的批量/异步作业
+    BACKFILL = "backfill"  # 批量灌库
+    REEMBED = "reembed"  # 向量重建
+
+
+class EmbeddingModelStatus(str, Enum):
+    """向量化模型状态 (embedding_models 表)"""
+    BACKFILLING = "backfilling"  # 正在为全部文本块补齐该模型的向量，检索尚未使用
+    SERVING = "serving"  # 检索使用的模型 (同一时刻只有一个)
+    RETIRED = "retired"  # 已被替换，向量保留
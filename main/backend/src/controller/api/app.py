@@ -1,9 +1,13 @@
 '''
 开发者: BackendAgent
-当前版本: v0.1_papers
+当前版本: v0.5_replica_lifespan
 创建时间: 2026年01月02日 07:43
-更新时间: 2026年01月02日 10:16
+更新时间: 2026年10月20日 05:00
 更新记录:
+    [2026年10月20日 05:00:v0.5_replica_lifespan:关闭时释放只读副本连接池]
+    [2026年10月20日 01:00:v0.4_cursor_header:跨域暴露分页游标响应头 X-Next-Cursor]
+    [2026年10月19日 22:00:v0.3_embedding_lifespan:关闭时排空语义搜索使用的向量化批处理器]
+    [2026年10月19日 10:00:v0.2_arq_lifespan:在lifespan中初始化/关闭进程级Arq连接池]
     [2026年01月02日 10:16:v0.1_papers:统一版本号]
     [2026年01月02日 08:54:v0.1_app_with_papers:注册papers路由，支持论文获取功能]
 '''
@@ -27,8 +31,11 @@ from controller.api.jobs.router import router as jobs_router
 # 导入异常处理器
 from controller.response import global_exception_handler
 from common.logger import setup_logging
-from base.pg.service import engine
+from base.pg.service import engine, replica_engine
+from base.pg.pagination import NEXT_CURSOR_HEADER
 from base.redis.service import RedisService
+from base.redis.arq_service import ArqService
+from base.embedding.batcher import close_embedding_batcher
 from base.neo4j.service import Neo4jService
 
 # 配置日志
@@ -38,14 +45,20 @@ setup_logging()
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("System starting up...")
+    # 常驻任务队列连接池，Redis 不可用时不阻塞启动 (由健康检查在之后自动恢复)
+    await ArqService.init()
    
     yield
     # Shutdown
     logger.info("System shutting down...")
 
+    await close_embedding_batcher()
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
     logger.info("Database connection pool disposed")
     
+    await ArqService.close()
     await RedisService.close()
     await Neo4jService.close()
 
@@ -70,6 +83,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],  # 关键：允许所有HTTP方法
         allow_headers=["*"],  # 关键：允许所有请求头
+        expose_headers=[NEXT_CURSOR_HEADER],  # 列表接口的下一页游标
     )
     # 注册全局异常处理器
     app.add_exception_handler(Exception, global_exception_handler)
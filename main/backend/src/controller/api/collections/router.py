@@ -1,8 +1,8 @@
 
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response as FastAPIResponse, status
 
 from controller.api.collections.schema import (
     CollectionResponse,
@@ -13,6 +13,7 @@ from service.collections.collection_service import CollectionServiceDep
 from controller.api.auth.router import get_current_user
 from controller.response import Response
 from base.pg.entity import User
+from base.pg.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 router = APIRouter(prefix="/collections", tags=["collections"])
 
@@ -30,13 +31,18 @@ async def create_collection(
 
 @router.get("", response_model=Response[List[CollectionResponse]])
 async def get_collections(
+    response: FastAPIResponse,
     service: CollectionServiceDep,
     current_user: User = Depends(get_current_user),
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    """获取我的收藏夹列表"""
-    collections = await service.get_user_collections(current_user.id, limit, offset)
+    """获取我的收藏夹列表 (游标分页，下一页游标见 X-Next-Cursor 响应头)"""
+    collections = await service.get_user_collections(current_user.id, limit, offset, cursor)
+    next_page = next_cursor(collections, limit, lambda c: (c.updated_at, c.id))
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
     cr = []
     for c in collections:
         cr.append(CollectionResponse.model_validate(c))
@@ -48,10 +54,12 @@ async def get_collections(
 async def get_collection_detail(
     collection_id: UUID,
     service: CollectionServiceDep,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    limit: int = 1000,
+    cursor: Optional[str] = None
 ):
-    """获取指定收藏夹的详情"""
-    result = await service.get_collection_details(collection_id, current_user.id)
+    """获取指定收藏夹的详情 (论文按收藏时间倒序，next_cursor 用于翻页)"""
+    result = await service.get_collection_details(collection_id, current_user.id, limit, cursor)
     return Response.success(data=result)
 
 
@@ -24,6 +24,7 @@ class CollectionResponse(BaseModel):
 class CollectionDetailResponse(BaseModel):
     """收藏夹详情响应"""
     items: List[PaperMeta]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，已到末尾时为空")
 
 class CreateCollectionRequest(BaseModel):
     name: str = Field(..., description="收藏夹名称")
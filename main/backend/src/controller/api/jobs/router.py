@@ -1,5 +1,6 @@
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query
 from fastapi.responses import StreamingResponse
 
 from controller.response import Response
@@ -7,13 +8,22 @@ from service.reader.job_service import JobService
 from base.pg.service import SessionDep
 from controller.api.auth.router import get_current_user
 from base.pg.entity import User
-from controller.api.reader.schema import JobResponse
+from controller.api.reader.schema import JobResponse, LaneStatsResponse
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
 def get_job_service(session: SessionDep) -> JobService:
     return JobService(session)
 
+@router.get("/lanes", response_model=Response[List[LaneStatsResponse]])
+async def get_lane_stats(
+    service: JobService = Depends(get_job_service),
+    current_user: User = Depends(get_current_user)
+):
+    """获取各优先级通道的队列积压与等待时间"""
+    data = await service.get_lane_stats()
+    return Response.success(data)
+
 @router.get("/{job_id}", response_model=Response[JobResponse])
 async def get_job_status(
     job_id: UUID,
@@ -27,11 +37,14 @@ async def get_job_status(
 @router.get("/{job_id}/events")
 async def subscribe_job_events(
     job_id: UUID,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    last_event_id_query: Optional[str] = Query(None, alias="last_event_id", description="不支持自定义请求头的客户端可通过查询参数续读"),
     service: JobService = Depends(get_job_service),
     current_user: User = Depends(get_current_user)
 ):
-    """订阅任务SSE"""
+    """订阅任务SSE (支持 Last-Event-ID 断线续读)"""
     return StreamingResponse(
-        service.subscribe_job_events(job_id, current_user.id),
-        media_type="text/event-stream"
+        service.subscribe_job_events(job_id, current_user.id, last_event_id or last_event_id_query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
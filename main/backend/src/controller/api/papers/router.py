@@ -1,9 +1,12 @@
 '''
 开发者: BackendAgent
-当前版本: v0.4_papers_absolute_file_url
+当前版本: v0.7_papers_related
 创建时间: 2026年01月02日 10:16
-更新时间: 2026年01月17日 23:24
+更新时间: 2026年10月20日 09:00
 更新记录:
+    [2026年10月20日 09:00:v0.7_papers_related:新增相关论文接口(论文向量最近邻，使用只读会话)]
+    [2026年10月20日 05:00:v0.6_papers_read_replica:论文列表使用只读会话，配置只读副本时从副本查询]
+    [2026年10月20日 01:00:v0.5_papers_keyset_list:论文列表接口支持游标分页，下一页游标通过 X-Next-Cursor 响应头返回]
     [2026年01月17日 21:58:v0.3_papers_x_accel_redirect:论文文件下载改为X-Accel-Redirect，交由Nginx托管文件流]
     [2026年01月17日 23:24:v0.4_papers_absolute_file_url:状态/详情接口返回绝对 file_url，避免前端以自身域名请求导致404]
     [2026年01月09日 10:19:v0.2_papers_upload_status:补齐论文上传、状态查询、触发处理与列表接口，避免与动态路由冲突]
@@ -13,10 +16,11 @@
 
 import asyncio
 import os
+from typing import Optional
 from urllib.parse import quote
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Header, Form, Request
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Header, Form, Query, Request
 from fastapi.responses import Response as FastAPIResponse, FileResponse
 
 from controller.api.papers.schema import (
@@ -24,6 +28,7 @@ from controller.api.papers.schema import (
     PaperStatusResponse,
     PapersUploadWebRequest,
     PapersUploadResponse,
+    RelatedPaperResponse,
 )
 from controller.api.collections.schema import (
     CollectionResponse,
@@ -32,11 +37,12 @@ from controller.api.auth.router import get_current_user
 from controller.response import Response
 from service.papers.schema import PaperListResponse, PaperInfo, PaperUploadResponse
 from service.papers.arxiv_service import ArxivService
-from service.papers.paper_service import PaperService, PaperProcessingService, PaperServiceDep
+from service.papers.paper_service import PaperService, PaperProcessingService, PaperServiceDep, ReadPaperServiceDep
 from service.collections.collection_service import CollectionServiceDep
 from base.arxiv.client import ArxivClient
 from base.arxiv.parser import ArxivXmlParser
 from base.pg.entity import User
+from base.pg.pagination import NEXT_CURSOR_HEADER, next_cursor
 from common.model.enums import PaperStatus
 
 # 配置日志
@@ -339,12 +345,20 @@ async def trigger_paper_processing(
 @router.get("/list", response_model=Response[list[PaperStatusResponse]])
 async def list_user_papers(
     request: Request,
-    paper_service: PaperServiceDep,
+    response: FastAPIResponse,
+    paper_service: ReadPaperServiceDep,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
 ):
-    papers = await paper_service.get_user_papers(user_id=current_user.id, limit=limit, offset=offset)
+    """论文列表: 传入上一页响应头 X-Next-Cursor 中的游标翻页，offset 仅为兼容保留"""
+    papers = await paper_service.get_user_papers(
+        user_id=current_user.id, limit=limit, offset=offset, cursor=cursor
+    )
+    next_page = next_cursor(papers, limit, lambda p: (p.created_at, p.id))
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
     return Response.success(data=[
         PaperStatusResponse(
             paper_id=str(p.id),
@@ -363,6 +377,41 @@ async def list_user_papers(
     ])
 
 
+@router.get("/{paper_id}/related", response_model=Response[list[RelatedPaperResponse]])
+async def get_related_papers(
+    paper_id: str,
+    paper_service: ReadPaperServiceDep,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+):
+    """相关论文: 当前用户论文库中论文向量最相近的论文，按相似度降序"""
+    try:
+        paper_uuid = UUID(paper_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的论文ID格式",
+        )
+
+    related = await paper_service.get_related_papers(paper_uuid, current_user.id, limit)
+    if related is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="论文不存在或无访问权限",
+        )
+    return Response.success(data=[
+        RelatedPaperResponse(
+            paper_id=str(p.id),
+            title=p.title,
+            authors=p.authors,
+            abstract=p.abstract,
+            score=score,
+            created_at=p.created_at,
+        )
+        for p, score in related
+    ])
+
+
 @router.get("/{paper_id}/file")
 async def get_paper_file(
     paper_id: str,
@@ -1,9 +1,11 @@
 '''
 开发者: BackendAgent
-当前版本: v0.3_papers_status_optional
+当前版本: v0.5_papers_related
 创建时间: 2026年01月02日 10:16
-更新时间: 2026年01月09日 10:19
+更新时间: 2026年10月20日 09:00
 更新记录:
+    [2026年10月20日 09:00:v0.5_papers_related:新增相关论文响应模型]
+    [2026年10月19日 11:00:v0.4_papers_upload_job:上传响应新增job_id，用于订阅解析进度]
     [2026年01月09日 10:19:v0.3_papers_status_optional:PaperStatusResponse的updated_at改为可选，适配当前实体模型]
     [2026年01月08日 17:30:v0.2_papers_upload:添加论文上传相关请求模型]
     [2026年01月02日 10:16:v0.1_papers:重新定义PaperFetchRequest，符合Controller层职责]
@@ -74,6 +76,7 @@ class PapersUploadResponse(BaseModel):
     title: str = Field(..., description="论文标题")
     status: str = Field(..., description="处理状态")  # Literal['processing','success','failed']
     message: Optional[str] = None
+    job_id: Optional[UUID] = Field(None, description="解析作业ID(可订阅 /jobs/{job_id}/events 获取进度)")
 
 
 class PaperStatusResponse(BaseModel):
@@ -103,4 +106,23 @@ class PaperStatusResponse(BaseModel):
     file_url: Optional[str] = Field(None, description="文件访问URL")
 
 
-__all__ = ["PaperFetchRequest", "PaperUploadRequest", "PaperStatusResponse"]
+class RelatedPaperResponse(BaseModel):
+    '''
+    相关论文响应模型
+    字段说明:
+    - paper_id: 论文唯一ID
+    - title: 论文标题
+    - authors: 作者列表
+    - abstract: 论文摘要
+    - score: 与目标论文的相似度 (论文向量的余弦相似度)
+    - created_at: 创建时间
+    '''
+    paper_id: str = Field(..., description="论文唯一ID")
+    title: Optional[str] = Field(None, description="论文标题")
+    authors: Optional[List[str]] = Field(None, description="作者列表")
+    abstract: Optional[str] = Field(None, description="论文摘要")
+    score: float = Field(..., description="与目标论文的相似度(余弦相似度)")
+    created_at: datetime = Field(..., description="创建时间")
+
+
+__all__ = ["PaperFetchRequest", "PaperUploadRequest", "PaperStatusResponse", "RelatedPaperResponse"]
@@ -1,7 +1,7 @@
 from uuid import UUID
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Header
 from controller.response import Response
 from service.reader.reader_service import ReaderServiceDep
 from service.reader.toc_service import TocService
@@ -11,7 +11,7 @@ from service.reader.summary_service import SummaryService
 from service.reader.mind_map_service import MindMapService
 from service.reader.history_service import HistoryService
 from service.reader.job_service import JobService
-from base.pg.service import SessionDep
+from base.pg.service import ReadSessionDep, SessionDep
 from controller.api.auth.router import get_current_user
 from base.pg.entity import User
 from controller.api.reader.schema import (
@@ -24,7 +24,7 @@ from controller.api.reader.schema import (
 router = APIRouter(prefix="/papers", tags=["reader"])
 
 # Service Dependencies
-def get_toc_service(session: SessionDep) -> TocService:
+def get_toc_service(session: ReadSessionDep) -> TocService:
     return TocService(session)
 
 def get_view_service(session: SessionDep) -> ViewService:
@@ -164,9 +164,12 @@ async def create_job(
     paper_id: UUID,
     req: JobCreateRequest,
     service: JobServiceDep,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user)
 ):
-    """创建任务"""
+    """创建任务 (同一幂等键重复提交返回已有任务)"""
+    if idempotency_key:
+        req.idempotency_key = idempotency_key
     data = await service.create_job(paper_id, req, current_user.id)
     return Response.success(data)
 
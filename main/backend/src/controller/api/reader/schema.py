@@ -7,7 +7,7 @@ from pydantic import BaseModel, Field, ConfigDict
 
 from service.reader.schema import (
     TocItem, Toc, Annotation, View, NoteMeta, AISummary,
-    MindMapNode, MindMapEdge, MindMap, Record, Message,  Job, JobResult
+    MindMapNode, MindMapEdge, MindMap, Record, Message,  Job, JobResult, RelatedPaper
 )
 
 
@@ -21,6 +21,7 @@ class PaperReaderMetaResponse(BaseModel):
     mind_map: Optional[MindMap] = Field(None, description="论文AI脑图")
     history: List[Record] = Field(..., description="论文AI历史记录")
     jobs: List[Job] = Field(..., description="关联任务列表")
+    related: List[RelatedPaper] = Field([], description="用户论文库中的相关论文(预先计算)")
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -88,6 +89,8 @@ class JobCreateRequest(BaseModel):
     """创建任务请求"""
     job_type: Literal['toc', 'summary', 'mind_map', 'deep_research', 'chat'] = Field(..., description="作业类型")
     params: Optional[Dict[str, Any]] = Field(None, description="任务参数")
+    idempotency_key: Optional[str] = Field(None, max_length=200, description="幂等键(为空时按作业类型、论文与参数生成)")
+    dependency_ids: Optional[List[UUID]] = Field(None, description="依赖作业ID，全部成功后才执行")
 
 
 class JobResponse(BaseModel):
@@ -126,3 +129,15 @@ class SSEDataEnvelope(BaseModel):
 
 class JobListResponse(BaseModel):
     items: List[Job]
+
+
+class LaneStatsResponse(BaseModel):
+    """任务优先级通道统计"""
+    queue: str = Field(..., description="Arq队列名")
+    lane: str = Field(..., description="优先级通道(interactive/user/backfill/reembed)")
+    weight: int = Field(..., description="调度权重")
+    depth: int = Field(..., description="已入队未开始的任务数")
+    oldest_wait_seconds: float = Field(..., description="积压中最早任务已等待时间(秒)")
+    avg_wait_seconds: float = Field(..., description="最近开始执行任务的平均排队时间(秒)")
+    p95_wait_seconds: float = Field(..., description="最近开始执行任务的P95排队时间(秒)")
+    samples: int = Field(..., description="等待时间样本数")
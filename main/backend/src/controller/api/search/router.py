@@ -1,7 +1,7 @@
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Response as FastAPIResponse, status
 from redis.asyncio import Redis
 from sqlmodel import Session
 
@@ -20,6 +20,7 @@ from service.search.search_service import SearchService, get_search_service
 from controller.api.auth.router import get_current_user
 from controller.response import Response
 from base.pg.entity import User
+from base.pg.pagination import NEXT_CURSOR_HEADER, next_cursor
 from base.arxiv.client import ArxivClient
 from base.arxiv.parser import ArxivXmlParser
 from service.papers.arxiv_service import ArxivService
@@ -51,12 +52,17 @@ async def search_papers(
 
 @router.get("/history", response_model=Response[List[SearchHistoryResponse]])
 async def get_search_history(
+    response: FastAPIResponse,
     current_user: CurrentUserDep,
     search_service: SearchServiceDep,
-    limit: int = Query(10, ge=1, le=50)
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = None
 ):
-    """获取最近搜索历史"""
-    history = await search_service.get_search_history(current_user.id, limit)
+    """获取最近搜索历史 (下一页游标见 X-Next-Cursor 响应头)"""
+    history = await search_service.get_search_history(current_user.id, limit, cursor)
+    next_page = next_cursor(history, limit, lambda h: (h.created_at, h.id))
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
     return Response.success(data=history)
 
 @router.delete("/history", response_model=Response[bool])
@@ -22,13 +22,15 @@ class SearchRequest(BaseModel):
     filters: Optional[SearchFilter] = Field(None, description="过滤条件")
     page: int = Field(1, ge=1, description="页码")
     limit: int = Field(10, ge=1, le=100, alias="page_size", description="每页数量")
-    enable_semantic_search: bool = Field(False, description="是否启用语义搜索(暂未实现)")
+    enable_semantic_search: bool = Field(False, description="是否启用语义搜索(按文本块向量相似度召回论文)")
+    enable_hybrid_search: bool = Field(False, description="是否启用混合检索(关键词全文检索+向量检索, 倒数排名融合), 优先于语义搜索")
 
 
 class SearchedPaperMetaResponse(BaseModel):
     """搜索结果响应 (Standardized)"""
     items: List[PaperMeta]
     total: int
+    total_exact: bool = Field(True, description="total 是否为精确值，False 时为缓存计数或估算值")
     query_id: Optional[UUID] = Field(None, description="搜索历史记录ID")
 
 
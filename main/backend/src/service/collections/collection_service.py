@@ -8,8 +8,9 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
-from base.pg.service import CollectionRepository, PaperRepository, SessionDep, UserRepository
+from base.pg.service import CollectionRepository, PaperRepository, SessionDep, UserRepository, savepoint
 from base.pg.entity import Collection
+from base.pg.pagination import next_cursor
 from service.collections.schema import CollectionDTO, CollectionDetailDTO
 from service.papers.schema import PaperMeta
 
@@ -38,10 +39,10 @@ class CollectionService:
                 name="默认收藏夹",
                 is_default=True,
             )
-            return await CollectionRepository.create_collection(self.session, collection)
+            async with savepoint(self.session):
+                return await CollectionRepository.create_collection(self.session, collection)
 
         except IntegrityError:
-            await self.session.rollback()
             default_collection = await CollectionRepository.get_default_collection(self.session, user_id)
             if default_collection:
                 return default_collection
@@ -60,13 +61,14 @@ class CollectionService:
         self, 
         user_id: UUID, 
         limit: int = 100, 
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[CollectionDTO]:
-        """获取用户收藏夹列表"""
-        if offset == 0:
+        """获取用户收藏夹列表 (传入 cursor 时按游标分页)"""
+        if offset == 0 and not cursor:
             await self.ensure_default_collection(user_id)
         results = await CollectionRepository.get_user_collections_with_counts(
-            self.session, user_id, limit, offset
+            self.session, user_id, limit, offset, cursor
         )
         
         responses = []
@@ -77,18 +79,26 @@ class CollectionService:
             
         return responses
 
-    async def get_collection_details(self, collection_id: UUID, user_id: UUID) -> CollectionDetailDTO:
-        """获取收藏夹详情（包含论文列表）"""
+    async def get_collection_details(
+        self,
+        collection_id: UUID,
+        user_id: UUID,
+        limit: int = 1000,
+        cursor: Optional[str] = None
+    ) -> CollectionDetailDTO:
+        """获取收藏夹详情（包含论文列表，按收藏时间倒序，满页时返回下一页游标）"""
         # 1. Check collection exists and belongs to user
         collection = await CollectionRepository.get_collection_by_id(self.session, collection_id)
         if not collection or collection.user_id != user_id:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="收藏夹不存在")
         
         # 2. Fetch papers (default limit 1000 to simulate 'all')
-        papers = await CollectionRepository.get_collection_papers(self.session, collection_id, limit=1000)
+        rows = await CollectionRepository.get_collection_papers(
+            self.session, collection_id, limit=limit, cursor=cursor
+        )
         
         items = []
-        for p in papers:
+        for p, _ in rows:
             items.append(PaperMeta(
                 paper_id=p.id,
                 url=p.file_url,
@@ -101,7 +111,10 @@ class CollectionService:
                 references_number=None
             ))
             
-        return CollectionDetailDTO(items=items)
+        return CollectionDetailDTO(
+            items=items,
+            next_cursor=next_cursor(rows, limit, lambda row: (row[1], row[0].id)),
+        )
 
     async def move_paper(self, paper_id: UUID, target_collection_id: UUID, user_id: UUID) -> bool:
         """移动论文到指定收藏夹"""
@@ -26,5 +26,6 @@ class CollectionDTO(BaseModel):
 class CollectionDetailDTO(BaseModel):
     """收藏夹详情 DTO"""
     items: List[PaperMeta]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，已到末尾时为空")
 
 
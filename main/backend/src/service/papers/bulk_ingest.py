@@ -0,0 +1,313 @@
+'''
+开发者: BackendAgent
+当前版本: v1.2_bulk_ingest
+创建时间: 2026年10月19日 14:00
+更新时间: 2026年10月20日 11:00
+更新记录:
+    [2026年10月20日 11:00:v1.2_bulk_ingest:进度输出改为回调 (on_progress，默认写日志)，由命令行脚本打印]
+    [2026年10月19日 15:00:v1.1_bulk_ingest:queue模式投递到backfill通道，不影响用户交互式上传]
+    [2026年10月19日 14:00:v1.0_bulk_ingest:批量导入(目录/清单)，支持并发度配置、断点续传与吞吐/分阶段耗时统计]
+'''
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+
+import aiofiles
+from loguru import logger
+
+from base.pg.service import async_session_factory
+from base.redis.arq_service import INGEST_PARSE_QUEUE
+from base.redis.lane_scheduler import LaneScheduler
+from common.model.enums import JobLane
+from service.papers.paper_service import PaperProcessingService, PaperService
+from service.reader.job_progress import JobProgressReporter, ProgressReporter
+
+
+@dataclass
+class IngestItem:
+    """待导入的单个文件"""
+    path: Path
+    collection_id: Optional[UUID] = None
+
+    @property
+    def key(self) -> str:
+        return str(self.path.resolve())
+
+
+def scan_directory(directory: Path, recursive: bool = True) -> List[IngestItem]:
+    """扫描目录下的PDF文件 (按路径排序，保证多次运行顺序一致)"""
+    pattern = "**/*" if recursive else "*"
+    paths = sorted(p for p in directory.glob(pattern) if p.is_file() and p.suffix.lower() == ".pdf")
+    return [IngestItem(path=p) for p in paths]
+
+
+def load_manifest(manifest: Path) -> List[IngestItem]:
+    """
+    读取导入清单
+
+    每行一条记录，支持两种格式:
+    - 纯文本: PDF路径 (相对路径以清单所在目录为基准)
+    - JSON: {"path": "...", "collection_id": "..."}
+    空行与 # 开头的行会被忽略。
+    """
+    items: List[IngestItem] = []
+    base_dir = manifest.parent
+    for line in manifest.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            record = json.loads(line)
+            path = Path(record["path"])
+            collection_id = UUID(record["collection_id"]) if record.get("collection_id") else None
+        else:
+            path, collection_id = Path(line), None
+        if not path.is_absolute():
+            path = base_dir / path
+        items.append(IngestItem(path=path, collection_id=collection_id))
+    return items
+
+
+class IngestCheckpoint:
+    """
+    断点文件 (JSON Lines，只追加)
+
+    每个文件依次记录 registered(已登记论文) 与 done/failed(处理结束)。
+    重启后 done 的文件直接跳过；已登记但未完成的文件复用原论文ID重新处理，不会重复登记。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程崩溃时最后一行可能不完整
+                    continue
+                self.entries.setdefault(record["key"], {}).update(record)
+
+    def is_done(self, key: str) -> bool:
+        return self.entries.get(key, {}).get("status") == "done"
+
+    def paper_id(self, key: str) -> Optional[UUID]:
+        paper_id = self.entries.get(key, {}).get("paper_id")
+        return UUID(paper_id) if paper_id else None
+
+    def job_id(self, key: str) -> Optional[UUID]:
+        job_id = self.entries.get(key, {}).get("job_id")
+        return UUID(job_id) if job_id else None
+
+    async def record(self, key: str, status: str, **fields: Any) -> None:
+        record = {"key": key, "status": status, **{k: str(v) if isinstance(v, UUID) else v for k, v in fields.items()}}
+        self.entries.setdefault(key, {}).update(record)
+        async with self._lock:
+            async with aiofiles.open(self.path, "a", encoding="utf-8") as f:
+                await f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                await f.flush()
+
+
+class StageTimingReporter(ProgressReporter):
+    """
+    记录各阶段耗时的进度上报器
+
+    某阶段耗时 = 该阶段开始到下一次上报(下一阶段开始或结束)的时间；
+    同时把事件转发给 inner (如 JobProgressReporter)，作业进度照常更新。
+    """
+
+    def __init__(self, stats: "IngestStats", inner: Optional[ProgressReporter] = None):
+        self.stats = stats
+        self.inner = inner or ProgressReporter()
+        self.chunks = 0
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+
+    def _close_stage(self) -> None:
+        if self._stage is not None:
+            self.stats.add_stage_time(self._stage, time.perf_counter() - self._stage_started)
+            self._stage = None
+
+    async def start(self, stage: Optional[str] = None) -> None:
+        await self.inner.start(stage)
+
+    async def stage(self, stage: str, progress: int, message: Optional[str] = None) -> None:
+        self._close_stage()
+        self._stage, self._stage_started = stage, time.perf_counter()
+        await self.inner.stage(stage, progress, message)
+
+    async def succeed(self, result: Optional[Dict[str, Any]] = None) -> None:
+        self._close_stage()
+        self.chunks = ((result or {}).get("ingest") or {}).get("chunks", 0)
+        await self.inner.succeed(result)
+
+    async def fail(self, error: str) -> None:
+        self._close_stage()
+        await self.inner.fail(error)
+
+
+@dataclass
+class IngestStats:
+    """批量导入统计"""
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    chunks: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    stage_times: Dict[str, List[float]] = field(default_factory=dict)
+
+    def add_stage_time(self, stage: str, seconds: float) -> None:
+        self.stage_times.setdefault(stage, []).append(seconds)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    def progress_line(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return (
+            f"[{self.processed + self.skipped}/{self.total}] "
+            f"成功 {self.succeeded} 失败 {self.failed} 跳过 {self.skipped} | "
+            f"{self.succeeded / elapsed * 60:.1f} 篇/分钟, {self.chunks / elapsed:.1f} 块/秒"
+        )
+
+    def summary(self) -> str:
+        lines = [
+            "批量导入完成",
+            f"  文件总数: {self.total}  成功: {self.succeeded}  失败: {self.failed}  跳过(已完成): {self.skipped}",
+            f"  耗时: {self.elapsed:.1f}s  吞吐: {self.succeeded / max(self.elapsed, 1e-9) * 60:.1f} 篇/分钟, "
+            f"{self.chunks / max(self.elapsed, 1e-9):.1f} 块/秒 (共 {self.chunks} 块)",
+        ]
+        if self.stage_times:
+            lines.append("  分阶段耗时(秒):  阶段      次数     合计      平均      p95       最大")
+            for stage, times in self.stage_times.items():
+                ordered = sorted(times)
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                lines.append(
+                    f"                   {stage:<9} {len(times):<8} {sum(times):<9.2f} "
+                    f"{sum(times) / len(times):<9.3f} {p95:<9.3f} {ordered[-1]:.3f}"
+                )
+        return "\n".join(lines)
+
+
+class BulkIngestor:
+    """
+    批量导入驱动
+
+    - inline 模式: 在当前进程内登记并处理 (parse/split/embed/store)，可统计分阶段耗时；
+      并发处理的论文共享向量化批处理器，适合冷启动灌库。
+    - queue 模式: 仅登记论文并投递到分阶段队列 (backfill 通道)，由 Worker 集群处理。
+    """
+
+    def __init__(
+        self,
+        user_id: UUID,
+        checkpoint: IngestCheckpoint,
+        parallelism: int = 4,
+        mode: str = "inline",
+        collection_id: Optional[UUID] = None,
+        report_every: int = 10,
+        on_progress: Optional[Callable[["IngestStats"], None]] = None,
+    ):
+        if mode not in ("inline", "queue"):
+            raise ValueError(f"不支持的导入模式: {mode}")
+        self.user_id = user_id
+        self.checkpoint = checkpoint
+        self.parallelism = max(1, parallelism)
+        self.mode = mode
+        self.collection_id = collection_id
+        self.report_every = max(1, report_every)
+        # 每处理 report_every 个文件回调一次，未指定时写日志
+        self.on_progress = on_progress or (lambda stats: logger.info(stats.progress_line()))
+        self.stats = IngestStats()
+        self.processing_service = PaperProcessingService()
+
+    async def run(self, items: Iterable[IngestItem]) -> IngestStats:
+        items = list(items)
+        self.stats = IngestStats(total=len(items))
+        pending = []
+        for item in items:
+            if self.checkpoint.is_done(item.key):
+                self.stats.skipped += 1
+            else:
+                pending.append(item)
+        if self.stats.skipped:
+            logger.info(f"断点续传: 跳过已完成 {self.stats.skipped} 个文件")
+
+        semaphore = asyncio.Semaphore(self.parallelism)
+
+        async def _worker(item: IngestItem) -> None:
+            async with semaphore:
+                await self._ingest_one(item)
+                if self.stats.processed % self.report_every == 0:
+                    self.on_progress(self.stats)
+
+        await asyncio.gather(*(_worker(item) for item in pending))
+        return self.stats
+
+    async def _ingest_one(self, item: IngestItem) -> None:
+        key = item.key
+        try:
+            paper_id, job_id = await self._register(item)
+            if self.mode == "queue":
+                args = PaperService._process_task_args(paper_id, job_id, JobLane.BACKFILL, self.user_id)
+                job = await LaneScheduler.enqueue(
+                    "parse_pdf_task", *args,
+                    lane=JobLane.BACKFILL, user_id=self.user_id, queue_name=INGEST_PARSE_QUEUE,
+                )
+                if job is None:
+                    raise ConnectionError("任务队列不可用")
+                await self.checkpoint.record(key, "done", paper_id=paper_id, job_id=job_id)
+                self.stats.succeeded += 1
+                return
+
+            job_reporter = JobProgressReporter(job_id, "ingest") if job_id else None
+            reporter = StageTimingReporter(self.stats, inner=job_reporter)
+            if await self.processing_service.process_pdf(paper_id, reporter=reporter):
+                self.stats.succeeded += 1
+                self.stats.chunks += reporter.chunks
+                await self.checkpoint.record(key, "done", paper_id=paper_id, job_id=job_id, chunks=reporter.chunks)
+            else:
+                self.stats.failed += 1
+                await self.checkpoint.record(key, "failed", paper_id=paper_id, job_id=job_id)
+        except Exception as e:
+            logger.error(f"导入失败: {item.path}, 错误: {e}")
+            self.stats.failed += 1
+            await self.checkpoint.record(key, "failed", error=str(e))
+
+    async def _register(self, item: IngestItem) -> tuple[UUID, Optional[UUID]]:
+        """登记论文，已登记过的文件复用断点中的论文ID"""
+        paper_id = self.checkpoint.paper_id(item.key)
+        if paper_id is not None:
+            return paper_id, self.checkpoint.job_id(item.key)
+
+        started = time.perf_counter()
+        async with aiofiles.open(item.path, "rb") as f:
+            content = await f.read()
+        async with async_session_factory() as session:
+            response = await PaperService(session).upload_paper(
+                file_content=content,
+                filename=item.path.name,
+                user_id=self.user_id,
+                collection_id=item.collection_id or self.collection_id,
+                trigger_process=False,
+            )
+        self.stats.add_stage_time("register", time.perf_counter() - started)
+
+        paper_id = UUID(response.paper_id)
+        job_id = UUID(response.job_id) if response.job_id else None
+        await self.checkpoint.record(item.key, "registered", paper_id=paper_id, job_id=job_id)
+        return paper_id, job_id
@@ -0,0 +1,154 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_cleanup_service
+创建时间: 2026年10月19日 17:00
+更新时间: 2026年10月19日 17:00
+更新记录:
+    [2026年10月19日 17:00:v1.0_cleanup_service:定时清理过期作业、失败论文残留文本块与孤立文件，按批执行]
+'''
+
+import asyncio
+import shutil
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from base.config import settings
+from base.pg.service import JobRepository, PaperRepository, async_session_factory
+from common.model.enums import PaperStatus
+from service.reader.job_orchestrator import FAILED_STATUSES
+
+# 仍在处理中的论文，其解析产物不能删除
+_ACTIVE_PAPER_STATUSES = (PaperStatus.PENDING, PaperStatus.PROCESSING)
+
+
+class CleanupService:
+    """
+    定时清理服务 (Worker 定时任务 cleanup_failed_tasks 调用)
+
+    每类清理按 cleanup_batch_size 分批、每批独立提交，单次运行最多 cleanup_max_batches 批，
+    剩余部分留给下次运行，避免一次性大事务长时间占用数据库。
+    """
+
+    def __init__(self, upload_dir: Optional[Path] = None):
+        self.upload_dir = Path(upload_dir or settings.upload_dir)
+        self.batch_size = settings.cleanup_batch_size
+        self.max_batches = settings.cleanup_max_batches
+
+    async def run(self) -> Dict[str, int]:
+        return {
+            "expired_jobs": await self.purge_expired_jobs(),
+            "stale_chunks": await self.purge_stale_chunks(),
+            "orphan_files": await self.purge_orphan_files(),
+            "orphan_artifacts": await self.purge_orphan_artifacts(),
+        }
+
+    async def purge_expired_jobs(self) -> int:
+        """删除超过保留期的已结束(失败/取消/过期)作业记录"""
+        before = datetime.now() - timedelta(days=settings.cleanup_job_retention_days)
+        total = 0
+        for _ in range(self.max_batches):
+            async with async_session_factory() as session:
+                deleted = await JobRepository.delete_finished_jobs(session, FAILED_STATUSES, before, self.batch_size)
+            total += deleted
+            if deleted < self.batch_size:
+                break
+        return total
+
+    async def purge_stale_chunks(self) -> int:
+        """删除处理失败论文残留的文本块 (失败超过宽限期，期间可能仍在人工重试)"""
+        before = datetime.now() - timedelta(hours=settings.cleanup_orphan_grace_hours)
+        total = 0
+        for _ in range(self.max_batches):
+            async with async_session_factory() as session:
+                deleted = await PaperRepository.delete_failed_paper_chunks(session, before, self.batch_size)
+            total += deleted
+            if deleted < self.batch_size:
+                break
+        return total
+
+    async def purge_orphan_files(self) -> int:
+        """删除未被任何论文引用的上传文件 (上传中途失败、论文删除后遗留等)"""
+        papers_dir = self.upload_dir / "papers"
+        candidates = await asyncio.to_thread(self._old_files, papers_dir)
+        deleted = 0
+        for start in range(0, len(candidates), self.batch_size):
+            batch = candidates[start:start + self.batch_size]
+            keys = {path.relative_to(self.upload_dir).as_posix(): path for path in batch}
+            async with async_session_factory() as session:
+                referenced = await PaperRepository.get_existing_file_keys(session, keys.keys())
+            orphans = [path for key, path in keys.items() if key not in referenced]
+            deleted += await asyncio.to_thread(self._remove_files, orphans, papers_dir)
+        return deleted
+
+    async def purge_orphan_artifacts(self) -> int:
+        """删除已不在处理中的论文遗留的解析产物目录 (阶段任务最终失败时未清理)"""
+        artifacts_dir = self.upload_dir / "artifacts"
+        candidates = await asyncio.to_thread(self._old_artifact_dirs, artifacts_dir)
+        deleted = 0
+        for start in range(0, len(candidates), self.batch_size):
+            batch = candidates[start:start + self.batch_size]
+            async with async_session_factory() as session:
+                statuses = await PaperRepository.get_paper_statuses(session, [paper_id for paper_id, _ in batch])
+            stale = [path for paper_id, path in batch if statuses.get(paper_id) not in _ACTIVE_PAPER_STATUSES]
+            for path in stale:
+                await asyncio.to_thread(shutil.rmtree, path, True)
+            deleted += len(stale)
+        return deleted
+
+    def _cutoff(self) -> float:
+        return time.time() - settings.cleanup_orphan_grace_hours * 3600
+
+    def _limit(self) -> int:
+        return self.batch_size * self.max_batches
+
+    def _old_files(self, root: Path) -> List[Path]:
+        if not root.exists():
+            return []
+        cutoff, limit = self._cutoff(), self._limit()
+        files = []
+        for path in root.rglob("*"):
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                files.append(path)
+                if len(files) >= limit:
+                    break
+        return files
+
+    def _old_artifact_dirs(self, root: Path) -> List[tuple[UUID, Path]]:
+        if not root.exists():
+            return []
+        cutoff, limit = self._cutoff(), self._limit()
+        dirs = []
+        for path in root.iterdir():
+            try:
+                paper_id = UUID(path.name)
+            except ValueError:
+                continue
+            if path.is_dir() and path.stat().st_mtime < cutoff:
+                dirs.append((paper_id, path))
+                if len(dirs) >= limit:
+                    break
+        return dirs
+
+    @staticmethod
+    def _remove_files(paths: List[Path], root: Path) -> int:
+        removed = 0
+        for path in paths:
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"删除孤立文件失败: {path}, 错误: {e}")
+                continue
+            # 清理随之变空的上级目录 (papers/{user_id}/{file_id}/)
+            parent = path.parent
+            while parent != root and parent.is_dir() and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+        return removed
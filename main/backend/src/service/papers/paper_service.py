@@ -1,9 +1,28 @@
 '''
 开发者: BackendAgent
-当前版本: v1.4_paper_file_url_and_x_accel
+当前版本: v1.23_paper_related_after_commit
 创建时间: 2026年01月08日 14:00
-更新时间: 2026年01月17日 21:58
+更新时间: 2026年10月20日 12:00
 更新记录:
+    [2026年10月20日 12:00:v1.23_paper_related_after_commit:删除论文后的相关论文补齐任务改为提交后投递，不再在工作单元中途提交]
+    [2026年10月20日 12:00:v1.22_paper_count_on_complete:论文处理完成 (状态变为完成) 提交后同样失效检索总数缓存]
+    [2026年10月20日 11:00:v1.21_paper_delete_after_commit:删除论文时 PDF 文件在记录删除提交后再删除]
+    [2026年10月20日 11:00:v1.20_paper_count_after_commit:检索总数缓存改为工作单元提交后失效；论文标记失败或失败后重试时同样失效]
+    [2026年10月20日 10:00:v1.19_paper_related_graph:相关论文改为读取预先计算的 related_papers；删除论文后投递任务补齐受影响论文的列表]
+    [2026年10月20日 09:00:v1.18_paper_embedding:入库时写入论文向量(文本块向量均值)；新增相关论文查询]
+    [2026年10月20日 07:00:v1.17_paper_serving_model:文本块向量按检索使用的模型(embedding_models)生成与写入，分阶段导入经产物记录模型]
+    [2026年10月20日 06:00:v1.16_paper_chunk_embeddings:文本块向量按当前模型写入 chunk_embeddings]
+    [2026年10月20日 05:00:v1.15_paper_read_replica:新增只读会话的 PaperService 依赖(可路由到只读副本)，供论文列表使用]
+    [2026年10月20日 04:00:v1.14_paper_unit_of_work:上传在任务入队前统一提交，可失败的收藏夹/作业写入使用保存点；入库阶段文本块替换与状态更新在同一工作单元中提交]
+    [2026年10月20日 03:00:v1.13_paper_update_returning:状态与元数据合并为一条 UPDATE ... RETURNING 更新]
+    [2026年10月20日 02:00:v1.12_paper_count_invalidate:论文新增/删除后失效该用户的检索总数缓存]
+    [2026年10月20日 01:00:v1.11_paper_keyset_list:论文列表支持游标分页]
+    [2026年10月19日 17:00:v1.10_paper_task_retry:处理流程支持将可重试异常抛给任务层重试，向量化失败不再以零向量降级写入]
+    [2026年10月19日 15:00:v1.9_paper_job_lanes:解析任务按优先级通道入队(单篇上传interactive，网络批量导入user)，按用户公平调度]
+    [2026年10月19日 13:00:v1.8_paper_embedding_batcher:文本块向量化改由Worker进程共享的批处理器完成，多篇论文合并批次]
+    [2026年10月19日 12:00:v1.7_paper_staged_ingest:导入拆分为parse/embed/persist三个阶段队列，阶段间通过解析产物存储传递文本块与向量]
+    [2026年10月19日 11:00:v1.6_paper_job_progress:上传时创建ingest作业并随任务下发，解析各阶段(parse/split/embed/store)上报实时进度]
+    [2026年10月19日 10:00:v1.5_paper_arq_pool:任务入队改用常驻Arq连接池，移除逐请求TCP探测；网络批量导入改为统一批量入队]
     [2026年01月17日 21:58:v1.4_paper_file_url_and_x_accel:上传时生成稳定file_url并规范化文件名，配合Nginx X-Accel-Redirect下载]
     [2026年01月10日 10:20:v1.3_paper_service_saas:适配SaaS化架构，Service层返回DTO而非Entity，解耦数据层]
     [2026年01月09日 16:10:v1.2_paper_service:重构数据库访问逻辑，移除Service层SQL语句，使用Repository模式]
@@ -18,34 +37,62 @@ import logging
 import os
 import uuid
 import httpx
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Optional, Annotated
-from urllib.parse import urlparse
+from typing import Callable, List, Optional, Annotated, Tuple
 from uuid import UUID
 
 import aiofiles
 from fastapi import Depends
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from arq import create_pool
-from arq.connections import RedisSettings
 
 # 导入 Business Models / DTOs
 from service.papers.schema import PaperUploadResponse, PaperDTO, PaperInfo
-from common.model.enums import PaperStatus
+from common.model.enums import JobLane, PaperStatus
 from controller.api.papers.schema import PapersUploadWebRequest, PapersUploadResponse
 
 # 导入 Entities (仅用于与 Repository 交互)
-from base.pg.entity import Paper, PaperChunk, User, Collection
+from base.pg.entity import Paper, PaperChunk, ChunkEmbedding, PaperEmbedding, User, Collection, Job
 
 from base.config import settings
-from base.pg.service import PaperRepository, CollectionRepository, SessionDep, async_session_factory
+from base.redis.arq_service import INGEST_PARSE_QUEUE, INGEST_PERSIST_QUEUE
+from base.redis.count_cache import PaperCountCache
+from base.redis.lane_scheduler import LaneScheduler
+from base.pg.service import (
+    PaperRepository,
+    CollectionRepository,
+    JobRepository,
+    RelatedPaperRepository,
+    ReadSessionDep,
+    SessionDep,
+    async_session_factory,
+    on_commit,
+    savepoint,
+    unit_of_work,
+)
 from base.pdf_parser.parser import PDFParseResult, parse_pdf, extract_pdf_text
-from base.embedding.embedding_service import EmbeddingService, embed_batch
+from base.pdf_parser.artifact_store import ParseArtifactStore
+from base.embedding.embedding_service import EmbeddingService
+from base.embedding.batcher import get_embedding_batcher
+from base.embedding.serving import serving_embedding_model
+from base.embedding.registry import active_embedding_model, embedding_dimension
 from base.embedding.text_splitter import SemanticTextSplitter
+from service.reader.job_progress import ProgressReporter
 
 from loguru import logger
 
+# 判断异常是否交由任务层重试 (返回 True 时处理流程直接抛出异常，不标记失败)
+RetryPredicate = Callable[[Exception], bool]
+
+
+async def invalidate_paper_counts(user_id: UUID) -> None:
+    """失效用户的检索总数缓存；Redis 不可用时不影响主流程 (缓存按过期时间兜底)"""
+    try:
+        await PaperCountCache.invalidate(user_id)
+    except Exception as e:
+        logger.warning(f"检索总数缓存失效失败: user={user_id}, 错误: {e}")
+
 
 class PaperService:
     """
@@ -80,8 +127,11 @@ class PaperService:
     async def upload_papers_from_web(self, req: PapersUploadWebRequest, user_id: UUID) -> List[PapersUploadResponse]:
         """
         从网络URL上传论文
+
+        逐个下载并落库后，统一批量入队解析任务，避免每篇论文单独一次入队往返。
         """
         responses = []
+        uploaded: List[Tuple[UUID, Optional[UUID]]] = []
         
         async with httpx.AsyncClient() as client:
             for url in req.urls:
@@ -102,20 +152,25 @@ class PaperService:
                     if not filename.lower().endswith(".pdf"):
                         filename += ".pdf"
                     
-                    # 2. Upload using existing logic
-                    upload_resp = await self.upload_paper(
-                        file_content=resp.content,
-                        filename=filename,
-                        user_id=user_id,
-                        content_type=content_type,
-                        collection_id=req.collection_id
-                    )
+                    # 2. Upload using existing logic (单篇失败只撤销该篇的写入)
+                    async with savepoint(self.session):
+                        upload_resp = await self.upload_paper(
+                            file_content=resp.content,
+                            filename=filename,
+                            user_id=user_id,
+                            content_type=content_type,
+                            collection_id=req.collection_id,
+                            trigger_process=False,
+                        )
+                    job_id = uuid.UUID(upload_resp.job_id) if upload_resp.job_id else None
+                    uploaded.append((uuid.UUID(upload_resp.paper_id), job_id))
                     
                     responses.append(PapersUploadResponse(
                         paper_id=uuid.UUID(upload_resp.paper_id),
                         title=filename, 
                         status=upload_resp.status,
-                        message=upload_resp.message
+                        message=upload_resp.message,
+                        job_id=job_id
                     ))
                     
                 except Exception as e:
@@ -126,7 +181,10 @@ class PaperService:
                         status="failed",
                         message=str(e)
                     ))
-                    
+
+        # 入队前提交，Worker 取到任务时论文与作业记录已可见
+        await self.session.commit()
+        await self._trigger_process_tasks(uploaded, user_id, lane=JobLane.USER)
         return responses
 
     async def upload_paper(
@@ -136,9 +194,12 @@ class PaperService:
         user_id: UUID,
         content_type: str = "application/pdf",
         collection_id: UUID | None = None,
+        trigger_process: bool = True,
     ) -> PaperUploadResponse:
         """
         上传论文文件
+
+        trigger_process=False 时仅落库不入队，由调用方批量触发 (见 _trigger_process_tasks)。
         """
         logger.info(f"开始上传论文: {filename}, 用户ID: {user_id}")
 
@@ -182,40 +243,48 @@ class PaperService:
             )
 
             try:
-                if target_collection_id is not None:
-                    await CollectionRepository.add_paper_to_collection(self.session, target_collection_id, paper.id)
-                else:
-                    default_collection = await CollectionRepository.get_default_collection(self.session, user_id)
-                    if not default_collection:
-                        try:
-                            default_collection = await CollectionRepository.create_collection(
-                                self.session,
-                                Collection(
-                                    user_id=user_id,
-                                    name="默认收藏夹",
-                                    description="系统默认收藏夹",
-                                    is_default=True,
-                                ),
-                            )
-                        except IntegrityError:
-                            await self.session.rollback()
-                            default_collection = await CollectionRepository.get_default_collection(self.session, user_id)
-
-                    if default_collection:
-                        await CollectionRepository.add_paper_to_collection(self.session, default_collection.id, paper.id)
+                async with savepoint(self.session):
+                    if target_collection_id is not None:
+                        await CollectionRepository.add_paper_to_collection(self.session, target_collection_id, paper.id)
+                    else:
+                        default_collection = await CollectionRepository.get_default_collection(self.session, user_id)
+                        if not default_collection:
+                            try:
+                                async with savepoint(self.session):
+                                    default_collection = await CollectionRepository.create_collection(
+                                        self.session,
+                                        Collection(
+                                            user_id=user_id,
+                                            name="默认收藏夹",
+                                            description="系统默认收藏夹",
+                                            is_default=True,
+                                        ),
+                                    )
+                            except IntegrityError:
+                                default_collection = await CollectionRepository.get_default_collection(self.session, user_id)
+
+                        if default_collection:
+                            await CollectionRepository.add_paper_to_collection(self.session, default_collection.id, paper.id)
             except Exception as e:
                 logger.warning(f"论文加入默认收藏夹失败(不影响上传): paper_id={paper.id}, user_id={user_id}, err={e}")
 
             logger.info(f"论文记录创建成功: {paper.id}")
 
-            # 5. 触发异步处理任务
+            # 5. 创建解析作业，前端可通过 /jobs/{job_id}/events 订阅实时进度
+            job_id = await self._create_ingest_job(user_id, paper.id)
+
+            # 6. 触发异步处理任务
             # TODO: 这个解析好像有问题。TODO::作者标记,1. 要不要等待解析完成才持久化到本地?2.现在是先存储元数据到数据库,哪如果第一次解析,失败,那什么时候会再解析呢?
-            await self._trigger_process_task(paper.id, file_path)
+            if trigger_process:
+                # 入队前提交，Worker 取到任务时论文与作业记录已可见
+                await self.session.commit()
+                await self._trigger_process_task(paper.id, file_path, job_id, user_id=user_id)
 
             return PaperUploadResponse(
                 paper_id=str(paper.id),
                 status=paper.status.value,
-                message="论文上传成功，正在处理中"
+                message="论文上传成功，正在处理中",
+                job_id=str(job_id) if job_id else None
             )
 
         except Exception as e:
@@ -225,56 +294,95 @@ class PaperService:
                 file_path.unlink()
             raise
     
-    # TODO: 这个异步任务创建和调度是否合理呃?
-    async def _trigger_process_task(self, paper_id: UUID, file_path: Path):
+    async def _create_ingest_job(self, user_id: UUID, paper_id: UUID) -> Optional[UUID]:
         """
-        触发PDF处理异步任务
+        创建论文解析(ingest)作业记录，失败时返回 None (不影响上传)
         """
         try:
-            redis_url = settings.arq_redis_url
-            parsed = urlparse(redis_url)
-            host = parsed.hostname
-            port = parsed.port or 6379
-            database = int(parsed.path.lstrip("/") or "0")
-
-            if not host:
-                raise ValueError(f"Invalid Redis URL: {redis_url}")
-
-            try:
-                reader, writer = await asyncio.wait_for(
-                    asyncio.open_connection(host, port),
-                    timeout=0.2,
-                )
-                writer.close()
-                await writer.wait_closed()
-            except Exception:
-                # TODO: 这里的确是需要异步任务的一个执行。其实应该分为3个模块论文上传
-                # 1.解析: 存储解析结果给AI进行利用(在上传的时候就进行处理,而不用等到需要AI需要的时候再解析->持久化))
-                # 2.pdf持久化: 存储到本地文件系统或是对象存储,用于在离线的情况下,存储论文(思考: 我真的需要存储完整的论文嘛?我这边只做pdf解析和元数据存储(url或file?),想就保留着吧,再说)
-                # 3.pdf元数据持久化: 存储基础的信息和可引用信息,可服务与收藏夹。
-                logger.warning(f"Redis不可用，跳过任务入队: {host}:{port}, paper_id={paper_id}")
+            async with savepoint(self.session):
+                job = await JobRepository.create_job(self.session, Job(
+                    user_id=user_id,
+                    paper_id=paper_id,
+                    job_type="ingest",
+                    status="queued",
+                    progress=0,
+                    stage="queued",
+                    idempotency_key=f"ingest:{paper_id}",
+                ))
+            return job.id
+        except Exception as e:
+            logger.warning(f"创建解析作业失败(不影响上传): paper_id={paper_id}, err={e}")
+            return None
 
-                return
+    async def _trigger_process_task(
+        self,
+        paper_id: UUID,
+        file_path: Path,
+        job_id: Optional[UUID] = None,
+        user_id: Optional[UUID] = None,
+        lane: JobLane = JobLane.INTERACTIVE,
+    ):
+        """
+        触发PDF处理异步任务
 
-            redis_settings = RedisSettings(
-                host=host,
-                port=port,
-                database=database
+        复用应用级 Arq 连接池；Redis 不可用时由 ArqService 的健康状态快速跳过，不阻塞上传。
+        单篇上传走 interactive 通道，不会排在其他用户的大批量导入之后。
+        """
+        try:
+            # TODO: 这里的确是需要异步任务的一个执行。其实应该分为3个模块论文上传
+            # 1.解析: 存储解析结果给AI进行利用(在上传的时候就进行处理,而不用等到需要AI需要的时候再解析->持久化))
+            # 2.pdf持久化: 存储到本地文件系统或是对象存储,用于在离线的情况下,存储论文(思考: 我真的需要存储完整的论文嘛?我这边只做pdf解析和元数据存储(url或file?),想就保留着吧,再说)
+            # 3.pdf元数据持久化: 存储基础的信息和可引用信息,可服务与收藏夹。
+            job = await LaneScheduler.enqueue(
+                'parse_pdf_task',
+                *self._process_task_args(paper_id, job_id, lane, user_id),
+                lane=lane,
+                user_id=user_id,
+                queue_name=INGEST_PARSE_QUEUE,
             )
-            
-            pool = None
-            try:
-                pool = await create_pool(redis_settings)
-                await pool.enqueue_job('process_pdf_task', str(paper_id))
-            finally:
-                if pool is not None:
-                    await pool.close()
-            
+            if job is None:
+                logger.warning(f"任务队列不可用，跳过任务入队: paper_id={paper_id}")
+                return
             logger.info(f"已触发PDF处理任务: {paper_id}")
         except Exception as e:
             logger.error(f"触发PDF处理任务失败: {e}", exc_info=True)
             # 记录错误但不抛出异常，避免影响上传响应
+
+    async def _trigger_process_tasks(
+        self,
+        items: List[Tuple[UUID, Optional[UUID]]],
+        user_id: Optional[UUID] = None,
+        lane: JobLane = JobLane.USER,
+    ):
+        """
+        批量触发PDF处理异步任务 (多论文导入)
+        items: [(paper_id, job_id), ...]
+        """
+        if not items:
+            return
+        try:
+            jobs = await LaneScheduler.enqueue_many(
+                'parse_pdf_task',
+                [self._process_task_args(paper_id, job_id, lane, user_id) for paper_id, job_id in items],
+                lane=lane,
+                user_id=user_id,
+                queue_name=INGEST_PARSE_QUEUE,
+            )
+            enqueued = sum(1 for job in jobs if job is not None)
+            if enqueued < len(items):
+                logger.warning(f"部分PDF处理任务未能入队: {enqueued}/{len(items)}")
+            else:
+                logger.info(f"已批量触发PDF处理任务: {enqueued} 篇")
+        except Exception as e:
+            logger.error(f"批量触发PDF处理任务失败: {e}", exc_info=True)
     
+    @staticmethod
+    def _process_task_args(
+        paper_id: UUID, job_id: Optional[UUID], lane: JobLane, user_id: Optional[UUID]
+    ) -> Tuple[Optional[str], ...]:
+        """阶段任务参数: (paper_id, job_id, lane, user_id)，通道与用户随阶段传递"""
+        return (str(paper_id), str(job_id) if job_id else None, JobLane(lane).value, str(user_id) if user_id else None)
+
     #TODO: 用这里的redis做嘛?不用我们的worker下的内容,Agent需要获取重新了解下整个项目对这种解析的任务的了解,并汇报给我。
     def _validate_file(self, filename: str, file_content: bytes) -> bool:
         """
@@ -323,7 +431,16 @@ class PaperService:
         if paper.file_url is None:
             paper.file_url = f"/api/v1/papers/{paper.id}/file"
 
-        return await PaperRepository.create_paper(self.session, paper)
+        created = await PaperRepository.create_paper(self.session, paper)
+        await self._invalidate_counts(user_id)
+        return created
+
+    async def _invalidate_counts(self, user_id: UUID) -> None:
+        """
+        论文新增/删除后失效检索总数缓存
+        在工作单元提交后执行: 提交前失效时并发检索仍读到旧数据，会把旧总数重新写入缓存。
+        """
+        await on_commit(self.session, lambda: invalidate_paper_counts(user_id))
 
     async def get_paper_status(self, paper_id: UUID, user_id: UUID) -> Optional[PaperDTO]:
         """
@@ -340,6 +457,18 @@ class PaperService:
         """
         return await self.get_paper_status(paper_id, user_id)
 
+    async def get_related_papers(
+        self, paper_id: UUID, user_id: UUID, limit: int = 10
+    ) -> Optional[List[Tuple[PaperDTO, float]]]:
+        """
+        用户论文库中的相关论文 [(论文, 相似度)]，读取后台预先计算的 related_papers (不做向量计算)
+        论文不存在或无访问权限时返回 None，列表尚未计算时返回空列表。
+        """
+        paper = await PaperRepository.get_paper_by_id(self.session, paper_id)
+        if not paper or paper.user_id != user_id:
+            return None
+        related = await RelatedPaperRepository.get_related_papers(self.session, paper_id, user_id, limit)
+        return [(self._entity_to_dto(related_paper), score) for related_paper, score in related]
 
     async def update_paper_status(
         self,
@@ -352,15 +481,14 @@ class PaperService:
         """
         更新论文处理状态
         """
-        # 先更新状态
-        paper = await PaperRepository.update_paper_status(self.session, paper_id, status, error_message)
+        # 状态、错误信息与非空元数据一条语句更新
+        values = {"status": status, **PaperRepository.metadata_values(title, authors)}
+        if error_message:
+            values["error_message"] = error_message
+        paper = await PaperRepository.update_paper_fields(self.session, paper_id, **values)
         if not paper:
             return False
         
-        # 如果有元数据更新
-        if title or authors:
-            await PaperRepository.update_paper_metadata(self.session, paper_id, title, authors)
-        
         logger.info(f"论文状态更新: {paper_id} -> {status.value}")
         return True
 
@@ -368,12 +496,14 @@ class PaperService:
         self,
         user_id: UUID,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[PaperDTO]:
         """
         获取用户的论文列表 (返回 DTO 列表)
+        传入 cursor 时按游标分页并忽略 offset
         """
-        papers = await PaperRepository.get_user_papers(self.session, user_id, limit, offset)
+        papers = await PaperRepository.get_user_papers(self.session, user_id, limit, offset, cursor)
         return [self._entity_to_dto(p) for p in papers]
 
     async def get_file_path(self, paper: PaperDTO) -> Optional[Path]:
@@ -394,17 +524,39 @@ class PaperService:
         if not paper or paper.user_id != user_id:
             return False
 
-        # 删除数据库记录
+        # 删除数据库记录 (相关论文列表随之级联删除一项，删除提交后投递任务补齐，任务读到的已是删除后的论文库)
+        affected = await RelatedPaperRepository.get_listing_papers(self.session, paper_id)
         await PaperRepository.delete_paper(self.session, paper_id)
+        await self._invalidate_counts(user_id)
+        if affected:
+            await on_commit(self.session, lambda: self._trigger_related_update(user_id, affected))
 
-        # 删除文件
+        # 删除文件: 在记录删除提交后执行，提交失败回滚时文件仍在
         file_path = self.upload_dir / paper.file_key
-        if file_path.exists():
-            file_path.unlink()
+        await on_commit(self.session, lambda: self._delete_file(file_path))
 
         logger.info(f"论文已删除: {paper_id}")
         return True
 
+    async def _delete_file(self, file_path: Path) -> None:
+        file_path.unlink(missing_ok=True)
+
+    async def _trigger_related_update(self, user_id: UUID, affected: List[UUID]) -> None:
+        """投递相关论文补齐任务 (入队失败只记录日志，列表可由 related_papers.py --rebuild 修复)"""
+        try:
+            job = await LaneScheduler.enqueue(
+                'update_related_papers_task',
+                [],
+                [str(paper_id) for paper_id in affected],
+                lane=JobLane.BACKFILL,
+                user_id=str(user_id),
+                queue_name=INGEST_PERSIST_QUEUE,
+            )
+            if job is None:
+                logger.warning(f"相关论文补齐任务入队失败: {len(affected)} 篇论文")
+        except Exception as e:
+            logger.warning(f"相关论文补齐任务入队失败: {e}")
+
 
 async def get_paper_service(session: SessionDep) -> PaperService:
     """获取 PaperService 实例"""
@@ -413,20 +565,42 @@ async def get_paper_service(session: SessionDep) -> PaperService:
 PaperServiceDep = Annotated[PaperService, Depends(get_paper_service)]
 
 
+async def get_read_paper_service(session: ReadSessionDep) -> PaperService:
+    """获取只读会话的 PaperService 实例 (只能调用查询方法)"""
+    return PaperService(session)
+
+ReadPaperServiceDep = Annotated[PaperService, Depends(get_read_paper_service)]
+
+
 class PaperProcessingService:
     """
     论文处理服务（供异步任务调用）
     """
 
-    def __init__(self):
+    # 各阶段开始时上报的进度 (0-100)
+    STAGE_PROGRESS = {"parse": 10, "split": 40, "embed": 55, "store": 85}
+
+    def __init__(self, artifact_store: Optional[ParseArtifactStore] = None):
         # TODO: 初始化PDF解析器、向量化模型等
-        pass
+        self.artifact_store = artifact_store or ParseArtifactStore()
+        # 最近一次标记失败的原因 (供任务层写入死信队列)
+        self.last_error: Optional[str] = None
 
-    async def process_pdf(self, paper_id: UUID) -> bool:
+    async def process_pdf(
+        self,
+        paper_id: UUID,
+        reporter: Optional[ProgressReporter] = None,
+        retry_on: Optional[RetryPredicate] = None,
+    ) -> bool:
         """
         处理PDF文件
+
+        reporter: 进度上报器，按 parse/split/embed/store 阶段上报；为空时不上报。
+        retry_on: 异常满足该条件时直接抛出由任务层重试 (论文保持处理中)；为空时所有异常均标记失败。
         """
         logger.info(f"开始处理PDF: {paper_id}")
+        reporter = reporter or ProgressReporter()
+        await reporter.start()
 
         try:
             # 1. 获取论文记录并更新状态
@@ -434,10 +608,15 @@ class PaperProcessingService:
                 paper = await PaperRepository.get_paper_by_id(session, paper_id)
                 if not paper:
                     logger.error(f"论文不存在: {paper_id}")
+                    self.last_error = "论文不存在"
+                    await reporter.fail("论文不存在")
                     return False
                 
-                # 更新状态为处理中
+                # 更新状态为处理中 (失败后重试的论文重新计入检索总数)
+                retried = paper.status == PaperStatus.FAILED
                 await PaperRepository.update_paper_status(session, paper_id, PaperStatus.PROCESSING)
+                if retried:
+                    await invalidate_paper_counts(paper.user_id)
                 paper.status = PaperStatus.PROCESSING # 更新本地对象状态
 
             # 2. 获取文件路径
@@ -446,27 +625,34 @@ class PaperProcessingService:
 
             if not file_path.exists():
                 logger.error(f"文件不存在: {file_path}")
-                await self._update_status(paper_id, PaperStatus.FAILED, "文件不存在")
+                await self.mark_failed(paper_id, reporter, "文件不存在")
                 return False
 
             # 3. 解析PDF
+            await reporter.stage("parse", self.STAGE_PROGRESS["parse"], "解析PDF")
             text_content = await self._parse_pdf(file_path)
             if not text_content:
                 logger.error("PDF解析失败")
-                await self._update_status(paper_id, PaperStatus.FAILED, "PDF解析失败")
+                await self.mark_failed(paper_id, reporter, "PDF解析失败")
                 return False
 
             # 4. 提取元数据（标题、作者等）
             metadata = await self._extract_metadata(file_path, text_content)
 
             # 5. 分割文本
+            await reporter.stage("split", self.STAGE_PROGRESS["split"], "分割文本")
             chunks = self._split_text(text_content)
 
             # 6. 生成向量嵌入
-            embeddings = await self._generate_embeddings(chunks)
+            await reporter.stage("embed", self.STAGE_PROGRESS["embed"], f"生成向量: {len(chunks)} 个文本块")
+            model = await serving_embedding_model()
+            embeddings = await self._generate_embeddings(chunks, model)
 
-            # 7. 存储chunks
-            await self._save_chunks(paper_id, chunks, embeddings)
+            # 7. 存储chunks (先清理已有文本块，任务重试时不会重复写入)
+            await reporter.stage("store", self.STAGE_PROGRESS["store"], "保存文本块")
+            async with async_session_factory() as session:
+                await PaperRepository.delete_paper_chunks(session, paper_id)
+            await self._save_chunks(paper_id, chunks, embeddings, model=model)
 
             # 8. 更新论文记录
             await self._update_paper_after_processing(
@@ -476,17 +662,153 @@ class PaperProcessingService:
             )
 
             logger.info(f"PDF处理完成: {paper_id}")
+            await reporter.succeed({"ingest": {"paper_id": str(paper_id), "chunks": len(chunks)}})
             return True
 
         except Exception as e:
+            if retry_on is not None and retry_on(e):
+                logger.warning(f"PDF处理失败，等待重试: {paper_id}, 错误: {e}")
+                raise
             logger.error(f"PDF处理失败: {e}", exc_info=True)
-            await self._update_status(
-                paper_id,
-                PaperStatus.FAILED,
-                f"处理失败: {str(e)}"
+            await self.mark_failed(paper_id, reporter, f"处理失败: {str(e)}")
+            return False
+
+    async def parse_stage(
+        self,
+        paper_id: UUID,
+        reporter: Optional[ProgressReporter] = None,
+        retry_on: Optional[RetryPredicate] = None,
+    ) -> bool:
+        """
+        分阶段导入 - 解析阶段 (CPU密集)
+
+        解析PDF、提取元数据并分块，文本块写入解析产物存储，供向量化阶段读取。
+        """
+        reporter = reporter or ProgressReporter()
+        await reporter.start()
+        try:
+            async with async_session_factory() as session:
+                paper = await PaperRepository.get_paper_by_id(session, paper_id)
+                if not paper:
+                    logger.error(f"论文不存在: {paper_id}")
+                    self.last_error = "论文不存在"
+                    await reporter.fail("论文不存在")
+                    return False
+                retried = paper.status == PaperStatus.FAILED
+                await PaperRepository.update_paper_status(session, paper_id, PaperStatus.PROCESSING)
+                if retried:
+                    await invalidate_paper_counts(paper.user_id)
+
+            file_path = Path(settings.upload_dir) / paper.file_key
+            if not file_path.exists():
+                await self.mark_failed(paper_id, reporter, "文件不存在")
+                return False
+
+            await reporter.stage("parse", self.STAGE_PROGRESS["parse"], "解析PDF")
+            text_content = await self._parse_pdf(file_path)
+            if not text_content:
+                await self.mark_failed(paper_id, reporter, "PDF解析失败")
+                return False
+            metadata = await self._extract_metadata(file_path, text_content)
+
+            await reporter.stage("split", self.STAGE_PROGRESS["split"], "分割文本")
+            chunks = self._split_text(text_content)
+            await self.artifact_store.save_chunks(
+                paper_id, chunks, {"title": metadata.get("title"), "authors": metadata.get("authors", [])}
             )
+            return True
+        except Exception as e:
+            if retry_on is not None and retry_on(e):
+                logger.warning(f"PDF解析阶段失败，等待重试: {paper_id}, 错误: {e}")
+                raise
+            logger.error(f"PDF解析阶段失败: {paper_id}, 错误: {e}", exc_info=True)
+            await self.mark_failed(paper_id, reporter, f"处理失败: {str(e)}")
+            return False
+
+    async def embed_stage(
+        self,
+        paper_id: UUID,
+        reporter: Optional[ProgressReporter] = None,
+        retry_on: Optional[RetryPredicate] = None,
+    ) -> bool:
+        """
+        分阶段导入 - 向量化阶段 (I/O密集)
+
+        读取解析阶段的文本块生成向量，向量写入解析产物存储，供入库阶段读取。
+        """
+        reporter = reporter or ProgressReporter()
+        try:
+            loaded = await self.artifact_store.load_chunks(paper_id)
+            if loaded is None:
+                await self.mark_failed(paper_id, reporter, "解析产物不存在")
+                return False
+            chunks, _ = loaded
+
+            await reporter.stage("embed", self.STAGE_PROGRESS["embed"], f"生成向量: {len(chunks)} 个文本块")
+            model = await serving_embedding_model()
+            embeddings = await self._generate_embeddings(chunks, model)
+            await self.artifact_store.save_embeddings(paper_id, embeddings, model=model)
+            return True
+        except Exception as e:
+            if retry_on is not None and retry_on(e):
+                logger.warning(f"向量化阶段失败，等待重试: {paper_id}, 错误: {e}")
+                raise
+            logger.error(f"向量化阶段失败: {paper_id}, 错误: {e}", exc_info=True)
+            await self.mark_failed(paper_id, reporter, f"处理失败: {str(e)}")
             return False
 
+    async def persist_stage(
+        self,
+        paper_id: UUID,
+        reporter: Optional[ProgressReporter] = None,
+        retry_on: Optional[RetryPredicate] = None,
+    ) -> bool:
+        """
+        分阶段导入 - 入库阶段 (I/O密集)
+
+        将文本块与向量写入数据库并更新论文记录，完成后清理解析产物。
+        先删除该论文已有的文本块，任务重试时不会重复写入。
+        """
+        reporter = reporter or ProgressReporter()
+        try:
+            loaded = await self.artifact_store.load_chunks(paper_id)
+            embeddings = await self.artifact_store.load_embeddings(paper_id)
+            model = await self.artifact_store.load_embedding_model(paper_id)
+            if loaded is None or embeddings is None:
+                await self.mark_failed(paper_id, reporter, "解析产物不存在")
+                return False
+            chunks, metadata = loaded
+
+            await reporter.stage("store", self.STAGE_PROGRESS["store"], "保存文本块")
+            # 替换文本块与标记完成在同一事务中提交，不会出现文本块写入一半或已写入但状态未完成
+            async with unit_of_work() as session:
+                await PaperRepository.delete_paper_chunks(session, paper_id)
+                await self._save_chunks(paper_id, chunks, embeddings, session=session, model=model)
+                await self._update_paper_after_processing(
+                    paper_id,
+                    title=metadata.get("title"),
+                    authors=metadata.get("authors", []),
+                    session=session,
+                )
+            await self.artifact_store.clear(paper_id)
+
+            logger.info(f"PDF处理完成: {paper_id}")
+            await reporter.succeed({"ingest": {"paper_id": str(paper_id), "chunks": len(chunks)}})
+            return True
+        except Exception as e:
+            if retry_on is not None and retry_on(e):
+                logger.warning(f"入库阶段失败，等待重试: {paper_id}, 错误: {e}")
+                raise
+            logger.error(f"入库阶段失败: {paper_id}, 错误: {e}", exc_info=True)
+            await self.mark_failed(paper_id, reporter, f"处理失败: {str(e)}")
+            return False
+
+    async def mark_failed(self, paper_id: UUID, reporter: ProgressReporter, message: str):
+        """标记论文处理失败并上报作业失败"""
+        self.last_error = message
+        await self._update_status(paper_id, PaperStatus.FAILED, message)
+        await reporter.fail(message)
+
     async def _parse_pdf(self, file_path: Path) -> Optional[str]:
         """
         解析PDF文件
@@ -549,41 +871,57 @@ class PaperProcessingService:
         logger.info(f"文本分割完成，共 {len(chunks)} 个块")
         return chunks
 
-    async def _generate_embeddings(self, chunks: List[str]) -> List[List[float]]:
+    async def _generate_embeddings(self, chunks: List[str], model: Optional[str] = None) -> List[List[float]]:
         """
         生成文本向量嵌入
+
+        经进程级批处理器提交，与同时处理的其他论文的文本块合并为满批次调用模型。
+        model 为生成向量的模型 (为空时为当前模型)。
+        模型不可用时抛出异常 (由任务层按可重试错误重试)，不再写入零向量污染检索结果。
         """
-        try:
-            logger.info(f"开始生成向量嵌入，chunks数量: {len(chunks)}")
-            # 使用嵌入服务批量生成向量
-            embeddings = await embed_batch(chunks, model_type="openai")
-            logger.info(f"向量生成完成，向量维度: {len(embeddings[0]) if embeddings else 0}")
-            return embeddings
-        except Exception as e:
-            logger.error(f"向量生成失败: {e}", exc_info=True)
-            # 降级处理：返回零向量
-            return [[0.0] * 1536 for _ in chunks]
+        logger.info(f"开始生成向量嵌入，chunks数量: {len(chunks)}")
+        embeddings = await get_embedding_batcher(model).embed(chunks)
+        logger.info(f"向量生成完成，向量维度: {len(embeddings[0]) if embeddings else 0}")
+        return embeddings
 
     async def _save_chunks(
         self,
         paper_id: UUID,
         chunks: List[str],
-        embeddings: List[List[float]]
+        embeddings: List[List[float]],
+        session: Optional[AsyncSession] = None,
+        model: Optional[str] = None
     ):
         """
-        保存文本块到数据库
+        保存文本块及其向量到数据库 (传入 session 时在调用方的事务中写入)
+        向量记在生成它的模型 model 下，为空时为当前模型；论文向量为文本块向量的均值，与文本块一同写入。
         """
-        async with async_session_factory() as session:
+        model = model or active_embedding_model()
+        dim = embedding_dimension(model)
+        # 维度不符的向量进不了该模型的索引，且会使检索时的维度转换报错
+        if any(len(embedding) != dim for embedding in embeddings):
+            raise ValueError(f"向量维度与模型不一致: {model} 需要 {dim} 维")
+        async with nullcontext(session) if session is not None else async_session_factory() as session:
             paper_chunks = []
+            chunk_embeddings = []
             for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                paper_chunks.append(PaperChunk(
+                paper_chunk = PaperChunk(
                     paper_id=paper_id,
                     content=chunk,
                     chunk_index=i,
-                    embedding=embedding
-                ))
+                    embedding_model=model,
+                    embedding_dim=dim
+                )
+                paper_chunks.append(paper_chunk)
+                chunk_embeddings.append(ChunkEmbedding(chunk_id=paper_chunk.id, model=model, embedding=embedding))
             
-            await PaperRepository.create_paper_chunks(session, paper_chunks)
+            paper_embedding = None
+            if embeddings:
+                centroid = [sum(values) / len(embeddings) for values in zip(*embeddings)]
+                paper_embedding = PaperEmbedding(paper_id=paper_id, model=model, embedding=centroid)
+            await PaperRepository.create_paper_chunks(
+                session, paper_chunks, chunk_embeddings, paper_embedding=paper_embedding
+            )
             logger.info(f"保存了 {len(chunks)} 个文本块")
 
     async def _update_paper_after_processing(
@@ -591,15 +929,24 @@ class PaperProcessingService:
         paper_id: UUID,
         title: Optional[str] = None,
         authors: Optional[List[str]] = None,
-        toc: Optional[List] = None
+        toc: Optional[List] = None,
+        session: Optional[AsyncSession] = None
     ):
         """
-        处理完成后更新论文记录
+        处理完成后更新论文记录 (传入 session 时在调用方的事务中更新)
         """
-        async with async_session_factory() as session:
-            await PaperRepository.update_paper_status(session, paper_id, PaperStatus.COMPLETED)
-            await PaperRepository.update_paper_metadata(session, paper_id, title, authors, toc)
+        async with nullcontext(session) if session is not None else async_session_factory() as session:
+            paper = await PaperRepository.update_paper_fields(
+                session,
+                paper_id,
+                status=PaperStatus.COMPLETED,
+                **PaperRepository.metadata_values(title, authors, toc),
+            )
             logger.info(f"论文状态更新为完成: {paper_id}")
+            # 待处理/处理中 -> 完成改变按状态筛选的检索总数
+            if paper:
+                user_id = paper.user_id
+                await on_commit(session, lambda: invalidate_paper_counts(user_id))
 
     async def _update_status(
         self,
@@ -611,4 +958,7 @@ class PaperProcessingService:
         更新论文状态
         """
         async with async_session_factory() as session:
-            await PaperRepository.update_paper_status(session, paper_id, status, error_message)
+            paper = await PaperRepository.update_paper_status(session, paper_id, status, error_message)
+        # 失败的论文不计入检索总数 (仓储已提交)
+        if paper and status == PaperStatus.FAILED:
+            await invalidate_paper_counts(paper.user_id)
@@ -0,0 +1,146 @@
+'''
+开发者: BackendAgent
+当前版本: v1.1_reembed_service
+创建时间: 2026年10月20日 07:00
+更新时间: 2026年10月20日 09:00
+更新记录:
+    [2026年10月20日 09:00:v1.1_reembed_service:每批回填后重新计算所涉论文的论文向量]
+    [2026年10月20日 07:00:v1.0_reembed_service:更换向量化模型时在线回填新模型向量(按主键分批、节流、可断点续跑)，覆盖率100%后原子切换检索模型]
+'''
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from base.config import settings
+from base.embedding.batcher import EmbeddingBatcher, get_embedding_batcher
+from base.embedding.registry import embedding_dimension
+from base.embedding.serving import invalidate_serving_model
+from base.pg.service import EmbeddingModelRepository, PaperRepository, async_session_factory, unit_of_work
+from common.model.enums import EmbeddingModelStatus
+
+
+class ReembedService:
+    """
+    向量回填服务 (Worker 任务 reembed_chunks_task 调用)
+
+    更换向量化模型时，新模型的向量与旧模型的向量并存于 chunk_embeddings，检索在回填期间继续使用旧模型:
+    1. start: 登记新模型 (embedding_models, status = backfilling)；
+    2. run: 按文本块主键顺序每批取 reembed_batch_size 个缺少新模型向量的文本块，向量化后写入，
+       向量与游标在同一事务中提交 (中断后从游标继续，重复执行只会覆盖写入)；
+       批次间暂停 reembed_batch_pause 秒，单次最多 reembed_max_batches 批，剩余部分由任务重新入队后继续；
+    3. 一轮走完后从头再走一轮，补上回填期间新导入的文本块 (主键为随机UUID，可能落在游标之前)，
+       某一轮从头开始就没有缺失时覆盖率为 100%，以一条 UPDATE 切换检索模型 (switch_serving)；
+    4. 切换后等待各进程的检索模型缓存过期 (embedding_model_cache_seconds)，再补齐过渡期内仍按旧模型导入的文本块。
+    """
+
+    def __init__(self, batcher: Optional[EmbeddingBatcher] = None):
+        self._batcher = batcher
+        self.batch_size = settings.reembed_batch_size
+        self.batch_pause = settings.reembed_batch_pause
+        self.max_batches = settings.reembed_max_batches
+
+    async def start(self, model: str) -> Dict[str, Any]:
+        """登记模型回填 (模型须已配置维度)，已在回填中时继续原进度"""
+        embedding_dimension(model)
+        async with async_session_factory() as session:
+            await EmbeddingModelRepository.start_backfill(session, model)
+        return await self.progress(model)
+
+    async def progress(self, model: str) -> Dict[str, Any]:
+        """回填进度: 状态、游标与覆盖率"""
+        async with async_session_factory() as session:
+            state = await EmbeddingModelRepository.get_state(session, model)
+            embedded, total = await EmbeddingModelRepository.count_coverage(session, model)
+        return {
+            "model": model,
+            "status": state.status if state else None,
+            "cursor": str(state.cursor) if state and state.cursor else None,
+            "embedded": embedded,
+            "total": total,
+            "coverage": round(embedded / total, 4) if total else 1.0,
+        }
+
+    async def run(self, model: str) -> Dict[str, Any]:
+        """
+        执行一次回填 (至多 max_batches 批)
+
+        返回 status:
+        - running: 还有未回填的文本块，需要再次执行；
+        - switched: 本次覆盖率达到 100% 并已切换检索模型，需要再执行一次切换后的补齐；
+        - done: 已是检索模型且没有缺失的向量；
+        - skipped: 模型未登记或已退役。
+        """
+        async with async_session_factory() as session:
+            state = await EmbeddingModelRepository.get_state(session, model)
+        if state is None or state.status == EmbeddingModelStatus.RETIRED.value:
+            return {"status": "skipped", "model": model, "embedded": 0}
+
+        if state.status == EmbeddingModelStatus.SERVING.value:
+            return await self._sweep(model)
+
+        cursor = state.cursor
+        embedded = 0
+        for _ in range(self.max_batches):
+            async with unit_of_work() as session:
+                chunks = await EmbeddingModelRepository.get_chunks_missing_embedding(
+                    session, model, cursor, self.batch_size
+                )
+                if not chunks:
+                    if cursor is None:
+                        break
+                    # 一轮结束，从头开始下一轮 (只剩回填期间新导入的文本块)
+                    cursor = None
+                    await EmbeddingModelRepository.advance_cursor(session, model, None)
+                    continue
+                await self._embed(session, model, chunks)
+                cursor = chunks[-1][0]
+                await EmbeddingModelRepository.advance_cursor(session, model, cursor, len(chunks))
+            embedded += len(chunks)
+            await asyncio.sleep(self.batch_pause)
+        else:
+            return {"status": "running", "model": model, "embedded": embedded}
+
+        async with async_session_factory() as session:
+            switched = await EmbeddingModelRepository.switch_serving(session, model)
+        if not switched:
+            # 两次检查之间有新文本块写入，下次继续
+            return {"status": "running", "model": model, "embedded": embedded}
+        invalidate_serving_model()
+        logger.info(f"向量回填完成，检索模型已切换为: {model}")
+        # 等各进程的检索模型缓存过期，之后的补齐 (_sweep) 不会再遇到按旧模型导入的文本块
+        await asyncio.sleep(settings.embedding_model_cache_seconds)
+        return {"status": "switched", "model": model, "embedded": embedded}
+
+    async def _sweep(self, model: str) -> Dict[str, Any]:
+        """
+        切换后的补齐: 各进程在检索模型缓存过期前仍可能按旧模型导入文本块，
+        切换后等缓存全部过期再从头补一轮，此后新导入的文本块都带有该模型的向量。
+        """
+        embedded = 0
+        for _ in range(self.max_batches):
+            async with unit_of_work() as session:
+                chunks = await EmbeddingModelRepository.get_chunks_missing_embedding(
+                    session, model, None, self.batch_size
+                )
+                if not chunks:
+                    return {"status": "done", "model": model, "embedded": embedded}
+                await self._embed(session, model, chunks)
+            embedded += len(chunks)
+            await asyncio.sleep(self.batch_pause)
+        return {"status": "switched", "model": model, "embedded": embedded}
+
+    async def _embed(self, session: AsyncSession, model: str, chunks: List[tuple[UUID, str]]) -> None:
+        batcher = self._batcher or get_embedding_batcher(model)
+        started = time.perf_counter()
+        vectors = await batcher.embed([content for _, content in chunks])
+        await PaperRepository.save_chunk_embeddings(
+            session, model, [(chunk_id, vector) for (chunk_id, _), vector in zip(chunks, vectors)]
+        )
+        # 论文的文本块分散在多个批次中，每批重算所涉论文的均值，论文最后一个文本块回填后即为完整的论文向量
+        await PaperRepository.refresh_paper_embeddings(session, model, [chunk_id for chunk_id, _ in chunks])
+        logger.debug(f"回填 {model}: {len(chunks)} 个文本块, 耗时 {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,79 @@
+'''
+开发者: BackendAgent
+当前版本: v1.2_related_service
+创建时间: 2026年10月20日 10:00
+更新时间: 2026年10月20日 12:00
+更新记录:
+    [2026年10月20日 12:00:v1.2_related_service:近邻论文恢复走论文向量索引，按用户过滤由迭代索引扫描保证]
+    [2026年10月20日 11:00:v1.1_related_service:近邻论文在用户论文库内精确计算，不再设置向量索引参数]
+    [2026年10月20日 10:00:v1.0_related_service:后台增量维护每篇论文在用户论文库中的相关论文列表(论文向量最近邻Top-K)]
+'''
+
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from base.config import settings
+from base.embedding.serving import serving_embedding_model
+from base.pg.service import PaperRepository, RelatedPaperRepository, async_session_factory, unit_of_work
+
+
+class RelatedPaperService:
+    """
+    相关论文维护服务 (Worker 任务 update_related_papers_task 调用)
+
+    related_papers 保存每篇论文在所属用户论文库中论文向量最相近的 K 篇论文 (related_papers_k)，
+    论文库变化时增量更新，读取时只按主键前缀查表:
+    - 新增论文: 取其最相近的 fanout 篇论文 (related_papers_fanout，走论文向量索引)，前 K 篇作为它的列表；
+      相似度对称，它同时进入这 fanout 篇论文的列表 (只在比原第 K 名更相近时保留)。
+      更远的论文不会因为它而更新，fanout 越大越接近完整重算；
+    - 删除论文: 列表随级联删除少了一项，删除前记下列表中含它的论文 (get_listing_papers)，删除后重算这些论文的列表；
+    - 重建 (rebuild): 逐篇重算，用于初次填充、更换检索模型后或入队失败后的修复。
+    """
+
+    def __init__(self):
+        self.k = settings.related_papers_k
+        self.fanout = max(settings.related_papers_fanout, self.k)
+
+    async def update(self, added: Iterable[UUID] = (), affected: Iterable[UUID] = ()) -> Dict[str, int]:
+        """新增论文 added 加入论文库，并重算 affected 的列表 (列表中有论文被删除)"""
+        added = list(dict.fromkeys(added))
+        affected = [paper_id for paper_id in dict.fromkeys(affected) if paper_id not in added]
+        model = await serving_embedding_model()
+        updated = 0
+        for paper_id in added:
+            updated += await self._refresh(model, paper_id, offer=True)
+        for paper_id in affected:
+            updated += await self._refresh(model, paper_id, offer=False)
+        return {"added": len(added), "affected": len(affected), "updated": updated}
+
+    async def rebuild(self, user_id: Optional[UUID] = None) -> int:
+        """重算 (某个用户或全部用户的) 所有论文的列表，返回重算的论文数"""
+        model = await serving_embedding_model()
+        async with async_session_factory() as session:
+            paper_ids = await RelatedPaperRepository.get_embedded_papers(session, model, user_id)
+        updated = 0
+        for paper_id in paper_ids:
+            updated += await self._refresh(model, paper_id, offer=False)
+        logger.info(f"相关论文重建完成: {updated}/{len(paper_ids)} 篇论文, 模型: {model}")
+        return updated
+
+    async def _refresh(self, model: str, paper_id: UUID, offer: bool) -> int:
+        """重算一篇论文的列表 (offer 为真时同时加入近邻论文的列表)，论文已删除时跳过"""
+        async with unit_of_work() as session:
+            paper = await PaperRepository.get_paper_by_id(session, paper_id)
+            if paper is None:
+                return 0
+            limit = self.fanout if offer else self.k
+            # 近似索引的候选列表不少于要取的论文数；按用户过滤后不足时迭代扫描继续取
+            await PaperRepository.set_vector_search_params(
+                session, ef_search=max(settings.vector_search_ef_search, limit)
+            )
+            neighbours = await RelatedPaperRepository.find_nearest_papers(
+                session, paper_id, paper.user_id, model, limit
+            )
+            await RelatedPaperRepository.replace_related(session, paper_id, neighbours[:self.k])
+            if offer:
+                await RelatedPaperRepository.offer_related(session, paper_id, neighbours, self.k)
+        return 1
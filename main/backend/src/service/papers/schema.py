@@ -1,9 +1,10 @@
 '''
 开发者: BackendAgent
-当前版本: v1.0_paper_schema
+当前版本: v1.1_paper_schema
 创建时间: 2026年01月10日 10:05
-更新时间: 2026年01月10日 10:05
+更新时间: 2026年10月19日 11:00
 更新记录:
+    [2026年10月19日 11:00:v1.1_paper_schema:上传响应返回解析作业ID，供订阅 /jobs/{job_id}/events]
     [2026年01月10日 10:05:v1.0_paper_schema:创建论文服务层数据模型，实现SaaS化契约设计]
 '''
 
@@ -66,6 +67,7 @@ class PaperUploadResponse(BaseModel):
     paper_id: str
     status: str
     message: str
+    job_id: Optional[str] = None
 
 
 class PaperDTO(BaseModel):
@@ -0,0 +1,202 @@
+'''
+开发者: BackendAgent
+当前版本: v1.1_job_orchestrator
+创建时间: 2026-10-19 16:00:00
+更新时间: 2026-10-20 04:00:00
+更新记录:
+    [2026-10-20 04:00:00:v1.1_job_orchestrator:工作单元会话下在作业落库后、入队前显式提交]
+    [2026-10-19 16:00:00:v1.0_job_orchestrator:作业编排，按幂等键去重提交，依赖作业成功后批量入队，依赖失败时级联取消]
+'''
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from base.pg.entity import Job
+from base.pg.service import JobRepository, async_session_factory
+from base.redis.lane_scheduler import LaneScheduler
+from common.model.enums import JobLane
+from common.model.errors import NotFoundError
+
+# 依赖处于这些状态时，下游作业无法再执行
+FAILED_STATUSES = ("failed", "canceled", "expired")
+# 可按同一幂等键重新提交的状态
+RESUBMITTABLE_STATUSES = FAILED_STATUSES
+
+RUN_JOB_TASK = "run_job_task"
+
+
+class JobOrchestrator:
+    """
+    作业编排 (jobs.idempotency_key / jobs.dependency_ids)
+
+    - 提交: 同一用户的同一幂等键只会创建一个作业，重复点击、客户端重试直接返回已有作业；
+      已失败/取消的作业按同一幂等键再次提交时原地重置后重新执行。
+    - 依赖: 依赖全部成功的作业立即入队 (queued)，否则进入 blocked 等待；
+      父作业结束时由 on_job_finished 统一检查下游作业，满足条件的批量入队，依赖失败的级联取消。
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def submit(
+        self,
+        user_id: UUID,
+        job_type: str,
+        idempotency_key: str,
+        paper_id: Optional[UUID] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        dependency_ids: Optional[Iterable[UUID | str]] = None,
+        lane: JobLane = JobLane.USER,
+    ) -> tuple[Job, bool]:
+        """提交作业，返回 (作业, 是否新提交)"""
+        dependency_ids = list(dict.fromkeys(str(dep) for dep in dependency_ids or []))
+        await self._check_dependencies(user_id, dependency_ids)
+
+        existing = await JobRepository.get_job_by_idempotency_key(self.session, user_id, idempotency_key)
+        if existing is not None:
+            if existing.status not in RESUBMITTABLE_STATUSES:
+                logger.info(f"幂等键命中已有作业: {idempotency_key} -> {existing.id}({existing.status})")
+                return existing, False
+            reset = await JobRepository.transition_jobs(self.session, [existing.id], existing.status, {
+                "status": "blocked",
+                "progress": 0,
+                "stage": None,
+                "error_message": None,
+                "completed_at": None,
+                "payload": payload,
+                "dependency_ids": dependency_ids or None,
+                "updated_at": datetime.now(),
+            })
+            if not reset:
+                # 并发的重新提交已抢先重置
+                return await self._reload(existing.id), False
+            job = await self._reload(existing.id)
+        else:
+            job, created = await JobRepository.create_job_if_absent(self.session, Job(
+                user_id=user_id,
+                paper_id=paper_id,
+                job_type=job_type,
+                status="blocked",
+                progress=0,
+                idempotency_key=idempotency_key,
+                dependency_ids=dependency_ids or None,
+                payload=payload,
+            ))
+            if not created:
+                return job, False
+
+        # 作业以 blocked 落库(提交)后再检查依赖: 依赖恰在此期间完成时，
+        # 父作业的 on_job_finished 与这里至多一方能把作业迁移为 queued
+        await self.session.commit()
+        await self._resolve([job], lane=lane)
+        return await self._reload(job.id), True
+
+    async def release_dependents(self, job_id: UUID, status: str) -> None:
+        """父作业结束后检查其下游作业"""
+        finished = await JobRepository.get_job_by_id(self.session, job_id)
+        if finished is None:
+            return
+        pending = [(finished.user_id, str(job_id), status)]
+        while pending:
+            user_id, parent_id, parent_status = pending.pop()
+            dependents = [
+                job for job in await JobRepository.get_blocked_jobs(self.session, user_id)
+                if parent_id in (job.dependency_ids or [])
+            ]
+            if not dependents:
+                continue
+            stopped = await self._resolve(dependents, known={parent_id: parent_status})
+            # 取消沿依赖链向下传递
+            pending.extend((user_id, str(stopped_id), "canceled") for stopped_id in stopped)
+
+    @classmethod
+    async def on_job_finished(cls, job_id: UUID | str, status: str) -> None:
+        """作业进入终态时调用 (Worker 进度上报)，失败只记录日志"""
+        try:
+            async with async_session_factory() as session:
+                await cls(session).release_dependents(UUID(str(job_id)), status)
+        except Exception as e:
+            logger.error(f"释放下游作业失败: job_id={job_id}, 错误: {e}")
+
+    async def _check_dependencies(self, user_id: UUID, dependency_ids: List[str]) -> None:
+        if not dependency_ids:
+            return
+        found = await JobRepository.get_jobs_by_ids(self.session, [UUID(dep) for dep in dependency_ids])
+        found_ids = {str(job.id) for job in found if job.user_id == user_id}
+        missing = [dep for dep in dependency_ids if dep not in found_ids]
+        if missing:
+            raise NotFoundError(f"依赖作业不存在: {', '.join(missing)}")
+
+    async def _resolve(
+        self,
+        jobs: List[Job],
+        known: Optional[Dict[str, str]] = None,
+        lane: JobLane = JobLane.USER,
+    ) -> List[UUID]:
+        """
+        检查 blocked 作业的依赖状态: 全部成功的批量入队，存在失败依赖的取消
+        known: 调用方已知的依赖状态 (刚结束的父作业，进度可能尚未落库)
+        返回本次取消或入队失败的作业ID (其下游作业需继续级联处理)
+        """
+        statuses = dict(known or {})
+        unknown = {dep for job in jobs for dep in job.dependency_ids or []} - statuses.keys()
+        if unknown:
+            for dep in await JobRepository.get_jobs_by_ids(self.session, [UUID(dep) for dep in unknown]):
+                statuses[str(dep.id)] = dep.status
+
+        ready, doomed = [], []
+        for job in jobs:
+            dep_statuses = [statuses.get(dep) for dep in job.dependency_ids or []]
+            if any(dep_status in FAILED_STATUSES for dep_status in dep_statuses):
+                doomed.append(job.id)
+            elif all(dep_status == "succeeded" for dep_status in dep_statuses):
+                ready.append(job)
+
+        now = datetime.now()
+        canceled = await JobRepository.transition_jobs(self.session, doomed, "blocked", {
+            "status": "canceled",
+            "error_message": "依赖作业未成功完成",
+            "completed_at": now,
+            "updated_at": now,
+        })
+        queued = set(await JobRepository.transition_jobs(
+            self.session, [job.id for job in ready], "blocked", {"status": "queued", "updated_at": now}
+        ))
+        failed = await self._enqueue([job for job in ready if job.id in queued], lane)
+        return canceled + failed
+
+    async def _enqueue(self, jobs: List[Job], lane: JobLane) -> List[UUID]:
+        """按用户分组批量入队，入队失败的作业标记为失败 (避免永久停留在 queued)，返回这些作业ID"""
+        # 入队前提交，Worker 取到任务时作业已是 queued
+        await self.session.commit()
+        by_user: Dict[UUID, List[Job]] = defaultdict(list)
+        for job in jobs:
+            by_user[job.user_id].append(job)
+
+        lost: List[UUID] = []
+        for user_id, user_jobs in by_user.items():
+            results = await LaneScheduler.enqueue_many(
+                RUN_JOB_TASK, [(str(job.id),) for job in user_jobs], lane=lane, user_id=user_id
+            )
+            lost.extend(job.id for job, result in zip(user_jobs, results) if result is None)
+
+        if not lost:
+            return []
+        logger.warning(f"作业入队失败: {len(lost)} 个")
+        now = datetime.now()
+        return await JobRepository.transition_jobs(self.session, lost, "queued", {
+            "status": "failed",
+            "error_message": "任务队列不可用",
+            "completed_at": now,
+            "updated_at": now,
+        })
+
+    async def _reload(self, job_id: UUID) -> Job:
+        job = await JobRepository.get_job_by_id(self.session, job_id)
+        await self.session.refresh(job)
+        return job
@@ -0,0 +1,151 @@
+'''
+开发者: BackendAgent
+当前版本: v1.2_job_progress
+创建时间: 2026-10-19 11:00:00
+更新时间: 2026-10-20 12:00:00
+更新记录:
+    [2026-10-20 12:00:00:v1.2_job_progress:任务结束时刷新进度缓冲；批量落库跳过已是终态的作业，其他阶段进程的旧进度不覆盖终态]
+    [2026-10-19 16:00:00:v1.1_job_progress:作业进入终态后释放依赖它的下游作业]
+    [2026-10-19 11:00:00:v1.0_job_progress:Worker侧作业进度上报，事件实时写入Redis Stream，jobs表按批落库]
+'''
+
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from base.config import settings
+from base.pg.service import JobRepository, async_session_factory
+from base.redis.job_stream import JobEventStream
+from service.reader.job_orchestrator import JobOrchestrator
+
+TERMINAL_STATUSES = ("succeeded", "failed", "canceled", "expired")
+
+
+class JobStatusBuffer:
+    """
+    jobs 表进度写入缓冲 (进程级单例)
+
+    同一 Worker 进程内的所有作业共享缓冲区: 同一作业的多次进度更新只保留最新值，
+    到达刷新间隔后用一次批量 UPDATE 写入全部作业；终态更新立即刷新，保证最终状态不丢失。
+    每个任务结束时 (Worker 的 on_job_end) 同样刷新，缓冲的进度不会拖到下一个任务才落库；
+    已是终态的作业不再更新: 导入作业的各阶段在不同进程执行，前一阶段的旧进度不能覆盖后一阶段写入的终态。
+    """
+    _pending: Dict[UUID, Dict[str, Any]] = {}
+    _last_flush: float = 0.0
+    _lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def _get_lock(cls) -> asyncio.Lock:
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        return cls._lock
+
+    @classmethod
+    async def put(cls, job_id: UUID, values: Dict[str, Any], flush: bool = False) -> None:
+        cls._pending.setdefault(job_id, {}).update(values)
+        if flush or time.monotonic() - cls._last_flush >= settings.job_progress_flush_interval:
+            await cls.flush()
+
+    @classmethod
+    async def flush(cls) -> None:
+        async with cls._get_lock():
+            if not cls._pending:
+                return
+            pending, cls._pending = cls._pending, {}
+            cls._last_flush = time.monotonic()
+            rows = [{"id": job_id, **values} for job_id, values in pending.items()]
+            try:
+                async with async_session_factory() as session:
+                    await JobRepository.bulk_update_jobs(session, rows, final_statuses=TERMINAL_STATUSES)
+            except Exception as e:
+                logger.error(f"作业进度落库失败: {len(rows)} 条, 错误: {e}")
+                # 放回缓冲区等待下次刷新，已有更新的值优先
+                for job_id, values in pending.items():
+                    cls._pending[job_id] = {**values, **cls._pending.get(job_id, {})}
+
+
+class ProgressReporter:
+    """进度上报接口 (默认实现为空操作，未关联作业的处理流程使用)"""
+
+    async def start(self, stage: Optional[str] = None) -> None:
+        pass
+
+    async def stage(self, stage: str, progress: int, message: Optional[str] = None) -> None:
+        pass
+
+    async def succeed(self, result: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    async def fail(self, error: str) -> None:
+        pass
+
+
+class JobProgressReporter(ProgressReporter):
+    """
+    作业进度上报
+
+    - 每个事件立即 XADD 到 job:{job_id}:events，SSE 端点实时转发。
+    - jobs 表的 status/progress/stage 经 JobStatusBuffer 批量写入。
+    - 上报失败只记录日志，不影响作业本身。
+    - 终态落库后通知 JobOrchestrator，依赖该作业的下游作业随之入队或取消。
+    """
+
+    def __init__(self, job_id: UUID | str, job_type: str):
+        self.job_id = UUID(str(job_id))
+        self.job_type = job_type
+
+    async def start(self, stage: Optional[str] = None) -> None:
+        await self._emit("start", "running", 0, stage=stage)
+
+    async def stage(self, stage: str, progress: int, message: Optional[str] = None) -> None:
+        await self._emit("progress", "running", progress, stage=stage, message=message)
+
+    async def succeed(self, result: Optional[Dict[str, Any]] = None) -> None:
+        await self._emit("end", "succeeded", 100, stage="done", result=result)
+
+    async def fail(self, error: str) -> None:
+        await self._emit("error", "failed", None, error=error)
+
+    async def _emit(
+        self,
+        state: str,
+        status: str,
+        progress: Optional[int],
+        stage: Optional[str] = None,
+        message: Optional[str] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        fields = {
+            "state": state,
+            "status": status,
+            "job_type": self.job_type,
+            "progress": progress,
+            "stage": stage,
+            "message": message,
+            "error": error,
+            "result": json.dumps(result, ensure_ascii=False) if result is not None else None,
+        }
+        try:
+            await JobEventStream.publish(self.job_id, fields)
+        except Exception as e:
+            logger.warning(f"作业事件发布失败: job_id={self.job_id}, state={state}, 错误: {e}")
+
+        values: Dict[str, Any] = {"status": status, "updated_at": datetime.now()}
+        if progress is not None:
+            values["progress"] = progress
+        if stage is not None:
+            values["stage"] = stage
+        if error is not None:
+            values["error_message"] = error
+        terminal = status in TERMINAL_STATUSES
+        if terminal:
+            values["completed_at"] = datetime.now()
+        await JobStatusBuffer.put(self.job_id, values, flush=terminal)
+        if terminal:
+            await JobOrchestrator.on_job_finished(self.job_id, status)
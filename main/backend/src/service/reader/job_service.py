@@ -1,15 +1,28 @@
 import asyncio
+import hashlib
 import json
-from datetime import datetime
 from typing import List, AsyncGenerator, Optional, Any
-from uuid import UUID, uuid4
+from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
+from loguru import logger
+
+from base.config import settings
 from base.pg.entity import Job, Paper
+from base.pg.service import JobRepository, async_session_factory
+from base.redis.arq_service import INGEST_EMBED_QUEUE, INGEST_PARSE_QUEUE, INGEST_PERSIST_QUEUE
+from base.redis.job_stream import JobEventStream
+from base.redis.lane_scheduler import LaneScheduler
+from common.model.errors import SystemError
+from service.reader.job_orchestrator import JobOrchestrator
+from service.reader.job_progress import TERMINAL_STATUSES
 from service.reader.schema import Job as JobDTO, JobResult
-from controller.api.reader.schema import JobCreateRequest, JobResponse, SSEDataEnvelope, JobEventPayload
+from controller.api.reader.schema import JobCreateRequest, JobResponse, SSEDataEnvelope, JobEventPayload, LaneStatsResponse
+
+# 依赖论文解析(ingest)结果的作业类型
+INGEST_DEPENDENT_JOB_TYPES = ("toc", "summary", "mind_map")
 
 
 class JobService:
@@ -50,24 +63,28 @@ class JobService:
         if not paper:
             raise HTTPException(status_code=404, detail="Paper not found")
 
-        # Create Job
-        new_job = Job(
-            id=uuid4(),
-            paper_id=paper_id,
+        dependency_ids = list(req.dependency_ids or [])
+        if req.job_type in INGEST_DEPENDENT_JOB_TYPES:
+            # 总结/导图等依赖论文解析结果，解析未完成时等待解析作业
+            ingest_job = await JobRepository.get_job_by_idempotency_key(self.session, user_id, f"ingest:{paper_id}")
+            if ingest_job and ingest_job.status != "succeeded":
+                dependency_ids.append(ingest_job.id)
+
+        job, _ = await JobOrchestrator(self.session).submit(
+            user_id=user_id,
             job_type=req.job_type,
-            status="queued",
-            progress=0,
-            params=req.params,
-            created_at=datetime.now()
+            idempotency_key=req.idempotency_key or self._default_idempotency_key(paper_id, req),
+            paper_id=paper_id,
+            payload=req.params,
+            dependency_ids=dependency_ids,
         )
-        self.session.add(new_job)
-        await self.session.commit()
-        await self.session.refresh(new_job)
-        
-        # TODO: Trigger background task here
-        # For example: task_service.submit(new_job.id)
-        
-        return JobResponse.model_validate(new_job)
+        return JobResponse.model_validate(job)
+
+    @staticmethod
+    def _default_idempotency_key(paper_id: UUID, req: JobCreateRequest) -> str:
+        """同一论文、同一作业类型与参数视为同一次提交"""
+        params = json.dumps(req.params or {}, sort_keys=True, ensure_ascii=False, default=str)
+        return f"{req.job_type}:{paper_id}:{hashlib.sha1(params.encode('utf-8')).hexdigest()[:16]}"
 
     async def get_job(self, job_id: UUID, user_id: UUID) -> JobResponse:
         # Join Paper to check user permission
@@ -83,31 +100,122 @@ class JobService:
         
         return JobResponse.model_validate(job)
 
-    async def subscribe_job_events(self, job_id: UUID, user_id: UUID) -> AsyncGenerator[str, None]:
-        # 1. Check permission
-        await self.get_job(job_id, user_id)
-
-        # 2. Simulate SSE (In production, use Redis Pub/Sub)
-        # Mocking progress for demonstration since we don't have real backend workers connected yet
+    async def get_lane_stats(self) -> List[LaneStatsResponse]:
+        """各导入阶段队列的优先级通道积压与等待时间"""
         try:
-            # Send Start
-            yield self._format_sse("start", job_id, "queued", 0, "Job started")
-            
-            # Mock progress
-            for i in range(1, 6):
-                await asyncio.sleep(1)
-                yield self._format_sse("progress", job_id, "running", i * 20, f"Processing step {i}")
-            
-            # Send End
-            yield self._format_sse("end", job_id, "succeeded", 100, "Job completed", result={"summary": "Done"})
-            
+            stats = await LaneScheduler.lane_stats([INGEST_PARSE_QUEUE, INGEST_EMBED_QUEUE, INGEST_PERSIST_QUEUE])
         except Exception as e:
-            yield self._format_sse("error", job_id, "failed", 0, str(e))
+            logger.warning(f"获取通道统计失败: {e}")
+            raise SystemError("任务队列不可用", code=503)
+        return [LaneStatsResponse(**item) for item in stats]
+
+    async def subscribe_job_events(
+        self,
+        job_id: UUID,
+        user_id: UUID,
+        last_event_id: Optional[str] = None,
+    ) -> AsyncGenerator[str, None]:
+        """
+        订阅作业事件 (SSE)
+
+        - 转发 Worker 写入 job:{job_id}:events 的事件，Stream 条目 ID 作为 SSE id。
+        - 客户端携带 Last-Event-ID 重连时从断点之后续读，不重复也不丢失。
+        - 无新事件时发送保活注释；事件流已过期或 Redis 不可用时以 jobs 表状态兜底。
+        """
+        # 1. Check permission
+        job = await self.get_job(job_id, user_id)
+        job_type = job.job_type
+        # SSE 连接可能持续数分钟，权限校验后立即归还数据库连接，后续状态检查使用短会话
+        await self.session.close()
+
+        # 2. 新订阅先推送当前快照 (不带 id，不影响客户端记录的 Last-Event-ID)
+        if not last_event_id and job.status not in TERMINAL_STATUSES:
+            yield self._format_sse("start", job_id, job.status, job.progress, job.stage, job_type=job_type)
+
+        last_id = last_event_id
+        # 已结束的作业只回放剩余事件，不再阻塞等待
+        block_ms: Optional[int] = None if job.status in TERMINAL_STATUSES else int(settings.job_events_keepalive * 1000)
+        snapshot = (job.status, job.progress, job.stage)
+
+        while True:
+            try:
+                entries = await JobEventStream.read(job_id, last_id, block_ms=block_ms)
+            except Exception as e:
+                # Redis 不可用: 退化为轮询 jobs 表
+                logger.warning(f"读取作业事件流失败，改为轮询数据库: job_id={job_id}, 错误: {e}")
+                await asyncio.sleep(settings.job_progress_flush_interval)
+                current = await self._load_job(job_id)
+                if current is None:
+                    return
+                if current.status in TERMINAL_STATUSES:
+                    yield self._format_job_snapshot(current)
+                    return
+                if (current.status, float(current.progress or 0), current.stage) != snapshot:
+                    snapshot = (current.status, float(current.progress or 0), current.stage)
+                    yield self._format_sse("progress", job_id, current.status, current.progress, current.stage, job_type=job_type)
+                continue
+
+            for entry_id, fields in entries:
+                last_id = entry_id
+                yield self._format_stream_entry(job_id, entry_id, fields, job_type)
+                if fields.get("state") in ("end", "error"):
+                    return
+
+            if entries:
+                continue
+
+            # 无新事件: 作业已结束(事件流过期或终态事件未写入)则以数据库状态收尾，否则保活
+            current = await self._load_job(job_id)
+            if current is None:
+                return
+            if current.status in TERMINAL_STATUSES:
+                yield self._format_job_snapshot(current)
+                return
+            yield ": keep-alive\n\n"
+
+    async def _load_job(self, job_id: UUID) -> Optional[Job]:
+        async with async_session_factory() as session:
+            return await JobRepository.get_job_by_id(session, job_id)
+
+    def _format_job_snapshot(self, job: Job) -> str:
+        """根据 jobs 表记录生成终态事件"""
+        state = "end" if job.status == "succeeded" else "error"
+        return self._format_sse(
+            state, job.id, job.status, job.progress, job.stage,
+            error=job.error_message, job_type=job.job_type
+        )
+
+    def _format_stream_entry(self, job_id: UUID, entry_id: str, fields: dict, job_type: str) -> str:
+        """将 Stream 条目转换为 SSE 消息"""
+        progress = fields.get("progress")
+        result = fields.get("result")
+        return self._format_sse(
+            fields.get("state", "progress"),
+            job_id,
+            fields.get("status", "running"),
+            float(progress) if progress else None,
+            fields.get("stage") or fields.get("message") or None,
+            result=json.loads(result) if result else None,
+            error=fields.get("error") or None,
+            event_id=entry_id,
+            job_type=fields.get("job_type") or job_type,
+        )
 
-    def _format_sse(self, state: str, job_id: UUID, status: str, progress: float, stage: str, result: Any = None, error: str = None) -> str:
+    def _format_sse(
+        self,
+        state: str,
+        job_id: UUID,
+        status: str,
+        progress: Optional[float],
+        stage: Optional[str],
+        result: Any = None,
+        error: str = None,
+        event_id: Optional[str] = None,
+        job_type: str = "unknown",
+    ) -> str:
         payload = JobEventPayload(
             job_id=job_id,
-            type="unknown", # Should retrieve type from job if possible, or pass it in
+            type=job_type,
             status=status,
             progress=progress,
             stage=stage,
@@ -118,4 +226,5 @@ class JobService:
             state=state,
             payload=payload
         )
-        return f"id: {uuid4()}\nevent: Job{state.capitalize()}\ndata: {envelope.model_dump_json()}\n\n"
+        id_line = f"id: {event_id}\n" if event_id else ""
+        return f"{id_line}event: Job{state.capitalize()}\ndata: {envelope.model_dump_json()}\n\n"
@@ -4,7 +4,7 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from base.pg.entity import MindMap as MindMapEntity
-from base.pg.service import ReaderRepository
+from base.pg.service import ReaderRepository, save
 from service.reader.schema import MindMapCreateDTO, MindMapUpdateDTO, MindMapDTO, MindMap, MindMapNode, MindMapEdge
 
 
@@ -46,8 +46,7 @@ class MindMapService:
             graph_data=initial_data
         )
         self.session.add(mind_map)
-        await self.session.commit()
-        await self.session.refresh(mind_map)
+        await save(self.session, mind_map)
         return MindMapDTO.model_validate(mind_map)
 
     async def update_mind_map(self, paper_id: UUID, user_id: UUID, map_in: MindMapUpdateDTO) -> Optional[MindMapDTO]:
@@ -60,6 +59,5 @@ class MindMapService:
         mind_map.updated_at = datetime.now()
         
         self.session.add(mind_map)
-        await self.session.commit()
-        await self.session.refresh(mind_map)
+        await save(self.session, mind_map)
         return MindMapDTO.model_validate(mind_map)
@@ -4,7 +4,7 @@ from datetime import datetime
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException
 from base.pg.entity import Note
-from base.pg.service import ReaderRepository
+from base.pg.service import ReaderRepository, save
 from service.reader.schema import NoteCreateDTO, NoteUpdateDTO, NoteDTO, NoteMeta
 
 
@@ -48,8 +48,7 @@ class NoteService:
             content=note_in.content
         )
         self.session.add(note)
-        await self.session.commit()
-        await self.session.refresh(note)
+        await save(self.session, note)
         return NoteDTO.model_validate(note)
 
     async def update_note(self, note_id: UUID, user_id: UUID, note_in: NoteUpdateDTO) -> Optional[NoteDTO]:
@@ -64,8 +63,7 @@ class NoteService:
             
         note.updated_at = datetime.now()
         self.session.add(note)
-        await self.session.commit()
-        await self.session.refresh(note)
+        await save(self.session, note)
         return NoteDTO.model_validate(note)
 
     async def delete_note(self, note_id: UUID, user_id: UUID) -> bool:
@@ -74,5 +72,5 @@ class NoteService:
             return False
         
         await self.session.delete(note)
-        await self.session.commit()
+        await save(self.session)
         return True
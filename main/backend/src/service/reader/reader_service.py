@@ -8,11 +8,12 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from base.pg.entity import Paper, Layer, Note, MindMap, AgentSession, Job, PaperSummary, Annotation as AnnotationEntity
-from base.pg.service import SessionDep
+from base.config import settings
+from base.pg.service import ReadSessionDep, RelatedPaperRepository
 from service.reader.schema import (
     Toc, TocItem, View, NoteMeta, AISummary, Record,
     Job as JobSchema, Rect, Annotation, MindMap as MindMapSchema,
-    MindMapNode, MindMapEdge, PaperReaderMeta
+    MindMapNode, MindMapEdge, PaperReaderMeta, RelatedPaper
 )
 
 
@@ -142,6 +143,15 @@ class ReaderService:
                 result=None # TODO: Implement result parsing logic
             ))
 
+        # Related papers (precomputed by update_related_papers_task, no vector search here)
+        related_rows = await RelatedPaperRepository.get_related_papers(
+            self.session, paper_id, user_id, settings.related_papers_k
+        )
+        related = [
+            RelatedPaper(paper_id=related_paper.id, title=related_paper.title, score=score)
+            for related_paper, score in related_rows
+        ]
+
         return PaperReaderMeta(
             paper_id=paper.id,
             file_url=paper.file_url,
@@ -151,10 +161,11 @@ class ReaderService:
             notes=notes_meta,
             mind_map=mind_map,
             history=history,
-            jobs=jobs_dto
+            jobs=jobs_dto,
+            related=related
         )
 
-def get_reader_service(session: SessionDep) -> ReaderService:
+def get_reader_service(session: ReadSessionDep) -> ReaderService:
     return ReaderService(session)
 
 ReaderServiceDep = Annotated[ReaderService, Depends(get_reader_service)]
@@ -0,0 +1,48 @@
+'''
+开发者: BackendAgent
+当前版本: v1.1_retrieval_service
+创建时间: 2026年10月19日 23:00
+更新时间: 2026年10月20日 07:00
+更新记录:
+    [2026年10月20日 07:00:v1.1_retrieval_service:查询向量与向量召回使用检索模型(embedding_models中的serving模型)]
+    [2026年10月19日 23:00:v1.0_retrieval_service:论文内问答检索，复用混合检索(关键词+向量, RRF)召回文本块]
+'''
+
+from typing import List
+from uuid import UUID
+
+from langchain_core.documents import Document
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from base.embedding.batcher import embed_query
+from base.embedding.serving import serving_embedding_model
+from base.pg.entity import PaperChunk
+from service.search.hybrid_retriever import HybridRetriever
+
+
+class RetrievalService:
+    """论文内问答的文本块检索 (paper_chat_agent 的 retrieve 节点调用)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def retrieve_chunks(self, paper_id: UUID | str, query: str, top_k: int = 5) -> List[Document]:
+        """检索论文中与问题最相关的文本块，按融合得分降序返回"""
+        model = await serving_embedding_model()
+        embedding = await embed_query(query, model)
+        results = await HybridRetriever(self.session, model=model).search_chunks(
+            query, embedding, [PaperChunk.paper_id == UUID(str(paper_id))], top_k
+        )
+        return [
+            Document(
+                page_content=chunk.content,
+                metadata={
+                    "chunk_id": str(chunk.id),
+                    "paper_id": str(chunk.paper_id),
+                    "chunk_index": chunk.chunk_index,
+                    "page_number": chunk.page_number,
+                    "score": float(score),
+                },
+            )
+            for chunk, score in results
+        ]
@@ -227,11 +227,12 @@ class JobResult(BaseModel):
     mind_map: Optional[MindMap] = None
     chat: Optional[List[Message]] = None
     deep_research: Optional[List[Message]] = None
+    ingest: Optional[Dict[str, Any]] = None
 
 
 class Job(BaseModel):
     job_id: UUID = Field(..., alias="id", description="作业ID")
-    type: Literal['toc', 'summary', 'mind_map', 'deep_research', 'chat'] = Field(..., alias="job_type", description="作业类型")
+    type: Literal['ingest', 'toc', 'summary', 'mind_map', 'deep_research', 'chat'] = Field(..., alias="job_type", description="作业类型")
     status: Literal['queued', 'running', 'blocked', 'succeeded', 'failed', 'canceled', 'expired'] = Field(..., description="作业状态")
     progress: Optional[float] = Field(None, description="作业进度(0-1)")
     stage: Optional[str] = Field(None, description="作业当前阶段")
@@ -243,6 +244,12 @@ class Job(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class RelatedPaper(BaseModel):
+    paper_id: UUID = Field(..., description="相关论文ID")
+    title: str = Field(..., description="相关论文标题")
+    score: float = Field(..., description="相似度(论文向量余弦相似度)")
+
+
 class PaperReaderMeta(BaseModel):
     paper_id: UUID
     file_url: Optional[str] = None
@@ -253,3 +260,4 @@ class PaperReaderMeta(BaseModel):
     mind_map: Optional[MindMap] = None
     history: List[Record]
     jobs: List[Job]
+    related: List[RelatedPaper] = []
@@ -1,8 +1,11 @@
 """
 开发者: BackendAgent
-当前版本: v1.0
+当前版本: v1.1
 创建时间: 2026年01月14日
+更新时间: 2026年10月20日 11:00
 描述: 论文总结服务，负责调用 LLM 生成论文摘要
+更新记录:
+    [2026年10月20日 11:00:v1.1:摘要写入经 save() 收尾，工作单元内只 flush，由请求统一提交]
 """
 
 from uuid import UUID
@@ -14,7 +17,7 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
 from base.pg.entity import Paper, PaperSummary
-from base.pg.service import ReaderRepository, PaperRepository
+from base.pg.service import ReaderRepository, PaperRepository, save
 from service.reader.schema import SummaryCreateDTO, SummaryDTO, AISummary
 
 class SummaryService:
@@ -67,8 +70,7 @@ class SummaryService:
             content=content
         )
         self.session.add(new_summary)
-        await self.session.commit()
-        await self.session.refresh(new_summary)
+        await save(self.session, new_summary)
         
         return SummaryDTO.model_validate(new_summary)
 
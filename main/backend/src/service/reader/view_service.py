@@ -62,20 +62,15 @@ class ViewService:
         )
 
     async def rename_view(self, view_id: UUID, name: str, user_id: UUID) -> None:
-        layer = await ReaderRepository.get_layer_by_id(self.session, view_id)
-        if not layer or layer.user_id != user_id:
+        # 归属校验在 UPDATE 的 WHERE 中完成，未命中即不存在或无权限
+        layer = await ReaderRepository.update_layer_fields(self.session, view_id, user_id, name=name)
+        if not layer:
             raise HTTPException(status_code=404, detail="View not found")
-        
-        layer.name = name
-        await ReaderRepository.update_layer(self.session, layer)
 
     async def enable_view(self, view_id: UUID, enable: bool, user_id: UUID) -> None:
-        layer = await ReaderRepository.get_layer_by_id(self.session, view_id)
-        if not layer or layer.user_id != user_id:
+        layer = await ReaderRepository.update_layer_fields(self.session, view_id, user_id, visible=enable)
+        if not layer:
             raise HTTPException(status_code=404, detail="View not found")
-        
-        layer.visible = enable
-        await ReaderRepository.update_layer(self.session, layer)
 
     async def delete_view(self, view_id: UUID, user_id: UUID) -> None:
         layer = await ReaderRepository.get_layer_by_id(self.session, view_id)
@@ -143,6 +138,20 @@ class ViewService:
         await ReaderRepository.create_annotation(self.session, annotation)
 
     async def update_annotation(self, paper_id: UUID, view_id: UUID, annotation_id: UUID, req: AnnotationRequest, user_id: UUID) -> None:
+        # 一条 UPDATE 完成归属校验与更新；未命中时再查询以返回具体错误
+        updated = await ReaderRepository.update_annotation_fields(
+            self.session,
+            annotation_id,
+            view_id,
+            user_id,
+            type=req.type,
+            rects=[r for r in req.rect],
+            content=req.content,
+            color=req.color,
+        )
+        if updated:
+            return
+
         annotation = await ReaderRepository.get_annotation_by_id(self.session, annotation_id)
         if not annotation:
              raise HTTPException(status_code=404, detail="Annotation not found")
@@ -151,16 +160,7 @@ class ViewService:
         if annotation.layer_id != view_id:
              raise HTTPException(status_code=400, detail="Annotation does not belong to this view")
              
-        layer = await ReaderRepository.get_layer_by_id(self.session, view_id)
-        if not layer or layer.user_id != user_id:
-             raise HTTPException(status_code=403, detail="Permission denied")
-
-        annotation.type = req.type
-        annotation.rects = [r for r in req.rect]
-        annotation.content = req.content
-        annotation.color = req.color
-        
-        await ReaderRepository.update_annotation(self.session, annotation)
+        raise HTTPException(status_code=403, detail="Permission denied")
 
     async def delete_annotation(self, paper_id: UUID, view_id: UUID, annotation_id: UUID, user_id: UUID) -> None:
         annotation = await ReaderRepository.get_annotation_by_id(self.session, annotation_id)
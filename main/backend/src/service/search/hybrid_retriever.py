@@ -0,0 +1,205 @@
+'''
+开发者: BackendAgent
+当前版本: v1.6_hybrid_retriever
+创建时间: 2026年10月19日 23:00
+更新时间: 2026年10月20日 11:00
+更新记录:
+    [2026年10月20日 11:00:v1.6_hybrid_retriever:作者模糊检索改用实体上声明的生成列 Paper.authors_text]
+    [2026年10月20日 11:00:v1.5_hybrid_retriever:全文检索改用实体上声明的生成列 Paper.search_vector / PaperChunk.content_tsv]
+    [2026年10月20日 11:00:v1.4_hybrid_retriever:分页的 OFFSET/LIMIT 使用具名参数 (page_offset/page_limit)]
+    [2026年10月20日 08:00:v1.3_hybrid_retriever:向量召回经 nearest (可选二值量化预筛选后重排)]
+    [2026年10月20日 06:00:v1.2_hybrid_retriever:向量召回改查 chunk_embeddings 中当前模型的向量 (命中该模型的索引)]
+    [2026年10月20日 00:00:v1.1_hybrid_retriever:新增作者规范化文本生成列引用]
+    [2026年10月19日 23:00:v1.0_hybrid_retriever:关键词(全文检索 ts_rank_cd)与向量检索各自召回，按倒数排名融合(RRF)]
+'''
+
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import ColumnElement, Select, bindparam, cast, func, literal, select, true, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from base.config import settings
+from base.embedding.registry import active_embedding_model
+from base.pg.entity import ChunkEmbedding, Paper, PaperChunk
+from base.pg.service import PaperRepository
+from base.pg.vector_index import index_candidates, model_filter, nearest
+
+def to_tsquery(query: str) -> ColumnElement:
+    """用户输入按 websearch 语法解析 (支持引号短语、OR、-排除)，不会因特殊字符报错"""
+    return func.websearch_to_tsquery(cast(literal(settings.text_search_config), REGCONFIG), query)
+
+
+async def fetch_paper_page(session: AsyncSession, ranked, page: int, limit: int) -> Tuple[List[Paper], int]:
+    """
+    对按论文打分的 CTE (paper_id, score) 分页，并在同一条 SQL 中返回总数
+
+    以总数为驱动表外连接当前页，页码超出范围时仍返回一行 total。
+    """
+    paged = (
+        select(ranked.c.paper_id, ranked.c.score)
+        .order_by(ranked.c.score.desc(), ranked.c.paper_id)
+        .offset(bindparam("page_offset", (page - 1) * limit))
+        .limit(bindparam("page_limit", limit))
+        .cte("paged")
+    )
+    counted = select(func.count().label("total")).select_from(ranked).cte("counted")
+    stmt = (
+        select(counted.c.total, Paper)
+        .select_from(counted)
+        .outerjoin(paged, true())
+        .outerjoin(Paper, Paper.id == paged.c.paper_id)
+        .order_by(paged.c.score.desc(), paged.c.paper_id)
+    )
+    rows = (await session.execute(stmt)).all()
+    total = rows[0].total if rows else 0
+    return [row.Paper for row in rows if row.Paper is not None], total
+
+
+class HybridRetriever:
+    """
+    混合检索 (论文搜索与论文内问答共用)
+
+    - 关键词: 标题/摘要 (papers.search_vector) 与正文文本块 (paper_chunks.content_tsv) 的 GIN 索引匹配，
+      按 ts_rank_cd (考虑词项密度与邻近度) 排序；
+    - 向量: 文本块在 model (默认当前模型) 下的向量的近似最近邻检索，查询向量须由同一模型生成；
+    - 融合: 各路结果只取排名，按 RRF (Σ 1/(k + rank)) 求和，不同量纲的分数无需归一化。
+    每路最多召回 hybrid_search_candidates 条，全部在一条 SQL 内完成。
+    """
+
+    def __init__(self, session: AsyncSession, model: Optional[str] = None):
+        self.session = session
+        self.model = model or active_embedding_model()
+        self.candidates = settings.hybrid_search_candidates
+
+    @staticmethod
+    def _ranked(name: str, stmt: Select, value: ColumnElement, limit: int, descending: bool = False):
+        """取 stmt 中按 value 排序的前 limit 条 (key)，编号为 1..limit 的排名"""
+        order = value.desc() if descending else value
+        top = stmt.add_columns(value.label("value")).order_by(order).limit(limit).subquery(f"{name}_top")
+        return select(
+            top.c.key,
+            func.row_number().over(order_by=top.c.value.desc() if descending else top.c.value).label("rank"),
+        ).select_from(top).cte(name)
+
+    @staticmethod
+    def _fuse(name: str, *ranked_lists) -> Select:
+        """RRF 融合，返回 (key, score)"""
+        hits = union_all(*(
+            select(ranked.c.key, (1.0 / (settings.hybrid_search_rrf_k + ranked.c.rank)).label("score"))
+            for ranked in ranked_lists
+        )).subquery(f"{name}_hits")
+        return select(hits.c.key, func.sum(hits.c.score).label("score")).group_by(hits.c.key)
+
+    async def _prepare(self) -> None:
+        await PaperRepository.set_vector_search_params(
+            self.session, ef_search=max(settings.vector_search_ef_search, index_candidates(self.candidates))
+        )
+
+    async def search_papers(
+        self,
+        query: str,
+        embedding: List[float],
+        conditions: Sequence[ColumnElement],
+        page: int,
+        limit: int,
+    ) -> Tuple[List[Paper], int]:
+        """
+        论文级混合检索: 向量 / 标题摘要 / 正文 三路排名融合后分页
+        conditions: 论文过滤条件 (用户、状态、时间等)
+        """
+        await self._prepare()
+        tsquery = to_tsquery(query)
+        k = self.candidates
+
+        # 向量: 最相近的 K 个文本块，论文按其最近文本块的距离排名
+        vec_chunks = nearest(
+            select(PaperChunk.paper_id)
+            .select_from(ChunkEmbedding)
+            .join(PaperChunk, PaperChunk.id == ChunkEmbedding.chunk_id)
+            .join(Paper, Paper.id == PaperChunk.paper_id)
+            .where(model_filter(self.model), *conditions),
+            self.model, embedding, k, name="vec_prefiltered",
+        ).subquery("vec_chunks")
+        vector = (
+            select(
+                vec_chunks.c.paper_id.label("key"),
+                func.row_number().over(order_by=func.min(vec_chunks.c.distance)).label("rank"),
+            )
+            .group_by(vec_chunks.c.paper_id)
+            .cte("vector")
+        )
+
+        # 标题/摘要
+        meta_score = func.ts_rank_cd(Paper.search_vector, tsquery)
+        meta = self._ranked(
+            "meta",
+            select(Paper.id.label("key")).where(*conditions, Paper.search_vector.op("@@")(tsquery)),
+            meta_score, k, descending=True,
+        )
+
+        # 正文: 命中度最高的 K 个文本块，论文按其最高分文本块排名
+        body_score = func.ts_rank_cd(PaperChunk.content_tsv, tsquery)
+        body_chunks = (
+            select(PaperChunk.paper_id, body_score.label("score"))
+            .join(Paper, Paper.id == PaperChunk.paper_id)
+            .where(*conditions, PaperChunk.content_tsv.op("@@")(tsquery))
+            .order_by(body_score.desc())
+            .limit(k)
+            .subquery("body_chunks")
+        )
+        body = (
+            select(
+                body_chunks.c.paper_id.label("key"),
+                func.row_number().over(order_by=func.max(body_chunks.c.score).desc()).label("rank"),
+            )
+            .group_by(body_chunks.c.paper_id)
+            .cte("body")
+        )
+
+        fused = self._fuse("papers", vector, meta, body).subquery("fused")
+        ranked = select(fused.c.key.label("paper_id"), fused.c.score).cte("ranked")
+        return await fetch_paper_page(self.session, ranked, page, limit)
+
+    async def search_chunks(
+        self,
+        query: str,
+        embedding: List[float],
+        conditions: Sequence[ColumnElement],
+        top_k: int,
+    ) -> List[Tuple[PaperChunk, float]]:
+        """
+        文本块级混合检索 (论文内问答): 向量 / 正文关键词 两路排名融合
+        conditions: 文本块过滤条件 (如 PaperChunk.paper_id == paper_id)
+        返回 [(文本块, 融合得分)]，按得分降序；文本块不加载向量列与全文检索列
+        """
+        await self._prepare()
+        tsquery = to_tsquery(query)
+        k = max(self.candidates, top_k)
+
+        vector_top = nearest(
+            select(PaperChunk.id.label("key"))
+            .join(ChunkEmbedding, ChunkEmbedding.chunk_id == PaperChunk.id)
+            .where(model_filter(self.model), *conditions),
+            self.model, embedding, k, name="vector_prefiltered",
+        ).subquery("vector_top")
+        vector = select(
+            vector_top.c.key,
+            func.row_number().over(order_by=vector_top.c.distance).label("rank"),
+        ).cte("vector")
+        lexical = self._ranked(
+            "lexical",
+            select(PaperChunk.id.label("key")).where(*conditions, PaperChunk.content_tsv.op("@@")(tsquery)),
+            func.ts_rank_cd(PaperChunk.content_tsv, tsquery), k, descending=True,
+        )
+        fused = self._fuse("chunks", vector, lexical).cte("fused")
+        stmt = (
+            select(PaperChunk, fused.c.score)
+            .join(fused, fused.c.key == PaperChunk.id)
+            .options(defer(PaperChunk.embedding), defer(PaperChunk.content_tsv))
+            .order_by(fused.c.score.desc(), PaperChunk.chunk_index)
+            .limit(top_k)
+        )
+        rows = (await self.session.execute(stmt)).all()
+        return [(row.PaperChunk, row.score) for row in rows]
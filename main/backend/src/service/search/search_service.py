@@ -5,32 +5,53 @@ from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, desc, or_
+from sqlalchemy import bindparam, func, desc, literal, or_
 
 from fastapi import Depends, HTTPException, status
 
-from base.pg.service import SessionDep
-from base.pg.entity import Paper, PaperChunk, SearchHistory, User
+from base.config import settings
+from base.embedding.batcher import embed_query
+from base.embedding.serving import serving_embedding_model
+from base.pg.pagination import paginate
+from base.pg.vector_index import (
+    embedding_distance,
+    index_candidates,
+    model_filter,
+    nearest,
+    paper_embedding_distance,
+    paper_model_filter,
+)
+from base.pg.service import PaperRepository, ReadSessionDep, SessionDep, replica_session_factory, save, savepoint, untracked_writes
+from base.pg.entity import ChunkEmbedding, Paper, PaperChunk, PaperEmbedding, SearchHistory, User
 from controller.api.search.schema import SearchRequest, SearchFilter, SearchResponse, SearchedPaperMetaResponse
 from service.papers.schema import PaperMeta
 from service.papers.paper_service import PaperServiceDep
 from service.papers.arxiv_service import ArxivService
+from service.search.hybrid_retriever import (
+    HybridRetriever,
+    fetch_paper_page,
+    to_tsquery,
+)
+from service.search.total_count import TotalCounter, fingerprint
 from common.model.enums import PaperStatus
 
 logger = logging.getLogger(__name__)
+
+
+def _escape_like(term: str) -> str:
+    """转义 LIKE 通配符，用户输入按字面匹配"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 # TODO: 相关说明已经在schema中标注了。
 class SearchService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, read_session: Optional[AsyncSession] = None):
         self.session = session
+        # 检索查询使用的会话 (可为只读副本)，搜索历史的写入仍使用 session
+        self.read_session = read_session or session
 
-    async def _get_embedding(self, text: str) -> List[float]:
-        """
-        获取文本向量 (Mock)
-        TODO: 对接真实 Embedding 服务
-        """
-        import random
-        # 1536 dim for OpenAI compatibility
-        return [random.random() for _ in range(1536)]
+    async def _get_embedding(self, text: str, model: Optional[str] = None) -> List[float]:
+        """获取查询文本向量 (进程内共享的批处理器，并发查询合并调用模型；model 须与检索的向量模型一致)"""
+        return await embed_query(text, model)
 
     async def search_papers(
         self, 
@@ -54,82 +75,57 @@ class SearchService:
             logger.info("Executing external search (Arxiv) as requested.")
             return await self._search_external(user_id, request, arxiv_service)
 
-        # 1. 本地搜索 - 构建基础查询
+        # 1. 本地搜索 - 基础条件 (用户、状态、高级过滤器)
         logger.info("Executing local search.")
-        query = select(Paper).where(
-            Paper.user_id == user_id,
-            Paper.status != PaperStatus.FAILED
-        )
+        conditions = self._paper_conditions(user_id, request.filters)
 
-        # 2. 语义搜索或关键词匹配
-        if request.enable_semantic_search and request.query:
-            embedding = await self._get_embedding(request.query)
-            # 语义搜索: 查找最相似的 Chunk 所属的 Paper
-            # 注意: 这里逻辑简化，直接 Join 并按距离排序
-            # 真实场景可能需要先筛选 Chunk 再聚合 Paper
-            query = query.join(PaperChunk).order_by(
-                PaperChunk.embedding.cosine_distance(embedding)
+        # 2. 混合/语义搜索: 数据库内完成召回、按论文聚合与分页
+        total_exact = True
+        if request.enable_hybrid_search and request.query:
+            model = await serving_embedding_model()
+            embedding = await self._get_embedding(request.query, model)
+            papers, total = await HybridRetriever(self.read_session, model=model).search_papers(
+                request.query, embedding, conditions, request.page, request.limit
             )
-            # 由于一对多，需要去重。但 distinct 与 order_by 冲突处理较麻烦
-            # 这里简单处理: 不去重，直接返回 Chunk 对应的 Paper (可能会有重复)，
-            # 或者在应用层去重。
-            # 为了演示，我们假设只返回最相关的一个 Chunk 对应的 Paper 列表 (可能会重复)
-            # 更好的做法是 subquery
-        elif request.query:
-            # 关键词匹配
-            search_term = f"%{request.query}%"
-            query = query.where(
-                or_(
-                    Paper.title.ilike(search_term),
-                    Paper.abstract.ilike(search_term)
+        elif request.enable_semantic_search and request.query:
+            papers, total = await self._semantic_search(request, conditions)
+        else:
+            query = select(Paper).where(*conditions)
+            if request.query:
+                # 关键词匹配: 标题子串/模糊匹配 (三元组 GIN 索引) 或 标题摘要全文检索 (GIN 索引)，
+                # 按标题相似度、全文相关度排序
+                await PaperRepository.set_fuzzy_search_params(self.read_session)
+                tsquery = to_tsquery(request.query)
+                query = query.where(
+                    or_(
+                        Paper.title.ilike(f"%{_escape_like(request.query)}%", escape="\\"),
+                        literal(request.query).op("<%")(Paper.title),
+                        Paper.search_vector.op("@@")(tsquery),
+                    )
+                ).order_by(
+                    func.word_similarity(request.query, Paper.title).desc(),
+                    func.ts_rank_cd(Paper.search_vector, tsquery).desc(),
+                    desc(Paper.created_at),
                 )
+            else:
+                # 无关键词，默认按时间倒序
+                query = query.order_by(desc(Paper.created_at))
+
+            # 总数: 阈值内精确计数，超出后取缓存计数或计划估算 (见 TotalCounter)
+            total, total_exact = await TotalCounter(self.read_session).count(
+                query,
+                user_id,
+                fingerprint(
+                    query=request.query,
+                    filters=request.filters.model_dump(mode="json") if request.filters else None,
+                ),
             )
-            query = query.order_by(desc(Paper.created_at))
-        else:
-             # 无关键词，默认按时间倒序
-             query = query.order_by(desc(Paper.created_at))
-
-        # 3. 应用高级过滤器 (Common)
-        if request.filters:
-            if request.filters.start_date:
-                query = query.where(Paper.created_at >= request.filters.start_date)
-            if request.filters.end_date:
-                query = query.where(Paper.created_at <= request.filters.end_date)
-            if request.filters.status:
-                query = query.where(Paper.status == request.filters.status)
-
-        # 4. 计算总数 (Simplified for semantic search performance)
-        # count_stmt = select(func.count()).select_from(query.subquery())
-        # total = (await self.session.execute(count_stmt)).scalar_one()
-        # 暂且简单处理 total，如果是语义搜索，total 可能不准确或者是 limit
-        total = 0 
-        
-        # 5. 分页与执行
-        if not request.enable_semantic_search:
-             # 非语义搜索计算 Total
-             count_stmt = select(func.count()).select_from(query.subquery())
-             total = (await self.session.execute(count_stmt)).scalar_one()
-             
-             query = query.offset((request.page - 1) * request.limit).limit(request.limit)
-             result = await self.session.execute(query)
-             papers = result.scalars().all()
-        else:
-             # 语义搜索分页
-             # 直接 limit (语义搜索通常是 TopK)
-             query = query.limit(request.limit).offset((request.page - 1) * request.limit)
-             result = await self.session.execute(query)
-             papers = result.scalars().all()
-             # 去重 (保持顺序)
-             seen = set()
-             unique_papers = []
-             for p in papers:
-                 if p.id not in seen:
-                     unique_papers.append(p)
-                     seen.add(p.id)
-             papers = unique_papers
-             total = len(papers) # Mock total for semantic search
-
-        # 6. 记录搜索历史
+
+            query = query.offset((request.page - 1) * request.limit).limit(request.limit)
+            result = await self.read_session.execute(query)
+            papers = result.scalars().all()
+
+        # 3. 记录搜索历史
         query_id = await self._save_search_history(user_id, request, total)
 
         # 转换 convert to PaperMeta
@@ -154,10 +150,107 @@ class SearchService:
 
         return SearchedPaperMetaResponse(
             total=total,
+            total_exact=total_exact,
             items=items,
             query_id=query_id
         )
 
+    def _paper_conditions(self, user_id: UUID, filters: Optional[SearchFilter]) -> list:
+        conditions = [Paper.user_id == user_id, Paper.status != PaperStatus.FAILED]
+        if filters:
+            if filters.start_date:
+                conditions.append(Paper.created_at >= filters.start_date)
+            if filters.end_date:
+                conditions.append(Paper.created_at <= filters.end_date)
+            if filters.status:
+                conditions.append(Paper.status == filters.status)
+            authors = [name.strip().lower() for name in filters.authors or [] if name.strip()]
+            if authors:
+                # 任一作者匹配即可: 子串或模糊匹配规范化作者文本 (三元组 GIN 索引)
+                conditions.append(or_(*(
+                    or_(
+                        Paper.authors_text.ilike(f"%{_escape_like(name)}%", escape="\\"),
+                        literal(name).op("<%")(Paper.authors_text),
+                    )
+                    for name in authors
+                )))
+        return conditions
+
+    async def _semantic_search(self, request: SearchRequest, conditions: list) -> Tuple[List[Paper], int]:
+        """
+        语义搜索 (一条 SQL 完成召回、聚合与分页)
+
+        1. candidates: 按余弦距离取当前用户(及过滤条件)下最相近的 K 个文本块 (检索模型的向量)；
+           配置了粗排 (semantic_search_coarse_papers) 时先经论文向量索引取最相近的 N 篇论文，
+           再在其文本块中精确计算 (见 _coarse_candidates)，否则走该模型的文本块向量索引；
+           两种方式都由迭代索引扫描 (vector_search_iterative_scan) 保证按用户过滤后仍取满 N/K 条；
+        2. ranked: 按论文聚合，论文得分为其文本块的最大相似度 (1 - 最小距离)；
+        3. 对论文按得分分页，total 为候选集中的论文数 (fetch_paper_page)。
+
+        K 固定为 semantic_search_candidate_chunks (与页码无关)，翻页时候选集不变，各页不重复、不遗漏。
+        """
+        model = await serving_embedding_model()
+        embedding = await self._get_embedding(request.query, model)
+        candidate_k = settings.semantic_search_candidate_chunks
+        coarse_papers = settings.semantic_search_coarse_papers
+        # 近似最近邻索引的候选列表不少于要取的行数 (粗排为论文数；二值预筛选时为预筛选候选数)，否则召回会不足
+        index_rows = coarse_papers if coarse_papers else index_candidates(candidate_k)
+        await PaperRepository.set_vector_search_params(
+            self.read_session, ef_search=max(settings.vector_search_ef_search, index_rows)
+        )
+
+        if coarse_papers:
+            candidates = self._coarse_candidates(model, embedding, conditions, coarse_papers, candidate_k)
+        else:
+            candidates = nearest(
+                select(PaperChunk.paper_id)
+                .select_from(ChunkEmbedding)
+                .join(PaperChunk, PaperChunk.id == ChunkEmbedding.chunk_id)
+                .join(Paper, Paper.id == PaperChunk.paper_id)
+                .where(model_filter(model), *conditions),
+                model, embedding, candidate_k, name="prefiltered",
+            ).cte("candidates")
+        ranked = (
+            select(candidates.c.paper_id, (1 - func.min(candidates.c.distance)).label("score"))
+            .group_by(candidates.c.paper_id)
+            .cte("ranked")
+        )
+        return await fetch_paper_page(self.read_session, ranked, request.page, request.limit)
+
+    @staticmethod
+    def _coarse_candidates(model: str, embedding: List[float], conditions: list, coarse_papers: int, candidate_k: int):
+        """
+        粗排 + 精排的候选文本块 (CTE candidates: paper_id, distance)
+
+        coarse: 论文向量最相近的 coarse_papers 篇论文 (走论文向量索引，每篇论文一行，远小于文本块索引)；
+                索引按全体用户的论文排序，用户过滤在索引扫描之后，由迭代索引扫描 (set_vector_search_params)
+                在过滤后不足 N 篇时继续扫描，小论文库不会因其他用户的论文占满候选列表而丢结果；
+        scored: 这些论文的全部文本块的精确余弦距离 (N 篇论文的文本块，精确计算比按论文过滤的文本块索引扫描更省)，
+                MATERIALIZED 使其不被内联，外层按距离取前 K 个时不会改走文本块索引。
+        """
+        coarse = (
+            select(PaperEmbedding.paper_id)
+            .join(Paper, Paper.id == PaperEmbedding.paper_id)
+            .where(paper_model_filter(model), *conditions)
+            .order_by(paper_embedding_distance(model, embedding))
+            .limit(bindparam("coarse_papers", coarse_papers))
+            .cte("coarse")
+        )
+        scored = (
+            select(PaperChunk.paper_id, embedding_distance(model, embedding).label("distance"))
+            .select_from(ChunkEmbedding)
+            .join(PaperChunk, PaperChunk.id == ChunkEmbedding.chunk_id)
+            .where(model_filter(model), PaperChunk.paper_id.in_(select(coarse.c.paper_id)))
+            .cte("scored")
+            .prefix_with("MATERIALIZED")
+        )
+        return (
+            select(scored.c.paper_id, scored.c.distance)
+            .order_by(scored.c.distance)
+            .limit(bindparam("candidate_chunks", candidate_k))
+            .cte("candidates")
+        )
+
     async def _search_external(self, user_id: UUID, request: SearchRequest, arxiv_service: ArxivService) -> SearchedPaperMetaResponse:
         """Helper method for external search"""
         start = (request.page - 1) * request.limit
@@ -194,9 +287,10 @@ class SearchService:
                 filters=request.filters.model_dump() if request.filters else None,
                 result_count=total
             )
-            self.session.add(history)
-            await self.session.commit()
-            await self.session.refresh(history)
+            # 检索历史写入失败不影响检索结果；历史不要求写后立即可读，不触发读己之写粘滞
+            async with untracked_writes(self.session), savepoint(self.session):
+                self.session.add(history)
+                await save(self.session, history)
             return history.id
         except Exception as e:
             logger.error(f"Failed to save search history: {e}")
@@ -205,14 +299,16 @@ class SearchService:
     async def get_search_history(
         self, 
         user_id: UUID, 
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None
     ) -> List[SearchHistory]:
-        """获取最近搜索历史"""
-        stmt = select(SearchHistory).where(
-            SearchHistory.user_id == user_id
-        ).order_by(desc(SearchHistory.created_at)).limit(limit)
+        """获取最近搜索历史 (按 (created_at, id) 倒序，传入 cursor 时取游标之后的一页)"""
+        stmt = paginate(
+            select(SearchHistory).where(SearchHistory.user_id == user_id),
+            SearchHistory.created_at, SearchHistory.id, limit, cursor=cursor
+        )
         
-        result = await self.session.execute(stmt)
+        result = await self.read_session.execute(stmt)
         return result.scalars().all()
 
     async def clear_search_history(self, user_id: UUID) -> int:
@@ -221,9 +317,10 @@ class SearchService:
         from sqlalchemy import delete
         stmt = delete(SearchHistory).where(SearchHistory.user_id == user_id)
         result = await self.session.execute(stmt)
-        await self.session.commit()
+        await save(self.session)
         return result.rowcount
 
 
-async def get_search_service(session: SessionDep) -> SearchService:
-    return SearchService(session)
+async def get_search_service(session: SessionDep, read_session: ReadSessionDep) -> SearchService:
+    # 未配置只读副本时查询与历史写入共用一个主库会话，避免一次请求占用两个连接
+    return SearchService(session, read_session if replica_session_factory is not None else session)
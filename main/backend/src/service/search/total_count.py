@@ -0,0 +1,70 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_total_count
+创建时间: 2026年10月20日 02:00
+更新时间: 2026年10月20日 02:00
+更新记录:
+    [2026年10月20日 02:00:v1.0_total_count:搜索总数统计策略，阈值内精确计数，超出后取缓存计数或计划估算]
+'''
+
+import hashlib
+import json
+import logging
+from typing import Any, NamedTuple
+from uuid import UUID
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from base.config import settings
+from base.pg.counting import count_rows, planner_estimate
+from base.redis.count_cache import PaperCountCache
+
+logger = logging.getLogger(__name__)
+
+
+class TotalCount(NamedTuple):
+    total: int
+    exact: bool  # False: 缓存值(可能滞后于论文状态变化)或查询计划估算值
+
+
+def fingerprint(**parts: Any) -> str:
+    """检索条件指纹，作为计数缓存的字段名"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class TotalCounter:
+    """
+    论文检索总数统计策略
+
+    1. 带上限计数: 结果数不超过 search_count_exact_threshold 时即为精确总数，扫描行数有上限；
+    2. 超过阈值:
+       - cache: 读取按 (用户, 检索条件) 缓存的计数，未命中时完整计数一次并写入缓存
+         (论文新增/删除时失效，见 PaperCountCache)；Redis 不可用时退化为估算；
+       - estimate: 取查询计划器的行数估算，不执行计数。
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def count(self, statement: Select, user_id: UUID, key: str) -> TotalCount:
+        threshold = settings.search_count_exact_threshold
+        total = await count_rows(self.session, statement, cap=threshold)
+        if total <= threshold:
+            return TotalCount(total, True)
+
+        if settings.search_count_strategy == "cache":
+            try:
+                cached = await PaperCountCache.get(user_id, key)
+                if cached is not None:
+                    return TotalCount(cached, False)
+                total = await count_rows(self.session, statement)
+                await PaperCountCache.set(user_id, key, total, settings.search_count_cache_ttl)
+                return TotalCount(total, True)
+            except Exception as e:
+                logger.warning(f"Count cache unavailable, falling back to planner estimate: {e}")
+
+        # 估算值低于已确认的下限时以下限为准
+        estimate = await planner_estimate(self.session, statement)
+        return TotalCount(max(estimate, threshold + 1), False)
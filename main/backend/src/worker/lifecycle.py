@@ -0,0 +1,145 @@
+'''
+开发者: BackendAgent
+当前版本: v1.2_worker_lifecycle
+创建时间: 2026年10月19日 18:00
+更新时间: 2026年10月20日 12:00
+更新记录:
+    [2026年10月20日 12:00:v1.2_worker_lifecycle:进程内共享资源按运行中的Worker计数，最后一个Worker关闭时才释放 (单进程运行多个Worker)]
+    [2026年10月20日 12:00:v1.1_worker_lifecycle:新增 on_job_end，任务结束时刷新作业进度缓冲]
+    [2026年10月19日 18:00:v1.0_worker_lifecycle:Worker启动时预加载数据库连接、解析与向量化模型并预热，上报就绪状态；关闭时释放资源]
+'''
+
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Sequence
+
+from loguru import logger
+from sqlalchemy import text
+
+from base.config import settings
+from base.embedding.batcher import close_embedding_batcher, get_embedding_batcher
+from base.pdf_parser.parser import get_pdf_parser, warmup_pdf_parser
+from base.pg.service import async_session_factory, engine
+from base.redis.worker_readiness import WorkerReadiness
+from service.reader.job_progress import JobStatusBuffer
+
+Hook = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# 本进程中已启动未关闭的Worker数: 数据库引擎、向量化批处理器与作业进度缓冲为进程内共享，
+# run_ingest_workers 在同一进程运行多个Worker，先关闭的Worker不能释放其他Worker仍在使用的资源
+_active_workers = 0
+
+
+async def _preload_db(ctx: Dict[str, Any]) -> None:
+    """建立连接池中的首个连接，Worker 内所有任务共用同一个引擎"""
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    ctx["db_engine"] = engine
+    ctx["session_factory"] = async_session_factory
+
+
+async def _preload_parser(ctx: Dict[str, Any]) -> None:
+    parser = await get_pdf_parser()
+    if settings.worker_warmup:
+        await warmup_pdf_parser(parser)
+    ctx["pdf_parser"] = parser
+
+
+async def _preload_embedding(ctx: Dict[str, Any]) -> None:
+    # 本地 ONNX 模型在构造时同步加载，放到线程中执行
+    batcher = await asyncio.to_thread(get_embedding_batcher)
+    if settings.worker_warmup:
+        await batcher.embed(["warmup"])
+    ctx["embedding_batcher"] = batcher
+
+
+PRELOADERS: Dict[str, Hook] = {
+    "db": _preload_db,
+    "parser": _preload_parser,
+    "embedding": _preload_embedding,
+}
+
+
+async def _keep_ready(ctx: Dict[str, Any], queue_name: str, worker_id: str, info: Dict[str, Any]) -> None:
+    """就绪状态按 TTL 的 1/3 周期续期"""
+    interval = max(1, settings.worker_readiness_ttl // 3)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await WorkerReadiness.report(ctx["redis"], queue_name, worker_id, info, settings.worker_readiness_ttl)
+        except Exception as e:
+            logger.warning(f"Worker就绪状态续期失败: {e}")
+
+
+def make_startup(queue_name: str, components: Sequence[str]) -> Hook:
+    """
+    生成 Worker 启动回调 (WorkerSettings.on_startup)
+
+    按 components 依次预加载 (db/parser/embedding) 并记录耗时，结果放入 Worker ctx；
+    单个组件失败不阻止 Worker 启动 (首个任务时会再次懒加载)，但就绪状态标记为未就绪。
+    """
+    async def startup(ctx: Dict[str, Any]) -> None:
+        global _active_workers
+        _active_workers += 1
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        timings: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        for name in components:
+            started = time.perf_counter()
+            try:
+                await PRELOADERS[name](ctx)
+            except Exception as e:
+                logger.error(f"Worker预加载失败: {name}, 错误: {e}", exc_info=True)
+                errors[name] = str(e)
+            timings[name] = round(time.perf_counter() - started, 3)
+
+        info = {
+            "worker_id": worker_id,
+            "queue": queue_name,
+            "ready": not errors,
+            "components": list(components),
+            "preload_seconds": timings,
+            "errors": errors,
+            "started_at": datetime.now().isoformat(),
+        }
+        ctx["worker_id"] = worker_id
+        await WorkerReadiness.report(ctx["redis"], queue_name, worker_id, info, settings.worker_readiness_ttl)
+        ctx["readiness_task"] = asyncio.create_task(_keep_ready(ctx, queue_name, worker_id, info))
+        logger.info(f"Worker就绪: {queue_name}, 预加载耗时: {timings}, 失败: {errors or '无'}")
+
+    return startup
+
+
+async def on_job_end(ctx: Dict[str, Any]) -> None:
+    """任务结束 (成功、失败或重试) 后刷新作业进度缓冲，缓冲的进度不会在下一个任务时才落库"""
+    await JobStatusBuffer.flush()
+
+
+def make_shutdown(queue_name: str) -> Hook:
+    """
+    生成 Worker 关闭回调: 撤销就绪状态；本进程最后一个Worker关闭时
+    排空向量化批处理器与作业进度缓冲，释放数据库连接
+    """
+    async def shutdown(ctx: Dict[str, Any]) -> None:
+        global _active_workers
+        task = ctx.pop("readiness_task", None)
+        if task is not None:
+            task.cancel()
+        if "worker_id" in ctx:
+            try:
+                await WorkerReadiness.clear(ctx["redis"], queue_name, ctx["worker_id"])
+            except Exception as e:
+                logger.warning(f"清除Worker就绪状态失败: {e}")
+        _active_workers = max(0, _active_workers - 1)
+        if _active_workers:
+            # 其他Worker仍在运行，进度缓冲仍需落库，共享资源留给最后一个Worker释放
+            await JobStatusBuffer.flush()
+            return
+        await close_embedding_batcher()
+        await JobStatusBuffer.flush()
+        await engine.dispose()
+
+    return shutdown
@@ -0,0 +1,89 @@
+'''
+开发者: BackendAgent
+当前版本: v1.0_task_retry
+创建时间: 2026年10月19日 17:00
+更新时间: 2026年10月19日 17:00
+更新记录:
+    [2026年10月19日 17:00:v1.0_task_retry:任务异常分类(可重试/不可重试)与带抖动的指数退避]
+'''
+
+import asyncio
+import random
+from typing import Any, Dict
+
+import httpx
+import openai
+from redis import exceptions as redis_exceptions
+from sqlalchemy import exc as sa_exc
+
+from base.config import settings
+
+
+class TransientTaskError(Exception):
+    """明确可重试的任务异常 (外部依赖暂时不可用等)"""
+
+
+class PermanentTaskError(Exception):
+    """明确不可重试的任务异常 (输入本身有问题，重试结果不会改变)"""
+
+
+# 网络、数据库连接、模型接口限流/超时等瞬时故障
+RETRYABLE_ERRORS = (
+    TransientTaskError,
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+    redis_exceptions.ConnectionError,
+    redis_exceptions.TimeoutError,
+    sa_exc.OperationalError,
+    sa_exc.InterfaceError,
+    sa_exc.TimeoutError,
+    httpx.TransportError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# 输入数据或代码缺陷导致的错误，重试无意义
+PERMANENT_ERRORS = (
+    PermanentTaskError,
+    FileNotFoundError,
+    ValueError,
+    TypeError,
+    KeyError,
+    NotImplementedError,
+    sa_exc.IntegrityError,
+    sa_exc.DataError,
+    openai.BadRequestError,
+    openai.AuthenticationError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    判断异常是否值得重试
+
+    先匹配可重试类型 (如 ConnectionError 虽是 OSError 子类，也按瞬时故障处理)，再匹配不可重试类型；
+    其余未知异常按可重试处理，由最大重试次数兜底，最终失败的任务进入死信队列。
+    """
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    if isinstance(error, PERMANENT_ERRORS):
+        return False
+    return True
+
+
+def backoff_delay(job_try: int) -> float:
+    """
+    第 job_try 次执行失败后的重试等待时间 (秒)
+
+    指数退避 + 全抖动: uniform(0, min(上限, 基数 * 2^(job_try-1)))，
+    避免依赖恢复时大量任务同时重试。
+    """
+    ceiling = min(settings.task_retry_max_delay, settings.task_retry_base_delay * 2 ** max(0, job_try - 1))
+    return random.uniform(0, ceiling)
+
+
+def can_retry(ctx: Dict[str, Any]) -> bool:
+    """当前执行失败后是否还有重试机会"""
+    return ctx.get("job_try", 1) < settings.task_max_tries
@@ -1,47 +1,77 @@
 '''
 开发者: BackendAgent
-当前版本: v1.0_arq_tasks
+当前版本: v1.15_arq_tasks
 创建时间: 2026年01月08日 14:30
-更新时间: 2026年01月08日 14:30
+更新时间: 2026年10月20日 12:10
 更新记录:
+    [2026年10月20日 12:10:v1.15_arq_tasks:Worker注册on_job_end，任务结束时刷新作业进度缓冲]
+    [2026年10月20日 12:00:v1.14_arq_tasks:导入阶段Worker配置类显式包含继承的配置 (arq 命令行只读取类自身的 __dict__)；create_worker 与命令行一致按 get_kwargs 构造；移除 arq 不支持的 retry_delay]
+    [2026年10月20日 10:00:v1.13_arq_tasks:新增update_related_papers_task增量维护相关论文列表，论文入库完成后投递]
+    [2026年10月20日 09:00:v1.12_arq_tasks:generate_embeddings_task写回文本块向量后重算所涉论文的论文向量]
+    [2026年10月20日 07:00:v1.11_arq_tasks:新增reembed_chunks_task更换模型时节流回填新模型向量(reembed通道，分次执行并重新入队)；generate_embeddings_task默认使用检索模型]
+    [2026年10月20日 06:00:v1.10_arq_tasks:generate_embeddings_task按模型写入chunk_embeddings，未指定模型时使用当前模型]
+    [2026年10月19日 19:00:v1.9_arq_tasks:generate_embeddings_task改为按文本块ID向量化并直接写回数据库，由向量化Worker消费]
+    [2026年10月19日 18:00:v1.8_arq_tasks:Worker启动时按队列预加载数据库连接、解析与向量化模型并上报就绪状态，生命周期回调移至worker.lifecycle；create_worker移除arq不支持的retry_delay参数]
+    [2026年10月19日 17:00:v1.7_arq_tasks:异常分类后按指数退避(抖动)重试，最终失败写入死信队列；实现定时清理任务]
+    [2026年10月19日 16:00:v1.6_arq_tasks:新增run_job_task执行编排后的作业(toc/summary/mind_map)]
+    [2026年10月19日 15:00:v1.5_arq_tasks:阶段任务携带优先级通道与用户，阶段间按通道投递；Worker记录各通道排队等待时间]
+    [2026年10月19日 13:00:v1.4_arq_tasks:Worker关闭时排空向量化批处理器]
+    [2026年10月19日 12:00:v1.3_arq_tasks:导入拆分为parse/embed/persist阶段任务，各阶段独立队列与Worker并发上限]
+    [2026年10月19日 11:00:v1.2_arq_tasks:PDF处理任务关联作业ID，解析各阶段进度写入Redis Stream并批量落库]
+    [2026年10月19日 10:00:v1.1_arq_tasks:TaskQueue改用进程级共享Arq连接池(ArqService)，新增批量入队接口]
     [2026年01月08日 14:30:v1.0_arq_tasks:创建Arq异步任务，集成PDF解析和向量化处理]
 '''
 
 
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from arq import create_pool, cron
-from arq.connections import RedisSettings
-from arq.worker import Worker
+from arq import cron
+from arq.constants import default_queue_name
+from arq.worker import Retry, Worker, get_kwargs
 
 from base.config import settings
+from base.embedding.batcher import get_embedding_batcher
+from base.embedding.registry import active_embedding_model
+from base.embedding.serving import serving_embedding_model
+from base.pg.entity import Job
+from base.pg.service import JobRepository, PaperRepository, async_session_factory
+from base.redis.arq_service import (
+    ArqRedisSettings,
+    ArqService,
+    INGEST_EMBED_QUEUE,
+    INGEST_PARSE_QUEUE,
+    INGEST_PERSIST_QUEUE,
+)
+from base.redis.dead_letter import DeadLetterStore
+from base.redis.lane_scheduler import LaneScheduler
+from common.model.enums import JobLane
+from service.papers.cleanup_service import CleanupService
 from service.papers.paper_service import PaperProcessingService
+from service.papers.reembed_service import ReembedService
+from service.papers.related_service import RelatedPaperService
+from service.reader.job_progress import JobProgressReporter, ProgressReporter
+from service.reader.mind_map_service import MindMapService
+from service.reader.schema import SummaryCreateDTO
+from service.reader.summary_service import SummaryService
+from service.reader.toc_service import TocService
+from worker.lifecycle import make_shutdown, make_startup, on_job_end
+from worker.retry import backoff_delay, can_retry, is_retryable
 
 
 from loguru import logger
 
 
-class ArqRedisSettings(RedisSettings):
-    """自定义Redis设置，支持从配置读取"""
-
-    def __init__(self):
-        # 从settings中读取Redis配置
-        super().__init__(
-            host=settings.arq_redis_url.split('//')[1].split(':')[0],
-            port=int(settings.arq_redis_url.split(':')[-1].split('/')[0]),
-            database=int(settings.arq_redis_url.split('/')[-1])
-        )
-
-
 # 异步任务定义
-async def process_pdf_task(ctx: Dict[str, Any], paper_id: str) -> Dict[str, Any]:
+async def process_pdf_task(ctx: Dict[str, Any], paper_id: str, job_id: Optional[str] = None) -> Dict[str, Any]:
     """
     处理PDF文件的异步任务
 
     参数:
     - ctx: 任务上下文
     - paper_id: 论文ID（字符串格式）
+    - job_id: 关联的作业ID，传入时各阶段进度发布到 job:{job_id}:events
 
     返回:
     - dict: 处理结果
@@ -52,90 +82,363 @@ async def process_pdf_task(ctx: Dict[str, Any], paper_id: str) -> Dict[str, Any]
     3. 返回处理结果
 
     异常处理:
-    - 捕获所有异常并记录日志
-    - 返回错误信息以便前端显示
+    - 可重试异常 (网络/数据库连接/模型接口限流等) 按指数退避重试，论文保持处理中
+    - 不可重试或重试耗尽时标记失败，任务写入死信队列
     """
     logger.info(f"开始异步处理PDF任务: {paper_id}")
 
+    processing_service = PaperProcessingService()
     try:
-        # 转换paper_id为UUID
-        uuid_paper_id = UUID(paper_id)
+        success = await processing_service.process_pdf(
+            UUID(paper_id), reporter=_reporter(job_id), retry_on=_retry_on(ctx)
+        )
+    except Exception as e:
+        raise _retry(ctx, "process_pdf_task", e) from e
+
+    if success:
+        logger.info(f"PDF处理成功: {paper_id}")
+        await _enqueue_related_update(ctx, paper_id)
+        return {
+            "status": "success",
+            "paper_id": paper_id,
+            "message": "PDF处理完成"
+        }
 
-        # 初始化处理服务
-        processing_service = PaperProcessingService()
+    logger.error(f"PDF处理失败: {paper_id}")
+    await _dead_letter(ctx, "process_pdf_task", (paper_id, job_id), processing_service.last_error)
+    return {
+        "status": "failed",
+        "paper_id": paper_id,
+        "message": processing_service.last_error or "PDF处理失败"
+    }
 
-        # 处理PDF
-        success = await processing_service.process_pdf(uuid_paper_id)
 
-        if success:
-            logger.info(f"PDF处理成功: {paper_id}")
-            return {
-                "status": "success",
-                "paper_id": paper_id,
-                "message": "PDF处理完成"
-            }
-        else:
-            logger.error(f"PDF处理失败: {paper_id}")
-            return {
-                "status": "failed",
-                "paper_id": paper_id,
-                "message": "PDF处理失败"
-            }
+def _retry_on(ctx: Dict[str, Any]):
+    """还有重试机会时，可重试异常交由任务层重试；最后一次执行时所有异常都按失败处理"""
+    return is_retryable if can_retry(ctx) else None
+
+
+def _retry(ctx: Dict[str, Any], function: str, error: BaseException) -> Retry:
+    delay = backoff_delay(ctx.get("job_try", 1))
+    logger.warning(f"任务将在 {delay:.1f}s 后重试: {function}, 第{ctx.get('job_try', 1)}次执行失败, 错误: {error}")
+    return Retry(defer=delay)
 
+
+async def _dead_letter(ctx: Dict[str, Any], function: str, args: tuple, error: Optional[BaseException | str]) -> None:
+    """最终失败的任务写入死信队列，写入失败只记录日志"""
+    try:
+        await DeadLetterStore.add(
+            function, args, error or "处理失败",
+            job_id=ctx.get("job_id"), job_try=ctx.get("job_try", 1), client=ctx["redis"],
+        )
     except Exception as e:
-        logger.error(f"PDF任务执行异常: {paper_id}, 错误: {e}", exc_info=True)
-        return {
-            "status": "error",
-            "paper_id": paper_id,
-            "message": f"任务执行异常: {str(e)}"
-        }
+        logger.error(f"写入死信队列失败: {function}{args}, 错误: {e}")
+
+
+def _reporter(job_id: Optional[str]) -> Optional[JobProgressReporter]:
+    return JobProgressReporter(job_id, "ingest") if job_id else None
+
+
+async def _enqueue_next_stage(
+    ctx: Dict[str, Any],
+    function: str,
+    queue_name: str,
+    paper_id: str,
+    job_id: Optional[str],
+    lane: str,
+    user_id: Optional[str],
+) -> bool:
+    """
+    按原通道投递下一阶段任务
+
+    投递失败时按退避重试当前阶段 (阶段产物覆盖写入，可重复执行)；
+    重试耗尽时标记论文失败并写入死信队列，返回 False。
+    """
+    job = await LaneScheduler.enqueue(
+        function, paper_id, job_id, lane, user_id,
+        lane=lane, user_id=user_id, queue_name=queue_name, redis=ctx["redis"],
+    )
+    if job is not None:
+        return True
+
+    error = ConnectionError(f"下一阶段任务入队失败: {function}, paper_id={paper_id}")
+    if can_retry(ctx):
+        raise _retry(ctx, function, error)
+    await PaperProcessingService().mark_failed(UUID(paper_id), _reporter(job_id) or ProgressReporter(), str(error))
+    await _dead_letter(ctx, function, (paper_id, job_id, lane, user_id), error)
+    return False
+
+
+async def _run_stage(ctx: Dict[str, Any], function: str, stage: str, args: tuple) -> bool:
+    """执行导入阶段: 可重试异常转为 arq Retry，最终失败写入死信队列"""
+    paper_id, job_id = args[0], args[1]
+    service = PaperProcessingService()
+    run = getattr(service, f"{stage}_stage")
+    try:
+        success = await run(UUID(paper_id), reporter=_reporter(job_id), retry_on=_retry_on(ctx))
+    except Exception as e:
+        raise _retry(ctx, function, e) from e
+    if not success:
+        await _dead_letter(ctx, function, args, service.last_error)
+    return success
+
+
+async def parse_pdf_task(
+    ctx: Dict[str, Any],
+    paper_id: str,
+    job_id: Optional[str] = None,
+    lane: str = JobLane.INTERACTIVE.value,
+    user_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    分阶段导入 - 解析任务 (队列: INGEST_PARSE_QUEUE)
+
+    解析并分块后将文本块写入解析产物存储，随后把向量化任务投递到 INGEST_EMBED_QUEUE。
+    可重试异常按指数退避重试本阶段 (产物覆盖写入，可重复执行)，最终失败写入死信队列。
+    lane/user_id 为优先级通道与所属用户，随各阶段传递。
+    """
+    logger.info(f"开始解析阶段: {paper_id}")
+    args = (paper_id, job_id, lane, user_id)
+    if not await _run_stage(ctx, "parse_pdf_task", "parse", args):
+        return {"status": "failed", "paper_id": paper_id, "stage": "parse"}
+
+    if not await _enqueue_next_stage(ctx, "embed_chunks_task", INGEST_EMBED_QUEUE, *args):
+        return {"status": "failed", "paper_id": paper_id, "stage": "parse"}
+    return {"status": "success", "paper_id": paper_id, "stage": "parse"}
+
+
+async def embed_chunks_task(
+    ctx: Dict[str, Any],
+    paper_id: str,
+    job_id: Optional[str] = None,
+    lane: str = JobLane.INTERACTIVE.value,
+    user_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    分阶段导入 - 向量化任务 (队列: INGEST_EMBED_QUEUE)
+
+    读取文本块生成向量并写入解析产物存储，随后把入库任务投递到 INGEST_PERSIST_QUEUE。
+    """
+    logger.info(f"开始向量化阶段: {paper_id}")
+    args = (paper_id, job_id, lane, user_id)
+    if not await _run_stage(ctx, "embed_chunks_task", "embed", args):
+        return {"status": "failed", "paper_id": paper_id, "stage": "embed"}
+
+    if not await _enqueue_next_stage(ctx, "persist_chunks_task", INGEST_PERSIST_QUEUE, *args):
+        return {"status": "failed", "paper_id": paper_id, "stage": "embed"}
+    return {"status": "success", "paper_id": paper_id, "stage": "embed"}
+
+
+async def persist_chunks_task(
+    ctx: Dict[str, Any],
+    paper_id: str,
+    job_id: Optional[str] = None,
+    lane: str = JobLane.INTERACTIVE.value,
+    user_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    分阶段导入 - 入库任务 (队列: INGEST_PERSIST_QUEUE)
+
+    文本块与向量写入数据库，更新论文状态并清理解析产物；成功后投递相关论文更新任务。
+    """
+    logger.info(f"开始入库阶段: {paper_id}")
+    success = await _run_stage(ctx, "persist_chunks_task", "persist", (paper_id, job_id, lane, user_id))
+    if success:
+        await _enqueue_related_update(ctx, paper_id, user_id)
+    return {"status": "success" if success else "failed", "paper_id": paper_id, "stage": "persist"}
 
 
 async def generate_embeddings_task(
     ctx: Dict[str, Any],
-    chunks: list,
-    model: str = "text-embedding-ada-002"
+    chunk_ids: List[str],
+    model: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    生成文本向量嵌入的异步任务
+    独立向量化任务 (队列: INGEST_EMBED_QUEUE)
+
+    按文本块ID读取内容，经 Worker 共享的批处理器生成向量后直接写入 chunk_embeddings，
+    结果只返回条数，避免向量列表经 Redis 回传。按 embedding_task_window 分批读取和写回，
+    已写回的批次在重试时会重新计算 (按 (文本块, 模型) 覆盖写入，可重复执行)；每批写回后重算所涉论文的论文向量。
 
     参数:
     - ctx: 任务上下文
-    - chunks: 文本块列表
-    - model: 嵌入模型名称
+    - chunk_ids: 文本块ID列表
+    - model: 向量所属的模型名称 (为空时为检索模型)，按该模型生成向量
 
     返回:
-    - dict: 包含生成的向量列表
-
-    TODO:
-    - 集成OpenAI或其他嵌入模型
-    - 支持批量处理优化性能
+    - dict: 请求条数、写回条数与不存在的条数
     """
-    logger.info(f"开始生成向量嵌入，chunks数量: {len(chunks)}")
-
+    logger.info(f"开始生成向量嵌入，chunks数量: {len(chunk_ids)}")
+    window = settings.embedding_task_window
+    embedded = 0
     try:
-        # TODO: 实现向量生成逻辑
-        # 临时返回模拟数据
-        embeddings = []
-        for i, chunk in enumerate(chunks):
-            # 模拟向量生成（实际应调用嵌入模型API）
-            embedding = [0.1 * (i + 1)] * 1536  # 1536维向量
-            embeddings.append(embedding)
-
-        logger.info(f"向量嵌入生成完成，数量: {len(embeddings)}")
-        return {
-            "status": "success",
-            "embeddings": embeddings,
-            "count": len(embeddings)
-        }
-
+        target_model = model or await serving_embedding_model()
+        batcher = _embedding_batcher(ctx, target_model)
+        for start in range(0, len(chunk_ids), window):
+            ids = [UUID(chunk_id) for chunk_id in chunk_ids[start:start + window]]
+            async with async_session_factory() as session:
+                chunks = await PaperRepository.get_chunk_contents(session, ids)
+                if not chunks:
+                    continue
+                vectors = await batcher.embed([content for _, content in chunks])
+                await PaperRepository.save_chunk_embeddings(
+                    session, target_model, [(chunk_id, vector) for (chunk_id, _), vector in zip(chunks, vectors)]
+                )
+                await PaperRepository.refresh_paper_embeddings(session, target_model, [chunk_id for chunk_id, _ in chunks])
+            embedded += len(chunks)
     except Exception as e:
+        if can_retry(ctx) and is_retryable(e):
+            raise _retry(ctx, "generate_embeddings_task", e) from e
         logger.error(f"向量生成任务失败: {e}", exc_info=True)
+        await _dead_letter(ctx, "generate_embeddings_task", (chunk_ids, model), e)
         return {
             "status": "error",
-            "message": f"向量生成失败: {str(e)}"
+            "message": f"向量生成失败: {str(e)}",
+            "embedded": embedded,
         }
 
+    logger.info(f"向量嵌入生成完成，数量: {embedded}")
+    return {
+        "status": "success",
+        "requested": len(chunk_ids),
+        "embedded": embedded,
+        "missing": len(chunk_ids) - embedded,
+    }
+
+
+def _embedding_batcher(ctx: Dict[str, Any], model: str):
+    """Worker 启动时预加载的是当前模型的批处理器，其他模型按需创建"""
+    preloaded = ctx.get("embedding_batcher")
+    if preloaded is not None and model == active_embedding_model():
+        return preloaded
+    return get_embedding_batcher(model)
+
+
+async def reembed_chunks_task(ctx: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """
+    向量回填任务 (队列: INGEST_EMBED_QUEUE, 通道: reembed)
+
+    更换向量化模型时按文本块主键分批补齐 model 的向量 (ReembedService.run)，单次执行批数有限，
+    未完成 (running) 或刚切换检索模型 (switched，还需补齐一轮) 时重新入队，
+    reembed 通道权重最低，导入任务不会被回填积压阻塞。进度保存在 embedding_models 表，
+    重新入队失败时可重新执行 reembed.py 继续。
+    """
+    logger.info(f"开始向量回填: {model}")
+    try:
+        result = await ReembedService(_embedding_batcher(ctx, model)).run(model)
+    except Exception as e:
+        if can_retry(ctx) and is_retryable(e):
+            raise _retry(ctx, "reembed_chunks_task", e) from e
+        logger.error(f"向量回填任务失败: {model}, 错误: {e}", exc_info=True)
+        await _dead_letter(ctx, "reembed_chunks_task", (model,), e)
+        return {"status": "error", "model": model, "message": f"向量回填失败: {str(e)}"}
+
+    logger.info(f"向量回填: {result}")
+    if result["status"] in ("running", "switched"):
+        job = await LaneScheduler.enqueue(
+            "reembed_chunks_task", model,
+            lane=JobLane.REEMBED, queue_name=INGEST_EMBED_QUEUE, redis=ctx["redis"],
+        )
+        if job is None:
+            logger.warning(f"向量回填任务重新入队失败: {model}")
+    return result
+
+
+async def update_related_papers_task(
+    ctx: Dict[str, Any],
+    added: List[str],
+    affected: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    相关论文更新任务 (队列: INGEST_PERSIST_QUEUE, 通道: backfill)
+
+    论文入库完成后 (added) 计算其相关论文并加入近邻论文的列表，论文删除后 (affected) 重算列表中含它的论文，
+    见 RelatedPaperService。列表只影响相关论文展示，入队失败或任务失败时可执行 related_papers.py --rebuild 修复。
+    """
+    logger.info(f"开始更新相关论文: 新增 {len(added)} 篇, 重算 {len(affected or [])} 篇")
+    try:
+        result = await RelatedPaperService().update(
+            [UUID(paper_id) for paper_id in added], [UUID(paper_id) for paper_id in affected or []]
+        )
+    except Exception as e:
+        if can_retry(ctx) and is_retryable(e):
+            raise _retry(ctx, "update_related_papers_task", e) from e
+        logger.error(f"相关论文更新任务失败: {e}", exc_info=True)
+        await _dead_letter(ctx, "update_related_papers_task", (added, affected), e)
+        return {"status": "error", "message": f"相关论文更新失败: {str(e)}"}
+
+    logger.info(f"相关论文更新完成: {result}")
+    return {"status": "success", **result}
+
+
+async def _enqueue_related_update(ctx: Dict[str, Any], paper_id: str, user_id: Optional[str] = None) -> None:
+    """论文入库完成后投递相关论文更新 (入队失败只记录日志，不影响导入结果)"""
+    job = await LaneScheduler.enqueue(
+        "update_related_papers_task", [paper_id],
+        lane=JobLane.BACKFILL, user_id=user_id, queue_name=INGEST_PERSIST_QUEUE, redis=ctx.get("redis"),
+    )
+    if job is None:
+        logger.warning(f"相关论文更新任务入队失败: {paper_id}")
+
+
+async def _run_toc_job(session, job: Job) -> Dict[str, Any]:
+    toc = await TocService(session).get_toc(job.paper_id, job.user_id)
+    return {"toc": toc.model_dump(mode="json")}
+
+
+async def _run_summary_job(session, job: Job) -> Dict[str, Any]:
+    summary_type = (job.payload or {}).get("summary_type") or SummaryCreateDTO().summary_type
+    summary = await SummaryService(session).get_or_create_summary(job.paper_id, SummaryCreateDTO(summary_type=summary_type))
+    return {"summary": {"summary_config": {summary.summary_type: summary.content}}}
+
+
+async def _run_mind_map_job(session, job: Job) -> Dict[str, Any]:
+    mind_map = await MindMapService(session).get_or_create_mind_map(job.paper_id, job.user_id)
+    return {"mind_map": mind_map.graph_data.model_dump(mode="json")}
+
+
+# 作业类型 -> 执行函数 (session, job) -> 结果
+_JOB_HANDLERS = {
+    "toc": _run_toc_job,
+    "summary": _run_summary_job,
+    "mind_map": _run_mind_map_job,
+}
+
+
+async def run_job_task(ctx: Dict[str, Any], job_id: str) -> Dict[str, Any]:
+    """
+    执行 JobOrchestrator 编排的作业
+
+    只执行状态为 queued 的作业 (重试时为 running): 已取消或被重复投递的作业直接跳过。
+    可重试异常按指数退避重试；结束时经 JobProgressReporter 上报终态，由编排器释放依赖该作业的下游作业。
+    """
+    runnable = ("queued", "running") if ctx.get("job_try", 1) > 1 else ("queued",)
+    async with async_session_factory() as session:
+        job = await JobRepository.get_job_by_id(session, UUID(job_id))
+        if job is None or job.status not in runnable:
+            logger.info(f"作业无需执行: {job_id}, 状态: {job.status if job else '不存在'}")
+            return {"status": "skipped", "job_id": job_id}
+
+        reporter = JobProgressReporter(job.id, job.job_type)
+        handler = _JOB_HANDLERS.get(job.job_type)
+        if handler is None:
+            await reporter.fail(f"不支持的作业类型: {job.job_type}")
+            return {"status": "failed", "job_id": job_id}
+
+        await reporter.start(job.job_type)
+        try:
+            result = await handler(session, job)
+        except Exception as e:
+            if can_retry(ctx) and is_retryable(e):
+                raise _retry(ctx, "run_job_task", e) from e
+            logger.error(f"作业执行失败: {job_id}({job.job_type}), 错误: {e}", exc_info=True)
+            await reporter.fail(str(e))
+            await _dead_letter(ctx, "run_job_task", (job_id,), e)
+            return {"status": "failed", "job_id": job_id}
+
+    await reporter.succeed(result)
+    return {"status": "success", "job_id": job_id}
+
 
 async def cleanup_failed_tasks(ctx: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -147,23 +450,20 @@ async def cleanup_failed_tasks(ctx: Dict[str, Any]) -> Dict[str, Any]:
     返回:
     - dict: 清理结果
 
-    功能:
-    - 删除超过7天的失败任务记录
-    - 清理临时文件
-    - 释放存储空间
+    功能 (每类按批删除，单批条数与批数有上限，避免长事务):
+    - 删除超过保留期的已结束(失败/取消/过期)作业记录
+    - 删除处理失败论文残留的文本块
+    - 删除未被任何论文引用的上传文件与解析产物
     """
     logger.info("开始清理失败任务")
 
     try:
-        # TODO: 实现清理逻辑
-        # 1. 查询数据库中失败的旧任务
-        # 2. 删除相关文件
-        # 3. 更新数据库记录
-
-        logger.info("失败任务清理完成")
+        result = await CleanupService().run()
+        logger.info(f"失败任务清理完成: {result}")
         return {
             "status": "success",
-            "message": "清理完成"
+            "message": "清理完成",
+            **result
         }
 
     except Exception as e:
@@ -180,11 +480,12 @@ class WorkerSettings:
 
     # Redis连接设置
     redis_settings = ArqRedisSettings()
+    queue_name = default_queue_name
 
-    # 任务函数注册
+    # 任务函数注册 (process_pdf_task 为单任务全流程，保留以兼容已入队的任务)
     functions = [
         process_pdf_task,
-        generate_embeddings_task,
+        run_job_task,
         cleanup_failed_tasks
     ]
 
@@ -198,78 +499,202 @@ class WorkerSettings:
         )
     ]
 
+    # 启动时预加载模型并预热，首个任务无需等待模型加载
+    on_startup = make_startup(default_queue_name, ("db", "parser", "embedding"))
+    on_shutdown = make_shutdown(default_queue_name)
+    # 记录通道任务的排队等待时间
+    on_job_start = LaneScheduler.on_job_start
+    # 任务结束时刷新作业进度缓冲
+    on_job_end = on_job_end
+
     # Worker配置
     max_jobs = 10  # 最大并发任务数
     job_timeout = 600  # 任务超时时间（秒）
     keep_result = 86400  # 保留任务结果时间（秒）
-    max_tries = 3  # 最大重试次数
-    retry_delay = 10  # 重试延迟（秒）
+    max_tries = settings.task_max_tries  # 最大执行次数 (任务内按异常类型决定是否重试，退避见 _retry)
+
+
+def stage_worker_settings(cls: type) -> type:
+    """
+    导入阶段Worker配置: 把未覆盖的 WorkerSettings 配置写入子类自身
+
+    arq 命令行 (arq worker.tasks.XxxWorkerSettings) 只读取配置类自身的 __dict__ (arq.worker.get_kwargs)，
+    继承的 redis_settings/on_job_start/job_timeout 等不会生效，Worker 会连到默认的本地 Redis。
+    """
+    for name, value in get_kwargs(WorkerSettings).items():
+        if name not in cls.__dict__:
+            setattr(cls, name, value)
+    return cls
+
+
+@stage_worker_settings
+class ParseWorkerSettings(WorkerSettings):
+    """
+    解析阶段Worker: arq worker.tasks.ParseWorkerSettings
+
+    Marker/PyMuPDF 解析为CPU密集型，并发上限按CPU核数配置，避免与向量化/入库争抢。
+    """
+    queue_name = INGEST_PARSE_QUEUE
+    on_startup = make_startup(INGEST_PARSE_QUEUE, ("db", "parser"))
+    on_shutdown = make_shutdown(INGEST_PARSE_QUEUE)
+    functions = [parse_pdf_task]
+    cron_jobs = []
+    max_jobs = settings.ingest_parse_max_jobs
+
+
+@stage_worker_settings
+class EmbedWorkerSettings(WorkerSettings):
+    """
+    向量化Worker: arq worker.tasks.EmbedWorkerSettings (主要等待嵌入模型/接口，可较高并发)
+
+    同时消费导入流程的向量化阶段、按文本块ID提交的独立向量化任务与更换模型时的向量回填任务，共用进程内的批处理器。
+    """
+    queue_name = INGEST_EMBED_QUEUE
+    on_startup = make_startup(INGEST_EMBED_QUEUE, ("db", "embedding"))
+    on_shutdown = make_shutdown(INGEST_EMBED_QUEUE)
+    functions = [embed_chunks_task, generate_embeddings_task, reembed_chunks_task]
+    cron_jobs = []
+    max_jobs = settings.ingest_embed_max_jobs
+
+
+@stage_worker_settings
+class PersistWorkerSettings(WorkerSettings):
+    """
+    入库阶段Worker: arq worker.tasks.PersistWorkerSettings (数据库写入，受连接池约束)
+
+    同时消费入库后的相关论文更新任务 (只读写数据库，backfill 通道，不阻塞入库阶段)。
+    """
+    queue_name = INGEST_PERSIST_QUEUE
+    on_startup = make_startup(INGEST_PERSIST_QUEUE, ("db",))
+    on_shutdown = make_shutdown(INGEST_PERSIST_QUEUE)
+    functions = [persist_chunks_task, update_related_papers_task]
+    cron_jobs = []
+    max_jobs = settings.ingest_persist_max_jobs
 
 
 # 任务队列管理器
 class TaskQueue:
-    """任务队列管理器，提供任务入队接口"""
-
-    def __init__(self):
-        self._pool = None
+    """任务队列管理器，提供任务入队接口 (复用 ArqService 的进程级连接池)"""
 
     async def init(self):
-        """初始化Redis连接池"""
-        if not self._pool:
-            self._pool = await create_pool(ArqRedisSettings())
-            logger.info("任务队列初始化完成")
+        """初始化Redis连接池 (幂等，已由应用 lifespan 初始化时直接复用)"""
+        await ArqService.init()
 
     async def close(self):
         """关闭连接池"""
-        if self._pool:
-            await self._pool.close()
-            self._pool = None
-            logger.info("任务队列已关闭")
+        await ArqService.close()
+        logger.info("任务队列已关闭")
 
-    async def enqueue_process_pdf(self, paper_id: str) -> str:
+    async def _require_pool(self):
+        pool = await ArqService.get_pool()
+        if pool is None:
+            raise ConnectionError("任务队列不可用(Redis连接失败)")
+        return pool
+
+    async def enqueue_process_pdf(
+        self,
+        paper_id: str,
+        job_id: Optional[str] = None,
+        lane: JobLane = JobLane.USER,
+        user_id: Optional[str] = None,
+    ) -> Optional[str]:
         """
         入队PDF处理任务
 
         参数:
         - paper_id: 论文ID
+        - job_id: 关联的作业ID (可选，用于进度上报)
+        - lane: 优先级通道
+        - user_id: 所属用户 (用于同一通道内的用户间公平调度)
 
         返回:
-        - str: 任务ID
+        - str: 任务ID (队列不可用时为 None)
         """
-        await self.init()
-        job = await self._pool.enqueue_job(
-            'process_pdf_task',
-            paper_id,
-            _queue_name='pdf_processing'
+        job = await LaneScheduler.enqueue(
+            'parse_pdf_task', paper_id, job_id, JobLane(lane).value, user_id,
+            lane=lane, user_id=user_id, queue_name=INGEST_PARSE_QUEUE,
         )
+        if job is None:
+            logger.warning(f"PDF处理任务入队失败: {paper_id}")
+            return None
         logger.info(f"PDF处理任务已入队: {job.job_id}")
         return job.job_id
 
+    async def enqueue_process_pdf_batch(
+        self,
+        paper_ids: List[str],
+        lane: JobLane = JobLane.BACKFILL,
+        user_id: Optional[str] = None,
+    ) -> List[Optional[str]]:
+        """
+        批量入队PDF处理任务 (多论文导入场景)
+
+        参数:
+        - paper_ids: 论文ID列表
+        - lane: 优先级通道 (默认 backfill)
+        - user_id: 所属用户
+
+        返回:
+        - List[Optional[str]]: 与输入一一对应的任务ID，入队失败的为 None
+        """
+        jobs = await LaneScheduler.enqueue_many(
+            'parse_pdf_task',
+            [(pid, None, JobLane(lane).value, user_id) for pid in paper_ids],
+            lane=lane, user_id=user_id, queue_name=INGEST_PARSE_QUEUE,
+        )
+        job_ids = [job.job_id if job else None for job in jobs]
+        logger.info(f"PDF处理任务批量入队: {sum(1 for j in job_ids if j)}/{len(paper_ids)}")
+        return job_ids
+
     async def enqueue_generate_embeddings(
         self,
-        chunks: list,
-        model: str = "text-embedding-ada-002"
-    ) -> str:
+        chunk_ids: List[str],
+        model: Optional[str] = None,
+        lane: JobLane = JobLane.REEMBED,
+        user_id: Optional[str] = None,
+    ) -> Optional[str]:
         """
-        入队向量生成任务
+        入队向量生成任务 (只传文本块ID，文本与向量都不经过 Redis)
 
         参数:
-        - chunks: 文本块列表
-        - model: 嵌入模型
+        - chunk_ids: 文本块ID列表
+        - model: 向量所属的模型名称 (为空时为当前模型)
+        - lane: 优先级通道 (默认 reembed)
+        - user_id: 所属用户
 
         返回:
-        - str: 任务ID
+        - str: 任务ID (队列不可用时为 None)
         """
-        await self.init()
-        job = await self._pool.enqueue_job(
-            'generate_embeddings_task',
-            chunks,
-            model,
-            _queue_name='embeddings'
+        job = await LaneScheduler.enqueue(
+            'generate_embeddings_task', [str(chunk_id) for chunk_id in chunk_ids], model,
+            lane=lane, user_id=user_id, queue_name=INGEST_EMBED_QUEUE,
         )
+        if job is None:
+            logger.warning(f"向量生成任务入队失败: {len(chunk_ids)} 个文本块")
+            return None
         logger.info(f"向量生成任务已入队: {job.job_id}")
         return job.job_id
 
+    async def enqueue_reembed(self, model: str) -> Optional[str]:
+        """
+        入队向量回填任务 (reembed 通道)，回填进度保存在数据库，重复入队只会从当前进度继续
+
+        参数:
+        - model: 要回填的模型名称 (须已通过 ReembedService.start 登记)
+
+        返回:
+        - str: 任务ID (队列不可用时为 None)
+        """
+        job = await LaneScheduler.enqueue(
+            'reembed_chunks_task', model,
+            lane=JobLane.REEMBED, queue_name=INGEST_EMBED_QUEUE,
+        )
+        if job is None:
+            logger.warning(f"向量回填任务入队失败: {model}")
+            return None
+        logger.info(f"向量回填任务已入队: {job.job_id}")
+        return job.job_id
+
     async def get_job_status(self, job_id: str) -> Dict[str, Any]:
         """
         获取任务状态
@@ -280,8 +705,8 @@ class TaskQueue:
         返回:
         - dict: 任务状态信息
         """
-        await self.init()
-        job = await self._pool.get_job_result(job_id)
+        pool = await self._require_pool()
+        job = await pool.get_job_result(job_id)
 
         if job:
             return {
@@ -303,27 +728,36 @@ task_queue = TaskQueue()
 
 
 # 启动Worker的函数
-def create_worker() -> Worker:
+def create_worker(worker_settings: type = WorkerSettings) -> Worker:
     """
     创建Arq Worker实例
 
+    参数:
+    - worker_settings: Worker配置类 (WorkerSettings 或各导入阶段的 XxxWorkerSettings)
+
     返回:
-    - Worker: Worker实例
-    """
-    return Worker(
-        redis_settings=ArqRedisSettings(),
-        functions=WorkerSettings.functions,
-        cron_jobs=WorkerSettings.cron_jobs,
-        max_jobs=WorkerSettings.max_jobs,
-        job_timeout=WorkerSettings.job_timeout,
-        keep_result=WorkerSettings.keep_result,
-        max_tries=WorkerSettings.max_tries,
-        retry_delay=WorkerSettings.retry_delay
-    )
+    - Worker: Worker实例 (与 arq 命令行相同，按 get_kwargs 读取配置类自身声明的配置)
+    """
+    return Worker(**get_kwargs(worker_settings))
 
 
 # 运行Worker（用于命令行启动）
-async def run_worker():
+async def run_worker(worker_settings: type = WorkerSettings):
     """运行Worker"""
-    worker = create_worker()
-    await worker.main()
\ No newline at end of file
+    worker = create_worker(worker_settings)
+    await worker.main()
+
+
+async def run_ingest_workers():
+    """
+    在单进程内同时运行默认队列与三个导入阶段的Worker (开发环境使用)
+
+    生产环境建议按阶段分别启动进程，解析Worker可单独扩容:
+        arq worker.tasks.ParseWorkerSettings
+        arq worker.tasks.EmbedWorkerSettings
+        arq worker.tasks.PersistWorkerSettings
+    """
+    await asyncio.gather(*(
+        run_worker(worker_settings)
+        for worker_settings in (WorkerSettings, ParseWorkerSettings, EmbedWorkerSettings, PersistWorkerSettings)
+    ))
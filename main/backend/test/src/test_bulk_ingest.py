@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from service.papers.bulk_ingest import (
+    BulkIngestor,
+    IngestCheckpoint,
+    IngestItem,
+    IngestStats,
+    StageTimingReporter,
+    load_manifest,
+    scan_directory,
+)
+
+
+def test_scan_directory_and_manifest(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "b.pdf").write_bytes(b"%PDF")
+    (tmp_path / "sub" / "a.PDF").write_bytes(b"%PDF")
+    (tmp_path / "notes.txt").write_text("x")
+
+    assert [item.path.name for item in scan_directory(tmp_path)] == ["b.pdf", "a.PDF"]
+    assert [item.path.name for item in scan_directory(tmp_path, recursive=False)] == ["b.pdf"]
+
+    collection_id = uuid4()
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text(
+        "# seed\n"
+        "b.pdf\n"
+        "\n"
+        + json.dumps({"path": "sub/a.PDF", "collection_id": str(collection_id)}) + "\n"
+    )
+    items = load_manifest(manifest)
+    assert [item.path for item in items] == [tmp_path / "b.pdf", tmp_path / "sub" / "a.PDF"]
+    assert items[1].collection_id == collection_id
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_survives_restart_and_truncated_line(tmp_path):
+    path = tmp_path / "ckpt.jsonl"
+    checkpoint = IngestCheckpoint(path)
+    paper_id = uuid4()
+    await checkpoint.record("a", "registered", paper_id=paper_id, job_id=None)
+    await checkpoint.record("b", "done", paper_id=uuid4())
+    with path.open("a") as f:
+        f.write('{"key": "c", "sta')  # 崩溃时写了一半
+
+    restored = IngestCheckpoint(path)
+    assert restored.is_done("b")
+    assert not restored.is_done("a")
+    assert restored.paper_id("a") == paper_id
+    assert restored.job_id("a") is None
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_done_and_reuses_registered_papers(tmp_path):
+    done, registered, fresh = (tmp_path / name for name in ("done.pdf", "registered.pdf", "fresh.pdf"))
+    for path in (done, registered, fresh):
+        path.write_bytes(b"%PDF-1.4")
+
+    checkpoint = IngestCheckpoint(tmp_path / "ckpt.jsonl")
+    registered_paper = uuid4()
+    await checkpoint.record(IngestItem(done).key, "done", paper_id=uuid4())
+    await checkpoint.record(IngestItem(registered).key, "registered", paper_id=registered_paper)
+
+    progress = MagicMock()
+    ingestor = BulkIngestor(uuid4(), checkpoint, parallelism=2, report_every=1, on_progress=progress)
+    fresh_paper = uuid4()
+
+    async def fake_process(paper_id, reporter):
+        await reporter.stage("parse", 10)
+        await reporter.stage("embed", 55)
+        await reporter.succeed({"ingest": {"paper_id": str(paper_id), "chunks": 3}})
+        return True
+
+    upload = AsyncMock(return_value=type("R", (), {"paper_id": str(fresh_paper), "job_id": None})())
+    with patch("service.papers.bulk_ingest.PaperService") as paper_service, \
+         patch("service.papers.bulk_ingest.async_session_factory"), \
+         patch.object(ingestor.processing_service, "process_pdf", side_effect=fake_process) as process:
+        paper_service.return_value.upload_paper = upload
+        stats = await ingestor.run([IngestItem(done), IngestItem(registered), IngestItem(fresh)])
+
+    # 已完成的跳过，已登记的不重复登记
+    upload.assert_awaited_once()
+    assert {call.args[0] for call in process.await_args_list} == {registered_paper, fresh_paper}
+    assert (stats.skipped, stats.succeeded, stats.failed, stats.chunks) == (1, 2, 0, 6)
+    assert set(stats.stage_times) == {"register", "parse", "embed"}
+    # 进度经回调输出 (命令行脚本打印)
+    assert progress.call_count == 2
+
+    restored = IngestCheckpoint(tmp_path / "ckpt.jsonl")
+    assert all(restored.is_done(IngestItem(p).key) for p in (done, registered, fresh))
+
+
+@pytest.mark.asyncio
+async def test_stage_timing_reporter_forwards_to_inner_reporter():
+    stats = IngestStats()
+    inner = AsyncMock()
+    reporter = StageTimingReporter(stats, inner=inner)
+
+    await reporter.start()
+    await reporter.stage("parse", 10)
+    await reporter.fail("boom")
+
+    assert list(stats.stage_times) == ["parse"]
+    inner.stage.assert_awaited_once_with("parse", 10, None)
+    inner.fail.assert_awaited_once_with("boom")
+    assert "parse" in stats.summary()
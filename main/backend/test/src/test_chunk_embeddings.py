@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from base.config import settings
+from base.embedding.registry import active_embedding_model, embedding_dimension
+from base.pg.entity import ChunkEmbedding, PaperChunk
+from base.pg.service import PaperRepository
+from base.pg.vector_index import embedding_distance, embedding_index_ddl, embedding_index_name, model_filter
+from service.papers.paper_service import PaperProcessingService
+from service.search.hybrid_retriever import HybridRetriever
+
+
+def test_active_model_follows_embedding_type():
+    with patch.object(settings, "embedding_model", None), patch.object(settings, "embedding_type", "local"):
+        assert active_embedding_model() == "bge-m3"
+    with patch.object(settings, "embedding_model", None), patch.object(settings, "embedding_type", "siliconflow"):
+        assert active_embedding_model() == settings.siliconflow_embedding_model
+    with patch.object(settings, "embedding_model", "custom"):
+        assert active_embedding_model() == "custom"
+    with pytest.raises(ValueError):
+        embedding_dimension("unknown-model")
+
+
+def test_each_model_gets_its_own_partial_index():
+    ddl = embedding_index_ddl("Qwen/Qwen3-Embedding-0.6B")
+    assert "(embedding::vector(1024)) vector_cosine_ops" in ddl
+    assert "WHERE model = 'Qwen/Qwen3-Embedding-0.6B'" in ddl
+    assert "CONCURRENTLY IF NOT EXISTS" in ddl
+
+    names = {embedding_index_name(m) for m in settings.embedding_dimensions}
+    assert len(names) == len(settings.embedding_dimensions)
+    assert all(len(name) <= 63 for name in names)
+
+
+def test_query_matches_index_expression_and_inlines_model():
+    statement = (
+        select(ChunkEmbedding.chunk_id)
+        .where(model_filter("bge-m3"))
+        .order_by(embedding_distance("bge-m3", [0.1] * 1024))
+        .limit(5)
+    )
+    sql = str(statement.compile(dialect=dialect(), compile_kwargs={"render_postcompile": True}))
+    # 模型名为字面量 (通用计划下也能匹配部分索引)，距离表达式与索引表达式一致
+    assert "chunk_embeddings.model = 'bge-m3'" in sql
+    assert "CAST(chunk_embeddings.embedding AS VECTOR(1024)) <=>" in sql
+
+
+@pytest.mark.asyncio
+async def test_save_chunk_embeddings_upserts_and_checks_dimension():
+    session = MagicMock()
+    session.execute = AsyncMock()
+    session.commit = AsyncMock()
+    chunk_id = uuid4()
+
+    with pytest.raises(ValueError):
+        await PaperRepository.save_chunk_embeddings(session, "bge-m3", [(chunk_id, [0.1] * 1536)])
+    session.execute.assert_not_awaited()
+
+    await PaperRepository.save_chunk_embeddings(session, "bge-m3", [(chunk_id, [0.1] * 1024)])
+    sql = str(session.execute.await_args.args[0].compile(dialect=dialect()))
+    assert "INSERT INTO chunk_embeddings" in sql
+    assert "ON CONFLICT (chunk_id, model) DO UPDATE" in sql
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_save_chunks_stores_vectors_under_active_model():
+    service = PaperProcessingService()
+    session = MagicMock()
+    paper_id = uuid4()
+
+    with patch.object(settings, "embedding_model", "bge-m3"), \
+         patch.object(PaperRepository, "create_paper_chunks", new=AsyncMock()) as create:
+        await service._save_chunks(paper_id, ["a", "b"], [[0.1] * 1024, [0.2] * 1024], session=session)
+
+        chunks, embeddings = create.await_args.args[1:]
+        assert [c.embedding for c in chunks] == [None, None]
+        assert {(c.embedding_model, c.embedding_dim) for c in chunks} == {("bge-m3", 1024)}
+        assert [e.chunk_id for e in embeddings] == [c.id for c in chunks]
+        assert {e.model for e in embeddings} == {"bge-m3"}
+
+        # 其他模型 (如回退模型) 生成的向量维度不符时不写入
+        with pytest.raises(ValueError):
+            await service._save_chunks(paper_id, ["a"], [[0.1] * 1536], session=session)
+        assert create.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_chunk_retrieval_joins_model_vectors():
+    session = MagicMock()
+    result = MagicMock()
+    result.all.return_value = []
+    session.execute = AsyncMock(return_value=result)
+
+    await HybridRetriever(session, model="text-embedding-3-small").search_chunks(
+        "attention", [0.1] * 1536, [PaperChunk.paper_id == uuid4()], top_k=3
+    )
+
+    sql = str(session.execute.await_args.args[0].compile(dialect=dialect(), compile_kwargs={"render_postcompile": True}))
+    assert "JOIN chunk_embeddings ON chunk_embeddings.chunk_id = paper_chunks.id" in sql
+    assert "chunk_embeddings.model = 'text-embedding-3-small'" in sql
+    assert "VECTOR(1536)" in sql
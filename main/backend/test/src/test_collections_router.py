@@ -12,6 +12,7 @@ from service.papers.schema import PaperDTO
 from common.model.enums import PaperStatus
 from controller.api.auth.router import get_current_user
 from base.pg.entity import User
+from base.pg.pagination import decode_cursor
 
 @pytest.fixture
 def mock_collection_service():
@@ -93,6 +94,22 @@ def test_get_collections(client, mock_collection_service, mock_user):
     assert "total" in data[0]
     mock_collection_service.get_user_collections.assert_called_once()
 
+def test_get_collections_returns_next_cursor_header(client, mock_collection_service, mock_user):
+    mock_resps = [_fake_collection_response(uuid4(), mock_user.id, f"C{i}") for i in range(2)]
+    mock_collection_service.get_user_collections.return_value = mock_resps
+
+    resp = client.get("/api/v1/collections", params={"limit": 2})
+
+    assert resp.status_code == 200
+    cursor = resp.headers["X-Next-Cursor"]
+    # 响应体结构不变，游标指向本页最后一行
+    assert len(resp.json()["data"]) == 2
+    assert decode_cursor(cursor) == (mock_resps[-1].updated_at, mock_resps[-1].id)
+
+    resp = client.get("/api/v1/collections", params={"limit": 3, "cursor": cursor})
+    assert "X-Next-Cursor" not in resp.headers
+    mock_collection_service.get_user_collections.assert_called_with(mock_user.id, 3, 0, cursor)
+
 def test_update_collection(client, mock_collection_service, mock_user):
     user_id = mock_user.id
     collection_id = uuid4()
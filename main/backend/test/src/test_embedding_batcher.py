@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from base.embedding.batcher import EmbeddingBatcher
+
+
+class _RecordingModel:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def embed(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("model down")
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_batcher_pools_chunks_from_concurrent_papers():
+    model = _RecordingModel()
+    batcher = EmbeddingBatcher(model.embed, batch_size=4, max_latency=0.5)
+
+    paper_a, paper_b = await asyncio.gather(
+        batcher.embed(["a", "aa", "aaa"]),
+        batcher.embed(["b"]),
+    )
+    await batcher.close()
+
+    # 两篇论文的文本块合并为一个满批次
+    assert model.batches == [["a", "aa", "aaa", "b"]]
+    # 向量按提交顺序回填给各自的论文
+    assert paper_a == [[1.0], [2.0], [3.0]]
+    assert paper_b == [[1.0]]
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_partial_batch_after_deadline():
+    model = _RecordingModel()
+    batcher = EmbeddingBatcher(model.embed, batch_size=64, max_latency=0.01)
+
+    result = await asyncio.wait_for(batcher.embed(["x", "yy"]), timeout=1.0)
+    await batcher.close()
+
+    assert result == [[1.0], [2.0]]
+    assert model.batches == [["x", "yy"]]
+
+
+@pytest.mark.asyncio
+async def test_batcher_splits_large_submissions():
+    model = _RecordingModel()
+    batcher = EmbeddingBatcher(model.embed, batch_size=2, max_latency=0.01)
+
+    result = await batcher.embed(["a", "b", "c", "d", "e"])
+    await batcher.close()
+
+    assert len(result) == 5
+    assert all(len(batch) <= 2 for batch in model.batches)
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_model_errors_to_callers():
+    batcher = EmbeddingBatcher(_RecordingModel(fail=True).embed, batch_size=2, max_latency=0.01)
+
+    with pytest.raises(RuntimeError, match="model down"):
+        await batcher.embed(["a", "b"])
+    await batcher.close()
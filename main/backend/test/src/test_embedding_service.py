@@ -57,3 +57,24 @@ async def test_embedding_service_all_fail(mock_settings, mock_onnx_deps):
                 service = EmbeddingService()
                 with pytest.raises(RuntimeError, match="所有嵌入模型均不可用"):
                     await service.embed_text("test")
+
+
+@pytest.mark.asyncio
+async def test_batcher_for_active_model_never_falls_back_to_another_model(mock_settings, mock_onnx_deps):
+    from base.embedding import batcher as batcher_module
+
+    with patch("base.embedding.embedding_service.LocalOnnxEmbeddingModel._load_model"), \
+         patch("base.embedding.embedding_service.LocalOnnxEmbeddingModel.embed_batch", side_effect=Exception("Local fail")), \
+         patch("base.embedding.embedding_service.OpenAIEmbeddingModel.embed_batch", new_callable=AsyncMock) as fallback, \
+         patch.object(batcher_module, "active_embedding_model", return_value="bge-m3"), \
+         patch.object(batcher_module, "EmbeddingService", wraps=EmbeddingService) as service_cls, \
+         patch.dict(batcher_module._embedding_batchers, clear=True):
+        # 未指定模型与显式指定当前模型共用同一个按模型名创建的批处理器
+        assert batcher_module.get_embedding_batcher() is batcher_module.get_embedding_batcher("bge-m3")
+        service_cls.assert_called_once_with("bge-m3")
+
+        # 主模型失败时报错，而不是把其他模型的向量记在 bge-m3 名下
+        with pytest.raises(RuntimeError, match="所有嵌入模型均不可用"):
+            await batcher_module.get_embedding_batcher().embed(["text"])
+        fallback.assert_not_awaited()
+        await batcher_module.close_embedding_batcher()
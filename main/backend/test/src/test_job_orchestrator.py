@@ -0,0 +1,161 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from base.pg.entity import Job
+from common.model.errors import NotFoundError
+from service.reader.job_orchestrator import JobOrchestrator
+
+
+class FakeJobRepository:
+    """内存版 JobRepository，语义与条件更新一致"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def add(self, user_id, status, dependency_ids=None, key=None):
+        job = Job(id=uuid4(), user_id=user_id, job_type="summary", status=status, progress=0,
+                  idempotency_key=key or uuid4().hex, dependency_ids=[str(d) for d in dependency_ids or []] or None)
+        self.jobs[job.id] = job
+        return job
+
+    async def get_job_by_id(self, session, job_id):
+        return self.jobs.get(job_id)
+
+    async def get_jobs_by_ids(self, session, job_ids):
+        return [self.jobs[job_id] for job_id in job_ids if job_id in self.jobs]
+
+    async def get_job_by_idempotency_key(self, session, user_id, key):
+        return next((j for j in self.jobs.values() if j.user_id == user_id and j.idempotency_key == key), None)
+
+    async def create_job_if_absent(self, session, job):
+        existing = await self.get_job_by_idempotency_key(session, job.user_id, job.idempotency_key)
+        if existing:
+            return existing, False
+        self.jobs[job.id] = job
+        return job, True
+
+    async def get_blocked_jobs(self, session, user_id):
+        return [j for j in self.jobs.values() if j.user_id == user_id and j.status == "blocked"]
+
+    async def transition_jobs(self, session, job_ids, from_status, values):
+        moved = []
+        for job_id in job_ids:
+            job = self.jobs[job_id]
+            if job.status == from_status:
+                for k, v in values.items():
+                    setattr(job, k, v)
+                moved.append(job_id)
+        return moved
+
+
+@pytest.fixture
+def repo():
+    fake = FakeJobRepository()
+    with patch("service.reader.job_orchestrator.JobRepository", new=fake):
+        yield fake
+
+
+@pytest.fixture
+def enqueue_many():
+    mock = AsyncMock(side_effect=lambda function, args_list, **kwargs: [MagicMock() for _ in args_list])
+    with patch("service.reader.job_orchestrator.LaneScheduler.enqueue_many", new=mock):
+        yield mock
+
+
+def _orchestrator():
+    return JobOrchestrator(AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_submit_deduplicates_by_idempotency_key(repo, enqueue_many):
+    user_id = uuid4()
+    orchestrator = _orchestrator()
+
+    job, created = await orchestrator.submit(user_id, "summary", "summary:p1")
+    again, created_again = await orchestrator.submit(user_id, "summary", "summary:p1")
+
+    assert created and not created_again
+    assert again.id == job.id and job.status == "queued"
+    enqueue_many.assert_awaited_once()
+    # 其他用户的相同幂等键互不影响
+    _, other_created = await orchestrator.submit(uuid4(), "summary", "summary:p1")
+    assert other_created
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_reset_on_resubmit(repo, enqueue_many):
+    user_id = uuid4()
+    failed = repo.add(user_id, "failed", key="summary:p1")
+    failed.error_message = "boom"
+
+    job, created = await _orchestrator().submit(user_id, "summary", "summary:p1")
+
+    assert created and job.id == failed.id
+    assert job.status == "queued" and job.error_message is None
+
+
+@pytest.mark.asyncio
+async def test_job_waits_for_unfinished_dependency(repo, enqueue_many):
+    user_id = uuid4()
+    ingest = repo.add(user_id, "running")
+
+    job, _ = await _orchestrator().submit(user_id, "summary", "summary:p1", dependency_ids=[ingest.id])
+
+    assert job.status == "blocked"
+    enqueue_many.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unknown_dependency_is_rejected(repo, enqueue_many):
+    with pytest.raises(NotFoundError):
+        await _orchestrator().submit(uuid4(), "summary", "k", dependency_ids=[uuid4()])
+
+
+@pytest.mark.asyncio
+async def test_dependents_are_enqueued_in_bulk_when_parent_succeeds(repo, enqueue_many):
+    user_id = uuid4()
+    ingest = repo.add(user_id, "running")
+    other = repo.add(user_id, "running")
+    summary = repo.add(user_id, "blocked", [ingest.id])
+    mind_map = repo.add(user_id, "blocked", [ingest.id])
+    waiting = repo.add(user_id, "blocked", [ingest.id, other.id])
+
+    # 父作业的终态可能尚未落库，以调用方传入的状态为准
+    await _orchestrator().release_dependents(ingest.id, "succeeded")
+
+    assert summary.status == mind_map.status == "queued"
+    assert waiting.status == "blocked"
+    enqueue_many.assert_awaited_once()
+    args_list = enqueue_many.await_args.args[1]
+    assert sorted(args_list) == sorted([(str(summary.id),), (str(mind_map.id),)])
+
+
+@pytest.mark.asyncio
+async def test_parent_failure_cancels_dependency_chain(repo, enqueue_many):
+    user_id = uuid4()
+    ingest = repo.add(user_id, "running")
+    summary = repo.add(user_id, "blocked", [ingest.id])
+    report = repo.add(user_id, "blocked", [summary.id])
+
+    await _orchestrator().release_dependents(ingest.id, "failed")
+
+    assert summary.status == "canceled"
+    assert report.status == "canceled"
+    enqueue_many.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_failure_marks_job_failed(repo):
+    user_id = uuid4()
+    with patch("service.reader.job_orchestrator.LaneScheduler.enqueue_many", new=AsyncMock(return_value=[None])):
+        job, _ = await _orchestrator().submit(user_id, "summary", "k")
+
+    assert job.status == "failed"
+
+
+def test_idempotency_conflict_target_is_declared_on_entity():
+    # 去重依赖的唯一索引在模型中声明，autogenerate 与 create_all 都保留它
+    index = next(i for i in Job.__table__.indexes if i.name == "uq_jobs_user_idempotency_key")
+    assert index.unique
+    assert [c.name for c in index.columns] == ["user_id", "idempotency_key"]
@@ -1,12 +1,13 @@
 
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 from datetime import datetime
 
 from controller.api.reader.schema import JobCreateRequest
 from service.reader.job_service import JobService
 from base.pg.entity import Job, Paper
+from service.reader.job_progress import JobProgressReporter, JobStatusBuffer
 
 @pytest.fixture
 def mock_user():
@@ -19,22 +20,33 @@ async def test_create_job(mock_user):
     # Mock session
     mock_session = AsyncMock()
     service = JobService(mock_session)
-    
+    paper_id = uuid4()
+
     # Mock paper lookup
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = Paper(id=uuid4(), user_id=mock_user.id)
+    mock_result.scalar_one_or_none.return_value = Paper(id=paper_id, user_id=mock_user.id)
     mock_session.execute.return_value = mock_result
-    
+
+    # 论文解析作业尚未完成
+    ingest_job = Job(id=uuid4(), user_id=mock_user.id, job_type="ingest", status="running", progress=40, idempotency_key=f"ingest:{paper_id}")
+    created = Job(id=uuid4(), user_id=mock_user.id, paper_id=paper_id, job_type="summary", status="blocked",
+                  progress=0, idempotency_key="k", created_at=datetime.now())
+
     # Request
     req = JobCreateRequest(job_type="summary", params={"type": "short"})
-    
-    # Call
-    response = await service.create_job(uuid4(), req, mock_user.id)
-    
+
+    with patch("service.reader.job_service.JobRepository.get_job_by_idempotency_key", new=AsyncMock(return_value=ingest_job)), \
+         patch("service.reader.job_service.JobOrchestrator.submit", new=AsyncMock(return_value=(created, True))) as submit:
+        response = await service.create_job(paper_id, req, mock_user.id)
+        # 相同参数重复提交生成相同幂等键
+        await service.create_job(paper_id, JobCreateRequest(job_type="summary", params={"type": "short"}), mock_user.id)
+
     assert response.job_type == "summary"
-    assert response.status == "queued"
-    mock_session.add.assert_called_once()
-    mock_session.commit.assert_called_once()
+    assert response.status == "blocked"
+    first, second = submit.await_args_list
+    assert first.kwargs["dependency_ids"] == [ingest_job.id]
+    assert first.kwargs["payload"] == {"type": "short"}
+    assert first.kwargs["idempotency_key"] == second.kwargs["idempotency_key"]
 
 @pytest.mark.asyncio
 async def test_get_job(mock_user):
@@ -59,28 +71,168 @@ async def test_get_job(mock_user):
     assert response.status == "running"
     assert response.progress == 50.0
 
-@pytest.mark.asyncio
-async def test_subscribe_job_events(mock_user):
-    mock_session = AsyncMock()
-    service = JobService(mock_session)
-    
-    # Mock permission check
+def _mock_job_lookup(mock_session, status="running", job_type="summary"):
     mock_result = MagicMock()
     mock_result.scalar_one_or_none.return_value = Job(
-        id=uuid4(), 
-        paper_id=uuid4(), 
-        job_type="summary", 
-        status="running",
+        id=uuid4(),
+        paper_id=uuid4(),
+        job_type=job_type,
+        status=status,
         created_at=datetime.now()
     )
     mock_session.execute.return_value = mock_result
-    
-    # Iterate generator
-    events = []
-    async for event in service.subscribe_job_events(uuid4(), mock_user.id):
-        events.append(event)
-        if len(events) >= 2: # Test just a few events
-            break
-            
-    assert len(events) > 0
+
+
+@pytest.mark.asyncio
+async def test_subscribe_job_events(mock_user):
+    mock_session = AsyncMock()
+    service = JobService(mock_session)
+    _mock_job_lookup(mock_session)
+
+    entries = [
+        ("1-0", {"state": "progress", "status": "running", "progress": "40", "stage": "split", "job_type": "ingest"}),
+        ("2-0", {"state": "end", "status": "succeeded", "progress": "100", "stage": "done", "job_type": "ingest"}),
+    ]
+    with patch("service.reader.job_service.JobEventStream.read", new=AsyncMock(return_value=entries)):
+        events = [event async for event in service.subscribe_job_events(uuid4(), mock_user.id)]
+
+    assert len(events) == 3
     assert "event: JobStart" in events[0]
+    assert events[1].startswith("id: 1-0\nevent: JobProgress")
+    assert '"stage":"split"' in events[1]
+    assert events[2].startswith("id: 2-0\nevent: JobEnd")
+    # SSE 期间不占用请求会话的数据库连接
+    mock_session.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_subscribe_job_events_resumes_from_last_event_id(mock_user):
+    mock_session = AsyncMock()
+    service = JobService(mock_session)
+    _mock_job_lookup(mock_session)
+
+    read = AsyncMock(return_value=[("8-0", {"state": "error", "status": "failed", "error": "boom"})])
+    with patch("service.reader.job_service.JobEventStream.read", new=read):
+        events = [event async for event in service.subscribe_job_events(uuid4(), mock_user.id, last_event_id="7-0")]
+
+    # 续读时不重复推送快照
+    assert len(events) == 1
+    assert "event: JobError" in events[0]
+    assert read.await_args.args[1] == "7-0"
+
+
+@pytest.mark.asyncio
+async def test_subscribe_job_events_falls_back_to_db_when_stream_expired(mock_user):
+    mock_session = AsyncMock()
+    service = JobService(mock_session)
+    _mock_job_lookup(mock_session, status="succeeded")
+
+    finished = Job(id=uuid4(), user_id=uuid4(), job_type="ingest", status="succeeded", progress=100, idempotency_key="k")
+    with patch("service.reader.job_service.JobEventStream.read", new=AsyncMock(return_value=[])), \
+         patch.object(JobService, "_load_job", new=AsyncMock(return_value=finished)):
+        events = [event async for event in service.subscribe_job_events(uuid4(), mock_user.id)]
+
+    assert len(events) == 1
+    assert "event: JobEnd" in events[0]
+
+
+@pytest.mark.asyncio
+async def test_progress_reporter_batches_job_updates():
+    job_a, job_b = uuid4(), uuid4()
+    JobStatusBuffer._pending = {}
+    JobStatusBuffer._last_flush = float("inf")  # 刷新间隔内
+
+    with patch("service.reader.job_progress.JobEventStream.publish", new=AsyncMock()) as publish, \
+         patch("service.reader.job_progress.JobRepository.bulk_update_jobs", new=AsyncMock()) as bulk_update, \
+         patch("service.reader.job_progress.async_session_factory"), \
+         patch("service.reader.job_progress.JobOrchestrator.on_job_finished", new=AsyncMock()) as on_finished:
+        await JobProgressReporter(job_a, "ingest").stage("parse", 10)
+        await JobProgressReporter(job_a, "ingest").stage("split", 40)
+        await JobProgressReporter(job_b, "ingest").stage("parse", 10)
+        assert publish.await_count == 3
+        bulk_update.assert_not_awaited()
+
+        # 终态立即刷新，一次写入全部待更新作业
+        await JobProgressReporter(job_b, "ingest").succeed()
+
+    bulk_update.assert_awaited_once()
+    rows = {row["id"]: row for row in bulk_update.await_args.args[1]}
+    assert rows[job_a]["stage"] == "split" and rows[job_a]["progress"] == 40
+    assert rows[job_b]["status"] == "succeeded"
+    assert JobStatusBuffer._pending == {}
+    on_finished.assert_awaited_once_with(job_b, "succeeded")
+
+
+@pytest.mark.asyncio
+async def test_stale_progress_from_another_worker_does_not_overwrite_terminal_status():
+    from contextlib import asynccontextmanager
+    from datetime import timezone
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from sqlmodel import SQLModel
+
+    from base.pg.entity import Job
+
+    engine = create_engine("sqlite:///")
+    SQLModel.metadata.create_all(engine, tables=[Job.__table__])
+    now = datetime.now(timezone.utc)
+    job = Job(user_id=uuid4(), job_type="ingest", status="queued", progress=0, idempotency_key="k",
+              created_at=now, updated_at=now)
+    job_id = job.id
+    with Session(engine) as session:
+        session.add(job)
+        session.commit()
+
+    class SyncSession:
+        def __init__(self, session):
+            self.session, self.info = session, session.info
+
+        async def execute(self, statement, params=None):
+            return self.session.execute(statement, params)
+
+        async def commit(self):
+            self.session.commit()
+
+    @asynccontextmanager
+    async def session_factory():
+        with Session(engine) as session:
+            yield SyncSession(session)
+
+    def status():
+        with Session(engine) as session:
+            row = session.get(Job, job_id)
+            return row.status, row.stage
+
+    aware = MagicMock(now=MagicMock(return_value=now))
+    with patch("service.reader.job_progress.JobEventStream.publish", new=AsyncMock()), \
+         patch("service.reader.job_progress.async_session_factory", session_factory), \
+         patch("service.reader.job_progress.datetime", aware), \
+         patch("service.reader.job_progress.JobOrchestrator.on_job_finished", new=AsyncMock()):
+        # 解析进程: 进度留在缓冲区
+        JobStatusBuffer._pending, JobStatusBuffer._last_flush = {}, float("inf")
+        await JobProgressReporter(job_id, "ingest").stage("split", 40)
+        parse_pending = JobStatusBuffer._pending
+
+        # 入库进程: 写入终态
+        JobStatusBuffer._pending = {}
+        await JobProgressReporter(job_id, "ingest").succeed()
+        assert status() == ("succeeded", "done")
+
+        # 解析进程稍后刷新旧进度，终态不被覆盖
+        JobStatusBuffer._pending = parse_pending
+        await JobStatusBuffer.flush()
+
+    assert status() == ("succeeded", "done")
+    assert JobStatusBuffer._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_worker_flushes_progress_when_each_job_ends():
+    from worker import lifecycle
+    from worker.tasks import ParseWorkerSettings, WorkerSettings
+
+    assert WorkerSettings.on_job_end is ParseWorkerSettings.on_job_end is lifecycle.on_job_end
+    with patch.object(lifecycle.JobStatusBuffer, "flush", new=AsyncMock()) as flush:
+        await lifecycle.on_job_end({})
+    flush.assert_awaited_once()
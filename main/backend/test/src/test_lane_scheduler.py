@@ -0,0 +1,169 @@
+import pytest
+from uuid import uuid4
+
+from base.redis.lane_scheduler import LaneScheduler
+from common.model.enums import JobLane
+
+
+class _FakeScript:
+    """与 _ADVANCE_CLOCK_LUA 相同语义的虚拟时钟"""
+
+    def __init__(self, store):
+        self.store = store
+
+    async def __call__(self, keys, args, client=None):
+        now, inc, count = float(args[0]), float(args[1]), int(args[2])
+        start = max(now, float(self.store.get(keys[0], 0)))
+        self.store[keys[0]] = start + inc * count
+        return str(start)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+        return _queue
+
+    async def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+
+
+class FakeArqRedis:
+    def __init__(self):
+        self.kv, self.hashes, self.zsets, self.lists = {}, {}, {}, {}
+        self.queue = {}
+
+    def register_script(self, _):
+        return _FakeScript(self.kv)
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    async def enqueue_job(self, function, *args, _job_id, _queue_name, _defer_until, _expires, **kwargs):
+        self.queue[_job_id] = (_defer_until.timestamp(), function, args)
+        return type("Job", (), {"job_id": _job_id})()
+
+    # --- 同步命令 (由 _FakePipeline.execute 调用) ---
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hdel(self, key, *fields):
+        return sum(1 for f in fields if self.hashes.get(key, {}).pop(f, None) is not None)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, *members):
+        for m in members:
+            self.zsets.get(key, {}).pop(m, None)
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.zsets.get(key, {})
+        for m in [m for m, s in zset.items() if s <= high]:
+            del zset[m]
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrange(self, key, start, end, withscores=False):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda x: x[1])
+        return items[start:end + 1]
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    def pop_order(self):
+        """按 Arq Worker 的取任务顺序 (分数升序) 返回任务参数"""
+        return [args for _, _, args in sorted(self.queue.values(), key=lambda x: x[0])]
+
+
+@pytest.fixture(autouse=True)
+def reset_script():
+    LaneScheduler._clock_script = None
+    yield
+    LaneScheduler._clock_script = None
+
+
+@pytest.mark.asyncio
+async def test_interactive_upload_jumps_ahead_of_backfill():
+    redis = FakeArqRedis()
+    backfill_user, interactive_user = uuid4(), uuid4()
+
+    await LaneScheduler.enqueue_many(
+        "parse_pdf_task", [(f"b{i}",) for i in range(50)],
+        lane=JobLane.BACKFILL, user_id=backfill_user, queue_name="q", redis=redis,
+    )
+    await LaneScheduler.enqueue("parse_pdf_task", "upload", lane=JobLane.INTERACTIVE, user_id=interactive_user,
+                                queue_name="q", redis=redis)
+
+    assert redis.pop_order()[0] == ("upload",)
+    # 所有任务都可立即执行 (分数不晚于当前时间)
+    import time
+    assert all(score <= time.time() for score, _, _ in redis.queue.values())
+
+
+@pytest.mark.asyncio
+async def test_users_in_same_lane_are_interleaved():
+    redis = FakeArqRedis()
+    heavy, light = uuid4(), uuid4()
+
+    await LaneScheduler.enqueue_many("t", [(f"heavy{i}",) for i in range(20)],
+                                     lane=JobLane.USER, user_id=heavy, queue_name="q", redis=redis)
+    await LaneScheduler.enqueue_many("t", [(f"light{i}",) for i in range(2)],
+                                     lane=JobLane.USER, user_id=light, queue_name="q", redis=redis)
+
+    order = [args[0] for args in redis.pop_order()]
+    # 后到的轻量用户不必等待重度用户的全部积压
+    assert order.index("light1") < 4
+
+
+@pytest.mark.asyncio
+async def test_weighted_share_between_lanes():
+    redis = FakeArqRedis()
+    user = uuid4()
+
+    await LaneScheduler.enqueue_many("t", [(f"user{i}",) for i in range(40)],
+                                     lane=JobLane.USER, user_id=user, queue_name="q", redis=redis)
+    await LaneScheduler.enqueue_many("t", [(f"backfill{i}",) for i in range(40)],
+                                     lane=JobLane.BACKFILL, user_id=user, queue_name="q", redis=redis)
+
+    first = [args[0] for args in redis.pop_order()[:20]]
+    user_share = sum(1 for name in first if name.startswith("user"))
+    # 权重 4:1
+    assert user_share == 16
+
+
+@pytest.mark.asyncio
+async def test_lane_stats_track_depth_and_wait():
+    redis = FakeArqRedis()
+    jobs = await LaneScheduler.enqueue_many("t", [("a",), ("b",)], lane=JobLane.INTERACTIVE,
+                                            user_id=uuid4(), queue_name="q", redis=redis)
+
+    await LaneScheduler.on_job_start({"redis": redis, "job_id": jobs[0].job_id})
+    # 非通道任务不受影响
+    await LaneScheduler.on_job_start({"redis": redis, "job_id": "unknown"})
+
+    stats = {s["lane"]: s for s in await LaneScheduler.lane_stats(["q"], redis=redis)}
+    assert set(stats) == {lane.value for lane in JobLane}
+    assert stats["interactive"]["depth"] == 1
+    assert stats["interactive"]["samples"] == 1
+    assert stats["backfill"]["depth"] == 0
@@ -0,0 +1,68 @@
+import pytest
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from base.pg.entity import Collection, CollectionPaper, Paper, SearchHistory
+from base.pg.pagination import decode_cursor, encode_cursor, next_cursor, paginate
+from common.model.errors import BusinessError
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip_is_opaque_and_url_safe():
+    created_at, paper_id = datetime(2026, 10, 20, 1, 0, 0, 123456), uuid4()
+
+    cursor = encode_cursor(created_at, paper_id)
+
+    assert str(paper_id) not in cursor
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+    assert decode_cursor(cursor) == (created_at, paper_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(datetime.now(), uuid4())[:-4], "W10"])
+def test_invalid_cursor_raises_business_error(cursor):
+    with pytest.raises(BusinessError) as exc:
+        decode_cursor(cursor)
+    assert exc.value.code == 400
+
+
+def test_paginate_with_cursor_uses_row_comparison_instead_of_offset():
+    cursor = encode_cursor(datetime.now(), uuid4())
+
+    sql = compile_sql(paginate(select(Paper), Paper.created_at, Paper.id, 10, offset=50, cursor=cursor))
+
+    assert "(papers.created_at, papers.id) < (" in sql
+    assert "ORDER BY papers.created_at DESC, papers.id DESC" in sql
+    assert "OFFSET" not in sql
+
+
+def test_paginate_without_cursor_keeps_offset_mode():
+    sql = compile_sql(paginate(select(Paper), Paper.created_at, Paper.id, 10, offset=50))
+
+    assert "OFFSET" in sql
+    assert "ORDER BY papers.created_at DESC, papers.id DESC" in sql
+
+
+def test_next_cursor_only_for_full_pages():
+    rows = [(datetime(2026, 1, i + 1), uuid4()) for i in range(3)]
+
+    assert next_cursor(rows, 4, lambda row: row) is None
+    assert next_cursor([], 4, lambda row: row) is None
+    assert decode_cursor(next_cursor(rows, 3, lambda row: row)) == rows[-1]
+
+
+def test_keyset_indexes_are_declared_on_entities():
+    # 游标分页的复合索引在模型中声明，autogenerate 不会删除它们
+    for model, name, columns in (
+        (Paper, "ix_papers_user_created_id", ["user_id", "created_at", "id"]),
+        (Collection, "ix_collections_user_updated_id", ["user_id", "updated_at", "id"]),
+        (CollectionPaper, "ix_collection_papers_collection_created_paper", ["collection_id", "created_at", "paper_id"]),
+        (SearchHistory, "ix_search_histories_user_created_id", ["user_id", "created_at", "id"]),
+    ):
+        index = next(i for i in model.__table__.indexes if i.name == name)
+        assert [c.name for c in index.columns] == columns
@@ -0,0 +1,100 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from base.config import settings
+from base.pg.entity import Paper
+from base.pg.service import PaperRepository, RelatedPaperRepository
+from base.pg.vector_index import embedding_index_name, paper_embedding_index_ddl, paper_embedding_index_name
+from service.papers.paper_service import PaperProcessingService, PaperService
+
+
+def _session(rows=()):
+    session = MagicMock()
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    session.execute = AsyncMock(return_value=result)
+    session.commit = AsyncMock()
+    return session
+
+
+def _sql(session, call: int = -1) -> str:
+    statement = session.execute.await_args_list[call].args[0]
+    return str(statement.compile(dialect=dialect(), compile_kwargs={"render_postcompile": True}))
+
+
+def test_each_model_gets_its_own_paper_index():
+    ddl = paper_embedding_index_ddl("bge-m3")
+    assert "ON paper_embeddings USING" in ddl
+    assert "(embedding::vector(1024)) vector_cosine_ops" in ddl
+    assert "WHERE model = 'bge-m3'" in ddl
+
+    names = {paper_embedding_index_name(m) for m in settings.embedding_dimensions}
+    assert len(names) == len(settings.embedding_dimensions)
+    assert names.isdisjoint(embedding_index_name(m) for m in settings.embedding_dimensions)
+    assert all(len(name) <= 63 for name in names)
+
+
+@pytest.mark.asyncio
+async def test_save_chunks_writes_centroid_with_chunks():
+    service = PaperProcessingService()
+    paper_id = uuid4()
+
+    with patch.object(settings, "embedding_model", "bge-m3"), \
+         patch.object(PaperRepository, "create_paper_chunks", new=AsyncMock()) as create:
+        await service._save_chunks(paper_id, ["a", "b"], [[0.1] * 1024, [0.3] * 1024], session=MagicMock())
+
+    paper_embedding = create.await_args.kwargs["paper_embedding"]
+    assert (paper_embedding.paper_id, paper_embedding.model) == (paper_id, "bge-m3")
+    assert paper_embedding.embedding == pytest.approx([0.2] * 1024)
+
+
+@pytest.mark.asyncio
+async def test_refresh_paper_embeddings_averages_in_database():
+    session = _session()
+
+    await PaperRepository.refresh_paper_embeddings(session, "bge-m3", [])
+    session.execute.assert_not_awaited()
+
+    await PaperRepository.refresh_paper_embeddings(session, "bge-m3", [uuid4(), uuid4()])
+    sql = _sql(session)
+    assert sql.startswith("INSERT INTO paper_embeddings (paper_id, model, embedding, updated_at) SELECT")
+    assert "CAST(avg(chunk_embeddings.embedding) AS VECTOR)" in sql
+    assert "GROUP BY paper_chunks.paper_id" in sql
+    assert "ON CONFLICT (paper_id, model) DO UPDATE" in sql
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_related_papers_are_nearest_paper_vectors_in_library():
+    session = _session()
+
+    await RelatedPaperRepository.find_nearest_papers(session, uuid4(), uuid4(), "bge-m3", 5)
+
+    sql = _sql(session)
+    # 排序表达式与论文向量索引一致 (按用户过滤后的召回由迭代索引扫描保证)，目标论文的向量为只执行一次的子查询
+    assert sql.startswith("SELECT papers.id")
+    assert "paper_embeddings.model = 'bge-m3'" in sql
+    assert "ORDER BY CAST(paper_embeddings.embedding AS VECTOR(1024)) <=> CAST((SELECT paper_embeddings_1.embedding" in sql
+    assert "papers.user_id = " in sql and "papers.id != " in sql
+    assert "EXISTS (SELECT paper_embeddings_1.embedding" in sql
+
+
+@pytest.mark.asyncio
+async def test_related_papers_require_ownership():
+    owner, other = uuid4(), uuid4()
+    paper = Paper(id=uuid4(), user_id=owner, title="A", authors=[], file_key="k")
+    neighbour = Paper(id=uuid4(), user_id=owner, title="B", authors=[], file_key="k2")
+    service = PaperService(MagicMock())
+
+    with patch.object(PaperRepository, "get_paper_by_id", new=AsyncMock(return_value=paper)), \
+         patch.object(RelatedPaperRepository, "get_related_papers", new=AsyncMock(return_value=[(neighbour, 0.9)])) as related:
+        assert await service.get_related_papers(paper.id, other) is None
+        related.assert_not_awaited()
+
+        result = await service.get_related_papers(paper.id, owner, limit=3)
+
+    assert [(dto.id, score) for dto, score in result] == [(neighbour.id, 0.9)]
+    assert related.await_args.args[1:] == (paper.id, owner, 3)
@@ -31,6 +31,7 @@ def mock_paper_repo():
         mock_repo.delete_paper = AsyncMock()
         mock_repo.get_user_papers = AsyncMock()
         mock_repo.update_paper_metadata = AsyncMock()
+        mock_repo.delete_paper_chunks = AsyncMock()
         yield mock_repo
 
 
@@ -185,3 +186,84 @@ async def test_process_pdf_success(mock_settings, mock_async_session_factory, mo
         # Verify status updates
         # Called once for PROCESSING
         mock_paper_repo.update_paper_status.assert_any_call(mock_db_session, paper_id, PaperStatus.PROCESSING)
+
+
+@pytest.mark.asyncio
+async def test_paper_count_invalidation_waits_for_unit_of_work_commit(mock_db_session, mock_paper_repo):
+    from base.pg.service import AFTER_COMMIT, UNIT_OF_WORK
+
+    mock_db_session.info = {UNIT_OF_WORK: True}
+    service = PaperService(session=mock_db_session)
+    user_id = uuid4()
+    mock_paper_repo.create_paper.return_value = Paper(id=uuid4(), user_id=user_id, title="t")
+
+    with patch("service.papers.paper_service.PaperCountCache") as cache:
+        cache.invalidate = AsyncMock()
+        await service._create_paper_record(user_id, "t", [], "key")
+        cache.invalidate.assert_not_awaited()
+
+        for callback in mock_db_session.info[AFTER_COMMIT]:
+            await callback()
+        cache.invalidate.assert_awaited_once_with(user_id)
+
+
+@pytest.mark.asyncio
+async def test_mark_failed_invalidates_paper_counts(mock_async_session_factory, mock_paper_repo):
+    service = PaperProcessingService()
+    paper = Paper(id=uuid4(), user_id=uuid4(), title="t", status=PaperStatus.FAILED)
+    mock_paper_repo.update_paper_status.return_value = paper
+    reporter = MagicMock(fail=AsyncMock())
+
+    with patch("service.papers.paper_service.PaperCountCache") as cache:
+        cache.invalidate = AsyncMock()
+        await service.mark_failed(paper.id, reporter, "boom")
+        cache.invalidate.assert_awaited_once_with(paper.user_id)
+
+        cache.invalidate.reset_mock()
+        await service._update_status(paper.id, PaperStatus.PROCESSING)
+        cache.invalidate.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_delete_paper_removes_file_only_after_commit(tmp_path, mock_db_session, mock_paper_repo):
+    from base.pg.service import AFTER_COMMIT, UNIT_OF_WORK
+
+    mock_db_session.info = {UNIT_OF_WORK: True}
+    service = PaperService(session=mock_db_session)
+    service.upload_dir = tmp_path
+    user_id = uuid4()
+    paper = Paper(id=uuid4(), user_id=user_id, title="t", file_key="a.pdf")
+    (tmp_path / "a.pdf").write_bytes(b"%PDF")
+    mock_paper_repo.get_paper_by_id.return_value = paper
+
+    with patch("service.papers.paper_service.RelatedPaperRepository") as related, \
+         patch("service.papers.paper_service.PaperCountCache") as cache:
+        related.get_listing_papers = AsyncMock(return_value=[])
+        cache.invalidate = AsyncMock()
+        assert await service.delete_paper(paper.id, user_id) is True
+        # 提交前 (可能回滚) 文件仍在
+        assert (tmp_path / "a.pdf").exists()
+
+        for callback in mock_db_session.info[AFTER_COMMIT]:
+            await callback()
+    assert not (tmp_path / "a.pdf").exists()
+
+
+@pytest.mark.asyncio
+async def test_completed_paper_invalidates_counts_after_commit(mock_db_session, mock_paper_repo):
+    from base.pg.service import AFTER_COMMIT, UNIT_OF_WORK
+
+    mock_db_session.info = {UNIT_OF_WORK: True}
+    service = PaperProcessingService()
+    paper = Paper(id=uuid4(), user_id=uuid4(), title="t", status=PaperStatus.COMPLETED)
+    mock_paper_repo.update_paper_fields = AsyncMock(return_value=paper)
+
+    with patch("service.papers.paper_service.PaperCountCache") as cache:
+        cache.invalidate = AsyncMock()
+        await service._update_paper_after_processing(paper.id, title="t", session=mock_db_session)
+        # 按状态筛选的总数在完成提交后才变化
+        cache.invalidate.assert_not_awaited()
+
+        for callback in mock_db_session.info[AFTER_COMMIT]:
+            await callback()
+        cache.invalidate.assert_awaited_once_with(paper.user_id)
@@ -3,71 +3,123 @@ from unittest.mock import MagicMock, AsyncMock, patch
 from uuid import uuid4
 from pathlib import Path
 from service.papers.paper_service import PaperService
-from common.model.enums import PaperStatus
+from common.model.enums import JobLane, PaperStatus
 from base.config import settings
+from base.redis.arq_service import ArqService, INGEST_PARSE_QUEUE
+from base.redis.lane_scheduler import LaneScheduler
+
+
+@pytest.fixture(autouse=True)
+def reset_arq_service():
+    yield
+    ArqService._pool = None
+    ArqService._healthy = False
+    ArqService._last_failure = 0.0
+    LaneScheduler._clock_script = None
+
 
 @pytest.mark.asyncio
 async def test_upload_paper_triggers_arq():
     # Mock session
     session = AsyncMock()
-    
+
     # Initialize service
     service = PaperService(session)
-    
-    # Mock dependencies
-    writer = AsyncMock()
-    writer.wait_closed = AsyncMock()
-    writer.close = MagicMock()
 
     with patch("service.papers.paper_service.aiofiles.open") as mock_open, \
          patch("service.papers.paper_service.PaperRepository") as mock_repo, \
          patch("service.papers.paper_service.CollectionRepository") as mock_collection_repo, \
-         patch("service.papers.paper_service.asyncio.open_connection", new=AsyncMock(return_value=(AsyncMock(), writer))), \
-         patch("service.papers.paper_service.create_pool") as mock_create_pool:
-        
+         patch("service.papers.paper_service.JobRepository") as mock_job_repo, \
+         patch("base.redis.arq_service.create_pool") as mock_create_pool:
+
         # Setup mocks
         mock_file_handle = AsyncMock()
         mock_open.return_value.__aenter__.return_value = mock_file_handle
-        
+
         mock_paper = MagicMock()
         mock_paper.id = uuid4()
         mock_paper.status = PaperStatus.PENDING
         # Fix: Make create_paper an AsyncMock
         mock_repo.create_paper = AsyncMock(return_value=mock_paper)
-        
+
         mock_pool = AsyncMock()
+        mock_pipe = MagicMock(execute=AsyncMock())
+        mock_pipe.__aenter__.return_value = mock_pipe
+        mock_pool.pipeline = MagicMock(return_value=mock_pipe)
+        mock_pool.register_script = MagicMock(return_value=AsyncMock(return_value="0"))
         mock_create_pool.return_value = mock_pool
 
         mock_collection_repo.get_default_collection = AsyncMock(return_value=MagicMock(id=uuid4()))
         mock_collection_repo.add_paper_to_collection = AsyncMock()
-        
-        # Call upload_paper
+
+        mock_job = MagicMock()
+        mock_job.id = uuid4()
+        mock_job_repo.create_job = AsyncMock(return_value=mock_job)
+
+        # Call upload_paper twice: the pool is created once and reused
         user_id = uuid4()
         file_content = b"%PDF-1.4 test"
         filename = "test.pdf"
-        
+
         response = await service.upload_paper(file_content, filename, user_id)
-        
+        await service.upload_paper(file_content, filename, user_id)
+
         # Verify result
         assert response.paper_id == str(mock_paper.id)
         assert response.status == PaperStatus.PENDING.value
-        
-        # Verify Arq triggered
+        assert response.job_id == str(mock_job.id)
+
+        # Verify Arq triggered on a shared pool
         mock_create_pool.assert_called_once()
-        mock_pool.enqueue_job.assert_called_once_with('process_pdf_task', str(mock_paper.id))
-        mock_pool.close.assert_called_once()
+        assert mock_pool.enqueue_job.await_count == 2
+        call = mock_pool.enqueue_job.await_args
+        assert call.args == ('parse_pdf_task', str(mock_paper.id), str(mock_job.id), JobLane.INTERACTIVE.value, str(user_id))
+        assert call.kwargs["_queue_name"] == INGEST_PARSE_QUEUE
+        mock_pool.close.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_trigger_process_task_error_handling():
     # Verify that error in triggering task does not raise exception
     session = AsyncMock()
     service = PaperService(session)
-    
-    writer = AsyncMock()
-    writer.wait_closed = AsyncMock()
-    writer.close = MagicMock()
 
-    with patch("service.papers.paper_service.asyncio.open_connection", new=AsyncMock(return_value=(AsyncMock(), writer))), \
-         patch("service.papers.paper_service.create_pool", side_effect=Exception("Redis error")):
+    with patch("base.redis.arq_service.create_pool", side_effect=OSError("Redis error")):
         # Should not raise exception
         await service._trigger_process_task(uuid4(), Path("test.pdf"))
+
+    assert ArqService.is_healthy() is False
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_queue_skips_until_retry_interval():
+    mock_pool = AsyncMock()
+    mock_pool.enqueue_job.side_effect = ConnectionError("down")
+
+    with patch("base.redis.arq_service.create_pool", new=AsyncMock(return_value=mock_pool)):
+        assert await ArqService.enqueue("process_pdf_task", "p1") is None
+        assert ArqService.is_healthy() is False
+
+        # 冷却期内不再触达 Redis
+        assert await ArqService.enqueue("process_pdf_task", "p2") is None
+        assert mock_pool.enqueue_job.await_count == 1
+        mock_pool.ping.assert_not_called()
+
+        # 冷却期过后通过一次 PING 恢复
+        ArqService._last_failure -= settings.arq_health_retry_interval + 1
+        mock_pool.enqueue_job.side_effect = None
+        assert await ArqService.enqueue("process_pdf_task", "p3") is not None
+        mock_pool.ping.assert_awaited_once()
+        assert ArqService.is_healthy() is True
+
+
+@pytest.mark.asyncio
+async def test_enqueue_many_reports_per_item_results():
+    mock_pool = AsyncMock()
+    ok_job = MagicMock(job_id="j1")
+    mock_pool.enqueue_job.side_effect = [ok_job, ValueError("bad args"), ok_job]
+
+    with patch("base.redis.arq_service.create_pool", new=AsyncMock(return_value=mock_pool)):
+        jobs = await ArqService.enqueue_many("process_pdf_task", [("a",), ("b",), ("c",)])
+
+    assert [j is not None for j in jobs] == [True, False, True]
+    assert ArqService.is_healthy() is True
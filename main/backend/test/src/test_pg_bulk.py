@@ -0,0 +1,85 @@
+import struct
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from base.pg.bulk import bulk_insert
+from base.pg.entity import PaperChunk
+
+
+def make_chunks(n, dim=3):
+    paper_id = uuid4()
+    return [
+        PaperChunk(paper_id=paper_id, content=f"c{i}", chunk_index=i, embedding=[float(i)] * dim, embedding_dim=dim)
+        for i in range(n)
+    ]
+
+
+def make_session(driver, copy_error=None):
+    driver_conn = MagicMock()
+    driver_conn.copy_records_to_table = AsyncMock(side_effect=copy_error)
+    driver_conn.set_type_codec = AsyncMock()
+    driver_conn.reset_type_codec = AsyncMock()
+
+    conn = MagicMock()
+    conn.dialect.driver = driver
+    conn.get_raw_connection = AsyncMock(return_value=MagicMock(driver_connection=driver_conn))
+
+    @asynccontextmanager
+    async def begin_nested():
+        yield
+
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=conn)
+    session.begin_nested = begin_nested
+    session.execute = AsyncMock()
+    return session, driver_conn
+
+
+@pytest.mark.asyncio
+async def test_asyncpg_uses_binary_copy_with_vector_codec():
+    session, driver_conn = make_session("asyncpg")
+    chunks = make_chunks(3)
+
+    assert await bulk_insert(session, chunks) == 3
+
+    call = driver_conn.copy_records_to_table.await_args
+    assert call.args == ("paper_chunks",)
+    columns = call.kwargs["columns"]
+    records = call.kwargs["records"]
+    assert [r[columns.index("id")] for r in records] == [c.id for c in chunks]
+    # 生成列由数据库计算，不参与写入
+    assert "content_tsv" not in columns
+    session.execute.assert_not_awaited()
+
+    # 向量按 pgvector 二进制格式编码: uint16 维度 + uint16 保留位 + float32 大端
+    codec = driver_conn.set_type_codec.await_args
+    assert codec.args == ("vector",)
+    assert codec.kwargs["format"] == "binary"
+    assert codec.kwargs["encoder"]([1.0, 2.0]) == struct.pack(">HH2f", 2, 0, 1.0, 2.0)
+    # COPY 结束后恢复文本编解码，连接仍供 SQLAlchemy 复用
+    driver_conn.reset_type_codec.assert_awaited_once_with("vector", schema="public")
+
+
+@pytest.mark.asyncio
+async def test_copy_failure_falls_back_to_insert_batches():
+    session, driver_conn = make_session("asyncpg", copy_error=RuntimeError("copy failed"))
+
+    assert await bulk_insert(session, make_chunks(5), batch_size=2) == 5
+
+    assert session.execute.await_count == 3
+    driver_conn.reset_type_codec.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_other_drivers_use_multi_row_insert():
+    session, driver_conn = make_session("psycopg")
+
+    assert await bulk_insert(session, make_chunks(4), batch_size=3) == 4
+    assert await bulk_insert(session, []) == 0
+
+    driver_conn.copy_records_to_table.assert_not_awaited()
+    assert session.execute.await_count == 2
+    statement = session.execute.await_args_list[0].args[0]
+    assert statement.table.name == "paper_chunks"
@@ -0,0 +1,168 @@
+import pytest
+from unittest.mock import patch
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import base.pg.service as pg_service
+from base.pg.service import HAS_WRITES, ReadSessionDep, SessionDep
+from common.security import create_access_token
+
+
+class FakeSession:
+    def __init__(self, name):
+        self.name = name
+        self.info = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeRecentWrites:
+    """内存版 ReadYourWrites，记录标记过的用户"""
+
+    def __init__(self, fail=False):
+        self.marked = {}
+        self.fail = fail
+
+    async def mark(self, principal, ttl):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.marked[principal] = ttl
+
+    async def is_recent(self, principal):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return principal in self.marked
+
+
+def build_client(used):
+    app = FastAPI()
+
+    @app.get("/papers")
+    async def read(session: ReadSessionDep):
+        used.append(session.name)
+        return {}
+
+    @app.post("/papers")
+    async def write(session: SessionDep):
+        used.append(session.name)
+        # 相当于仓储 flush 了写入 (由会话事件记录)
+        session.info[HAS_WRITES] = True
+        return {}
+
+    @app.post("/search")
+    async def search(session: SessionDep):
+        used.append(session.name)
+        return {}
+
+    return TestClient(app)
+
+
+def patch_engines(replica=True):
+    """主库与副本各一个会话工厂 (相当于两个指向同一实例的连接串)"""
+    return (
+        patch.object(pg_service, "async_session_factory", lambda: FakeSession("primary")),
+        patch.object(pg_service, "replica_session_factory", (lambda: FakeSession("replica")) if replica else None),
+    )
+
+
+def auth(user_id="u1"):
+    return {"Authorization": f"Bearer {create_access_token(subject=user_id)}"}
+
+
+def test_reads_go_to_replica_until_own_write():
+    used = []
+    recent = FakeRecentWrites()
+    primary, replica = patch_engines()
+    with primary, replica, patch.object(pg_service, "ReadYourWrites", recent):
+        client = build_client(used)
+        client.get("/papers", headers=auth())
+        client.post("/papers", headers=auth())
+        client.get("/papers", headers=auth())
+        # 其他用户不受影响
+        client.get("/papers", headers=auth("u2"))
+
+    assert used == ["replica", "primary", "primary", "replica"]
+    assert recent.marked == {"u1": pg_service.settings.read_your_writes_seconds}
+
+
+def test_post_without_writes_keeps_reads_on_replica():
+    used = []
+    recent = FakeRecentWrites()
+    primary, replica = patch_engines()
+    with primary, replica, patch.object(pg_service, "ReadYourWrites", recent):
+        client = build_client(used)
+        client.post("/search", headers=auth())
+        client.get("/papers", headers=auth())
+
+    assert used == ["primary", "replica"]
+    assert recent.marked == {}
+
+
+def test_token_from_cookie_and_anonymous_reads():
+    used = []
+    recent = FakeRecentWrites()
+    recent.marked["u1"] = 5
+    primary, replica = patch_engines()
+    with primary, replica, patch.object(pg_service, "ReadYourWrites", recent):
+        client = build_client(used)
+        client.cookies.set("access_token", create_access_token(subject="u1"))
+        client.get("/papers")
+        client.cookies.clear()
+        client.get("/papers")
+
+    assert used == ["primary", "replica"]
+
+
+def test_redis_failure_reads_from_primary():
+    used = []
+    primary, replica = patch_engines()
+    with primary, replica, patch.object(pg_service, "ReadYourWrites", FakeRecentWrites(fail=True)):
+        client = build_client(used)
+        # 标记失败不影响写请求本身
+        assert client.post("/papers", headers=auth()).status_code == 200
+        client.get("/papers", headers=auth())
+
+    assert used == ["primary", "primary"]
+
+
+def test_without_replica_everything_reads_primary():
+    used = []
+    recent = FakeRecentWrites()
+    primary, replica = patch_engines(replica=False)
+    with primary, replica, patch.object(pg_service, "ReadYourWrites", recent):
+        client = build_client(used)
+        client.get("/papers", headers=auth())
+        client.post("/papers", headers=auth())
+
+    assert used == ["primary", "primary"]
+    assert recent.marked == {}
+
+
+def test_failed_write_does_not_mark():
+    recent = FakeRecentWrites()
+    app = FastAPI()
+
+    @app.post("/papers")
+    async def write(session: SessionDep):
+        raise RuntimeError("boom")
+
+    primary, replica = patch_engines()
+    with primary, replica, patch.object(pg_service, "ReadYourWrites", recent):
+        client = TestClient(app, raise_server_exceptions=False)
+        assert client.post("/papers", headers=auth()).status_code == 500
+
+    assert recent.marked == {}
@@ -0,0 +1,201 @@
+import pytest
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from base.config import settings
+from base.embedding import serving
+from base.pdf_parser.artifact_store import ParseArtifactStore
+from base.pg.entity import EmbeddingModelState
+from base.pg.service import EmbeddingModelRepository
+from base.redis.lane_scheduler import LaneScheduler
+from common.model.enums import EmbeddingModelStatus
+from service.papers import reembed_service
+from service.papers.paper_service import PaperProcessingService
+from service.papers.reembed_service import ReembedService
+from worker.tasks import EmbedWorkerSettings, reembed_chunks_task
+
+
+def _uuid(i: int) -> UUID:
+    return UUID(int=i)
+
+
+@asynccontextmanager
+async def _session():
+    yield MagicMock()
+
+
+class _FakeChunks:
+    """按主键排序的文本块，记录已写入新模型向量的文本块"""
+
+    def __init__(self, count: int):
+        self.ids = [_uuid(i) for i in range(1, count + 1)]
+        self.embedded = set()
+        self.cursors = []
+
+    async def missing(self, _, model, after, limit):
+        return [(i, f"text {i.int}") for i in self.ids if i not in self.embedded and (after is None or i > after)][:limit]
+
+    async def save(self, _, model, vectors):
+        self.embedded.update(chunk_id for chunk_id, _ in vectors)
+
+    async def advance(self, _, model, cursor, embedded=0):
+        self.cursors.append(cursor)
+
+
+@contextmanager
+def _patch_repository(chunks: _FakeChunks, state: EmbeddingModelState, switched: bool = True):
+    with ExitStack() as stack:
+        for patcher in (
+            patch.object(reembed_service, "async_session_factory", _session),
+            patch.object(reembed_service, "unit_of_work", _session),
+            patch.object(EmbeddingModelRepository, "get_state", new=AsyncMock(return_value=state)),
+            patch.object(EmbeddingModelRepository, "get_chunks_missing_embedding", new=AsyncMock(side_effect=chunks.missing)),
+            patch.object(EmbeddingModelRepository, "advance_cursor", new=AsyncMock(side_effect=chunks.advance)),
+            patch.object(EmbeddingModelRepository, "switch_serving", new=AsyncMock(return_value=switched)),
+            patch.object(reembed_service.PaperRepository, "save_chunk_embeddings", new=AsyncMock(side_effect=chunks.save)),
+            patch.object(reembed_service.PaperRepository, "refresh_paper_embeddings", new=AsyncMock()),
+            patch.object(settings, "reembed_batch_pause", 0),
+            patch.object(settings, "embedding_model_cache_seconds", 0),
+        ):
+            stack.enter_context(patcher)
+        yield
+
+
+@pytest.mark.asyncio
+async def test_reembed_walks_primary_key_batches_and_resumes():
+    chunks = _FakeChunks(5)
+    batcher = MagicMock()
+    batcher.embed = AsyncMock(side_effect=lambda texts: [[0.1] * 1024 for _ in texts])
+    state = EmbeddingModelState(model="bge-m3", status=EmbeddingModelStatus.BACKFILLING.value)
+
+    with _patch_repository(chunks, state), \
+         patch.object(settings, "reembed_batch_size", 2), patch.object(settings, "reembed_max_batches", 2):
+        # 单次最多 2 批，进度 (游标) 随每批提交
+        result = await ReembedService(batcher).run("bge-m3")
+        assert result == {"status": "running", "model": "bge-m3", "embedded": 4}
+        assert chunks.cursors == [_uuid(2), _uuid(4)]
+        EmbeddingModelRepository.switch_serving.assert_not_awaited()
+
+        # 下次从游标继续
+        state.cursor = chunks.cursors[-1]
+        result = await ReembedService(batcher).run("bge-m3")
+        assert result["status"] == "running"
+        assert chunks.embedded == set(chunks.ids)
+
+        # 一轮结束后从头检查一遍，没有缺失时切换检索模型
+        state.cursor = chunks.cursors[-1]
+        result = await ReembedService(batcher).run("bge-m3")
+        assert result == {"status": "switched", "model": "bge-m3", "embedded": 0}
+        EmbeddingModelRepository.switch_serving.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_reembed_picks_up_chunks_ingested_behind_cursor():
+    chunks = _FakeChunks(4)
+    batcher = MagicMock()
+    batcher.embed = AsyncMock(side_effect=lambda texts: [[0.1] * 1024 for _ in texts])
+    # 游标已走到末尾，但回填期间新导入了主键更小的文本块
+    chunks.embedded = {_uuid(2), _uuid(3), _uuid(4)}
+    state = EmbeddingModelState(model="bge-m3", status=EmbeddingModelStatus.BACKFILLING.value, cursor=_uuid(4))
+
+    with _patch_repository(chunks, state):
+        result = await ReembedService(batcher).run("bge-m3")
+
+    assert result["status"] == "switched"
+    assert chunks.embedded == set(chunks.ids)
+    assert chunks.cursors == [None, _uuid(1), None]
+
+
+@pytest.mark.asyncio
+async def test_reembed_skips_retired_and_finishes_serving_model():
+    batcher = MagicMock()
+    batcher.embed = AsyncMock()
+
+    retired = EmbeddingModelState(model="bge-m3", status=EmbeddingModelStatus.RETIRED.value)
+    with _patch_repository(_FakeChunks(2), retired):
+        assert (await ReembedService(batcher).run("bge-m3"))["status"] == "skipped"
+
+    chunks = _FakeChunks(2)
+    chunks.embedded = set(chunks.ids)
+    serving_state = EmbeddingModelState(model="bge-m3", status=EmbeddingModelStatus.SERVING.value)
+    with _patch_repository(chunks, serving_state):
+        assert (await ReembedService(batcher).run("bge-m3"))["status"] == "done"
+    batcher.embed.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_switch_serving_is_one_guarded_update():
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = ["bge-m3", "Qwen/Qwen3-Embedding-0.6B"]
+    session.execute = AsyncMock(return_value=result)
+    session.commit = AsyncMock()
+
+    assert await EmbeddingModelRepository.switch_serving(session, "bge-m3") is True
+
+    session.execute.assert_awaited_once()
+    sql = str(session.execute.await_args.args[0].compile(dialect=dialect()))
+    assert sql.startswith("UPDATE embedding_models SET status=CASE WHEN")
+    # 仅在目标模型处于回填中、且所有文本块都有其向量时切换
+    assert "embedding_models_1.status" in sql
+    assert "NOT (EXISTS (SELECT paper_chunks.id" in sql
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_reembed_task_requeues_until_done():
+    ctx = {"redis": MagicMock(), "embedding_batcher": MagicMock()}
+
+    with patch.object(ReembedService, "run", new=AsyncMock(return_value={"status": "running", "model": "bge-m3"})), \
+         patch.object(LaneScheduler, "enqueue", new=AsyncMock(return_value=MagicMock())) as mock_enqueue:
+        await reembed_chunks_task(ctx, "bge-m3")
+    assert mock_enqueue.await_args.args == ("reembed_chunks_task", "bge-m3")
+    assert mock_enqueue.await_args.kwargs["lane"] == "reembed"
+
+    with patch.object(ReembedService, "run", new=AsyncMock(return_value={"status": "done", "model": "bge-m3"})), \
+         patch.object(LaneScheduler, "enqueue", new=AsyncMock()) as mock_enqueue:
+        await reembed_chunks_task(ctx, "bge-m3")
+    mock_enqueue.assert_not_awaited()
+    assert reembed_chunks_task in EmbedWorkerSettings.functions
+
+
+@pytest.mark.asyncio
+async def test_serving_model_is_cached_and_falls_back():
+    serving.invalidate_serving_model()
+    with patch.object(serving, "async_session_factory", _session), \
+         patch.object(EmbeddingModelRepository, "get_serving_model", new=AsyncMock(return_value="Qwen/Qwen3-Embedding-0.6B")) as get:
+        assert await serving.serving_embedding_model() == "Qwen/Qwen3-Embedding-0.6B"
+        assert await serving.serving_embedding_model() == "Qwen/Qwen3-Embedding-0.6B"
+    get.assert_awaited_once()
+
+    serving.invalidate_serving_model()
+    with patch.object(serving, "async_session_factory", _session), \
+         patch.object(EmbeddingModelRepository, "get_serving_model", new=AsyncMock(side_effect=ConnectionError)), \
+         patch.object(settings, "embedding_model", "bge-m3"):
+        assert await serving.serving_embedding_model() == "bge-m3"
+    serving.invalidate_serving_model()
+
+
+@pytest.mark.asyncio
+async def test_staged_ingest_keeps_the_model_that_made_the_vectors(tmp_path):
+    store = ParseArtifactStore(tmp_path)
+    service = PaperProcessingService(artifact_store=store)
+    paper_id = _uuid(7)
+    await store.save_chunks(paper_id, ["c1"], {"title": "Paper", "authors": []})
+
+    with patch("service.papers.paper_service.serving_embedding_model", new=AsyncMock(return_value="bge-m3")), \
+         patch.object(service, "_generate_embeddings", new=AsyncMock(return_value=[[0.1] * 4])) as generate:
+        assert await service.embed_stage(paper_id) is True
+    assert generate.await_args.args[1] == "bge-m3"
+
+    # 向量化之后检索模型切换，入库仍按生成向量的模型写入
+    with patch("service.papers.paper_service.serving_embedding_model", new=AsyncMock(return_value="Qwen/Qwen3-Embedding-0.6B")), \
+         patch("service.papers.paper_service.unit_of_work", _session), \
+         patch("service.papers.paper_service.PaperRepository.delete_paper_chunks", new=AsyncMock()), \
+         patch.object(service, "_save_chunks", new=AsyncMock()) as save_chunks, \
+         patch.object(service, "_update_paper_after_processing", new=AsyncMock()):
+        assert await service.persist_stage(paper_id) is True
+    assert save_chunks.await_args.kwargs["model"] == "bge-m3"
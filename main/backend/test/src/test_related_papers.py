@@ -0,0 +1,139 @@
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from base.config import settings
+from base.pg.entity import Paper
+from base.pg.service import AFTER_COMMIT, UNIT_OF_WORK, PaperRepository, RelatedPaperRepository
+from base.redis.arq_service import INGEST_PERSIST_QUEUE
+from base.redis.lane_scheduler import LaneScheduler
+from common.model.enums import JobLane
+from service.papers import related_service
+from service.papers.paper_service import PaperProcessingService, PaperService
+from service.papers.related_service import RelatedPaperService
+from worker.tasks import PersistWorkerSettings, persist_chunks_task, update_related_papers_task
+
+
+def _session():
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock())
+    session.commit = AsyncMock()
+    return session
+
+
+def _sql(session, call: int) -> str:
+    statement = session.execute.await_args_list[call].args[0]
+    return str(statement.compile(dialect=dialect(), compile_kwargs={"render_postcompile": True}))
+
+
+@asynccontextmanager
+async def _unit_of_work():
+    yield MagicMock()
+
+
+@pytest.mark.asyncio
+async def test_offer_related_upserts_then_trims_each_list():
+    session = _session()
+
+    await RelatedPaperRepository.offer_related(session, uuid4(), [], 10)
+    session.execute.assert_not_awaited()
+
+    await RelatedPaperRepository.offer_related(session, uuid4(), [(uuid4(), 0.9), (uuid4(), 0.8)], 10)
+
+    upsert, trim = _sql(session, 0), _sql(session, 1)
+    assert upsert.startswith("INSERT INTO related_papers")
+    assert "ON CONFLICT (paper_id, related_paper_id) DO UPDATE SET score = excluded.score" in upsert
+    assert trim.startswith("DELETE FROM related_papers WHERE (related_papers.paper_id, related_papers.related_paper_id) IN")
+    assert "row_number() OVER (PARTITION BY related_papers.paper_id ORDER BY related_papers.score DESC" in trim
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_related_papers_are_read_without_vector_math():
+    session = _session()
+    session.execute.return_value.all.return_value = []
+
+    await RelatedPaperRepository.get_related_papers(session, uuid4(), uuid4(), 5)
+
+    sql = _sql(session, 0)
+    assert "FROM related_papers JOIN papers ON papers.id = related_papers.related_paper_id" in sql
+    assert "<=>" not in sql and "paper_embeddings" not in sql
+
+
+@pytest.mark.asyncio
+async def test_update_offers_added_papers_and_recomputes_affected():
+    user_id = uuid4()
+    added, affected, deleted = uuid4(), uuid4(), uuid4()
+    neighbours = [(uuid4(), 0.9), (uuid4(), 0.8), (uuid4(), 0.7)]
+    papers = {paper_id: Paper(id=paper_id, user_id=user_id, title="t", authors=[], file_key="k") for paper_id in (added, affected)}
+
+    with patch.object(related_service, "unit_of_work", _unit_of_work), \
+         patch.object(related_service, "serving_embedding_model", new=AsyncMock(return_value="bge-m3")), \
+         patch.object(settings, "related_papers_k", 2), \
+         patch.object(settings, "related_papers_fanout", 3), \
+         patch.object(PaperRepository, "get_paper_by_id", new=AsyncMock(side_effect=lambda _, paper_id: papers.get(paper_id))), \
+         patch.object(PaperRepository, "set_vector_search_params", new=AsyncMock()) as set_params, \
+         patch.object(RelatedPaperRepository, "find_nearest_papers", new=AsyncMock(return_value=neighbours)) as nearest, \
+         patch.object(RelatedPaperRepository, "replace_related", new=AsyncMock()) as replace, \
+         patch.object(RelatedPaperRepository, "offer_related", new=AsyncMock()) as offer:
+        result = await RelatedPaperService().update([added], [affected, deleted, added])
+
+    assert result == {"added": 1, "affected": 2, "updated": 2}
+    # 新增论文取 fanout 篇近邻，保存前 K 篇并加入近邻论文的列表；受影响的论文只重算自己的列表
+    assert [c.args[1:] for c in nearest.await_args_list] == [(added, user_id, "bge-m3", 3), (affected, user_id, "bge-m3", 2)]
+    assert [c.args[1:] for c in replace.await_args_list] == [(added, neighbours[:2]), (affected, neighbours[:2])]
+    offer.assert_awaited_once()
+    assert offer.await_args.args[1:] == (added, neighbours, 2)
+    # 走论文向量索引: 候选列表不少于要取的论文数 (迭代扫描由 set_vector_search_params 开启)
+    assert [c.kwargs["ef_search"] for c in set_params.await_args_list] == [
+        max(settings.vector_search_ef_search, 3), max(settings.vector_search_ef_search, 2)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_persist_stage_enqueues_related_update():
+    paper_id, user_id = str(uuid4()), str(uuid4())
+    ctx = {"redis": MagicMock()}
+
+    assert update_related_papers_task in PersistWorkerSettings.functions
+    with patch.object(PaperProcessingService, "persist_stage", new=AsyncMock(return_value=True)), \
+         patch.object(LaneScheduler, "enqueue", new=AsyncMock(return_value=MagicMock())) as enqueue:
+        await persist_chunks_task(ctx, paper_id, None, "interactive", user_id)
+
+    enqueue.assert_awaited_once()
+    assert enqueue.await_args.args == ("update_related_papers_task", [paper_id])
+    assert enqueue.await_args.kwargs == {
+        "lane": JobLane.BACKFILL, "user_id": user_id, "queue_name": INGEST_PERSIST_QUEUE, "redis": ctx["redis"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_delete_paper_recomputes_lists_that_contained_it(tmp_path):
+    user_id = uuid4()
+    paper = Paper(id=uuid4(), user_id=user_id, title="A", authors=[], file_key="missing.pdf")
+    listing = [uuid4(), uuid4()]
+    session = _session()
+    session.info = {UNIT_OF_WORK: True}
+    service = PaperService(session)
+    service.upload_dir = tmp_path
+
+    with patch.object(PaperRepository, "get_paper_by_id", new=AsyncMock(return_value=paper)), \
+         patch.object(PaperRepository, "delete_paper", new=AsyncMock()) as delete, \
+         patch.object(RelatedPaperRepository, "get_listing_papers", new=AsyncMock(return_value=listing)), \
+         patch.object(service, "_invalidate_counts", new=AsyncMock()), \
+         patch.object(LaneScheduler, "enqueue", new=AsyncMock(return_value=MagicMock())) as enqueue:
+        assert await service.delete_paper(paper.id, user_id) is True
+        # 工作单元中途不提交，删除提交后再投递，任务读到的已是删除后的论文库
+        session.commit.assert_not_awaited()
+        enqueue.assert_not_awaited()
+
+        for callback in session.info[AFTER_COMMIT]:
+            await callback()
+
+    delete.assert_awaited_once()
+    assert enqueue.await_args.args == ("update_related_papers_task", [], [str(p) for p in listing])
+    assert enqueue.await_args.kwargs["lane"] == JobLane.BACKFILL
+    assert enqueue.await_args.kwargs["queue_name"] == INGEST_PERSIST_QUEUE
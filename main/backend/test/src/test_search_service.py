@@ -0,0 +1,181 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from base.config import settings
+from base.pg.entity import Paper, PaperChunk
+from controller.api.search.schema import SearchRequest
+from service.search.search_service import SearchService
+
+
+def make_service(rows):
+    session = MagicMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    session.execute = AsyncMock(return_value=result)
+    service = SearchService(session)
+    service._get_embedding = AsyncMock(return_value=[0.1] * 1536)
+    service._save_search_history = AsyncMock(return_value=uuid4())
+    return service, session
+
+
+def make_paper(title):
+    return Paper(id=uuid4(), user_id=uuid4(), title=title, authors=[], file_key="k", created_at=datetime.now())
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_pages_over_papers_in_one_query():
+    papers = [make_paper("A"), make_paper("B")]
+    service, session = make_service([SimpleNamespace(total=7, Paper=p) for p in papers])
+    request = SearchRequest(query="attention", page=2, page_size=2, enable_semantic_search=True)
+
+    with patch.object(settings, "semantic_search_coarse_papers", 0):
+        response = await service.search_papers(uuid4(), request)
+
+    assert response.total == 7
+    assert [item.title for item in response.items] == ["A", "B"]
+    # set_config + 检索语句
+    assert session.execute.await_count == 2
+    statement = session.execute.await_args_list[1].args[0]
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": False}))
+    assert "WITH candidates AS" in sql and "ranked AS" in sql and "paged AS" in sql
+    assert "GROUP BY candidates.paper_id" in sql
+    params = statement.compile(dialect=postgresql.dialect()).params
+    # 候选文本块数与页码无关，分页作用在论文上
+    assert params["prefiltered_limit"] == settings.semantic_search_candidate_chunks
+    assert params["page_offset"] == 2 and params["page_limit"] == 2
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_coarse_stage_ranks_papers_first():
+    service, session = make_service([SimpleNamespace(total=1, Paper=make_paper("A"))])
+    request = SearchRequest(query="attention", page=1, page_size=10, enable_semantic_search=True)
+
+    with patch.object(settings, "semantic_search_coarse_papers", 50), patch.object(settings, "embedding_model", "bge-m3"):
+        response = await service.search_papers(uuid4(), request)
+
+    assert response.total == 1
+    assert session.execute.await_count == 2
+    params = session.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()).params
+    # 论文向量索引的候选列表不少于 N，按用户过滤后不足 N 篇时迭代扫描继续取
+    assert "50" in params.values()
+    assert "hnsw.iterative_scan" in params.values() and settings.vector_search_iterative_scan in params.values()
+    statement = session.execute.await_args_list[1].args[0]
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}))
+    # 论文向量索引 (排序表达式与索引一致) 取用户的 N 篇论文，只在其文本块中精确计算距离 (MATERIALIZED，不走文本块索引)
+    assert "WITH coarse AS" in sql and "FROM paper_embeddings JOIN papers" in sql
+    assert "papers.user_id = " in sql.split("scored AS")[0]
+    assert "ORDER BY CAST(paper_embeddings.embedding AS VECTOR(1024)) <=> " in sql
+    assert "paper_embeddings.model = 'bge-m3'" in sql
+    assert "scored AS MATERIALIZED" in sql
+    assert "paper_chunks.paper_id IN (SELECT coarse.paper_id" in sql
+    assert "FROM scored ORDER BY scored.distance" in sql
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert params["coarse_papers"] == 50
+    assert params["candidate_chunks"] == settings.semantic_search_candidate_chunks
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_page_out_of_range_keeps_total():
+    service, _ = make_service([SimpleNamespace(total=3, Paper=None)])
+    request = SearchRequest(query="attention", page=5, page_size=10, enable_semantic_search=True)
+
+    response = await service.search_papers(uuid4(), request)
+
+    assert response.total == 3
+    assert response.items == []
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_lexical_and_vector_rankings():
+    papers = [make_paper("A")]
+    service, session = make_service([SimpleNamespace(total=1, Paper=p) for p in papers])
+    request = SearchRequest(query="graph attention", page=1, page_size=10, enable_hybrid_search=True)
+
+    response = await service.search_papers(uuid4(), request)
+
+    assert [item.title for item in response.items] == ["A"]
+    sql = str(session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    # 三路召回: 向量 / 标题摘要 / 正文，RRF 融合后分页
+    for cte in ("vector AS", "meta AS", "body AS", "ranked AS", "paged AS"):
+        assert cte in sql
+    assert "papers.search_vector @@ websearch_to_tsquery" in sql
+    assert "paper_chunks.content_tsv @@ websearch_to_tsquery" in sql
+    assert "UNION ALL" in sql and "ts_rank_cd" in sql
+
+
+@pytest.mark.asyncio
+async def test_retrieval_service_returns_documents_for_paper_chat():
+    from base.pg.entity import PaperChunk
+    from service.reader import retrieval_service
+    from service.reader.retrieval_service import RetrievalService
+
+    paper_id = uuid4()
+    chunk = PaperChunk(paper_id=paper_id, content="attention weights", chunk_index=3, page_number=2, embedding=[0.0])
+    session = MagicMock()
+    result = MagicMock()
+    result.all.return_value = [SimpleNamespace(PaperChunk=chunk, score=0.03)]
+    session.execute = AsyncMock(return_value=result)
+
+    with patch.object(retrieval_service, "embed_query", AsyncMock(return_value=[0.1] * 1536)):
+        docs = await RetrievalService(session).retrieve_chunks(str(paper_id), "what are attention weights?", top_k=3)
+
+    assert docs[0].page_content == "attention weights"
+    assert docs[0].metadata["chunk_index"] == 3
+    sql = str(session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    assert "lexical AS" in sql and "fused AS" in sql
+    assert "paper_chunks.paper_id = " in sql
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_uses_trigram_matching_and_author_filter():
+    from controller.api.search.schema import SearchFilter
+
+    session = MagicMock()
+    result = MagicMock()
+    result.scalar_one.return_value = 1
+    result.scalars.return_value.all.return_value = [make_paper("Attention Is All You Need")]
+    session.execute = AsyncMock(return_value=result)
+    service = SearchService(session)
+    service._save_search_history = AsyncMock(return_value=uuid4())
+    request = SearchRequest(query="atention 100%", filters=SearchFilter(authors=["Vaswani", " "]))
+
+    response = await service.search_papers(uuid4(), request)
+
+    assert response.total == 1
+    statements = [call.args[0] for call in session.execute.await_args_list]
+    assert "pg_trgm.word_similarity_threshold" in statements[0].compile(dialect=postgresql.dialect()).params.values()
+    compiled = statements[-1].compile(dialect=asyncpg_dialect())
+    sql = str(compiled)
+    assert "<% papers.title" in sql and "<% papers.authors_text" in sql
+    assert "ORDER BY word_similarity(" in sql
+    # LIKE 通配符按字面匹配，空白作者名被忽略
+    assert "%atention 100\\%%" in compiled.params.values()
+    assert "%vaswani%" in compiled.params.values()
+    assert sum(1 for v in compiled.params.values() if v == "vaswani") == 1
+
+
+def test_full_text_columns_and_indexes_are_declared_on_entities():
+    # 生成列与 GIN 索引在模型中声明，autogenerate 不会删除它们
+    for table, column, index in (
+        (Paper.__table__, "search_vector", "ix_papers_search_vector"),
+        (PaperChunk.__table__, "content_tsv", "ix_paper_chunks_content_tsv"),
+    ):
+        assert table.c[column].computed.persisted
+        gin = next(i for i in table.indexes if i.name == index)
+        assert gin.dialect_options["postgresql"]["using"] == "gin"
+        assert [c.name for c in gin.columns] == [column]
+
+
+def test_trigram_columns_and_indexes_are_declared_on_paper():
+    table = Paper.__table__
+    assert table.c.authors_text.computed.persisted
+    for index, column in (("ix_papers_title_trgm", "title"), ("ix_papers_authors_text_trgm", "authors_text")):
+        trgm = next(i for i in table.indexes if i.name == index)
+        assert trgm.dialect_options["postgresql"]["using"] == "gin"
+        assert trgm.dialect_options["postgresql"]["ops"] == {column: "gin_trgm_ops"}
@@ -0,0 +1,162 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from base.config import settings
+from base.pdf_parser.artifact_store import ParseArtifactStore
+from base.pg.service import PaperRepository
+from base.redis.arq_service import INGEST_EMBED_QUEUE, INGEST_PERSIST_QUEUE
+from base.redis.lane_scheduler import LaneScheduler
+from service.papers.paper_service import PaperProcessingService
+from worker.tasks import (
+    EmbedWorkerSettings,
+    ParseWorkerSettings,
+    PersistWorkerSettings,
+    TaskQueue,
+    embed_chunks_task,
+    generate_embeddings_task,
+    parse_pdf_task,
+    persist_chunks_task,
+)
+
+
+@pytest.mark.asyncio
+async def test_artifact_store_round_trip(tmp_path):
+    store = ParseArtifactStore(tmp_path)
+    paper_id = uuid4()
+
+    await store.save_chunks(paper_id, ["a", "b"], {"title": "T", "authors": ["X"]})
+    await store.save_embeddings(paper_id, [[0.5, 1.0, -2.0], [0.0, 0.25, 3.0]])
+
+    chunks, metadata = await store.load_chunks(paper_id)
+    assert chunks == ["a", "b"]
+    assert metadata["title"] == "T"
+    assert await store.load_embeddings(paper_id) == [[0.5, 1.0, -2.0], [0.0, 0.25, 3.0]]
+
+    await store.clear(paper_id)
+    assert await store.load_chunks(paper_id) is None
+    assert await store.load_embeddings(paper_id) is None
+
+
+@pytest.mark.asyncio
+async def test_embed_and_persist_stages_pass_results_through_store(tmp_path):
+    store = ParseArtifactStore(tmp_path)
+    service = PaperProcessingService(artifact_store=store)
+    paper_id = uuid4()
+    await store.save_chunks(paper_id, ["c1", "c2"], {"title": "Paper", "authors": []})
+
+    with patch.object(service, "_generate_embeddings", new=AsyncMock(return_value=[[0.1] * 4, [0.2] * 4])):
+        assert await service.embed_stage(paper_id) is True
+
+    with patch("service.papers.paper_service.async_session_factory"), \
+         patch("service.papers.paper_service.PaperRepository.delete_paper_chunks", new=AsyncMock()) as delete_chunks, \
+         patch.object(service, "_save_chunks", new=AsyncMock()) as save_chunks, \
+         patch.object(service, "_update_paper_after_processing", new=AsyncMock()) as update_paper:
+        assert await service.persist_stage(paper_id) is True
+
+    delete_chunks.assert_awaited_once()
+    saved_chunks, saved_embeddings = save_chunks.await_args.args[1:]
+    assert saved_chunks == ["c1", "c2"]
+    assert saved_embeddings[1] == pytest.approx([0.2] * 4)
+    update_paper.assert_awaited_once()
+    # 入库完成后清理产物
+    assert await store.load_chunks(paper_id) is None
+
+
+@pytest.mark.asyncio
+async def test_persist_stage_fails_without_artifacts(tmp_path):
+    service = PaperProcessingService(artifact_store=ParseArtifactStore(tmp_path))
+    reporter = AsyncMock()
+
+    with patch.object(service, "_update_status", new=AsyncMock()) as update_status:
+        assert await service.persist_stage(uuid4(), reporter=reporter) is False
+
+    update_status.assert_awaited_once()
+    reporter.fail.assert_awaited_once_with("解析产物不存在")
+
+
+@pytest.mark.asyncio
+async def test_stage_tasks_hand_off_to_next_queue():
+    paper_id, job_id, user_id = str(uuid4()), str(uuid4()), str(uuid4())
+    ctx = {"redis": MagicMock()}
+
+    with patch.object(PaperProcessingService, "parse_stage", new=AsyncMock(return_value=True)), \
+         patch.object(PaperProcessingService, "embed_stage", new=AsyncMock(return_value=True)), \
+         patch.object(PaperProcessingService, "persist_stage", new=AsyncMock(return_value=True)), \
+         patch.object(LaneScheduler, "enqueue", new=AsyncMock(return_value=MagicMock())) as mock_enqueue:
+        await parse_pdf_task(ctx, paper_id, job_id, "backfill", user_id)
+        await embed_chunks_task(ctx, paper_id, job_id, "backfill", user_id)
+        result = await persist_chunks_task(ctx, paper_id, job_id, "backfill", user_id)
+
+    # 后续阶段沿用原任务的通道与用户，保持公平调度
+    calls = mock_enqueue.await_args_list
+    assert calls[0].args == ("embed_chunks_task", paper_id, job_id, "backfill", user_id)
+    assert calls[0].kwargs == {"lane": "backfill", "user_id": user_id, "queue_name": INGEST_EMBED_QUEUE, "redis": ctx["redis"]}
+    assert calls[1].args == ("persist_chunks_task", paper_id, job_id, "backfill", user_id)
+    assert calls[1].kwargs["queue_name"] == INGEST_PERSIST_QUEUE
+    assert result["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_does_not_enqueue_next():
+    ctx = {"redis": MagicMock()}
+
+    with patch.object(PaperProcessingService, "parse_stage", new=AsyncMock(return_value=False)), \
+         patch.object(LaneScheduler, "enqueue", new=AsyncMock()) as mock_enqueue:
+        result = await parse_pdf_task(ctx, str(uuid4()))
+
+    assert result["status"] == "failed"
+    mock_enqueue.assert_not_awaited()
+
+
+def test_stage_workers_have_separate_queues_and_limits():
+    queues = {ParseWorkerSettings.queue_name, EmbedWorkerSettings.queue_name, PersistWorkerSettings.queue_name}
+    assert len(queues) == 3
+    assert ParseWorkerSettings.max_jobs < EmbedWorkerSettings.max_jobs
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_task_writes_vectors_by_chunk_id():
+    chunk_ids = [uuid4() for _ in range(5)]
+    contents = {chunk_id: f"text {i}" for i, chunk_id in enumerate(chunk_ids)}
+    batcher = MagicMock()
+    batcher.embed = AsyncMock(side_effect=lambda texts: [[float(len(t)), 1.0] for t in texts])
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+
+    async def get_contents(_, ids):
+        # 最后一个文本块已被删除
+        return [(chunk_id, contents[chunk_id]) for chunk_id in ids if chunk_id != chunk_ids[-1]]
+
+    with patch.object(settings, "embedding_task_window", 2), \
+         patch("worker.tasks.async_session_factory", return_value=session), \
+         patch.object(PaperRepository, "get_chunk_contents", new=AsyncMock(side_effect=get_contents)), \
+         patch.object(PaperRepository, "save_chunk_embeddings", new=AsyncMock()) as mock_save, \
+         patch.object(PaperRepository, "refresh_paper_embeddings", new=AsyncMock()) as mock_refresh:
+        result = await generate_embeddings_task(
+            {"embedding_batcher": batcher}, [str(chunk_id) for chunk_id in chunk_ids], "bge-m3"
+        )
+
+    # 只返回条数，不回传向量
+    assert result == {"status": "success", "requested": 5, "embedded": 4, "missing": 1}
+    assert mock_save.await_count == 2
+    assert {call.args[1] for call in mock_save.await_args_list} == {"bge-m3"}
+    rows = [row for call in mock_save.await_args_list for row in call.args[2]]
+    assert [chunk_id for chunk_id, _ in rows] == chunk_ids[:4]
+    assert rows[0] == (chunk_ids[0], [6.0, 1.0])
+    # 写回的文本块所属论文的论文向量随之重算
+    assert [chunk_id for call in mock_refresh.await_args_list for chunk_id in call.args[2]] == chunk_ids[:4]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_generate_embeddings_sends_only_chunk_ids():
+    chunk_ids = [uuid4(), uuid4()]
+    with patch.object(LaneScheduler, "enqueue", new=AsyncMock(return_value=MagicMock(job_id="j1"))) as mock_enqueue:
+        job_id = await TaskQueue().enqueue_generate_embeddings(chunk_ids)
+
+    assert job_id == "j1"
+    call = mock_enqueue.await_args
+    assert call.args == ("generate_embeddings_task", [str(c) for c in chunk_ids], None)
+    assert call.kwargs["queue_name"] == INGEST_EMBED_QUEUE
+    assert call.kwargs["lane"] == "reembed"
@@ -0,0 +1,139 @@
+import os
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import httpx
+from arq.worker import Retry
+
+from base.config import settings
+from base.pdf_parser.artifact_store import ParseArtifactStore
+from service.papers.cleanup_service import CleanupService
+from service.papers.paper_service import PaperProcessingService
+from worker.retry import PermanentTaskError, backoff_delay, is_retryable
+from worker.tasks import parse_pdf_task, run_job_task
+
+
+def test_error_classification():
+    assert is_retryable(ConnectionError("redis down"))
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert is_retryable(RuntimeError("所有嵌入模型均不可用"))
+    assert not is_retryable(PermanentTaskError("bad pdf"))
+    assert not is_retryable(FileNotFoundError("missing"))
+    assert not is_retryable(ValueError("bad input"))
+
+
+def test_backoff_is_jittered_exponential_and_capped():
+    for job_try in range(1, 12):
+        ceiling = min(settings.task_retry_max_delay, settings.task_retry_base_delay * 2 ** (job_try - 1))
+        delays = [backoff_delay(job_try) for _ in range(50)]
+        assert all(0 <= d <= ceiling for d in delays)
+    # 全抖动: 同一次数的等待时间分散
+    assert len({round(backoff_delay(5), 3) for _ in range(20)}) > 1
+
+
+@pytest.mark.asyncio
+async def test_embed_stage_raises_retryable_error_only_when_retry_allowed(tmp_path):
+    store = ParseArtifactStore(root=tmp_path)
+    paper_id = uuid4()
+    await store.save_chunks(paper_id, ["a", "b"], {})
+    service = PaperProcessingService(artifact_store=store)
+
+    with patch.object(service, "_generate_embeddings", new=AsyncMock(side_effect=ConnectionError("timeout"))), \
+         patch.object(service, "_update_status", new=AsyncMock()) as update_status:
+        with pytest.raises(ConnectionError):
+            await service.embed_stage(paper_id, retry_on=is_retryable)
+        update_status.assert_not_awaited()
+
+        # 最后一次执行: 标记失败
+        assert await service.embed_stage(paper_id) is False
+        update_status.assert_awaited_once()
+        assert "timeout" in service.last_error
+
+
+@pytest.mark.asyncio
+async def test_stage_task_retries_with_backoff():
+    ctx = {"redis": MagicMock(), "job_try": 1, "job_id": "j1"}
+    with patch.object(PaperProcessingService, "parse_stage", new=AsyncMock(side_effect=ConnectionError("db"))):
+        with pytest.raises(Retry) as exc_info:
+            await parse_pdf_task(ctx, str(uuid4()))
+    assert exc_info.value.defer_score <= settings.task_retry_base_delay * 1000
+
+
+@pytest.mark.asyncio
+async def test_poison_pdf_goes_to_dead_letter():
+    paper_id = str(uuid4())
+    ctx = {"redis": MagicMock(), "job_try": settings.task_max_tries, "job_id": "j1"}
+
+    async def fail_parse(self, *args, **kwargs):
+        self.last_error = "PDF解析失败"
+        return False
+
+    with patch.object(PaperProcessingService, "parse_stage", new=fail_parse), \
+         patch("worker.tasks.DeadLetterStore.add", new=AsyncMock()) as add, \
+         patch("worker.tasks.LaneScheduler.enqueue", new=AsyncMock()) as enqueue:
+        result = await parse_pdf_task(ctx, paper_id, None, "user", None)
+
+    assert result["status"] == "failed"
+    enqueue.assert_not_awaited()
+    add.assert_awaited_once()
+    assert add.await_args.args[:3] == ("parse_pdf_task", (paper_id, None, "user", None), "PDF解析失败")
+    assert add.await_args.kwargs["job_try"] == settings.task_max_tries
+
+
+@pytest.mark.asyncio
+async def test_run_job_task_retries_transient_handler_errors():
+    job = MagicMock(id=uuid4(), job_type="summary", status="queued")
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = AsyncMock()
+    ctx = {"redis": MagicMock(), "job_try": 1, "job_id": "j1"}
+
+    with patch("worker.tasks.async_session_factory", new=session_factory), \
+         patch("worker.tasks.JobRepository.get_job_by_id", new=AsyncMock(return_value=job)), \
+         patch("worker.tasks.JobProgressReporter") as reporter_cls, \
+         patch.dict("worker.tasks._JOB_HANDLERS", {"summary": AsyncMock(side_effect=httpx.ReadTimeout("llm"))}):
+        reporter_cls.return_value = AsyncMock()
+        with pytest.raises(Retry):
+            await run_job_task(ctx, str(job.id))
+        reporter_cls.return_value.fail.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_removes_only_old_unreferenced_files(tmp_path):
+    old = time.time() - (settings.cleanup_orphan_grace_hours + 1) * 3600
+    orphan = tmp_path / "papers" / "u1" / "f1" / "orphan.pdf"
+    kept = tmp_path / "papers" / "u1" / "f2" / "kept.pdf"
+    fresh = tmp_path / "papers" / "u1" / "f3" / "fresh.pdf"
+    for path in (orphan, kept, fresh):
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"%PDF")
+    os.utime(orphan, (old, old))
+    os.utime(kept, (old, old))
+
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = AsyncMock()
+    with patch("service.papers.cleanup_service.async_session_factory", new=session_factory), \
+         patch("service.papers.cleanup_service.PaperRepository.get_existing_file_keys",
+               new=AsyncMock(return_value={"papers/u1/f2/kept.pdf"})):
+        deleted = await CleanupService(upload_dir=tmp_path).purge_orphan_files()
+
+    assert deleted == 1
+    assert not orphan.exists() and not orphan.parent.exists()
+    assert kept.exists() and fresh.exists()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_deletes_expired_jobs_in_bounded_batches():
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = AsyncMock()
+    batch = settings.cleanup_batch_size
+    delete_jobs = AsyncMock(side_effect=[batch, batch, 3])
+
+    with patch("service.papers.cleanup_service.async_session_factory", new=session_factory), \
+         patch("service.papers.cleanup_service.JobRepository.delete_finished_jobs", new=delete_jobs):
+        deleted = await CleanupService().purge_expired_jobs()
+
+    assert deleted == batch * 2 + 3
+    assert delete_jobs.await_count == 3
+    assert all(call.args[3] == batch for call in delete_jobs.await_args_list)
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from base.config import settings
+from base.pg.counting import _ExplainJson
+from base.pg.entity import Paper
+from service.search import total_count
+from service.search.total_count import TotalCount, TotalCounter, fingerprint
+
+
+def make_session(*values):
+    """依次返回 values 的 session.execute"""
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=[MagicMock(scalar_one=MagicMock(return_value=v)) for v in values])
+    return session
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = MagicMock(get=AsyncMock(return_value=None), set=AsyncMock())
+    monkeypatch.setattr(total_count, "PaperCountCache", cache)
+    monkeypatch.setattr(settings, "search_count_exact_threshold", 100)
+    return cache
+
+
+def statement():
+    return select(Paper).where(Paper.title == "x").order_by(Paper.created_at.desc())
+
+
+@pytest.mark.asyncio
+async def test_small_result_is_counted_exactly_with_capped_scan(cache):
+    session = make_session(42)
+
+    assert await TotalCounter(session).count(statement(), uuid4(), "k") == TotalCount(42, True)
+
+    sql = str(session.execute.await_args.args[0].compile(dialect=dialect()))
+    assert "LIMIT" in sql and "ORDER BY" not in sql
+    cache.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_large_result_uses_cached_count(cache, monkeypatch):
+    monkeypatch.setattr(settings, "search_count_strategy", "cache")
+    user_id = uuid4()
+    session = make_session(101, 5000)
+
+    # 未命中: 完整计数一次并写入缓存
+    assert await TotalCounter(session).count(statement(), user_id, "k") == TotalCount(5000, True)
+    cache.set.assert_awaited_once_with(user_id, "k", 5000, settings.search_count_cache_ttl)
+
+    cache.get.return_value = 5000
+    session = make_session(101)
+    assert await TotalCounter(session).count(statement(), user_id, "k") == TotalCount(5000, False)
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_large_result_falls_back_to_planner_estimate(cache, monkeypatch):
+    monkeypatch.setattr(settings, "search_count_strategy", "cache")
+    cache.get.side_effect = ConnectionError("redis down")
+    session = make_session(101, [{"Plan": {"Plan Rows": 12345}}])
+
+    assert await TotalCounter(session).count(statement(), uuid4(), "k") == TotalCount(12345, False)
+    assert isinstance(session.execute.await_args.args[0], _ExplainJson)
+
+    monkeypatch.setattr(settings, "search_count_strategy", "estimate")
+    session = make_session(101, '[{"Plan": {"Plan Rows": 3}}]')
+    # 估算值低于已确认的下限时取下限
+    assert await TotalCounter(session).count(statement(), uuid4(), "k") == TotalCount(101, False)
+
+
+def test_explain_keeps_bound_parameters():
+    compiled = _ExplainJson(statement().order_by(None)).compile(dialect=dialect())
+
+    assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "x" in compiled.params.values()
+
+
+def test_fingerprint_is_order_independent():
+    assert fingerprint(query="a", filters={"x": 1, "y": 2}) == fingerprint(filters={"y": 2, "x": 1}, query="a")
+    assert fingerprint(query="a", filters=None) != fingerprint(query="b", filters=None)
+
+
+@pytest.mark.asyncio
+async def test_count_cache_sets_ttl_only_when_hash_is_created():
+    from base.redis.count_cache import PaperCountCache
+
+    pipe = MagicMock(execute=AsyncMock())
+    client = MagicMock()
+    client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    client.pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+    user_id = uuid4()
+
+    await PaperCountCache.set(user_id, "k", 7, 60, client=client)
+
+    pipe.hset.assert_called_once_with(PaperCountCache.key(user_id), "k", 7)
+    # 已存在的哈希不续期，否则持续写入会让旧条件的总数永不过期
+    pipe.expire.assert_called_once_with(PaperCountCache.key(user_id), 60, nx=True)
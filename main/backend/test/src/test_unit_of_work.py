@@ -0,0 +1,209 @@
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import base.pg.service as pg_service
+from base.pg.entity import Collection
+from base.pg.service import UNIT_OF_WORK, CollectionRepository, SessionDep, on_commit, save, savepoint, unit_of_work
+
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+        self.events = []
+        self.nested = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add(self, instance):
+        self.events.append("add")
+
+    async def flush(self):
+        self.events.append("flush")
+
+    async def commit(self):
+        self.events.append("commit")
+
+    async def refresh(self, instance):
+        self.events.append("refresh")
+
+    async def rollback(self):
+        self.events.append("rollback")
+
+    async def close(self):
+        self.events.append("close")
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        self.events.append("savepoint")
+        try:
+            yield
+        except Exception:
+            self.events.append("rollback_savepoint")
+            raise
+
+
+@pytest.mark.asyncio
+async def test_repositories_only_flush_inside_unit_of_work():
+    session = FakeSession()
+    await CollectionRepository.create_collection(session, MagicMock(spec=Collection))
+    assert session.events == ["add", "commit", "refresh"]
+
+    session = FakeSession()
+    session.info[UNIT_OF_WORK] = True
+    await CollectionRepository.create_collection(session, MagicMock(spec=Collection))
+    assert session.events == ["add", "flush"]
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_commits_once_or_rolls_back():
+    sessions = []
+
+    def factory():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    with patch.object(pg_service, "async_session_factory", factory):
+        async with unit_of_work() as session:
+            await save(session)
+            await save(session)
+        assert session.events == ["flush", "flush", "commit"]
+
+        with pytest.raises(RuntimeError):
+            async with unit_of_work() as session:
+                await save(session)
+                raise RuntimeError("boom")
+        assert session.events == ["flush", "rollback"]
+
+
+@pytest.mark.asyncio
+async def test_on_commit_callbacks_run_after_commit_and_are_dropped_on_rollback():
+    sessions = []
+
+    def factory():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    def callback(session, name):
+        async def run():
+            session.events.append(name)
+        return run
+
+    async def failing():
+        raise RuntimeError("redis down")
+
+    with patch.object(pg_service, "async_session_factory", factory):
+        async with unit_of_work() as session:
+            await save(session)
+            await on_commit(session, failing)
+            await on_commit(session, callback(session, "invalidate"))
+            assert session.events == ["flush"]
+        # 回调失败不影响已提交的写入与其余回调
+        assert session.events == ["flush", "commit", "invalidate"]
+
+        with pytest.raises(RuntimeError):
+            async with unit_of_work() as session:
+                await on_commit(session, callback(session, "invalidate"))
+                raise RuntimeError("boom")
+        assert session.events == ["rollback"]
+
+    # 非工作单元会话: 仓储已各自提交，立即执行
+    session = FakeSession()
+    await on_commit(session, callback(session, "invalidate"))
+    assert session.events == ["invalidate"]
+
+
+@pytest.mark.asyncio
+async def test_savepoint_only_undoes_the_failed_part():
+    session = FakeSession()
+    session.info[UNIT_OF_WORK] = True
+    with pytest.raises(ValueError):
+        async with savepoint(session):
+            raise ValueError("duplicate")
+    assert session.events == ["savepoint", "rollback_savepoint"]
+
+    # 非工作单元会话: 仓储已各自提交，回滚当前事务
+    session = FakeSession()
+    with pytest.raises(ValueError):
+        async with savepoint(session):
+            raise ValueError("duplicate")
+    assert session.events == ["rollback"]
+
+
+def test_request_sessions_commit_before_response_and_skip_commit_for_reads():
+    sessions = []
+
+    def factory():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    app = FastAPI()
+
+    def get_session(session: SessionDep):
+        return session
+
+    @app.get("/items")
+    async def read(session=Depends(get_session)):
+        session.events.append("handler")
+        return {}
+
+    @app.post("/items")
+    async def write(session=Depends(get_session)):
+        session.events.append("handler")
+        return {}
+
+    with patch.object(pg_service, "async_session_factory", factory):
+        client = TestClient(app)
+        client.get("/items")
+        client.post("/items")
+
+    read_session, write_session = sessions
+    assert "commit" not in read_session.events
+    assert read_session.info == {}
+    assert write_session.events == ["handler", "commit", "close"]
+    assert write_session.info[UNIT_OF_WORK] is True
+
+
+@pytest.mark.asyncio
+async def test_session_records_writes_for_read_your_writes():
+    from datetime import datetime, timezone
+    from uuid import uuid4
+
+    from sqlalchemy import create_engine, select, update
+    from sqlalchemy.orm import Session
+    from sqlmodel import SQLModel
+
+    from base.pg.entity import Layer
+    from base.pg.service import HAS_WRITES, untracked_writes
+
+    engine = create_engine("sqlite:///")
+    SQLModel.metadata.create_all(engine, tables=[Layer.__table__])
+    now = datetime.now(timezone.utc)
+
+    with Session(engine) as session:
+        session.execute(select(Layer))
+        assert HAS_WRITES not in session.info
+
+        # 不需要粘滞的写入 (检索历史)
+        async with untracked_writes(session):
+            session.add(Layer(paper_id=uuid4(), user_id=uuid4(), name="history", created_at=now, updated_at=now))
+            session.flush()
+        assert HAS_WRITES not in session.info
+
+        session.add(Layer(paper_id=uuid4(), user_id=uuid4(), name="n", created_at=now, updated_at=now))
+        session.flush()
+        assert session.info[HAS_WRITES] is True
+
+    with Session(engine) as session:
+        session.execute(update(Layer).values(name="m"))
+        assert session.info[HAS_WRITES] is True
+        async with untracked_writes(session):
+            pass
+        assert session.info[HAS_WRITES] is True
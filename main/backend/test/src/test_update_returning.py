@@ -0,0 +1,128 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from base.pg.entity import Annotation, Layer, Paper
+from base.pg.service import PaperRepository, ReaderRepository
+from common.model.enums import PaperStatus
+from service.reader.view_service import ViewService
+
+
+def make_session(row=None):
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = row
+    session.execute = AsyncMock(return_value=result)
+    session.commit = AsyncMock()
+    session.refresh = AsyncMock()
+    return session
+
+
+class SyncSession:
+    """以同步 Session 驱动仓储的异步接口 (测试环境无异步 SQLite 驱动)，保留真实的标识映射行为"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.info = session.info
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+    async def commit(self):
+        self.session.commit()
+
+    async def refresh(self, instance):
+        self.session.refresh(instance)
+
+
+def executed_sql(session) -> str:
+    return str(session.execute.await_args.args[0].compile(dialect=dialect()))
+
+
+@pytest.mark.asyncio
+async def test_status_and_metadata_update_is_one_statement():
+    paper = Paper(id=uuid4(), title="t", file_key="k")
+    session = make_session(paper)
+
+    updated = await PaperRepository.update_paper_fields(
+        session, paper.id, status=PaperStatus.COMPLETED, **PaperRepository.metadata_values("Title", [], None)
+    )
+
+    assert updated is paper
+    session.execute.assert_awaited_once()
+    session.commit.assert_awaited_once()
+    session.refresh.assert_not_awaited()
+    sql = executed_sql(session)
+    assert sql.startswith("UPDATE papers SET title=$1::VARCHAR, status=$2")
+    assert "authors" not in sql.split("RETURNING")[0]
+    assert "updated_at=$3" in sql
+    assert "WHERE papers.id = $4::UUID RETURNING papers.id" in sql
+
+
+@pytest.mark.asyncio
+async def test_update_paper_status_returns_none_when_missing():
+    session = make_session(None)
+
+    assert await PaperRepository.update_paper_status(session, uuid4(), PaperStatus.FAILED, "boom") is None
+    assert "error_message=" in executed_sql(session)
+
+
+@pytest.mark.asyncio
+async def test_layer_update_checks_ownership_and_bumps_updated_at():
+    session = make_session(None)
+
+    assert await ReaderRepository.update_layer_fields(session, uuid4(), uuid4(), name="n") is None
+
+    sql = executed_sql(session)
+    assert "updated_at=" in sql
+    assert "WHERE layers.id = $" in sql and "layers.user_id = $" in sql
+
+
+@pytest.mark.asyncio
+async def test_update_annotation_reports_specific_error_only_on_miss():
+    session = MagicMock()
+    service = ViewService(session)
+    view_id, annotation_id, user_id = uuid4(), uuid4(), uuid4()
+    req = MagicMock(type="highlight", rect=[], content="c", color="red")
+
+    with patch("service.reader.view_service.ReaderRepository") as repo:
+        repo.update_annotation_fields = AsyncMock(return_value=Annotation(layer_id=view_id, type="x", rects=[]))
+        repo.get_annotation_by_id = AsyncMock()
+        await service.update_annotation(uuid4(), view_id, annotation_id, req, user_id)
+        repo.get_annotation_by_id.assert_not_awaited()
+
+        repo.update_annotation_fields.return_value = None
+        repo.get_annotation_by_id.return_value = Annotation(layer_id=uuid4(), type="x", rects=[])
+        with pytest.raises(HTTPException) as exc:
+            await service.update_annotation(uuid4(), view_id, annotation_id, req, user_id)
+        assert exc.value.status_code == 400
+
+        repo.get_annotation_by_id.return_value = Annotation(layer_id=view_id, type="x", rects=[])
+        with pytest.raises(HTTPException) as exc:
+            await service.update_annotation(uuid4(), view_id, annotation_id, req, user_id)
+        assert exc.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_update_returns_fresh_values_for_rows_already_in_the_session():
+    engine = create_engine("sqlite:///")
+    SQLModel.metadata.create_all(engine, tables=[Layer.__table__])
+    now = datetime.now(timezone.utc)
+    layer = Layer(paper_id=uuid4(), user_id=uuid4(), name="old", created_at=now, updated_at=now)
+    with Session(engine, expire_on_commit=False) as session:
+        session.add(layer)
+        session.commit()
+        loaded = session.get(Layer, layer.id)
+
+        updated = await ReaderRepository.update_layer_fields(SyncSession(session), layer.id, layer.user_id, name="new", updated_at=now)
+
+        # 行已在标识映射中时返回同一实例，RETURNING 的新值须覆盖旧属性
+        assert updated is loaded
+        assert updated.name == "new"
@@ -0,0 +1,115 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from base.config import Settings, settings
+from base.pg.entity import ChunkEmbedding
+from base.pg.service import PaperRepository
+from base.pg.vector_index import (
+    binary_index_ddl,
+    binary_index_name,
+    is_vector_index_name,
+    embedding_index_ddl,
+    embedding_index_name,
+    model_filter,
+    nearest,
+    paper_embedding_index_name,
+)
+
+
+@pytest.mark.asyncio
+async def test_vector_search_params_are_transaction_local():
+    session = MagicMock()
+    session.execute = AsyncMock()
+
+    await PaperRepository.set_vector_search_params(session, ef_search=100)
+
+    statement = session.execute.await_args.args[0]
+    compiled = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    sql = str(compiled)
+    assert "set_config('hnsw.ef_search', '100', true)" in sql
+    assert f"set_config('ivfflat.probes', '{settings.vector_search_ivfflat_probes}', true)" in sql
+
+    # 超过 pgvector 上限的候选数按上限设置，不让数据库拒绝参数
+    await PaperRepository.set_vector_search_params(session, ef_search=1600)
+    statement = session.execute.await_args.args[0]
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "set_config('hnsw.ef_search', '1000', true)" in sql
+
+
+@pytest.mark.asyncio
+async def test_filtered_vector_search_keeps_scanning_until_k_rows():
+    session = MagicMock()
+    session.execute = AsyncMock()
+
+    # 论文库较小的用户: 全局索引的前 ef_search 个候选大多属于其他用户，过滤后不足 K 条时继续扫描
+    with patch.object(settings, "vector_search_iterative_scan", "strict_order"):
+        await PaperRepository.set_vector_search_params(session, ef_search=100)
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "set_config('hnsw.iterative_scan', 'strict_order', true)" in sql
+    assert f"set_config('hnsw.max_scan_tuples', '{settings.vector_search_max_scan_tuples}', true)" in sql
+    assert "ivfflat.iterative_scan" not in sql
+
+    with patch.object(settings, "vector_search_iterative_scan", "off"):
+        await PaperRepository.set_vector_search_params(session, ef_search=100)
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "iterative_scan" not in sql
+
+
+def test_vector_search_settings_are_validated():
+    with pytest.raises(ValidationError):
+        Settings(vector_search_ef_search=2000)
+    with pytest.raises(ValidationError):
+        Settings(related_papers_fanout=0)
+
+
+def test_halfvec_and_binary_index_expressions():
+    ddl = embedding_index_ddl("bge-m3", storage="halfvec")
+    assert "(embedding::halfvec(1024)) halfvec_cosine_ops" in ddl
+
+    ddl = binary_index_ddl("bge-m3", storage="vector")
+    assert "(binary_quantize(embedding::vector(1024))::bit(1024)) bit_hamming_ops" in ddl
+    assert "WHERE model = 'bge-m3'" in ddl
+
+    names = {binary_index_name(m) for m in settings.embedding_dimensions}
+    assert len(names) == len(settings.embedding_dimensions)
+    assert names.isdisjoint(embedding_index_name(m) for m in settings.embedding_dimensions)
+    assert all(len(name) <= 63 for name in names)
+
+
+def _nearest_sql(k: int):
+    stmt = select(ChunkEmbedding.chunk_id).where(model_filter("bge-m3"))
+    statement = nearest(stmt, "bge-m3", [0.1] * 1024, k)
+    return statement.compile(dialect=postgresql.asyncpg.dialect(), compile_kwargs={"render_postcompile": True})
+
+
+def test_nearest_orders_by_cosine_distance_by_default():
+    with patch.object(settings, "vector_binary_prefilter", False), patch.object(settings, "embedding_storage", "vector"):
+        sql = str(_nearest_sql(10))
+    assert "ORDER BY CAST(chunk_embeddings.embedding AS VECTOR(1024)) <=>" in sql
+    assert "binary_quantize" not in sql
+
+
+def test_nearest_prefilters_by_hamming_and_reranks():
+    with patch.object(settings, "vector_binary_prefilter", True), \
+         patch.object(settings, "vector_binary_oversample", 4), \
+         patch.object(settings, "embedding_storage", "halfvec"):
+        compiled = _nearest_sql(10)
+    sql = str(compiled)
+    # 内层按 Hamming 距离取 K × 4 个候选 (走二值量化索引)，外层按 halfvec 余弦距离重排取 K 个
+    assert "ORDER BY CAST(binary_quantize(CAST(chunk_embeddings.embedding AS HALFVEC(1024))) AS BIT(1024)) <~>" in sql
+    assert "CAST(chunk_embeddings.embedding AS HALFVEC(1024)) <=>" in sql
+    assert ") AS candidates ORDER BY candidates.distance" in sql
+    assert (compiled.params["candidates_index_limit"], compiled.params["candidates_limit"]) == (40, 10)
+
+
+def test_vector_indexes_are_recognised_for_autogenerate():
+    # 按模型创建的向量索引不在实体中声明，autogenerate 按名称忽略
+    for model in settings.embedding_dimensions:
+        for name in (embedding_index_name(model), binary_index_name(model), paper_embedding_index_name(model)):
+            assert is_vector_index_name(name)
+    assert is_vector_index_name("ix_paper_chunks_embedding_ann")
+    assert not is_vector_index_name("ix_chunk_embeddings_model")
+    assert not is_vector_index_name("ix_papers_user_created_id")
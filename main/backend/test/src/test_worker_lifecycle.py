@@ -0,0 +1,143 @@
+import json
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from base.redis.worker_readiness import WorkerReadiness
+from worker import lifecycle
+from arq.worker import get_kwargs
+
+from worker.tasks import EmbedWorkerSettings, ParseWorkerSettings, PersistWorkerSettings, WorkerSettings, create_worker
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        for key in list(self.store):
+            if key.startswith(prefix):
+                yield key
+
+
+@pytest.fixture
+def fake_engine():
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+
+    @asynccontextmanager
+    async def connect():
+        yield conn
+
+    engine = MagicMock()
+    engine.connect = connect
+    engine.dispose = AsyncMock()
+    with patch.object(lifecycle, "engine", engine):
+        yield engine
+
+
+@pytest.fixture(autouse=True)
+def no_active_workers():
+    with patch.object(lifecycle, "_active_workers", 0):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_startup_preloads_components_and_reports_ready(fake_engine):
+    parser, batcher = MagicMock(), MagicMock()
+    batcher.embed = AsyncMock(return_value=[[0.0]])
+    redis = FakeRedis()
+    ctx = {"redis": redis}
+
+    with patch.object(lifecycle, "get_pdf_parser", AsyncMock(return_value=parser)), \
+         patch.object(lifecycle, "warmup_pdf_parser", AsyncMock()) as warmup, \
+         patch.object(lifecycle, "get_embedding_batcher", return_value=batcher), \
+         patch.object(lifecycle, "close_embedding_batcher", AsyncMock()), \
+         patch.object(lifecycle.JobStatusBuffer, "flush", AsyncMock()):
+        await lifecycle.make_startup("arq:test", ("db", "parser", "embedding"))(ctx)
+
+        assert ctx["pdf_parser"] is parser
+        assert ctx["embedding_batcher"] is batcher
+        assert ctx["db_engine"] is fake_engine
+        warmup.assert_awaited_once_with(parser)
+        batcher.embed.assert_awaited_once()
+
+        workers = await WorkerReadiness.list_workers("arq:test", client=redis)
+        assert len(workers) == 1
+        assert workers[0]["ready"] is True
+        assert set(workers[0]["preload_seconds"]) == {"db", "parser", "embedding"}
+
+        await lifecycle.make_shutdown("arq:test")(ctx)
+
+    assert redis.store == {}
+    fake_engine.dispose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_shared_resources_released_once_after_last_worker_in_process(fake_engine):
+    # run_ingest_workers: 同一进程中的多个Worker共用引擎与批处理器
+    queues = ("arq:default", "arq:parse", "arq:embed", "arq:persist")
+    contexts = {queue: {"redis": FakeRedis()} for queue in queues}
+
+    with patch.object(lifecycle, "close_embedding_batcher", AsyncMock()) as close_batcher, \
+         patch.object(lifecycle.JobStatusBuffer, "flush", AsyncMock()) as flush:
+        for queue in queues:
+            await lifecycle.make_startup(queue, ("db",))(contexts[queue])
+
+        for queue in queues[:-1]:
+            await lifecycle.make_shutdown(queue)(contexts[queue])
+        # 先关闭的Worker不释放其他Worker仍在使用的资源
+        fake_engine.dispose.assert_not_awaited()
+        close_batcher.assert_not_awaited()
+
+        await lifecycle.make_shutdown(queues[-1])(contexts[queues[-1]])
+
+    fake_engine.dispose.assert_awaited_once()
+    close_batcher.assert_awaited_once()
+    assert flush.await_count == len(queues)
+
+
+@pytest.mark.asyncio
+async def test_failed_preload_keeps_worker_running_but_not_ready(fake_engine):
+    redis = FakeRedis()
+    ctx = {"redis": redis}
+
+    with patch.object(lifecycle, "get_pdf_parser", AsyncMock(side_effect=RuntimeError("marker missing"))):
+        await lifecycle.make_startup("arq:test", ("db", "parser"))(ctx)
+    ctx["readiness_task"].cancel()
+
+    assert "pdf_parser" not in ctx
+    assert "session_factory" in ctx
+    info = json.loads(next(iter(redis.store.values())))
+    assert info["ready"] is False
+    assert "marker missing" in info["errors"]["parser"]
+
+
+def test_worker_settings_register_startup_hooks():
+    for worker_settings in (WorkerSettings, ParseWorkerSettings, EmbedWorkerSettings):
+        assert callable(worker_settings.on_startup)
+    worker = create_worker(ParseWorkerSettings)
+    assert worker.on_startup is ParseWorkerSettings.on_startup
+
+
+def test_stage_settings_are_complete_for_arq_cli():
+    # arq worker.tasks.XxxWorkerSettings 只读取类自身的 __dict__
+    shared = get_kwargs(WorkerSettings)
+    assert "retry_delay" not in vars(WorkerSettings)
+    for worker_settings in (ParseWorkerSettings, EmbedWorkerSettings, PersistWorkerSettings):
+        kwargs = get_kwargs(worker_settings)
+        assert kwargs.keys() == shared.keys()
+        for name in ("redis_settings", "on_job_start", "job_timeout", "keep_result", "max_tries"):
+            assert kwargs[name] is shared[name]
+        assert kwargs["queue_name"] == worker_settings.queue_name != WorkerSettings.queue_name
+        assert kwargs["on_startup"] is not WorkerSettings.on_startup
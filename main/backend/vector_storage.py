@@ -0,0 +1,89 @@
+"""
+转换向量存储类型 (chunk_embeddings.embedding: vector <-> halfvec)
+
+halfvec 为 fp16，每维 2 字节 (vector 为 4 字节)，表与向量索引约减半，余弦距离的误差对召回影响很小。
+转换时删除各模型的向量索引，改写列类型 (重写整表，期间持有排他锁，需在维护窗口执行)，再按新类型重建索引。
+完成后将 EMBEDDING_STORAGE 改为目标类型并重启服务与Worker (检索表达式须与索引表达式一致)。
+
+用法:
+    python vector_storage.py --to halfvec
+    python vector_storage.py --to halfvec --binary    # 同时重建二值量化索引 (配合 VECTOR_BINARY_PREFILTER)
+    python vector_storage.py --to vector
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# 与 alembic/env.py 一致: 将 src 加入 python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from sqlalchemy import text  # noqa: E402
+
+from base.pg.service import engine  # noqa: E402
+from base.pg.vector_index import (  # noqa: E402
+    binary_index_ddl,
+    binary_index_name,
+    embedding_index_ddl,
+    embedding_index_name,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="转换向量存储类型")
+    parser.add_argument("--to", choices=("vector", "halfvec"), required=True, help="目标存储类型")
+    parser.add_argument("--binary", action="store_true", help="同时重建二值量化索引")
+    return parser.parse_args()
+
+
+async def table_size(conn) -> str:
+    result = await conn.execute(text(
+        "SELECT pg_size_pretty(pg_relation_size('chunk_embeddings')), "
+        "pg_size_pretty(pg_indexes_size('chunk_embeddings'))"
+    ))
+    heap, indexes = result.one()
+    return f"表 {heap}, 索引 {indexes}"
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            current = (await conn.execute(text(
+                "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+                "WHERE attrelid = 'chunk_embeddings'::regclass AND attname = 'embedding'"
+            ))).scalar_one()
+            if current == args.to:
+                print(f"chunk_embeddings.embedding 已是 {args.to}")
+                return 0
+            models = list((await conn.execute(text(
+                "SELECT model FROM chunk_embeddings GROUP BY model "
+                "UNION SELECT model FROM embedding_models"
+            ))).scalars().all())
+            print(f"转换前: {current}, {await table_size(conn)}, 模型: {', '.join(models) or '-'}")
+
+            for model in models:
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {embedding_index_name(model)}"))
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {binary_index_name(model)}"))
+            await conn.execute(text(
+                f"ALTER TABLE chunk_embeddings ALTER COLUMN embedding TYPE {args.to} USING embedding::{args.to}"
+            ))
+            for model in models:
+                await conn.execute(text(embedding_index_ddl(model, storage=args.to)))
+                if args.binary:
+                    await conn.execute(text(binary_index_ddl(model, storage=args.to)))
+            await conn.execute(text("ANALYZE chunk_embeddings"))
+            print(f"转换后: {args.to}, {await table_size(conn)}")
+    finally:
+        await engine.dispose()
+    print(f"请将 EMBEDDING_STORAGE 设为 {args.to} 并重启服务与Worker")
+    return 0
+
+
+def main():
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":
+    main()